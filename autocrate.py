@@ -0,0 +1,14 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AutoCrate command line launcher.
+Runs headless tasks without starting the PyQt GUI, e.g.:
+
+    python autocrate.py batch orders/ --out nx_crate_expressions/batch
+"""
+
+import sys
+from wizard_app.cli import main
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -41,13 +41,11 @@ try:
     
     # Import logical components
     from wizard_app import config
-    from wizard_app import skid_logic
-    from wizard_app import floorboard_logic
-    from wizard_app import wall_logic
-    from wizard_app import cap_logic
-    from wizard_app import decal_logic
-    from wizard_app import exp_generator
+    from wizard_app import pipeline
+    from wizard_app import instrumentation
+    from wizard_app import schema
     
+    instrumentation.enable() # Per-stage timings for the status bar and logs/metrics_*
     logger.info("All modules imported successfully")
 except Exception as e:
     logger.critical(f"Error importing modules: {str(e)}")
@@ -105,13 +103,13 @@ class AutoCrateDebugApp(QMainWindow):
                 return
                 
             with open(file_path, 'r') as f:
-                params = json.load(f)
+                params = schema.to_canonical(json.load(f)) # parameters.json, GUI or nested examples layout
                 
             # Load parameters into UI fields
             self.ui.productWeightSpinBox.setValue(params.get('product_weight', 500.0))
             self.ui.productWidthSpinBox.setValue(params.get('product_width', 36.0))
             self.ui.productLengthSpinBox.setValue(params.get('product_length', 48.0))
-            self.ui.productHeightSpinBox.setValue(params.get('product_height', 36.0))
+            self.ui.productHeightSpinBox.setValue(params.get('product_actual_height', 36.0))
             
             self.ui.clearanceSideSpinBox.setValue(params.get('clearance_side', 1.0))
             self.ui.clearanceTopSpinBox.setValue(params.get('clearance_above_product', 2.0))
@@ -222,85 +220,21 @@ class AutoCrateDebugApp(QMainWindow):
         try:
             self.statusBar().showMessage("Running calculations...", 2000)
             
-            # Calculate shipping base components
-            logger.info("Calculating skid layout")
-            self.skid_results = skid_logic.calculate_skid_layout(
-                product_weight=params['product_weight'], product_width=params['product_width'],
-                product_length=params['product_length'], clearance_side=params['clearance_side'],
-                panel_thickness=params['panel_thickness'], cleat_thickness=params['cleat_thickness'],
-                allow_3x4_skids_for_light_loads=params['allow_3x4_skids']
-            )
-            skid_results = self.skid_results  # Local variable for clarity
-            
-            logger.debug(f"Skid results: {json.dumps(skid_results, indent=2, default=str)}")
-            
-            target_span_y_floor = params['product_width'] + 2 * params['clearance_side']
-            board_len_x_floor = skid_results.get('skid_actual_length', params['product_length'])
-            
-            logger.info("Calculating floorboard layout")
-            floor_results = floorboard_logic.calculate_floorboard_layout_refined(
-                target_span_to_fill_y=target_span_y_floor,
-                board_length_x=board_len_x_floor, 
-                chosen_standard_floorboard_nominal_key=params['chosen_standard_floorboard_nominal'],
-                allow_custom_fill=params['allow_custom_floorboard_fill'],
-                floorboard_actual_thickness_z=params['floor_lumbar_thickness']
-            )
+            logger.info("Running crate design pipeline")
+            design = pipeline.design_crate(params, app_version=config.VERSION)
+            self.skid_results = design.skid
+            floor_results = design.floorboard
+            wall_results = design.wall
+            cap_results = design.cap
+            decal_results = design.decal
             
+            logger.debug(f"Skid results: {json.dumps(self.skid_results, indent=2, default=str)}")
             logger.debug(f"Floorboard results: {json.dumps(floor_results, indent=2, default=str)}")
-
-            # Calculate crate cap components
-            crate_internal_h_for_walls = params['product_actual_height'] + params['clearance_above_product']
-            
-            logger.info("Calculating wall layout")
-            wall_results = wall_logic.calculate_wall_layout(
-                crate_internal_width=target_span_y_floor,
-                crate_internal_length=board_len_x_floor,
-                crate_internal_height=crate_internal_h_for_walls,
-                panel_thickness=params['panel_thickness'],
-                cleat_thickness=params['cleat_thickness'],
-                cleat_width=params['wall_cleat_width'],
-                wall_construction_type="style_b",
-                end_panel_1_removable=params['end_panel_1_removable'],
-                end_panel_2_removable=params['end_panel_2_removable'],
-                side_panel_1_removable=params['side_panel_1_removable'],
-                side_panel_2_removable=params['side_panel_2_removable']
-            )
-            
             logger.debug(f"Wall results: {json.dumps(wall_results, indent=2, default=str)}")
-            
-            logger.info("Calculating cap layout")
-            cap_results = cap_logic.calculate_cap_layout(
-                crate_overall_width_y=skid_results.get('crate_overall_width_calculated', 0),
-                crate_overall_length_x=skid_results.get('skid_actual_length', 0),
-                cap_panel_sheathing_thickness=params['panel_thickness'],
-                cap_cleat_actual_thickness=params['cleat_thickness'],
-                cap_cleat_actual_width=params['cap_cleat_width'],
-                max_top_cleat_spacing=params['max_top_cleat_spacing'],
-                top_panel_removable=params['top_panel_removable']
-            )
-            
             logger.debug(f"Cap results: {json.dumps(cap_results, indent=2, default=str)}")
-
-            # Calculate decals
-            side_panel_h = wall_results.get('side_panels', {}).get('panel_height_dim', 0)
-            side_panel_w = wall_results.get('side_panels', {}).get('panel_width_dim', 0)
-            end_panel_h = wall_results.get('end_panels', {}).get('panel_height_dim', 0)
-            end_panel_w = wall_results.get('end_panels', {}).get('panel_width_dim', 0)
-            overall_crate_h_for_decals = (skid_results.get('skid_actual_height',0)) + \
-                                     params['floor_lumbar_thickness'] + \
-                                     crate_internal_h_for_walls + \
-                                     (cap_results.get('cap_panel',{}).get('thickness', params['panel_thickness']))
-
-            logger.info("Calculating decal placements")
-            decal_results = decal_logic.calculate_decal_placements(
-                product_is_fragile=params['product_is_fragile'],
-                product_requires_special_handling=params['product_requires_special_handling'],
-                panel_height_side=side_panel_h, panel_width_side=side_panel_w,
-                panel_height_end=end_panel_h, panel_width_end=end_panel_w,
-                overall_crate_height=overall_crate_h_for_decals
-            )
-            
             logger.debug(f"Decal results: {json.dumps(decal_results, indent=2, default=str)}")
+            for error in design.errors:
+                logger.warning(f"Pipeline reported: {error}")
             
             # Update visualization widgets with new data
             logger.info("Updating visualization widgets")
@@ -339,21 +273,14 @@ class AutoCrateDebugApp(QMainWindow):
             # Generate expression file
             logger.info("Generating expression file")
             try:
-                exp_content = exp_generator.generate_nx_exp_file_content(
-                    product_params=params, skid_results=self.skid_results, floorboard_results=floor_results,
-                    wall_results=wall_results, cap_results=cap_results, decal_results=decal_results,
-                    app_version=config.VERSION
-                )
-
-                output_dir = os.path.dirname(self.exp_output_path)
-                if not os.path.exists(output_dir):
-                    os.makedirs(output_dir)
-                
-                with open(self.exp_output_path, 'w') as f:
-                    f.write(exp_content)
+                pipeline.write_exp_file(design, self.exp_output_path)
                 
                 logger.info(f"Expression file generated: {self.exp_output_path}")
-                self.statusBar().showMessage(f"Results calculated and saved to {self.exp_output_path}", 5000)
+                timings = instrumentation.format_last_run()
+                logger.info(f"Stage timings: {timings}")
+                instrumentation.write_json(os.path.join(log_dir, "metrics_latest.json"))
+                instrumentation.write_prometheus(os.path.join(log_dir, "metrics_latest.prom"))
+                self.statusBar().showMessage(f"Saved to {self.exp_output_path} | {timings}", 10000)
             except Exception as e:
                 logger.error(f"Error generating expression file: {str(e)}")
                 logger.error(traceback.format_exc())
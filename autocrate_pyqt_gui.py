@@ -1,27 +1,28 @@
 import sys
 import os
-import json # For results display if needed
-import datetime
+import time
+_PROCESS_START = time.perf_counter() # Start of the startup-phase breakdown
+
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                              QGridLayout, QLabel, QLineEdit, QPushButton, QComboBox, 
                              QCheckBox, QGroupBox, QScrollArea, QStatusBar, QMessageBox,
                              QFileDialog, QTabWidget, QTableWidget, QTableWidgetItem, QHeaderView)
 from PyQt6.QtGui import QDoubleValidator, QIntValidator, QFont, QPalette, QColor
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
 
 # Make sure wizard_app is in the Python path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'wizard_app'))
 
 try:
     from wizard_app import config
-    from wizard_app import skid_logic
-    from wizard_app import floorboard_logic
-    from wizard_app import cap_logic
-    from wizard_app import wall_logic
-    from wizard_app import decal_logic
-    from wizard_app import exp_generator
-    from wizard_app.ui_modules import CrateVisualizationManager, SkidVisualizationWidget, FloorboardVisualizationWidget, WallVisualizationWidget, CapVisualizationWidget
+    from wizard_app import pipeline
+    from wizard_app import design_cache
+    from wizard_app import instrumentation
+    from wizard_app import layouts
+    from wizard_app import rules
+    from wizard_app import schema
     from wizard_app.ui_modules.base_assembly_views import FloorboardTopView, SkidFrontView
+    from wizard_app.ui_modules.calculation_worker import CalculationRunner
 except ImportError as e:
     print(f"Critical Import Error: {e}. Ensure wizard_app modules are accessible.")
     # In a real app, you might show a QMessageBox and exit.
@@ -29,6 +30,29 @@ except ImportError as e:
     # sys.exit(1)
     raise
 
+STARTUP_TIMING_ENV = "AUTOCRATE_STARTUP_TIMING" # Set to 1 to print the startup breakdown to stderr
+startup_timer = instrumentation.PhaseTimer("startup", start=_PROCESS_START)
+startup_timer.mark("imports")
+
+class LazyTab(QWidget):
+    """Tab page placeholder that builds its real content the first time it is shown."""
+    def __init__(self, factory):
+        super().__init__()
+        self._factory = factory
+        self.content = None
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+    def ensure_built(self):
+        if self.content is None:
+            self.content = self._factory()
+            self.layout().addWidget(self.content)
+        return self.content
+
+    def showEvent(self, event):
+        self.ensure_built()
+        super().showEvent(event)
+
 class SubassemblyTab(QWidget):
     def __init__(self, title, top_view_widget, side_view_widget, logic_text):
         super().__init__()
@@ -41,62 +65,80 @@ class SubassemblyTab(QWidget):
         views_layout.addWidget(top_view_widget)
         views_layout.addWidget(side_view_widget)
         layout.addLayout(views_layout)
-        # Logic dropdown
-        logic_group = QGroupBox("Logic Used")
-        logic_group.setCheckable(True)
-        logic_group.setChecked(False)
-        logic_layout = QVBoxLayout()
-        logic_label = QLabel(logic_text)
-        logic_label.setWordWrap(True)
-        logic_layout.addWidget(logic_label)
-        logic_group.setLayout(logic_layout)
-        layout.addWidget(logic_group)
+        # Logic dropdown; the explanation text is built when it is first expanded
+        self.logic_text = logic_text
+        self.logic_label = None
+        self.logic_group = QGroupBox("Logic Used")
+        self.logic_group.setCheckable(True)
+        self.logic_group.setChecked(False)
+        self.logic_group.setLayout(QVBoxLayout())
+        self.logic_group.toggled.connect(self.show_logic)
+        layout.addWidget(self.logic_group)
+
+    def show_logic(self, checked):
+        if checked and self.logic_label is None:
+            self.logic_label = QLabel(self.logic_text() if callable(self.logic_text) else self.logic_text)
+            self.logic_label.setWordWrap(True)
+            self.logic_group.layout().addWidget(self.logic_label)
 
 class AutoCrateApp(QMainWindow):
     EXP_FILENAME = "AutoCrate_Expressions.exp"
-    MAX_PRODUCT_DIM_CONST = 999.0 
-
-    parameter_definitions = [
-        ("Product Weight (lbs):", 'product_weight', 600.0, "float", 1, 1.0, 20000.0, "Total weight of the product. (Example: 600 lbs)"),
-        ("Product Width (in):", 'product_width', 38.0, "float", 2, 1.0, MAX_PRODUCT_DIM_CONST, f"Inside dimension across skids - Y direction (Example: 38.00\")"),
-        ("Product Length (in):", 'product_length', 46.0, "float", 2, 1.0, MAX_PRODUCT_DIM_CONST, f"Inside dimension along skids - X direction (Example: 46.00\")"),
-        ("Product Height (in):", 'product_actual_height', 91.5, "float", 2, 1.0, MAX_PRODUCT_DIM_CONST, f"Inside height of the product (Example: 91.50\")"),
-        
-        ("Side Clearance (in):", 'clearance_side', 1.0, "float", 2, 0.0, 20.0, "Clearance from product to inner wall surfaces (width and length)."),
-        ("Top Clearance (in):", 'clearance_above_product', config.DEFAULT_CLEARANCE_ABOVE_PRODUCT, "float", 2, 0.0, 20.0, "Clearance above product top to cap panel underside."),
-        
-        ("Panel Thickness (in):", 'panel_thickness', 0.25, "float", 3, 0.25, 1.5, "Thickness for wall and cap plywood/sheathing (typically 0.25\")."),
-        ("Cleat Thickness (in):", 'cleat_thickness', 0.75, "float", 3, 0.5, 3.0, "Actual thickness for ALL cleats. Ensure size is appropriate for panel area."),
-        
-        ("Wall Cleat Width (in):", 'wall_cleat_width', 3.5, "float", 2, 1.0, 11.25, "Actual width of wall cleats. (Example: Use 3.5\" for standard)"),
-        ("Floorboard Thickness (in):", 'floor_lumbar_thickness', 1.5, "float", 3, 0.5, 3.0, "Actual thickness of floorboards (typically 1.5\")."),
-        
-        ("Cap Cleat Width (in):", 'cap_cleat_width', 3.5, "float", 2, 1.0, 11.25, "Actual width of cap cleats. (Example: Use 3.5\" for 2x4 nominal lumber)"),
-        ("Max Cleat Spacing (C-C, in):", 'max_top_cleat_spacing', 24.0, "float", 2, 6.0, 60.0, "Maximum center-to-center spacing for cap cleats (typically 24\")."),
-        
-        ("Allow 3x4 Skids (Light Loads):", 'allow_3x4_skids', True, "bool", 0, None, None, "If checked, 3x4 skids can be used for lighter loads per rules."),
-        ("Std Floorboard Size:", 'chosen_standard_floorboard_nominal', "2x8", "choice", 0, config.ALL_LUMBER_OPTIONS_UI, None, "Standard floorboard nominal size to prioritize (typically 2x8)."),
-        ("Allow Custom Fill Floorboard:", 'allow_custom_floorboard_fill', True, "bool", 0, None, None, "Allow a custom-width floorboard to fill remaining small gaps."),
-        ("Product is Fragile:", 'product_is_fragile', False, "bool", 0, None, None, "Check if product is fragile (for decal selection)."),
-        ("Special Handling Required:", 'product_requires_special_handling', False, "bool", 0, None, None, "Check if special handling decals (e.g., This Way Up) are needed."),
-        ("Front Panel Removable:", 'end_panel_1_removable', False, "bool", 0, None, None, "Make Front Panel (End Panel 1) removable."),
-        ("Back Panel Removable:", 'end_panel_2_removable', False, "bool", 0, None, None, "Make Back Panel (End Panel 2) removable."),
-        ("Left Side Panel Removable:", 'side_panel_1_removable', True, "bool", 0, None, None, "Make Left Side Panel (Side Panel 1) removable (Style B default)."),
-        ("Right Side Panel Removable:", 'side_panel_2_removable', False, "bool", 0, None, None, "Make Right Side Panel (Side Panel 2) removable."),
-        ("Top Panel Removable:", 'top_panel_removable', False, "bool", 0, None, None, "Make the Top Panel removable.")
+    PREVIEW_DEBOUNCE_MS = 300 # Live preview waits this long after the last edit
+    rules_reloaded = pyqtSignal(object) # rules.RuleSet, emitted from the rule watcher thread
+    rules_rejected = pyqtSignal(str) # Validation error of a rejected rule file
+    MAX_PRODUCT_DIM_CONST = schema.MAX_PRODUCT_DIMENSION
+
+    # (tab title, first view placeholder, second view placeholder, logic text) for the placeholder subassembly tabs
+    SUBASSEMBLY_TABS = [
+        ("Front Panel", "Front View: Front Panel", "Side View: Front Panel", "Logic for front panel: ..."),
+        ("Left Side Panel", "Front View: Left Side Panel", "Side View: Left Side Panel", "Logic for left side panel: ..."),
+        ("Right Side Panel", "Front View: Right Side Panel", "Side View: Right Side Panel", "Logic for right side panel: ..."),
+        ("Back Panel", "Front View: Back Panel", "Side View: Back Panel", "Logic for back panel: ..."),
+        ("Top Panel", "Top View: Top Panel", "Side View: Top Panel", "Logic for top panel: ..."),
+        ("Markings", "Markings View 1", "Markings View 2", "Logic for markings: ..."),
+        ("Klimp Positions", "Klimp Positions View 1", "Klimp Positions View 2", "Logic for Klimp positions: ..."),
     ]
 
+    parameter_definitions = schema.PARAMETERS # (label, key, default, type, decimals, min, max, tooltip) per input
+
     def __init__(self):
         super().__init__()
+        # The first window continues the module's import-time breakdown
+        self.startup_timer = startup_timer if "window_init" not in startup_timer.phases else instrumentation.PhaseTimer("startup")
+        self.startup_timings = self.startup_timer.phases
+        self._startup_reported = False
         self.setWindowTitle(f"AutoCrate Wizard V{config.VERSION}")
         self.setMinimumSize(1200, 800)
         self.exp_output_path = ""
         self.input_widgets = {} # Initialize here, before set_default_exp_output_path or initUI
         self.results_labels = {}
         self.visualization_manager = None
+        self.skid_view = None # Created with the Base Assembly tab on first view
+        self.floorboard_view = None
+        self.last_design = None
+        self.designer = pipeline.IncrementalPipeline(app_version=config.VERSION) # Reruns only stages whose inputs changed
+        self.calc_runner = CalculationRunner(self, designer=self.designer) # Keeps calculations off the GUI thread
+        self.calc_runner.finished.connect(self.on_design_ready)
+        self.calc_runner.exp_written.connect(self.on_exp_written)
+        self.calc_runner.exp_unchanged.connect(self.on_exp_unchanged)
+        self.calc_runner.delta_written.connect(self.on_delta_written)
+        self.calc_runner.catalog_failed.connect(self.on_catalog_failed)
+        self.calc_runner.failed.connect(self.on_calculation_failed)
+        self.preview_timer = QTimer(self) # Debounces live-preview recalculations while typing
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.setInterval(self.PREVIEW_DEBOUNCE_MS)
+        self.preview_timer.timeout.connect(self.run_live_preview)
+        self.rules_reloaded.connect(self.on_rules_reloaded)
+        self.rules_rejected.connect(self.on_rules_rejected)
+        self.rules_watcher = rules.watch_default_rules(on_reload=self.rules_reloaded.emit,
+                                                       on_error=self.rules_rejected.emit) # None without AUTOCRATE_RULES
         self.set_default_exp_output_path()
+        self.startup_timer.mark("window_init")
         self.initUI()
-        self.statusBar().showMessage("Ready")
+        if rules.load_error():
+            self.statusBar().showMessage(f"Warning: {rules.load_error()}")
+        else:
+            self.statusBar().showMessage("Ready")
 
     def set_default_exp_output_path(self):
         # Default to a subdirectory in the application's directory
@@ -202,6 +244,12 @@ class AutoCrateApp(QMainWindow):
                 if widget_instance:
                     widget_instance.setToolTip(p_tooltip if p_tooltip else p_label)
                     self.input_widgets[p_key] = widget_instance
+                    if isinstance(widget_instance, QLineEdit):
+                        widget_instance.textEdited.connect(self.schedule_live_preview)
+                    elif isinstance(widget_instance, QCheckBox):
+                        widget_instance.toggled.connect(self.schedule_live_preview)
+                    elif isinstance(widget_instance, QComboBox):
+                        widget_instance.currentTextChanged.connect(self.schedule_live_preview)
                     group_layout.addWidget(label_widget, row_idx, 0)
                     group_layout.addWidget(widget_instance, row_idx, 1)
                 row_idx += 1
@@ -214,6 +262,7 @@ class AutoCrateApp(QMainWindow):
         
         # Add the grid to the left panel
         left_layout.addLayout(input_grid)
+        self.startup_timer.mark("input_form")
         
         # Add output path selection in a more compact way
         output_frame = QGroupBox("Expression File")
@@ -229,6 +278,18 @@ class AutoCrateApp(QMainWindow):
         output_frame.setLayout(output_layout)
         left_layout.addWidget(output_frame)
         
+        # Live preview toggle: recalculates on every edit without writing the .exp file
+        self.live_preview_checkbox = QCheckBox("Live preview (recalculate on edit)")
+        self.live_preview_checkbox.setToolTip("Update results and views as you type. The .exp file is only written by the Generate button.")
+        self.live_preview_checkbox.toggled.connect(self.schedule_live_preview)
+        left_layout.addWidget(self.live_preview_checkbox)
+
+        # Delta toggle: also write <name>.delta.exp holding only the expressions that changed
+        self.delta_exp_checkbox = QCheckBox("Write delta .exp (changed expressions only)")
+        self.delta_exp_checkbox.setToolTip("Compare with the previously written .exp and write a .delta.exp for a faster NX update. "
+                                           "An unchanged design leaves the .exp file untouched.")
+        left_layout.addWidget(self.delta_exp_checkbox)
+
         # Generate button
         generate_button = QPushButton("Generate & Update .exp File")
         generate_button.clicked.connect(self.run_calculations_and_generate_exp)
@@ -298,60 +359,11 @@ class AutoCrateApp(QMainWindow):
             self.results_labels[key] = row
         
         results_layout.addWidget(self.results_table)
-        
-        # Visualization Tab
-        visualization_tabs = QTabWidget()
-        # Create specialized visualization widgets for base assembly
-        floorboard_top_view = FloorboardTopView()
-        skid_front_view = SkidFrontView()
-        
-        # Store references to these views for later data updates
-        self.floorboard_view = floorboard_top_view
-        self.skid_view = skid_front_view
-        
-        # Create tab with the specialized views
-        visualization_tabs.addTab(SubassemblyTab("Base Assembly",
-            floorboard_top_view,
-            skid_front_view,
-            "Base assembly includes floorboards arranged across skids. Skid spacing follows the max 24 inch rule, and floorboards are selected based on standard lumber dimensions."
-        ), "Base Assembly")
-        visualization_tabs.addTab(SubassemblyTab("Front Panel",
-            QLabel("Front View: Front Panel"),
-            QLabel("Side View: Front Panel"),
-            "Logic for front panel: ..."
-        ), "Front Panel")
-        visualization_tabs.addTab(SubassemblyTab("Left Side Panel",
-            QLabel("Front View: Left Side Panel"),
-            QLabel("Side View: Left Side Panel"),
-            "Logic for left side panel: ..."
-        ), "Left Side Panel")
-        visualization_tabs.addTab(SubassemblyTab("Right Side Panel",
-            QLabel("Front View: Right Side Panel"),
-            QLabel("Side View: Right Side Panel"),
-            "Logic for right side panel: ..."
-        ), "Right Side Panel")
-        visualization_tabs.addTab(SubassemblyTab("Back Panel",
-            QLabel("Front View: Back Panel"),
-            QLabel("Side View: Back Panel"),
-            "Logic for back panel: ..."
-        ), "Back Panel")
-        visualization_tabs.addTab(SubassemblyTab("Top Panel",
-            QLabel("Top View: Top Panel"),
-            QLabel("Side View: Top Panel"),
-            "Logic for top panel: ..."
-        ), "Top Panel")
-        visualization_tabs.addTab(SubassemblyTab("Markings",
-            QLabel("Markings View 1"),
-            QLabel("Markings View 2"),
-            "Logic for markings: ..."
-        ), "Markings")
-        visualization_tabs.addTab(SubassemblyTab("Klimp Positions",
-            QLabel("Klimp Positions View 1"),
-            QLabel("Klimp Positions View 2"),
-            "Logic for Klimp positions: ..."
-        ), "Klimp Positions")
-        # Replace the old visualization tab with this:
-        tabs.addTab(visualization_tabs, "Crate Visualizations")
+        tabs.addTab(results_tab, "Results")
+        self.startup_timer.mark("results_tab")
+
+        # Visualization tabs are built the first time they are shown
+        tabs.addTab(LazyTab(self.build_visualization_tabs), "Crate Visualizations")
         
         right_layout.addWidget(tabs)
         content_layout.addWidget(right_panel, 2)  # Give right panel more space
@@ -362,6 +374,39 @@ class AutoCrateApp(QMainWindow):
         
         # Apply styling
         self.set_app_style()
+        self.startup_timer.mark("styling")
+
+    def build_visualization_tabs(self):
+        visualization_tabs = QTabWidget()
+        visualization_tabs.addTab(LazyTab(self.build_base_assembly_tab), "Base Assembly")
+        for title, first_view, second_view, logic_text in self.SUBASSEMBLY_TABS:
+            visualization_tabs.addTab(LazyTab(lambda t=title, a=first_view, b=second_view, l=logic_text:
+                                              SubassemblyTab(t, QLabel(a), QLabel(b), l)), title)
+        return visualization_tabs
+
+    def build_base_assembly_tab(self):
+        # Specialized visualization widgets for the base assembly; kept for later data updates
+        self.floorboard_view = FloorboardTopView()
+        self.skid_view = SkidFrontView()
+        if self.last_design is not None: # Show results calculated before the tab was opened
+            self.skid_view.set_data(self.last_design.skid)
+            self.floorboard_view.set_data(self.last_design.floorboard, skid_data=self.last_design.skid)
+        return SubassemblyTab("Base Assembly",
+            self.floorboard_view,
+            self.skid_view,
+            "Base assembly includes floorboards arranged across skids. Skid spacing follows the max 24 inch rule, and floorboards are selected based on standard lumber dimensions."
+        )
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if not self._startup_reported:
+            self._startup_reported = True
+            QTimer.singleShot(0, self.report_startup) # Runs once the first frame has been processed
+
+    def report_startup(self):
+        self.startup_timer.mark("first_show")
+        if os.environ.get(STARTUP_TIMING_ENV, "").strip().lower() in pipeline.TRUE_STRINGS:
+            print(f"Startup {self.startup_timer.total():.3f} s: {self.startup_timer.format()}", file=sys.stderr)
 
     def set_app_style(self):
         # Minimal, professional table style
@@ -420,7 +465,8 @@ class AutoCrateApp(QMainWindow):
             self.output_path_label.setText(self.exp_output_path)
             self.statusBar().showMessage(f"Output path set to: {self.exp_output_path}", 3000)
 
-    def collect_parameters(self):
+    def collect_parameters(self, quiet=False):
+        """Reads the input widgets. Returns None if a value is invalid (quiet=True skips the warning dialogs)."""
         params = {}
         validation_passed = True
         for p_label, p_key, p_default, p_type, p_dec, p_min, p_max, p_tooltip in self.parameter_definitions:
@@ -432,18 +478,20 @@ class AutoCrateApp(QMainWindow):
                 if widget.validator():
                     state, _, _ = widget.validator().validate(text_value, 0)
                     if state != QDoubleValidator.State.Acceptable and state != QIntValidator.State.Acceptable:
+                        validation_passed = False
+                        if quiet: break
                         QMessageBox.warning(self, "Input Error", f"Invalid value for '{p_label}': '{text_value}'")
                         widget.setFocus()
-                        validation_passed = False
                         break
                 try:
                     if p_type == "float": params[p_key] = float(text_value)
                     elif p_type == "int": params[p_key] = int(text_value)
                 except ValueError:
+                    validation_passed = False
+                    if quiet: break
                     QMessageBox.warning(self, "Input Error", f"Could not convert '{text_value}' to a number for '{p_label}'.")
                     params[p_key] = p_default 
                     widget.setFocus()
-                    validation_passed = False
                     break
             elif isinstance(widget, QComboBox):
                 params[p_key] = widget.currentText()
@@ -503,11 +551,11 @@ class AutoCrateApp(QMainWindow):
             update_cell('cap_long_cleats', f"{cl.get('count',0)} @ {cl.get('actual_spacing_centers',0):.3f} in C-C")
             update_cell('cap_trans_cleats', f"{ct.get('count',0)} @ {ct.get('actual_spacing_centers',0):.3f} in C-C")
 
-        if wall_res and isinstance(wall_res.get('side_panels'), dict) and isinstance(wall_res.get('end_panels'), dict):
-            wd_s = wall_res['side_panels']
-            wd_e = wall_res['end_panels']
-            update_cell('side_panel_dims', f"{wd_s.get('panel_width_dim',0):.2f} x {wd_s.get('panel_height_dim',0):.2f} in")
-            update_cell('end_panel_dims', f"{wd_e.get('panel_width_dim',0):.2f} x {wd_e.get('panel_height_dim',0):.2f} in")
+        if wall_res is not None and wall_res.side_panels is not None and wall_res.end_panels is not None: # WallLayout
+            wd_s = wall_res.side_panels
+            wd_e = wall_res.end_panels
+            update_cell('side_panel_dims', f"{wd_s.panel_width_dim or 0:.2f} x {wd_s.panel_height_dim or 0:.2f} in")
+            update_cell('end_panel_dims', f"{wd_e.panel_width_dim or 0:.2f} x {wd_e.panel_height_dim or 0:.2f} in")
         
         # Update the visualizations
         if self.visualization_manager:
@@ -538,128 +586,78 @@ class AutoCrateApp(QMainWindow):
         update_cell('crate_overall_length', f"{crate_overall_l:.2f} in")
         update_cell('crate_overall_height', f"{crate_overall_h:.2f} in")
 
-    def show_success_dialog(self, message):
-        msg = QMessageBox(self)
-        msg.setIcon(QMessageBox.Icon.Information)
-        msg.setWindowTitle("Success")
-        msg.setText(message)
-        msg.setStyleSheet("QLabel{color:#111;font-size:11pt;} QMessageBox{background:#fff;} QPushButton{background:#007bff;color:#fff;font-weight:bold;padding:6px 18px;border-radius:3px;}")
-        msg.exec()
-
     def run_calculations_and_generate_exp(self):
         params = self.collect_parameters()
         if not params:
             self.statusBar().showMessage("Parameter validation failed. Please correct inputs.", 5000)
             return
-
-        try:
-            self.statusBar().showMessage("Running calculations...", 2000)
-            
-            # Calculate shipping base components
-            self.skid_results = skid_logic.calculate_skid_layout(
-                product_weight=params['product_weight'], product_width=params['product_width'],
-                product_length=params['product_length'], clearance_side=params['clearance_side'],
-                panel_thickness=params['panel_thickness'], cleat_thickness=params['cleat_thickness'],
-                allow_3x4_skids_for_light_loads=params['allow_3x4_skids']
-            )
-            skid_results = self.skid_results # Keep local variable for clarity in subsequent calls within this function
-
-            target_span_y_floor = params['product_width'] + 2 * params['clearance_side']
-            board_len_x_floor = skid_results.get('skid_actual_length', params['product_length'])
-
-            floor_results = floorboard_logic.calculate_floorboard_layout_refined(
-                target_span_to_fill_y=target_span_y_floor,
-                board_length_x=board_len_x_floor, 
-                chosen_standard_floorboard_nominal_key=params['chosen_standard_floorboard_nominal'],
-                allow_custom_fill=params['allow_custom_floorboard_fill'],
-                floorboard_actual_thickness_z=params['floor_lumbar_thickness']
-            )
-
-            # Calculate crate cap components
-            crate_internal_h_for_walls = params['product_actual_height'] + params['clearance_above_product']
-            wall_results = wall_logic.calculate_wall_layout(
-                crate_internal_width=target_span_y_floor,
-                crate_internal_length=board_len_x_floor,
-                crate_internal_height=crate_internal_h_for_walls,
-                panel_thickness=params['panel_thickness'],
-                cleat_thickness=params['cleat_thickness'],
-                cleat_width=params['wall_cleat_width'],
-                wall_construction_type="style_b",
-                end_panel_1_removable=params['end_panel_1_removable'],
-                end_panel_2_removable=params['end_panel_2_removable'],
-                side_panel_1_removable=params['side_panel_1_removable'],
-                side_panel_2_removable=params['side_panel_2_removable']
-            )
-            
-            cap_results = cap_logic.calculate_cap_layout(
-                crate_overall_width_y=skid_results.get('crate_overall_width_calculated', 0),
-                crate_overall_length_x=skid_results.get('skid_actual_length', 0),
-                cap_panel_sheathing_thickness=params['panel_thickness'],
-                cap_cleat_actual_thickness=params['cleat_thickness'],
-                cap_cleat_actual_width=params['cap_cleat_width'],
-                max_top_cleat_spacing=params['max_top_cleat_spacing'],
-                top_panel_removable=params['top_panel_removable']
-            )
-
-            # Calculate decals
-            side_panel_h = wall_results.get('side_panels', {}).get('panel_height_dim', 0)
-            side_panel_w = wall_results.get('side_panels', {}).get('panel_width_dim', 0)
-            end_panel_h = wall_results.get('end_panels', {}).get('panel_height_dim', 0)
-            end_panel_w = wall_results.get('end_panels', {}).get('panel_width_dim', 0)
-            overall_crate_h_for_decals = (skid_results.get('skid_actual_height',0)) + \
-                                     params['floor_lumbar_thickness'] + \
-                                     crate_internal_h_for_walls + \
-                                     (cap_results.get('cap_panel',{}).get('thickness', params['panel_thickness']))
-
-            decal_results = decal_logic.calculate_decal_placements(
-                product_is_fragile=params['product_is_fragile'],
-                product_requires_special_handling=params['product_requires_special_handling'],
-                panel_height_side=side_panel_h, panel_width_side=side_panel_w,
-                panel_height_end=end_panel_h, panel_width_end=end_panel_w,
-                overall_crate_height=overall_crate_h_for_decals
-            )
-            
-            # Update visualization widgets with new data
-            # DEBUG: Print info about skid_results
-            print("DEBUG SKID_RESULTS:")
-            print(f"Type: {type(self.skid_results)}")
-            print(f"Has 'exp_data'?: {'exp_data' in self.skid_results if isinstance(self.skid_results, dict) else 'Not a dict'}")
-            if isinstance(self.skid_results, dict) and 'exp_data' in self.skid_results:
-                print(f"exp_data keys: {self.skid_results['exp_data'].keys()}")
-                if 'CALC_Skid_Count' in self.skid_results['exp_data']:
-                    print(f"CALC_Skid_Count: {self.skid_results['exp_data']['CALC_Skid_Count']}")
-            
-            if hasattr(self, 'skid_view') and self.skid_view and self.skid_results:
-                self.skid_view.set_data(self.skid_results)
-            if hasattr(self, 'floorboard_view') and self.floorboard_view and floor_results:
-                # This is where we pass skid_data to the FloorboardTopView
-                print(f"Before set_data, self.skid_results is {self.skid_results is not None}")
-                self.floorboard_view.set_data(floor_results, skid_data=self.skid_results)
-
-            # Update displays (table)
-            self.update_results_display(self.skid_results, floor_results, cap_results, wall_results, decal_results, params)
-
-            # Generate expression file
-            exp_content = exp_generator.generate_nx_exp_file_content(
-                product_params=params, skid_results=self.skid_results, floorboard_results=floor_results,
-                wall_results=wall_results, cap_results=cap_results, decal_results=decal_results,
-                app_version=config.VERSION
-            )
-
-            output_dir = os.path.dirname(self.exp_output_path)
-            if not os.path.exists(output_dir): os.makedirs(output_dir)
-            
-            with open(self.exp_output_path, 'w') as f: f.write(exp_content)
-            
-            self.statusBar().showMessage(f"Successfully generated {os.path.basename(self.exp_output_path)}", 5000)
-            self.show_success_dialog(f"Successfully generated AutoCrate_Expressions.exp to:\n{self.exp_output_path}")
-
-        except Exception as e:
-            self.statusBar().showMessage(f"Error: {str(e)}", 5000)
-            QMessageBox.critical(self, "Error", f"An error occurred: {str(e)}\nCheck console for more details.")
-            print(f"Error details: {e}", file=sys.stderr) # Print to stderr for console visibility
-            import traceback
-            traceback.print_exc()
+        self.preview_timer.stop() # This request supersedes any pending preview
+        self.calc_runner.submit(params, exp_output_path=self.exp_output_path, delta=self.delta_exp_checkbox.isChecked())
+        self.statusBar().showMessage("Running calculations...")
+
+    def schedule_live_preview(self, *args):
+        """Restarts the debounce timer after an edit when live preview is on."""
+        if self.live_preview_checkbox.isChecked():
+            self.preview_timer.start()
+
+    def run_live_preview(self):
+        """Recalculates in the background without writing the .exp file."""
+        params = self.collect_parameters(quiet=True)
+        if not params:
+            self.statusBar().showMessage("Live preview paused: invalid input.", 3000)
+            return
+        self.calc_runner.submit(params)
+
+    def on_design_ready(self, design):
+        """Shows the newest finished design (runs on the GUI thread)."""
+        self.last_design = design
+        self.skid_results = design.skid
+        floor_results = design.floorboard
+        if hasattr(self, 'skid_view') and self.skid_view and self.skid_results:
+            self.skid_view.set_data(self.skid_results)
+        if hasattr(self, 'floorboard_view') and self.floorboard_view and floor_results:
+            self.floorboard_view.set_data(floor_results, skid_data=self.skid_results)
+
+        self.update_results_display(self.skid_results, floor_results, design.cap,
+                                    layouts.WallLayout.from_dict(design.wall), design.decal, design.params)
+        if not self.calc_runner.is_busy():
+            self.statusBar().showMessage("; ".join(design.errors) if design.errors else "Results updated", 3000)
+
+    def on_exp_written(self, path):
+        self.statusBar().showMessage(f"Successfully generated {os.path.basename(path)} in {os.path.dirname(path)}", 8000)
+
+    def on_exp_unchanged(self, path):
+        self.statusBar().showMessage(f"{os.path.basename(path)} is already up to date (not rewritten)", 8000)
+
+    def on_delta_written(self, delta):
+        if delta.skip_import:
+            self.statusBar().showMessage(f"No expression changes in {os.path.basename(delta.exp_path)} - skip the NX import", 8000)
+        else:
+            self.statusBar().showMessage(f"{delta.summary()} -> {os.path.basename(delta.delta_path)}", 8000)
+
+    def on_catalog_failed(self, path, message):
+        self.statusBar().showMessage(f"Warning: {os.path.basename(path)} was written but not recorded in the "
+                                     f"design catalog ({message})", 8000)
+        print(f"Design catalog warning: {message}", file=sys.stderr)
+
+    def on_rules_reloaded(self, new_rules):
+        self.statusBar().showMessage(f"Loaded rules {new_rules.version} from {os.path.basename(new_rules.source)}", 8000)
+        self.schedule_live_preview()
+
+    def on_rules_rejected(self, message):
+        self.statusBar().showMessage(f"Rule file rejected, keeping the current rules: {message}", 10000)
+
+    def on_calculation_failed(self, message, details):
+        self.statusBar().showMessage(f"Error: {message}")
+        print(f"Error details: {message}", file=sys.stderr) # Print to stderr for console visibility
+        print(details, file=sys.stderr)
+
+    def closeEvent(self, event):
+        self.preview_timer.stop()
+        if self.rules_watcher is not None:
+            self.rules_watcher.stop()
+        self.calc_runner.wait() # Let an in-flight .exp write finish
+        super().closeEvent(event)
 
 def main():
     app = QApplication(sys.argv)
@@ -0,0 +1,3 @@
+# benchmarks/__init__.py
+# AutoCrate performance benchmarks.
+# Run with `python -m benchmarks run` from the repository root; see benchmarks/runner.py.
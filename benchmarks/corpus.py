@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Benchmark corpus: the example crates shipped in examples/, parameters.json and synthetic extremes."""
+
+import glob
+import json
+import os
+
+from wizard_app import schema
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Synthetic crates that exercise edge paths: single skid, splices, instance caps, oversize walls, rule fallbacks
+SYNTHETIC_CASES = {
+    "synthetic_tiny_light": {"product_weight": 50.0, "product_width": 4.0, "product_length": 6.0, "product_actual_height": 4.0},
+    "synthetic_single_skid": {"product_weight": 800.0, "product_width": 5.0, "product_length": 20.0, "product_actual_height": 12.0},
+    "synthetic_no_3x4_light": {"product_weight": 300.0, "allow_3x4_skids": False},
+    "synthetic_wide_floor_2x6": {"product_weight": 9000.0, "product_width": 140.0, "product_length": 60.0,
+                                 "chosen_standard_floorboard_nominal": "2x6"},
+    "synthetic_tall_top_splice": {"product_weight": 2500.0, "product_width": 40.0, "product_length": 40.0,
+                                  "product_actual_height": 108.0},
+    "synthetic_wide_case_7": {"product_weight": 4000.0, "product_width": 88.0, "product_length": 70.0,
+                              "product_actual_height": 80.0},
+    "synthetic_oversize_heavy": {"product_weight": 20000.0, "product_width": 92.0, "product_length": 118.0,
+                                 "product_actual_height": 110.0, "product_is_fragile": True,
+                                 "product_requires_special_handling": True, "top_panel_removable": True},
+    "synthetic_over_max_weight": {"product_weight": 30000.0, "product_width": 60.0, "product_length": 80.0},
+}
+
+
+def load_corpus(repo_root: str = REPO_ROOT, include_synthetic: bool = True) -> list:
+    """Returns (name, params) pairs in a stable order."""
+    corpus = []
+    for path in sorted(glob.glob(os.path.join(repo_root, "examples", "*.json"))):
+        with open(path, 'r') as f:
+            data = json.load(f)
+        name = "example_" + os.path.splitext(os.path.basename(path))[0]
+        corpus.append((name, schema.to_canonical(data)))
+
+    parameters_path = os.path.join(repo_root, "parameters.json")
+    if os.path.exists(parameters_path):
+        with open(parameters_path, 'r') as f:
+            corpus.append(("parameters_json", json.load(f)))
+
+    if include_synthetic:
+        corpus.extend(SYNTHETIC_CASES.items())
+    return corpus
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Benchmark runner for the AutoCrate logic modules and the full pipeline.
+
+    python -m benchmarks run --out benchmarks/baselines/local.json
+    python -m benchmarks compare benchmarks/baselines/local.json --threshold 10
+    python -m benchmarks compare old.json new.json
+
+Each benchmark calls one function once per corpus crate, with the inputs the
+pipeline would pass it. Times are reported per call in microseconds. The best
+of several repeats ("min_us") is the statistic used for comparisons.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+from wizard_app import config
+from wizard_app import panel_logic
+from wizard_app import pipeline
+
+try:
+    from . import corpus as corpus_module
+except ImportError:
+    import corpus as corpus_module # For direct testing
+
+DEFAULT_THRESHOLD_PCT = 10.0
+DEFAULT_REPEAT = 5
+MIN_REPEAT_SECONDS = 0.05 # Each repeat loops over the corpus until it takes at least this long
+
+
+def _stage_call(stage_name: str, p: dict, outputs: dict):
+    stage = next(s for s in pipeline.STAGES if s.name == stage_name)
+    return lambda: stage.run(p, outputs)
+
+
+def _panel_call(p: dict, outputs: dict):
+    width = outputs['skid'].get('skid_actual_length', p['product_length'])
+    height = p['product_actual_height'] + p['clearance_above_product']
+    return lambda: panel_logic.generate_panel_config(width, height, p['panel_thickness'], p['cleat_thickness'],
+                                                     p['wall_cleat_width'])
+
+
+def _pipeline_call(p: dict, outputs: dict):
+    return lambda: pipeline.design_crate(p)
+
+
+# Benchmark name -> factory building a zero-argument call for one crate
+BENCHMARKS = {
+    "skid_logic.calculate_skid_layout": lambda p, o: _stage_call("skid", p, o),
+    "floorboard_logic.calculate_floorboard_layout_refined": lambda p, o: _stage_call("floorboard", p, o),
+    "panel_logic.generate_panel_config": _panel_call,
+    "wall_logic.calculate_wall_layout": lambda p, o: _stage_call("wall", p, o),
+    "cap_logic.calculate_cap_layout": lambda p, o: _stage_call("cap", p, o),
+    "decal_logic.calculate_decal_placements": lambda p, o: _stage_call("decal", p, o),
+    "exp_generator.generate_nx_exp_file_content": lambda p, o: _stage_call("exp", p, o),
+    "pipeline.design_crate": _pipeline_call,
+}
+
+
+def _prepare_inputs(corpus: list) -> list:
+    """Runs every crate once so each stage can be timed on its real upstream results."""
+    prepared = []
+    for name, params in corpus:
+        p = pipeline.normalize_parameters(params)
+        outputs = {'_generate_exp': True, '_app_version': config.VERSION}
+        for stage in pipeline.STAGES:
+            outputs[stage.name] = stage.run(p, outputs)
+        prepared.append((name, p, outputs))
+    return prepared
+
+
+def _time_calls(calls: list, repeat: int) -> dict:
+    """Per-call timings over `repeat` rounds, each looping the calls enough times to be measurable."""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            for call in calls:
+                call()
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_REPEAT_SECONDS:
+            break
+        number *= 2
+
+    samples = [] # The calibration rounds above double as warm-up and are not recorded
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        for _ in range(number):
+            for call in calls:
+                call()
+        samples.append((time.perf_counter() - start) / (number * len(calls)))
+    return {
+        "min_us": min(samples) * 1e6,
+        "median_us": statistics.median(samples) * 1e6,
+        "max_us": max(samples) * 1e6,
+        "calls_per_repeat": number * len(calls),
+        "repeat": repeat,
+    }
+
+
+def run_benchmarks(corpus: list = None, repeat: int = DEFAULT_REPEAT, only: list = None) -> dict:
+    """Times every benchmark (or those named in `only`) over the corpus.
+
+    Returns:
+        dict: {"meta": {...}, "corpus": [names], "results": {benchmark: timings}}
+    """
+    corpus = corpus if corpus is not None else corpus_module.load_corpus()
+    prepared = _prepare_inputs(corpus)
+    results = {}
+    for bench_name, factory in BENCHMARKS.items():
+        if only and not any(part in bench_name for part in only):
+            continue
+        calls = [factory(p, outputs) for _, p, outputs in prepared]
+        results[bench_name] = _time_calls(calls, repeat)
+    return {
+        "meta": {
+            "app_version": config.VERSION,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        },
+        "corpus": [name for name, _, _ in prepared],
+        "results": results,
+    }
+
+
+def compare_results(baseline: dict, current: dict, threshold_pct: float = DEFAULT_THRESHOLD_PCT) -> list:
+    """Compares two benchmark result sets on min_us.
+
+    Returns:
+        list: One row per benchmark present in both, with change_pct and status
+        ("REGRESSION" beyond +threshold, "IMPROVED" beyond -threshold, else "OK").
+    """
+    rows = []
+    for name, current_timing in current["results"].items():
+        base_timing = baseline["results"].get(name)
+        if base_timing is None:
+            continue
+        before, after = base_timing["min_us"], current_timing["min_us"]
+        change_pct = (after - before) / before * 100.0 if before > 0 else 0.0
+        if change_pct > threshold_pct:
+            status = "REGRESSION"
+        elif change_pct < -threshold_pct:
+            status = "IMPROVED"
+        else:
+            status = "OK"
+        rows.append({"benchmark": name, "baseline_us": before, "current_us": after,
+                     "change_pct": change_pct, "status": status})
+    return rows
+
+
+def _print_results(results: dict) -> None:
+    print(f"{len(results['corpus'])} crates, Python {results['meta']['python']}")
+    for name, timing in results["results"].items():
+        print(f"  {name:<55} {timing['min_us']:>10.2f} us  (median {timing['median_us']:.2f})")
+
+
+def _print_comparison(rows: list, threshold_pct: float) -> None:
+    print(f"Threshold: +/-{threshold_pct:.1f}% on best-of-repeats time per call")
+    for row in rows:
+        print(f"  {row['benchmark']:<55} {row['baseline_us']:>10.2f} -> {row['current_us']:>10.2f} us "
+              f"{row['change_pct']:+7.1f}%  {row['status']}")
+
+
+def save_results(results: dict, path: str) -> str:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2)
+    return path
+
+
+def load_results(path: str) -> dict:
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="AutoCrate performance benchmarks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run the benchmarks and optionally save a JSON baseline")
+    run_parser.add_argument("--out", default=None, help="Write results to this JSON file")
+    run_parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Timing repeats per benchmark")
+    run_parser.add_argument("--only", nargs="*", default=None, help="Only run benchmarks whose name contains one of these")
+    run_parser.add_argument("--no-synthetic", action="store_true", help="Only use examples/ and parameters.json")
+
+    compare_parser = subparsers.add_parser("compare", help="Compare against a saved baseline")
+    compare_parser.add_argument("baseline", help="Baseline JSON file")
+    compare_parser.add_argument("current", nargs="?", default=None, help="Results JSON to compare (default: run now)")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD_PCT,
+                                help=f"Regression threshold in percent (default: {DEFAULT_THRESHOLD_PCT})")
+    compare_parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Timing repeats when running now")
+    compare_parser.add_argument("--out", default=None, help="Also save the current results to this JSON file")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        results = run_benchmarks(corpus_module.load_corpus(include_synthetic=not args.no_synthetic),
+                                 repeat=args.repeat, only=args.only)
+        _print_results(results)
+        if args.out:
+            print(f"Saved {save_results(results, args.out)}")
+        return 0
+
+    baseline = load_results(args.baseline)
+    if args.current:
+        current = load_results(args.current)
+    else:
+        include_synthetic = any(name.startswith("synthetic_") for name in baseline.get("corpus", []))
+        current = run_benchmarks(corpus_module.load_corpus(include_synthetic=include_synthetic),
+                                 repeat=args.repeat, only=list(baseline["results"]))
+        if args.out:
+            save_results(current, args.out)
+    rows = compare_results(baseline, current, args.threshold)
+    _print_comparison(rows, args.threshold)
+    return 1 if any(row["status"] == "REGRESSION" for row in rows) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
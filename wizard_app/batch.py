@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Batch processing of crate orders into NX .exp files.
+
+Orders come from a directory of JSON files, a glob, a CSV manifest or a
+JSON-Lines manifest. Each order runs through pipeline.design_crate() in a
+ProcessPoolExecutor and produces one .exp file plus a row in the summary report.
+The whole batch is validated up front (schema.validate_orders); invalid orders,
+and files, lines or list items that could not be read, are reported with their
+row number and skipped, the rest still run.
+"""
+
+import csv
+import glob
+import json
+import os
+import re
+import time
+
+try:
+    from . import catalog
+    from . import config
+    from . import design_cache
+    from . import pipeline
+    from . import rules
+    from . import schema
+except ImportError:
+    import catalog # For direct testing
+    import config
+    import design_cache
+    import pipeline
+    import rules
+    import schema
+
+SUMMARY_FILENAME = "batch_summary.json"
+GLOB_CHARS = ("*", "?", "[")
+
+
+def _safe_order_id(raw_id) -> str:
+    """Makes an order id usable as a file name."""
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", str(raw_id)).strip("._") or "order"
+
+
+class UnreadableOrder:
+    """Stands in for the params of an order that could not be read (malformed JSON file or line,
+    list item that is not an object); validation reports it as a FAILED row."""
+    __slots__ = ("message",)
+
+    def __init__(self, message: str):
+        self.message = message
+
+
+def _load_json_file(path: str) -> list:
+    """Loads one JSON file holding either a single order or a list of orders."""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    try:
+        with open(path, 'r') as f:
+            data = json.load(f)
+        return orders_from_json(data, stem)
+    except ValueError as e: # Malformed JSON (json.JSONDecodeError, UnicodeDecodeError) or not an order
+        return [(_safe_order_id(stem), UnreadableOrder(f"{os.path.basename(path)}: {type(e).__name__}: {e}"))]
+
+
+def orders_from_json(data, stem: str) -> list:
+    """(order_id, params) tuples from one decoded JSON order file: a single order or a list of orders,
+    flat or nested (see schema.to_canonical). Orders without an order_id are named after `stem`."""
+    if isinstance(data, list):
+        return [(_safe_order_id(item.get("order_id", f"{stem}_{i + 1}")), schema.to_canonical(item))
+                if isinstance(item, dict) else
+                (_safe_order_id(f"{stem}_{i + 1}"),
+                 UnreadableOrder(f"item {i + 1} is not an order object ({type(item).__name__})"))
+                for i, item in enumerate(data)]
+    if not isinstance(data, dict):
+        raise ValueError(f"Expected an order object or a list of orders, got {type(data).__name__}")
+    return [(_safe_order_id(data.get("order_id", stem)), schema.to_canonical(data))]
+
+
+def _load_csv(path: str) -> list:
+    orders = []
+    with open(path, 'r', newline='') as f:
+        for row_no, row in enumerate(csv.DictReader(f), start=1):
+            params = {k.strip(): v.strip() for k, v in row.items() if k and v is not None and v.strip() != ""}
+            orders.append((_safe_order_id(params.pop("order_id", f"row_{row_no}")), params))
+    return orders
+
+
+def _load_jsonl(path: str) -> list:
+    orders = []
+    with open(path, 'r') as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                params = json.loads(line)
+            except ValueError as e:
+                orders.append((f"line_{line_no}", UnreadableOrder(f"line {line_no}: {type(e).__name__}: {e}")))
+                continue
+            if not isinstance(params, dict):
+                orders.append((f"line_{line_no}", UnreadableOrder(
+                    f"line {line_no} is not an order object ({type(params).__name__})")))
+                continue
+            params = schema.to_canonical(params)
+            orders.append((_safe_order_id(params.get("order_id", f"line_{line_no}")), params))
+    return orders
+
+
+def load_orders(source: str) -> list:
+    """Loads crate orders from a directory, glob, .csv, .jsonl/.ndjson or .json file.
+
+    Returns:
+        list: (order_id, params_dict) tuples in a stable order.
+    """
+    if os.path.isdir(source):
+        paths = sorted(glob.glob(os.path.join(source, "*.json")))
+    elif any(ch in source for ch in GLOB_CHARS):
+        paths = sorted(glob.glob(source))
+    else:
+        paths = [source]
+
+    orders = []
+    for path in paths:
+        ext = os.path.splitext(path)[1].lower()
+        if ext == ".csv":
+            orders.extend(_load_csv(path))
+        elif ext in (".jsonl", ".ndjson"):
+            orders.extend(_load_jsonl(path))
+        else:
+            orders.extend(_load_json_file(path))
+    return orders
+
+
+def _unique_order_ids(orders: list) -> list:
+    """Renames repeated order ids A, A -> A, A_2 so no order overwrites another's .exp file.
+
+    Ids are compared case-insensitively, as on Windows file systems.
+    """
+    seen = {order_id.lower() for order_id, _ in orders}
+    if len(seen) == len(orders):
+        return orders
+    used, unique = set(), []
+    for order_id, params in orders:
+        new_id, n = order_id, 1
+        while new_id.lower() in used or (n > 1 and new_id.lower() in seen): # Leave an id like A_2 to its own order
+            n += 1
+            new_id = f"{order_id}_{n}"
+        used.add(new_id.lower())
+        unique.append((new_id, params))
+    return unique
+
+
+def validate_orders(orders: list) -> "schema.ValidationReport":
+    """schema.validate_orders() for load_orders() output; UnreadableOrder entries are invalid rows too."""
+    unreadable = {row: params.message for row, (_, params) in enumerate(orders, start=1)
+                  if isinstance(params, UnreadableOrder)}
+    report = schema.validate_orders([{} if row in unreadable else params
+                                     for row, (_, params) in enumerate(orders, start=1)])
+    if unreadable:
+        for row, message in unreadable.items():
+            report.errors.append((row, "order", None, f"unreadable ({message})"))
+            report.valid[row - 1] = False
+        report.errors.sort(key=lambda error: error[0])
+    return report
+
+
+def invalid_order_results(orders: list) -> dict:
+    """Validates all orders at once (see validate_orders).
+
+    Returns:
+        dict: {index in `orders`: FAILED result} for the orders that fail validation or could not be
+        read; the result's "row" is the 1-based position, i.e. the data row of a CSV or JSON-Lines manifest.
+    """
+    report = validate_orders(orders)
+    return {row - 1: {"order_id": orders[row - 1][0], "status": "FAILED", "message": f"Invalid input: {message}",
+                      "exp_path": "", "row": row, "seconds": 0.0}
+            for row, message in report.messages_by_row().items()}
+
+
+def _warm_worker(rule_data: str = "", rule_fingerprint: str = ""):
+    """Process pool initializer: import the logic modules once per worker, not once per order,
+    and use the parent's rule set (spawned workers would otherwise load their own)."""
+    try:
+        from . import skid_logic, floorboard_logic, wall_logic, cap_logic, decal_logic, exp_generator # noqa: F401
+    except ImportError:
+        import skid_logic, floorboard_logic, wall_logic, cap_logic, decal_logic, exp_generator # noqa: F401
+    if rule_fingerprint:
+        rules.use_rules(rule_data, rule_fingerprint)
+
+
+def _call_with_rules(rule_data: str, rule_fingerprint: str, func, *args):
+    """Worker process entry point for long-lived pools: switches to the parent's current rule set
+    (it may have been reloaded since the pool started), then returns func(*args)."""
+    rules.use_rules(rule_data, rule_fingerprint)
+    return func(*args)
+
+
+def run_order(order_id: str, params: dict, output_dir: str, use_cache: bool = True, delta: bool = False,
+              use_catalog: bool = True) -> dict:
+    """Designs one order and writes its .exp file. Never raises; failures are reported in the result.
+
+    With `delta`, also writes `<order_id>.delta.exp` against the previous run's file (see exp_delta).
+    With `use_catalog`, the design and its .exp path are recorded in the shared design catalog.
+    """
+    start = time.perf_counter()
+    result = {"order_id": order_id, "status": "OK", "message": "", "exp_path": ""}
+    try:
+        if use_cache:
+            design = design_cache.cached_design_crate(params)
+        else:
+            design = pipeline.design_crate(params)
+        exp_path = os.path.join(output_dir, f"{order_id}.exp")
+        if delta:
+            from . import exp_delta # Imported here so plain batch runs skip the parser
+
+            changes = exp_delta.write_exp_delta(design, exp_path)
+            result.update({"exp_status": changes.status, "delta_path": changes.delta_path,
+                           "changed_expressions": changes.change_count})
+            result["exp_changed"] = changes.exp_written
+        else:
+            result["exp_changed"] = pipeline.write_exp_file_if_changed(design, exp_path)
+        result["exp_path"] = exp_path
+        warnings = list(design.errors)
+        if use_catalog:
+            try:
+                catalog.record_design(design, exp_path, order_id=order_id)
+            except Exception as e: # The .exp file is written; a locked or corrupt catalog only loses the record
+                warnings.append(f"catalog: {type(e).__name__}: {e}")
+        if warnings:
+            result["status"] = "WARNING"
+            result["message"] = "; ".join(warnings)
+        result.update({
+            "skid_type": design.skid.get("skid_type_nominal"),
+            "skid_count": design.skid.get("skid_count"),
+            "crate_overall_width": design.crate_overall_width,
+            "crate_overall_length": design.crate_overall_length,
+            "crate_overall_height": design.crate_overall_height,
+        })
+    except Exception as e:
+        result["status"] = "FAILED"
+        result["message"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def _run_order_tuple(job: tuple) -> dict:
+    return run_order(*job)
+
+
+def run_batch(orders: list, output_dir: str, workers: int = None, chunksize: int = None,
+              report_path: str = None, use_cache: bool = True, delta: bool = False, use_catalog: bool = True) -> dict:
+    """Runs every order through the pipeline and writes the summary report.
+
+    Args:
+        orders: (order_id, params) tuples, e.g. from load_orders(). Repeated ids get a suffix (A, A_2).
+        output_dir: Directory receiving one .exp file per order.
+        workers: Worker process count (default: all CPU cores). 1 runs in-process.
+        chunksize: Orders sent to a worker per round trip (default: spread ~4 chunks per worker).
+        report_path: Summary file (.json or .csv). Defaults to output_dir/batch_summary.json.
+        use_cache: Reuse designs from the shared design cache (see design_cache).
+        delta: Also write a .delta.exp per order with only the expressions changed since the last run.
+        use_catalog: Record every design in the shared design catalog (see catalog).
+
+    Returns:
+        dict: Summary with totals and the per-order results.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    orders = _unique_order_ids(orders)
+    rejected = invalid_order_results(orders)
+    jobs = [(order_id, params, output_dir, use_cache, delta, use_catalog)
+            for index, (order_id, params) in enumerate(orders) if index not in rejected]
+
+    start = time.perf_counter()
+    if workers == 1 or len(jobs) <= 1:
+        results = [_run_order_tuple(job) for job in jobs]
+    else:
+        from concurrent.futures import ProcessPoolExecutor # Imported here so workers and small runs skip multiprocessing
+
+        chunksize = chunksize or max(1, len(jobs) // (workers * 4))
+        active_rules = rules.get_rules()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_warm_worker,
+                                 initargs=(active_rules.canonical, active_rules.fingerprint)) as executor:
+            results = list(executor.map(_run_order_tuple, jobs, chunksize=chunksize))
+    if rejected: # Back into manifest order
+        designed = iter(results)
+        results = [rejected[index] if index in rejected else next(designed) for index in range(len(orders))]
+    elapsed = time.perf_counter() - start
+
+    summary = {
+        "app_version": config.VERSION,
+        "rules_version": rules.get_rules().version,
+        "output_dir": os.path.abspath(output_dir),
+        "workers": workers,
+        "total": len(results),
+        "ok": sum(1 for r in results if r["status"] == "OK"),
+        "warnings": sum(1 for r in results if r["status"] == "WARNING"),
+        "failed": sum(1 for r in results if r["status"] == "FAILED"),
+        "invalid": len(rejected), # Failed validation; not designed
+        "elapsed_seconds": elapsed,
+        "unchanged": sum(1 for r in results if r.get("exp_changed") is False), # .exp files left untouched
+        "orders": results,
+    }
+    write_report(summary, report_path or os.path.join(output_dir, SUMMARY_FILENAME))
+    return summary
+
+
+def write_report(summary: dict, path: str) -> str:
+    """Writes the batch summary as JSON, or as one CSV row per order when `path` ends in .csv."""
+    if path.lower().endswith(".csv"):
+        fields = ["order_id", "row", "status", "message", "seconds", "exp_path", "exp_changed", "exp_status", "delta_path",
+                  "changed_expressions", "skid_type", "skid_count",
+                  "crate_overall_width", "crate_overall_length", "crate_overall_height"]
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(summary["orders"])
+    else:
+        with open(path, 'w') as f:
+            json.dump(summary, f, indent=2)
+    return path
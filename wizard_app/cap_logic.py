@@ -10,6 +10,29 @@ try:
 except ImportError:
     import config # For direct testing
 
+# Earlier .exp files named the cap panel CAP_Panel_*; these aliases keep NX models built on them working
+CAP_LEGACY_ALIASES = (
+    ("CAP_Panel_Width", "CALC_Cap_Panel_Actual_Width_Y"),
+    ("CAP_Panel_Length", "CALC_Cap_Panel_Actual_Length_X"),
+)
+
+
+def _exp_expressions(context: dict):
+    """Cap exp_data followed by the legacy CAP_Panel_* aliases."""
+    exp_data = (context.get("cap") or {}).get("exp_data") or {}
+    yield from exp_data.items()
+    for alias, name in CAP_LEGACY_ALIASES:
+        if name in exp_data:
+            yield alias, exp_data[name]
+    yield "CAP_Panel_Thickness", context["params"].get("panel_thickness", 0.0)
+
+
+# Section of the NX .exp file holding this module's exp_data (see exp_generator.ExpSection)
+EXP_SECTION = {
+    "key": "cap", "title": "CAP ASSEMBLY PARAMETERS (for N-Instance Suppression Strategy)", "order": 60,
+    "expressions": _exp_expressions,
+}
+
 def _calculate_cleat_pattern(span_to_cover: float, cleat_width_for_spacing: float, 
                              max_spacing_center_to_center: float, cleat_length: float,
                              cleat_thickness_val: float, cleat_width_val: float) -> dict:
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""SQLite catalog of generated crate designs, searchable by overall dimensions.
+
+Every design whose .exp file is written (GUI Generate, batch orders) is recorded
+with its inputs, key outputs (overall dimensions, skid type/count, panel case
+IDs) and the .exp path. An R*Tree index over overall width/length/height and
+product weight answers "existing crates within +/-0.5 in" queries in
+milliseconds, so engineers can reuse a released NX model instead of
+regenerating one. SQLite builds without the R*Tree module fall back to a
+composite B-tree index on the same columns.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+try:
+    from . import config
+    from . import design_cache
+    from . import pipeline
+except ImportError:
+    import config # For direct testing
+    import design_cache
+    import pipeline
+
+CATALOG_PATH_ENV = "AUTOCRATE_CATALOG" # Overrides the catalog file, e.g. a shared team catalog
+CATALOG_DISABLE_ENV = "AUTOCRATE_NO_CATALOG" # Set to 1 to stop recording designs
+CATALOG_FILENAME = "design_catalog.sqlite3"
+DEFAULT_TOLERANCE = 0.5 # Inches
+DEFAULT_LIMIT = 50
+SQL_BATCH = 500 # Ids per "IN (...)" lookup, below SQLite's bound-parameter limit
+
+# Result columns, in SELECT order
+COLUMNS = ("id", "design_key", "order_id", "exp_path", "status", "app_version", "recorded",
+           "overall_width", "overall_length", "overall_height", "product_weight",
+           "skid_type", "skid_count", "side_panel_case", "end_panel_case", "params")
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS designs ("
+    "id INTEGER PRIMARY KEY AUTOINCREMENT, design_key TEXT NOT NULL, order_id TEXT NOT NULL DEFAULT '', "
+    "exp_path TEXT NOT NULL DEFAULT '', status TEXT NOT NULL, app_version TEXT NOT NULL, recorded REAL NOT NULL, "
+    "overall_width REAL NOT NULL, overall_length REAL NOT NULL, overall_height REAL NOT NULL, "
+    "product_weight REAL NOT NULL, skid_type TEXT, skid_count INTEGER, "
+    "side_panel_case TEXT, end_panel_case TEXT, params TEXT NOT NULL, "
+    "UNIQUE (design_key, exp_path))",
+    "CREATE INDEX IF NOT EXISTS designs_exp_path ON designs(exp_path)",
+)
+# R*Tree entries are points (min == max); the rtree id is designs.id
+_RTREE_SCHEMA = ("CREATE VIRTUAL TABLE IF NOT EXISTS design_dims USING rtree("
+                 "id, min_width, max_width, min_length, max_length, min_height, max_height, min_weight, max_weight)")
+_FALLBACK_INDEX = ("CREATE INDEX IF NOT EXISTS designs_dims "
+                   "ON designs(overall_width, overall_length, overall_height, product_weight)")
+
+
+def _row_dict(row) -> dict:
+    entry = dict(zip(COLUMNS, row))
+    entry["params"] = json.loads(entry["params"])
+    entry["exp_exists"] = bool(entry["exp_path"]) and os.path.exists(entry["exp_path"])
+    return entry
+
+
+def default_catalog_path() -> str:
+    """Per-user catalog file (AUTOCRATE_CATALOG overrides it).
+
+    The catalog is kept with the user's application data rather than in the
+    design cache directory, since clearing the cache must not forget released models.
+    """
+    override = os.environ.get(CATALOG_PATH_ENV)
+    if override:
+        return override
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    return os.path.join(base, "autocrate", CATALOG_FILENAME)
+
+
+def _entry(design, exp_path: str = "", order_id: str = "", app_version: str = config.VERSION) -> dict:
+    """Catalog row values for a pipeline.CrateDesign."""
+    wall_exp = design.wall.get("exp_data", {})
+    return {
+        "design_key": design_cache.design_key(design.params, app_version=app_version),
+        "order_id": str(order_id or ""),
+        "exp_path": os.path.abspath(exp_path) if exp_path else "",
+        "status": design.status,
+        "app_version": app_version,
+        "recorded": time.time(),
+        "overall_width": float(design.crate_overall_width),
+        "overall_length": float(design.crate_overall_length),
+        "overall_height": float(design.crate_overall_height),
+        "product_weight": float(design.params["product_weight"]),
+        "skid_type": design.skid.get("skid_type_nominal"),
+        "skid_count": design.skid.get("skid_count"),
+        "side_panel_case": wall_exp.get("CALC_Side_Panel_Case_ID"),
+        "end_panel_case": wall_exp.get("CALC_End_Panel_Case_ID"),
+        "params": json.dumps(design.params, sort_keys=True),
+    }
+
+
+class DesignCatalog:
+    """Persistent, dimension-indexed record of generated designs."""
+
+    def __init__(self, path: str = None):
+        """
+        Args:
+            path: SQLite file (default: default_catalog_path()). ":memory:" keeps it in memory.
+        """
+        self.path = path or default_catalog_path()
+        self.has_rtree = False
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_pid = None
+
+    def _db(self):
+        """Opens the catalog lazily; each process (e.g. batch workers) gets its own connection."""
+        if self._conn is None or self._conn_pid != os.getpid():
+            directory = os.path.dirname(self.path) if self.path != ":memory:" else ""
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            for statement in _SCHEMA:
+                conn.execute(statement)
+            try:
+                conn.execute(_RTREE_SCHEMA)
+                self.has_rtree = True
+            except sqlite3.OperationalError: # SQLite built without the R*Tree module
+                conn.execute(_FALLBACK_INDEX)
+                self.has_rtree = False
+            conn.commit()
+            self._conn, self._conn_pid = conn, os.getpid()
+        return self._conn
+
+    def record(self, design, exp_path: str = "", order_id: str = "", app_version: str = config.VERSION) -> int:
+        """Adds or refreshes the entry for `design` written to `exp_path`. Returns the row id.
+
+        A design is stored once per .exp path; recording a different design at a path
+        replaces the entry that pointed there, since the file no longer holds it.
+        """
+        entry = _entry(design, exp_path, order_id, app_version)
+        with self._lock:
+            conn = self._db()
+            with conn:
+                if entry["exp_path"]:
+                    stale = [row[0] for row in conn.execute(
+                        "SELECT id FROM designs WHERE exp_path = ? AND design_key != ?",
+                        (entry["exp_path"], entry["design_key"]))]
+                    self._delete(conn, stale)
+                names = list(entry)
+                updates = ", ".join(f"{name} = excluded.{name}" for name in names
+                                    if name not in ("design_key", "exp_path"))
+                conn.execute(f"INSERT INTO designs ({', '.join(names)}) VALUES ({', '.join('?' * len(names))}) "
+                             f"ON CONFLICT (design_key, exp_path) DO UPDATE SET {updates}",
+                             [entry[name] for name in names])
+                row_id = conn.execute("SELECT id FROM designs WHERE design_key = ? AND exp_path = ?",
+                                      (entry["design_key"], entry["exp_path"])).fetchone()[0]
+                if self.has_rtree:
+                    conn.execute("INSERT OR REPLACE INTO design_dims VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                 (row_id, entry["overall_width"], entry["overall_width"],
+                                  entry["overall_length"], entry["overall_length"],
+                                  entry["overall_height"], entry["overall_height"],
+                                  entry["product_weight"], entry["product_weight"]))
+        return row_id
+
+    def _delete(self, conn, ids: list) -> None:
+        conn.executemany("DELETE FROM designs WHERE id = ?", [(i,) for i in ids])
+        if self.has_rtree:
+            conn.executemany("DELETE FROM design_dims WHERE id = ?", [(i,) for i in ids])
+
+    def find_within(self, width: float, length: float, height: float, tolerance: float = DEFAULT_TOLERANCE,
+                    weight: float = None, weight_tolerance: float = None, include_errors: bool = False,
+                    limit: int = DEFAULT_LIMIT) -> list:
+        """Existing designs whose overall dimensions are all within `tolerance` inches.
+
+        Args:
+            width, length, height: Overall crate dimensions to match (inches).
+            tolerance: Allowed difference per dimension (inches).
+            weight: Optional product weight (lb) to match as well.
+            weight_tolerance: Allowed weight difference (default: exact match).
+            include_errors: Also return designs recorded with pipeline errors.
+            limit: Maximum number of results.
+
+        Returns:
+            list: Dicts with the COLUMNS plus `deviation` (largest dimension difference)
+            and `exp_exists`, closest match first.
+        """
+        bounds = [(width - tolerance, width + tolerance), (length - tolerance, length + tolerance),
+                  (height - tolerance, height + tolerance)]
+        if weight is not None:
+            weight_tolerance = weight_tolerance or 0.0
+            bounds.append((weight - weight_tolerance, weight + weight_tolerance))
+        exact_columns = ("d.overall_width", "d.overall_length", "d.overall_height", "d.product_weight")
+        rtree_columns = (("r.max_width", "r.min_width"), ("r.max_length", "r.min_length"),
+                         ("r.max_height", "r.min_height"), ("r.max_weight", "r.min_weight"))
+
+        # The R*Tree stores 32-bit floats rounded outwards, so its hits are refined on the exact columns
+        clauses, args = [], []
+        for (low, high), column, (rtree_max, rtree_min) in zip(bounds, exact_columns, rtree_columns):
+            if self.has_rtree:
+                clauses.append(f"{rtree_max} >= ? AND {rtree_min} <= ?")
+                args.extend((low, high))
+            clauses.append(f"{column} BETWEEN ? AND ?")
+            args.extend((low, high))
+        if not include_errors:
+            clauses.append("d.status != 'ERROR'")
+        source = "design_dims r JOIN designs d ON d.id = r.id" if self.has_rtree else "designs d"
+        with self._lock:
+            rows = self._db().execute(
+                f"SELECT {', '.join('d.' + c for c in COLUMNS)} FROM {source} WHERE {' AND '.join(clauses)}",
+                args).fetchall()
+
+        matches = []
+        for row in rows:
+            match = _row_dict(row)
+            match["deviation"] = max(abs(match["overall_width"] - width), abs(match["overall_length"] - length),
+                                     abs(match["overall_height"] - height))
+            matches.append(match)
+        matches.sort(key=lambda m: (m["deviation"], -m["recorded"]))
+        return matches[:limit]
+
+    def find_similar(self, design, tolerance: float = DEFAULT_TOLERANCE, **kwargs) -> list:
+        """find_within() for the overall dimensions of a pipeline.CrateDesign."""
+        return self.find_within(design.crate_overall_width, design.crate_overall_length,
+                                design.crate_overall_height, tolerance=tolerance, **kwargs)
+
+    def get(self, ids) -> dict:
+        """Row id -> entry dict (COLUMNS plus `exp_exists`) for the ids that are still catalogued."""
+        ids = [int(i) for i in ids]
+        found = {}
+        with self._lock:
+            conn = self._db()
+            for start in range(0, len(ids), SQL_BATCH):
+                chunk = ids[start:start + SQL_BATCH]
+                for row in conn.execute(f"SELECT {', '.join(COLUMNS)} FROM designs "
+                                        f"WHERE id IN ({', '.join('?' * len(chunk))})", chunk):
+                    found[row[0]] = _row_dict(row)
+        return found
+
+    def product_envelopes(self, after_id: int = 0, include_errors: bool = False) -> list:
+        """(id, product width, length, height, weight) of every entry with an id above `after_id`, by id."""
+        status = "" if include_errors else " AND status != 'ERROR'"
+        with self._lock:
+            return self._db().execute(
+                "SELECT id, json_extract(params, '$.product_width'), json_extract(params, '$.product_length'), "
+                f"json_extract(params, '$.product_actual_height'), product_weight FROM designs WHERE id > ?{status} "
+                "ORDER BY id", (after_id,)).fetchall()
+
+    def count(self) -> int:
+        with self._lock:
+            return self._db().execute("SELECT COUNT(*) FROM designs").fetchone()[0]
+
+    def clear(self) -> None:
+        """Drops every entry."""
+        with self._lock:
+            conn = self._db()
+            with conn:
+                conn.execute("DELETE FROM designs")
+                if self.has_rtree:
+                    conn.execute("DELETE FROM design_dims")
+
+    def close(self) -> None:
+        if self._conn is not None and self._conn_pid == os.getpid():
+            self._conn.close()
+        self._conn = None
+
+
+_default_catalog = None
+_default_catalog_lock = threading.Lock()
+
+
+def get_default_catalog():
+    """The process-wide catalog at default_catalog_path(), or None when AUTOCRATE_NO_CATALOG is set."""
+    global _default_catalog
+    if os.environ.get(CATALOG_DISABLE_ENV, "").strip().lower() in pipeline.TRUE_STRINGS:
+        return None
+    with _default_catalog_lock:
+        path = default_catalog_path()
+        if _default_catalog is None or _default_catalog.path != path:
+            _default_catalog = DesignCatalog(path)
+        return _default_catalog
+
+
+def record_design(design, exp_path: str = "", order_id: str = "", app_version: str = config.VERSION,
+                  catalog: DesignCatalog = None):
+    """Records `design` in `catalog` (default: the shared catalog). Returns the row id, or None if disabled."""
+    catalog = catalog or get_default_catalog()
+    if catalog is None:
+        return None
+    return catalog.record(design, exp_path, order_id=order_id, app_version=app_version)
+
+
+def format_match(match: dict) -> str:
+    """One-line summary of a catalog entry, e.g. a find_within() result."""
+    location = match["exp_path"] or "(no .exp file)"
+    if match["exp_path"] and not match["exp_exists"]:
+        location += " (missing)"
+    offset = f" (off by {match['deviation']:.3f} in)" if "deviation" in match else ""
+    return (f"{match['overall_width']:.2f} x {match['overall_length']:.2f} x {match['overall_height']:.2f} in, "
+            f"{match['product_weight']:g} lb, {match['skid_count']}x {match['skid_type']} skids, "
+            f"panels {match['side_panel_case']}/{match['end_panel_case']}{offset} -> {location}")
+
+
+if __name__ == '__main__':
+    import sys
+
+    catalog = DesignCatalog(":memory:")
+    for weight in (900.0, 1800.0, 2600.0):
+        catalog.record(pipeline.design_crate(product_weight=weight, generate_exp=False), f"crate_{weight:g}.exp")
+    target = pipeline.design_crate(product_weight=1800.0, generate_exp=False)
+    tolerance = float(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_TOLERANCE
+    print(f"R*Tree index: {catalog.has_rtree}; {catalog.count()} designs")
+    for found in catalog.find_similar(target, tolerance=tolerance):
+        print(format_match(found))
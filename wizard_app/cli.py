@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Command line entry point for headless AutoCrate tasks (`python autocrate.py <command>`)."""
+
+import argparse
+import sys
+
+try:
+    from . import config
+except ImportError:
+    import config # For direct testing
+
+
+def _cmd_batch(args) -> int:
+    from . import batch
+
+    orders = batch.load_orders(args.source)
+    if not orders:
+        print(f"No crate orders found in '{args.source}'.", file=sys.stderr)
+        return 1
+    summary = batch.run_batch(orders, args.out, workers=args.workers, chunksize=args.chunksize,
+                              report_path=args.report, use_cache=not args.no_cache, delta=args.delta,
+                              use_catalog=not args.no_catalog)
+    print(f"Processed {summary['total']} orders in {summary['elapsed_seconds']:.2f}s "
+          f"({summary['ok']} OK, {summary['warnings']} warnings, {summary['failed']} failed) -> {summary['output_dir']}")
+    if summary["unchanged"]:
+        print(f"{summary['unchanged']} .exp files unchanged since the last run (not rewritten)")
+    return 0 if summary["failed"] == 0 else 2
+
+
+def _cmd_validate(args) -> int:
+    from . import batch
+    from . import schema
+
+    if args.source.lower().endswith(".csv"):
+        report = schema.validate_csv(args.source)
+    else:
+        report = batch.validate_orders(batch.load_orders(args.source))
+    if report.errors:
+        print(report.format(limit=args.limit))
+    print(f"{report.rows - report.invalid_rows} of {report.rows} orders valid, {report.invalid_rows} invalid",
+          file=sys.stderr)
+    return 0 if report.ok else 2
+
+
+def _cmd_delta(args) -> int:
+    from . import exp_delta
+
+    previous = exp_delta.parse_exp_file(args.previous)
+    if previous is None:
+        print(f"Previous .exp file '{args.previous}' not found.", file=sys.stderr)
+        return 1
+    current = exp_delta.parse_exp_file(args.current)
+    if current is None:
+        print(f"Current .exp file '{args.current}' not found.", file=sys.stderr)
+        return 1
+    changes = exp_delta.diff_expressions(previous, current)
+    lines = exp_delta.iter_delta_lines(changes, config.VERSION)
+    if args.out:
+        with open(args.out, 'w') as f:
+            f.write("\n".join(lines))
+    else:
+        print("\n".join(lines))
+    print(changes.summary(), file=sys.stderr)
+    return 0
+
+
+def _cmd_crosscheck(args) -> int:
+    from . import nx_expressions
+
+    if args.formula:
+        formula = nx_expressions.ExpressionFile.from_path(args.formula)
+    else:
+        try:
+            import create_skid_exp_file # Repository root script; on sys.path when run via autocrate.py
+        except ImportError:
+            print("No formula file given and create_skid_exp_file.py is not importable.", file=sys.stderr)
+            return 1
+        formula = nx_expressions.ExpressionFile.from_text(create_skid_exp_file.generate_nx_exp_file_content_for_skids({}))
+    report = nx_expressions.crosscheck_skids(formula, samples=args.samples, seed=args.seed, tolerance=args.tolerance)
+    mismatched = 0
+    for name, entry in report["expressions"].items():
+        print(f"{name}: {entry['mismatches']} of {report['samples']} differ (max error {entry['max_abs_error']:.6g})")
+        if entry["example"]:
+            mismatched += 1
+            print(f"    e.g. {entry['example']}")
+    return 0 if mismatched == 0 else 2
+
+
+def _cmd_serve(args) -> int:
+    from . import service
+
+    service.serve(args.host, args.port, workers=args.workers, queue_size=args.queue_size,
+                  max_batch=args.max_batch, use_cache=not args.no_cache)
+    return 0
+
+
+def _cmd_watch(args) -> int:
+    from . import inbox
+
+    stats = inbox.watch(args.inbox, args.out, once=args.once, done_dir=args.done, failed_dir=args.failed,
+                        workers=args.workers, max_in_flight=args.max_in_flight, settle=args.settle,
+                        use_cache=not args.no_cache, delta=args.delta, use_catalog=not args.no_catalog)
+    print(f"Processed {stats['processed']} order files ({stats['ok']} OK, {stats['warnings']} warnings, "
+          f"{stats['failed']} failed)")
+    return 0 if stats["failed"] == 0 else 2
+
+
+def _cmd_find(args) -> int:
+    from . import catalog
+
+    designs = catalog.DesignCatalog(args.catalog) if args.catalog else catalog.DesignCatalog()
+    matches = designs.find_within(args.width, args.length, args.height, tolerance=args.tolerance,
+                                  weight=args.weight, weight_tolerance=args.weight_tolerance, limit=args.limit)
+    for match in matches:
+        print(catalog.format_match(match))
+    print(f"{len(matches)} existing designs within {args.tolerance:g} in ({designs.count()} in {designs.path})",
+          file=sys.stderr)
+    return 0 if matches else 1
+
+
+def _parse_feature_weights(text: str) -> dict:
+    """"weight=2,skid_class=0" -> {"weight": 2.0, "skid_class": 0.0}"""
+    weights = {}
+    for item in filter(None, (part.strip() for part in text.split(","))):
+        name, sep, value = item.partition("=")
+        if not sep:
+            raise argparse.ArgumentTypeError(f"expected NAME=VALUE, got '{item}'")
+        try:
+            weights[name.strip()] = float(value)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"'{value}' is not a number")
+    return weights
+
+
+def _cmd_nearest(args) -> int:
+    from . import catalog
+    from . import neighbors
+
+    designs = catalog.DesignCatalog(args.catalog) if args.catalog else catalog.DesignCatalog()
+    try:
+        matches = neighbors.closest_crates(args.width, args.length, args.height, args.weight, k=args.k,
+                                           weights=args.weights, designs=designs)
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    for match in matches:
+        print(f"[{match['distance']:.3f}] {match['params']['product_width']:g} x {match['params']['product_length']:g} x "
+              f"{match['params']['product_actual_height']:g} in product: {catalog.format_match(match)}")
+    if not matches:
+        print(f"The design catalog {designs.path} is empty.", file=sys.stderr)
+    return 0 if matches else 1
+
+
+def _parse_sweep_axis(text: str) -> tuple:
+    """"product_width=20:120:0.5" -> ("product_width", [20.0, 20.5, ...])"""
+    from . import sweep
+
+    key, sep, spec = text.partition("=")
+    if not sep:
+        raise argparse.ArgumentTypeError(f"expected KEY=VALUES, got '{text}'")
+    try:
+        return key.strip(), sweep.parse_values(key.strip(), spec)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def _cmd_sweep(args) -> int:
+    import json
+    from . import sweep
+
+    base = None
+    if args.base:
+        with open(args.base, 'r') as f:
+            base = json.load(f)
+    columns = [column.strip() for column in args.columns.split(",") if column.strip()] if args.columns else None
+    try:
+        grid = sweep.SweepGrid(dict(args.param), base)
+        summary = sweep.run_sweep(grid, args.out, columns=columns, workers=args.workers, chunk_rows=args.chunk_rows)
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    print(f"{summary['rows']} rows in {summary['chunks']} chunks written to {summary['path']} "
+          f"in {summary['elapsed_seconds']:.1f}s", file=sys.stderr)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="autocrate", description=f"AutoCrate Wizard V{config.VERSION} command line tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    batch_parser = subparsers.add_parser("batch", help="Generate one .exp file per crate order using all CPU cores")
+    batch_parser.add_argument("source", help="Directory of .json orders, a glob, or a .csv / .jsonl manifest")
+    batch_parser.add_argument("-o", "--out", default="batch_output", help="Output directory for .exp files (default: batch_output)")
+    batch_parser.add_argument("-w", "--workers", type=int, default=None, help="Worker processes (default: CPU count, 1 = in-process)")
+    batch_parser.add_argument("--chunksize", type=int, default=None, help="Orders sent to a worker at a time")
+    batch_parser.add_argument("--report", default=None, help="Summary report path (.json or .csv)")
+    batch_parser.add_argument("--no-cache", action="store_true", help="Recompute every design instead of using the shared design cache")
+    batch_parser.add_argument("--delta", action="store_true", help="Also write <order>.delta.exp with only the expressions changed since the last run")
+    batch_parser.add_argument("--no-catalog", action="store_true", help="Do not record the designs in the design catalog")
+    batch_parser.set_defaults(func=_cmd_batch)
+
+    validate_parser = subparsers.add_parser("validate", help="Check crate orders against the input ranges without designing them")
+    validate_parser.add_argument("source", help="Directory of .json orders, a glob, or a .csv / .jsonl manifest")
+    validate_parser.add_argument("--limit", type=int, default=50, help="Maximum number of errors to list (default: 50)")
+    validate_parser.set_defaults(func=_cmd_validate)
+
+    delta_parser = subparsers.add_parser("delta", help="Write the expressions that changed between two .exp files")
+    delta_parser.add_argument("previous", help="Previously imported .exp file")
+    delta_parser.add_argument("current", help="Newly generated .exp file")
+    delta_parser.add_argument("-o", "--out", default=None, help="Delta file to write (default: print to stdout)")
+    delta_parser.set_defaults(func=_cmd_delta)
+
+    crosscheck_parser = subparsers.add_parser("crosscheck", help="Evaluate a formula-mode skid .exp file against the Python skid logic")
+    crosscheck_parser.add_argument("formula", nargs="?", default=None, help="Formula .exp file (default: the output of create_skid_exp_file.py)")
+    crosscheck_parser.add_argument("-n", "--samples", type=int, default=1000000, help="Random products to compare (default: 1000000)")
+    crosscheck_parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    crosscheck_parser.add_argument("--tolerance", type=float, default=1e-6, help="Absolute tolerance per value")
+    crosscheck_parser.set_defaults(func=_cmd_crosscheck)
+
+    serve_parser = subparsers.add_parser("serve", help="Serve crate designs over HTTP (POST /design, /designs)")
+    serve_parser.add_argument("--host", default="127.0.0.1", help="Listening address (default: 127.0.0.1)")
+    serve_parser.add_argument("-p", "--port", type=int, default=8765, help="Listening port (default: 8765)")
+    serve_parser.add_argument("-w", "--workers", type=int, default=None, help="Worker processes (default: CPU count, 0 = in-process)")
+    serve_parser.add_argument("--queue-size", type=int, default=256, help="Designs allowed to wait before requests get 503 (default: 256)")
+    serve_parser.add_argument("--max-batch", type=int, default=256, help="Largest /designs batch (default: 256)")
+    serve_parser.add_argument("--no-cache", action="store_true", help="Compute every design instead of using the shared design cache")
+    serve_parser.set_defaults(func=_cmd_serve)
+
+    watch_parser = subparsers.add_parser("watch", help="Turn order files dropped into an inbox folder into .exp files")
+    watch_parser.add_argument("inbox", help="Folder the order .json files are dropped into")
+    watch_parser.add_argument("-o", "--out", required=True, help="Outbox for the .exp and .result.json files")
+    watch_parser.add_argument("--done", default=None, help="Folder for processed order files (default: INBOX/done)")
+    watch_parser.add_argument("--failed", default=None, help="Folder for order files that failed (default: INBOX/failed)")
+    watch_parser.add_argument("-w", "--workers", type=int, default=None, help="Worker processes (default: CPU count, 0 = in-process)")
+    watch_parser.add_argument("--max-in-flight", type=int, default=None, help="Order files handed to the workers at once (default: 2 per worker)")
+    watch_parser.add_argument("--settle", type=float, default=1.0, help="Seconds a file must stay unchanged before it is read (default: 1.0)")
+    watch_parser.add_argument("--once", action="store_true", help="Process the files already in the inbox and exit")
+    watch_parser.add_argument("--no-cache", action="store_true", help="Recompute every design instead of using the shared design cache")
+    watch_parser.add_argument("--delta", action="store_true", help="Also write <order>.delta.exp with only the expressions changed since the last run")
+    watch_parser.add_argument("--no-catalog", action="store_true", help="Do not record the designs in the design catalog")
+    watch_parser.set_defaults(func=_cmd_watch)
+
+    find_parser = subparsers.add_parser("find", help="List catalogued crates with overall dimensions close to the given ones")
+    find_parser.add_argument("width", type=float, help="Overall crate width (in)")
+    find_parser.add_argument("length", type=float, help="Overall crate length (in)")
+    find_parser.add_argument("height", type=float, help="Overall crate height (in)")
+    find_parser.add_argument("-t", "--tolerance", type=float, default=0.5, help="Allowed difference per dimension in inches (default: 0.5)")
+    find_parser.add_argument("--weight", type=float, default=None, help="Also match the product weight (lb)")
+    find_parser.add_argument("--weight-tolerance", type=float, default=None, help="Allowed weight difference in lb (default: exact)")
+    find_parser.add_argument("--limit", type=int, default=50, help="Maximum number of results (default: 50)")
+    find_parser.add_argument("--catalog", default=None, help="Catalog file (default: the shared design catalog)")
+    find_parser.set_defaults(func=_cmd_find)
+
+    nearest_parser = subparsers.add_parser("nearest", help="List the catalogued crates closest to a product envelope")
+    nearest_parser.add_argument("width", type=float, help="Product width (in)")
+    nearest_parser.add_argument("length", type=float, help="Product length (in)")
+    nearest_parser.add_argument("height", type=float, help="Product height (in)")
+    nearest_parser.add_argument("weight", type=float, help="Product weight (lb)")
+    nearest_parser.add_argument("-k", type=int, default=5, help="Number of crates (default: 5)")
+    nearest_parser.add_argument("--weights", type=_parse_feature_weights, default=None,
+                                help="Feature weights, e.g. weight=2,skid_class=0 (features: width, length, height, weight, skid_class)")
+    nearest_parser.add_argument("--catalog", default=None, help="Catalog file (default: the shared design catalog)")
+    nearest_parser.set_defaults(func=_cmd_nearest)
+
+    sweep_parser = subparsers.add_parser("sweep", help="Evaluate a grid of inputs and write the results to Arrow IPC or Parquet")
+    sweep_parser.add_argument("-p", "--param", action="append", type=_parse_sweep_axis, required=True,
+                              metavar="KEY=VALUES",
+                              help="Parameter to vary: start:stop:step, a,b,c, or product_weight=classes (repeatable)")
+    sweep_parser.add_argument("--base", default=None, help="JSON order holding the values of the other parameters (default: the defaults)")
+    sweep_parser.add_argument("-c", "--columns", default=None,
+                              help="Comma-separated result columns (default: all kernel columns; also status, errors, exp:<name>)")
+    sweep_parser.add_argument("-o", "--out", required=True, help="Output file (.parquet for Parquet, otherwise Arrow IPC)")
+    sweep_parser.add_argument("-w", "--workers", type=int, default=None, help="Worker processes for pipeline columns (default: CPU count)")
+    sweep_parser.add_argument("--chunk-rows", type=int, default=None, help="Rows per record batch / row group")
+    sweep_parser.set_defaults(func=_cmd_sweep)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -52,6 +52,7 @@ PLYWOOD_STD_HEIGHT = 96.0 # Standard plywood sheet height
 # --- App Constants ---
 DEFAULT_CLEARANCE_ABOVE_PRODUCT: float = 1.5
 DEFAULT_PANEL_THICKNESS_UI: float = 0.25
+EXP_HEADER_TIMESTAMP: bool = False # Generation time in the .exp header; off so unchanged designs give identical files
 
 # UI Default Floorboard Selection
 DEFAULT_STANDARD_LUMBER_NOMINALS_UI: list = [ 
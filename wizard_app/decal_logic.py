@@ -3,10 +3,17 @@
 
 """Logic for calculating decal/stencil placements."""
 
-# try:
-#     from . import config
-# except ImportError:
-#     import config # For direct testing
+try:
+    from . import config
+    from . import rules
+except ImportError:
+    import config # For direct testing
+    import rules
+
+# Section of the NX .exp file holding this module's exp_data (see exp_generator.ExpSection)
+EXP_SECTION = {
+    "key": "decal", "title": "DECAL / STENCIL PARAMETERS", "order": 70,
+}
 
 def calculate_decal_placements(product_is_fragile: bool, product_requires_special_handling: bool, 
                                  panel_height_side: float, panel_width_side: float,
@@ -33,12 +40,12 @@ def calculate_decal_placements(product_is_fragile: bool, product_requires_specia
     exp_data_decals = {}
 
     # This is highly dependent on how decals are represented and controlled in NX.
-    # The `DECAL_RULES` in config.py will be the primary source.
+    # The decal rules (config.DECAL_RULES or the active rule file, see rules.py) are the primary source.
     # We need to translate those rules into specific X, Y, Z positions, angles, and suppression flags for NX.
 
     # Example for a "Fragile" decal (simplified)
     if product_is_fragile:
-        fragile_rule = config.DECAL_RULES.get("fragile", {})
+        fragile_rule = rules.get_rules().decal_rules.get("fragile", {})
         if fragile_rule:
             decal_info_side = {
                 "id": fragile_rule["id"],
@@ -54,7 +61,7 @@ def calculate_decal_placements(product_is_fragile: bool, product_requires_specia
             # Add to exp_data if specific expressions control this decal instance
             # exp_data_decals["CALC_Fragile_Side_Decal_Suppress"] = 0
 
-    # Similar logic for "handling_horizontal", "cog" based on their rules in config.DECAL_RULES
+    # Similar logic for "handling_horizontal", "cog" based on their decal rules
     # CoG placement will be more complex due to its vertical_placement_rules_crate_height
 
     return {
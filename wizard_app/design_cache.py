@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Content-addressed cache of complete crate designs.
+
+Designs are keyed by a SHA-256 of the normalized input parameters plus a
+fingerprint of the config/rules constants and the active rule set, so editing
+config.py or reloading the rule file invalidates every entry automatically.
+Lookups go through an in-memory LRU tier first and then an on-disk SQLite tier (size-bounded, least recently used evicted first)
+that the GUI, the batch CLI and worker processes all share.
+"""
+
+from collections import OrderedDict
+import hashlib
+import json
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+try:
+    from . import config
+    from . import panel_logic
+    from . import pipeline
+    from . import rules
+except ImportError:
+    import config # For direct testing
+    import panel_logic
+    import pipeline
+    import rules
+
+CACHE_DIR_ENV = "AUTOCRATE_CACHE_DIR" # Overrides the shared cache location
+CACHE_DISABLE_ENV = "AUTOCRATE_NO_CACHE" # Set to 1 to bypass the default cache
+CACHE_FILENAME = "design_cache.sqlite3"
+DEFAULT_MEMORY_ITEMS = 512
+DEFAULT_MAX_DISK_BYTES = 256 * 1024 * 1024
+DISK_EVICT_TO_FRACTION = 0.9 # Evict down to this share of max_disk_bytes once over the limit
+
+log = logging.getLogger(__name__)
+
+_fingerprint = None
+_fingerprint_rules = None # RuleSet the fingerprint was computed for
+
+
+def default_cache_dir() -> str:
+    """Shared per-user cache directory (AUTOCRATE_CACHE_DIR overrides it)."""
+    override = os.environ.get(CACHE_DIR_ENV)
+    if override:
+        return override
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "autocrate")
+
+
+def _module_constants(module) -> list:
+    return sorted((name, value) for name, value in vars(module).items() if name.isupper())
+
+
+def config_fingerprint(refresh: bool = False) -> str:
+    """Hash of every config / panel rule constant plus the active rule set.
+
+    Computed once per process and again whenever a new rule set is activated (see
+    rules.set_rules), so a rule reload invalidates cached designs. Pass refresh=True
+    after changing constants at runtime (e.g. in tests).
+    """
+    global _fingerprint, _fingerprint_rules
+    active_rules = rules.get_rules()
+    if _fingerprint is None or refresh or active_rules is not _fingerprint_rules:
+        source = repr((_module_constants(config), _module_constants(panel_logic),
+                       panel_logic.get_panel_case_table(), active_rules.fingerprint))
+        _fingerprint = hashlib.sha256(source.encode("utf-8")).hexdigest()[:16]
+        _fingerprint_rules = active_rules
+    return _fingerprint
+
+
+def design_key(params=None, generate_exp: bool = True, app_version: str = config.VERSION, **overrides) -> str:
+    """Canonical cache key for one design request (see pipeline.normalize_parameters)."""
+    normalized = pipeline.normalize_parameters(params, **overrides)
+    payload = json.dumps({"params": normalized, "generate_exp": bool(generate_exp), "app_version": app_version,
+                          "config": config_fingerprint()},
+                         sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class DesignCache:
+    """Two-tier (memory LRU + SQLite) cache of pipeline.CrateDesign results.
+
+    Cached designs are shared between callers and should be treated as read-only.
+    """
+
+    def __init__(self, path: str = None, memory_items: int = DEFAULT_MEMORY_ITEMS,
+                 max_disk_bytes: int = DEFAULT_MAX_DISK_BYTES, disk: bool = True):
+        """
+        Args:
+            path: SQLite file. Defaults to <default_cache_dir()>/design_cache.sqlite3.
+            memory_items: Entries kept in the in-process LRU tier (0 disables it).
+            max_disk_bytes: Size limit of the SQLite tier before old entries are evicted.
+            disk: False keeps the cache purely in memory.
+        """
+        self.path = (path or os.path.join(default_cache_dir(), CACHE_FILENAME)) if disk else None
+        self.memory_items = memory_items
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_pid = None
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "disk_errors": 0}
+
+    # --- SQLite tier ---
+    def _db(self):
+        """Opens the SQLite tier lazily; each process (e.g. batch workers) gets its own connection."""
+        if self.path is None:
+            return None
+        if self._conn is None or self._conn_pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute("CREATE TABLE IF NOT EXISTS designs ("
+                             "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)")
+                conn.execute("CREATE INDEX IF NOT EXISTS designs_last_access ON designs(last_access)")
+                conn.commit()
+            except sqlite3.Error:
+                conn.close()
+                raise
+            self._conn, self._conn_pid = conn, os.getpid()
+        return self._conn
+
+    def _disk_get(self, key: str):
+        conn = self._db()
+        if conn is None:
+            return None
+        row = conn.execute("SELECT value FROM designs WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        conn.execute("UPDATE designs SET last_access = ? WHERE key = ?", (time.time(), key))
+        conn.commit()
+        try:
+            return pickle.loads(row[0])
+        except Exception: # Entry written by an incompatible version; treat as a miss
+            return None
+
+    def _disk_put(self, key: str, design) -> None:
+        conn = self._db()
+        if conn is None:
+            return
+        blob = pickle.dumps(design, protocol=pickle.HIGHEST_PROTOCOL)
+        conn.execute("INSERT OR REPLACE INTO designs (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                     (key, blob, len(blob), time.time()))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM designs").fetchone()[0]
+        if total > self.max_disk_bytes:
+            self._evict(conn, total)
+        conn.commit()
+
+    def _evict(self, conn, total: int) -> None:
+        target = self.max_disk_bytes * DISK_EVICT_TO_FRACTION
+        doomed = []
+        for key, size in conn.execute("SELECT key, size FROM designs ORDER BY last_access"):
+            if total <= target:
+                break
+            doomed.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM designs WHERE key = ?", doomed)
+        self.stats["evictions"] += len(doomed)
+
+    # --- Public API ---
+    def get(self, key: str):
+        """Returns the cached design for `key`, or None."""
+        with self._lock:
+            design = self._memory.get(key)
+            if design is not None:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return design
+            try:
+                design = self._disk_get(key)
+            except (sqlite3.Error, OSError) as e:
+                self._disk_failed("read", e)
+                design = None
+            if design is None:
+                self.stats["misses"] += 1
+                return None
+            self.stats["disk_hits"] += 1
+            self._remember(key, design)
+            return design
+
+    def put(self, key: str, design) -> None:
+        with self._lock:
+            self._remember(key, design)
+            try:
+                self._disk_put(key, design)
+            except (sqlite3.Error, OSError) as e:
+                self._disk_failed("write", e)
+
+    def _disk_failed(self, action: str, error: Exception) -> None:
+        """The cache is only an optimization: a locked, corrupt or unreadable SQLite tier counts as a miss
+        (or a skipped write) and is logged, once per cache as a warning."""
+        self.stats["disk_errors"] += 1
+        level = logging.WARNING if self.stats["disk_errors"] == 1 else logging.DEBUG
+        log.log(level, "Design cache %s failed for %s (%s: %s); continuing without the disk tier",
+                action, self.path, type(error).__name__, error)
+
+    def _remember(self, key: str, design) -> None:
+        if self.memory_items <= 0:
+            return
+        self._memory[key] = design
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def design_crate(self, params=None, generate_exp: bool = True, app_version: str = config.VERSION,
+                     compute=None, **overrides):
+        """pipeline.design_crate() with caching. Returns (design, cache_hit).
+
+        `compute(params, **overrides)` replaces pipeline.design_crate on a miss, e.g. an
+        IncrementalPipeline.update configured with the same generate_exp/app_version.
+        """
+        key = design_key(params, generate_exp=generate_exp, app_version=app_version, **overrides)
+        design = self.get(key)
+        if design is not None:
+            return design, True
+        if compute is not None:
+            design = compute(params, **overrides)
+        else:
+            design = pipeline.design_crate(params, generate_exp=generate_exp, app_version=app_version, **overrides)
+        self.put(key, design)
+        return design, False
+
+    def clear(self) -> None:
+        """Drops every entry from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            conn = self._db()
+            if conn is not None:
+                conn.execute("DELETE FROM designs")
+                conn.commit()
+
+    def disk_usage(self) -> dict:
+        conn = self._db()
+        if conn is None:
+            return {"entries": 0, "bytes": 0}
+        entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM designs").fetchone()
+        return {"entries": entries, "bytes": size}
+
+    def close(self) -> None:
+        if self._conn is not None and self._conn_pid == os.getpid():
+            self._conn.close()
+        self._conn = None
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache():
+    """The process-wide shared cache, or None when AUTOCRATE_NO_CACHE is set."""
+    global _default_cache
+    if os.environ.get(CACHE_DISABLE_ENV, "").strip().lower() in pipeline.TRUE_STRINGS:
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = DesignCache()
+        return _default_cache
+
+
+def cached_design_crate(params=None, generate_exp: bool = True, app_version: str = config.VERSION,
+                        cache: DesignCache = None, compute=None, **overrides):
+    """Drop-in for pipeline.design_crate() that goes through `cache` (default: the shared cache)."""
+    cache = cache or get_default_cache()
+    if cache is None:
+        if compute is not None:
+            return compute(params, **overrides)
+        return pipeline.design_crate(params, generate_exp=generate_exp, app_version=app_version, **overrides)
+    return cache.design_crate(params, generate_exp=generate_exp, app_version=app_version, compute=compute,
+                              **overrides)[0]
+
+
+if __name__ == '__main__':
+    import sys
+
+    cache = get_default_cache() or DesignCache()
+    if len(sys.argv) > 1 and sys.argv[1] == "clear":
+        cache.clear()
+        print(f"Cleared {cache.path}")
+    else:
+        usage = cache.disk_usage()
+        print(f"{cache.path}: {usage['entries']} designs, {usage['bytes'] / 1024:.1f} KiB "
+              f"(config fingerprint {config_fingerprint()})")
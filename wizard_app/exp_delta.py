@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Delta NX expression files: only the expressions that changed since the last write.
+
+A full .exp import makes NX update every expression and regenerate the whole
+crate assembly. write_exp_delta() instead parses the previously written .exp
+(or the .exp content of a cached design), compares it with the new expression
+set and writes a `<name>.delta.exp` file holding only the changed and added
+expressions. When nothing changed, the full file is left untouched and the
+delta file carries the UNCHANGED status, which tells the NX journal to skip
+the import.
+"""
+
+from dataclasses import dataclass, field
+import os
+import re
+
+try:
+    from . import config
+    from . import exp_generator
+    from . import output_files
+    from . import pipeline
+except ImportError:
+    import config # For direct testing
+    import exp_generator
+    import output_files
+    import pipeline
+
+STATUS_NEW = "NEW" # No previous expressions: import the full file
+STATUS_CHANGED = "CHANGED" # Import the delta file
+STATUS_UNCHANGED = "UNCHANGED" # Skip the import
+
+DELTA_SUFFIX = ".delta.exp"
+DELTA_TITLE = "// NX Expression Delta for AutoCrate Wizard"
+STATUS_PREFIX = "// Delta Status: "
+
+# [unit]name = value // comment, (String) name = "value", or name = value
+_EXPRESSION_RE = re.compile(
+    r'^\s*(?:\[(?P<unit>[^\]]+)\]\s*|\((?P<type>[A-Za-z]+)\)\s*)?'
+    r'(?P<name>[A-Za-z_][A-Za-z0-9_]*)\s*=\s*'
+    r'(?P<value>"(?:[^"\\]|\\.)*"|(?:[^/]|/(?!/))*?)\s*(?://.*)?$'
+)
+
+
+@dataclass(frozen=True)
+class ExpExpression:
+    """One parsed expression line."""
+    name: str
+    unit: str # NX unit, "String" for string expressions, "" for unitless
+    value: str # Value text as written
+    line: str # Full source line (written unchanged into delta files)
+
+    def comparable(self) -> tuple:
+        """(unit, value) with numbers compared by value, so 1.5 == 1.5000."""
+        try:
+            return (self.unit, float(self.value))
+        except ValueError:
+            return (self.unit, self.value)
+
+
+@dataclass
+class ExpDelta:
+    """Difference between the previous and the new expression set."""
+    status: str
+    changed: list = field(default_factory=list) # New ExpExpression for each changed value or unit
+    added: list = field(default_factory=list) # ExpExpression not present before
+    removed: list = field(default_factory=list) # Names no longer written
+    unchanged: int = 0
+    exp_path: str = ""
+    delta_path: str = ""
+    exp_written: bool = False # False when the full .exp already held this content
+
+    @property
+    def change_count(self) -> int:
+        return len(self.changed) + len(self.added) + len(self.removed)
+
+    @property
+    def skip_import(self) -> bool:
+        return self.status == STATUS_UNCHANGED
+
+    def summary(self) -> str:
+        if self.status == STATUS_UNCHANGED:
+            return f"{STATUS_UNCHANGED} - skip import ({self.unchanged} expressions unchanged)"
+        if self.status == STATUS_NEW:
+            return f"{STATUS_NEW} - import the full file ({len(self.added)} expressions)"
+        return (f"{STATUS_CHANGED} - {len(self.changed)} changed, {len(self.added)} added, "
+                f"{len(self.removed)} removed, {self.unchanged} unchanged")
+
+
+def parse_exp_lines(lines) -> dict:
+    """Name -> ExpExpression for every expression line; comments and blank lines are skipped."""
+    expressions = {}
+    for raw in lines:
+        line = raw.rstrip("\r\n")
+        stripped = line.lstrip()
+        if not stripped or stripped.startswith("//"):
+            continue
+        match = _EXPRESSION_RE.match(line)
+        if not match:
+            continue
+        unit = match.group("unit") or match.group("type") or ""
+        expressions[match.group("name")] = ExpExpression(match.group("name"), unit, match.group("value"), line.strip())
+    return expressions
+
+
+def parse_exp_text(text: str) -> dict:
+    """Parses .exp content, e.g. CrateDesign.exp_content from the design cache."""
+    return parse_exp_lines(text.splitlines())
+
+
+def parse_exp_file(path: str):
+    """Parses an .exp file; returns None when it does not exist."""
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return parse_exp_lines(f)
+
+
+def diff_expressions(previous, current: dict) -> ExpDelta:
+    """Compares two parsed expression sets. `previous` None means nothing was written before."""
+    if previous is None:
+        return ExpDelta(STATUS_NEW, added=list(current.values()))
+    delta = ExpDelta(STATUS_UNCHANGED)
+    for name, expression in current.items():
+        before = previous.get(name)
+        if before is None:
+            delta.added.append(expression)
+        elif before.comparable() != expression.comparable():
+            delta.changed.append(expression)
+        else:
+            delta.unchanged += 1
+    delta.removed = [name for name in previous if name not in current]
+    if delta.change_count:
+        delta.status = STATUS_CHANGED
+    return delta
+
+
+def iter_delta_lines(delta: ExpDelta, app_version: str = "N/A"):
+    """Yields the delta file line by line: status header, changed and added expressions, removed names."""
+    yield DELTA_TITLE
+    yield f"// AutoCrate Wizard Version: {app_version}"
+    yield f"{STATUS_PREFIX}{delta.summary()}"
+    yield ""
+    for expression in delta.changed + delta.added:
+        yield expression.line
+    for name in delta.removed:
+        yield f"// Removed: {name} (NX keeps it; delete it in the part if it is no longer referenced)"
+    yield "// End of AutoCrate Wizard Delta"
+
+
+def delta_path_for(exp_path: str) -> str:
+    """crate.exp -> crate.delta.exp"""
+    root, _ = os.path.splitext(exp_path)
+    return root + DELTA_SUFFIX
+
+
+def write_exp_delta(design, path: str, delta_path: str = None, previous=None,
+                    app_version: str = config.VERSION) -> ExpDelta:
+    """Writes the delta file for `design` against the .exp previously written at `path`.
+
+    Args:
+        design: pipeline.CrateDesign to write.
+        path: The full .exp file. It is rewritten only when its content changed.
+        delta_path: Delta file path (default: `path` with a .delta.exp suffix).
+        previous: Parsed previous expressions (parse_exp_text / parse_exp_file) to diff
+            against instead of the file at `path`, e.g. from a cached design.
+        app_version: Version written into generated headers.
+
+    Returns:
+        ExpDelta with the status and the written paths.
+    """
+    if previous is None:
+        previous = parse_exp_file(path)
+    if design.exp_content:
+        lines = design.exp_content.splitlines()
+    else:
+        lines = exp_generator.iter_exp_lines(design.params, design.skid, design.floorboard, design.wall,
+                                             design.cap, design.decal, app_version=app_version)
+    delta = diff_expressions(previous, parse_exp_lines(lines))
+    delta.exp_written = pipeline.write_exp_file_if_changed(design, path, app_version=app_version)
+    delta.exp_path = path
+    delta.delta_path = delta_path or delta_path_for(path)
+    output_files.write_text_if_changed(delta.delta_path, "\n".join(iter_delta_lines(delta, app_version)))
+    return delta
+
+
+if __name__ == '__main__':
+    import sys
+    import tempfile
+
+    target = sys.argv[1] if len(sys.argv) > 1 else os.path.join(tempfile.gettempdir(), "AutoCrate_Delta_Test.exp")
+    for weight in (1800.0, 1800.0, 2600.0):
+        result = write_exp_delta(pipeline.design_crate(product_weight=weight), target)
+        print(f"product_weight={weight}: {result.summary()} -> {result.delta_path}")
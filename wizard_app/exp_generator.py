@@ -1,15 +1,187 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-"""Functions to generate the Siemens NX Expression File content."""
+"""Functions to generate the Siemens NX Expression File content.
 
+The file is assembled from registered sections. Each logic module declares
+an EXP_SECTION (title, order, and unit annotations for its `exp_data` keys)
+that is registered on first use; this module registers the user-controls and
+crate-dimension sections itself.
+iter_exp_lines() yields the file line by line and write_nx_exp_file()
+streams those lines to an open file handle. No full-file string is built.
+generate_nx_exp_file_content() joins the same lines for callers that want
+a string.
+
+Output is deterministic: the same design always gives the same bytes, so
+unchanged files can be detected by hash (see output_files). The generation
+time is only written into the header when config.EXP_HEADER_TIMESTAMP is set
+or a timestamp is passed in.
+"""
+
+from dataclasses import dataclass, field
 import datetime
+import importlib
+import math
+import re
+from typing import Callable, Optional
 
 try:
     from . import config
 except ImportError:
     import config # For direct testing
 
+HEADER_TITLE = "// NX Expressions for AutoCrate Wizard - Skids, Floorboards & Cap Assembly"
+TIMESTAMP_PREFIX = "// Parameters from PyQt GUI at: "
+FOOTER = "// End of AutoCrate Wizard Expressions"
+SECTION_RULE = "// ==========================================="
+FLOAT_DECIMALS = 4
+DEFAULT_UNIT = "Inch"
+
+# Unit rules applied in order when a section does not annotate a key explicitly.
+# None means a unitless NX number (counts, 0/1 flags, ratios).
+DEFAULT_UNIT_RULES = (
+    (re.compile(r"(_Count|_Count_[XY]|_Flag|_Removable|_Has_Splice|_Exemption|_SqFt)$"), None),
+    (re.compile(r"_Use_|^CALC_Use_"), None),
+    (re.compile(r"Weight"), "lbm"),
+)
+
+# Logic modules whose EXP_SECTION (ExpSection keyword arguments) is registered on first use
+_BUILTIN_SECTION_MODULES = ("skid_logic", "floorboard_logic", "wall_logic", "cap_logic", "decal_logic")
+
+
+@dataclass(frozen=True)
+class ExpSection:
+    """One titled block of the .exp file.
+
+    Attributes:
+        key: Registry key; also the stage-results name whose `exp_data` is emitted by default.
+        title: Heading text (the section number is added when writing).
+        order: Sort position in the file.
+        units: Explicit NX unit per expression name (None for unitless); overrides DEFAULT_UNIT_RULES.
+        comments: Trailing comment per expression name.
+        expressions: Optional callable(context) -> iterable of (name, value) pairs. Defaults to
+            the `exp_data` of context[key]. The context holds "params", the stage results
+            ("skid", "floorboard", "wall", "cap", "decal") and "app_version".
+    """
+    key: str
+    title: str
+    order: int
+    units: dict = field(default_factory=dict)
+    comments: dict = field(default_factory=dict)
+    expressions: Optional[Callable] = None
+
+    def iter_expressions(self, context: dict):
+        if self.expressions is not None:
+            return self.expressions(context)
+        results = context.get(self.key) or {}
+        return (results.get('exp_data') or {}).items()
+
+    def unit_for(self, name: str):
+        if name in self.units:
+            return self.units[name]
+        for pattern, unit in DEFAULT_UNIT_RULES:
+            if pattern.search(name):
+                return unit
+        return DEFAULT_UNIT
+
+
+_sections = {}
+_builtins_loaded = False
+
+
+def register_section(section: ExpSection) -> ExpSection:
+    """Adds (or replaces, by key) a section of the .exp file."""
+    _sections[section.key] = section
+    return section
+
+
+def registered_sections() -> list:
+    """All registered sections in file order (registers the logic modules' sections on first use)."""
+    global _builtins_loaded
+    if not _builtins_loaded:
+        package = __package__ or None
+        for module_name in _BUILTIN_SECTION_MODULES:
+            module = importlib.import_module(f".{module_name}" if package else module_name, package)
+            if module.EXP_SECTION["key"] not in _sections: # Keep sections replaced via register_section()
+                register_section(ExpSection(**module.EXP_SECTION))
+        _builtins_loaded = True
+    return sorted(_sections.values(), key=lambda section: section.order)
+
+
+def format_value(value) -> str:
+    """Consistent number formatting: integers as-is, floats with FLOAT_DECIMALS places."""
+    if hasattr(value, 'item'): # numpy scalar (e.g. from the batch layouts)
+        value = value.item()
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    return f"{float(value):.{FLOAT_DECIMALS}f}"
+
+
+def format_expression(name: str, value, unit: Optional[str] = DEFAULT_UNIT, comment: str = "") -> str:
+    """One .exp line, e.g. '[Inch]CALC_Skid_Pitch = 18.2500 // comment'."""
+    suffix = f" // {comment}" if comment else ""
+    if hasattr(value, 'item'):
+        value = value.item()
+    if value is None or (isinstance(value, float) and not math.isfinite(value)):
+        return f"// {name} not available{suffix}"
+    if isinstance(value, str):
+        escaped = value.replace('\\', '\\\\').replace('"', '\\"')
+        return f'(String) {name} = "{escaped}"{suffix}'
+    prefix = f"[{unit}]" if unit else ""
+    return f"{prefix}{name} = {format_value(value)}{suffix}"
+
+
+def _section_lines(number: int, section: ExpSection, context: dict):
+    yield SECTION_RULE
+    yield f"// {number}. {section.title}"
+    yield SECTION_RULE
+    emitted = False
+    for name, value in section.iter_expressions(context):
+        emitted = True
+        yield format_expression(name, value, section.unit_for(name), section.comments.get(name, ""))
+    if not emitted:
+        yield "// (no expressions)"
+    yield ""
+
+
+def iter_exp_lines(product_params: dict, skid_results: dict, floorboard_results: dict, wall_results: dict,
+                   cap_results: dict, decal_results: dict, app_version: str = "N/A", timestamp: str = None):
+    """Yields the .exp file line by line (without newlines). Arguments as for generate_nx_exp_file_content.
+
+    `timestamp` adds a "Parameters from PyQt GUI at" header line; by default it is only
+    written (with the current time) when config.EXP_HEADER_TIMESTAMP is set.
+    """
+    context = {
+        "params": product_params or {}, "skid": skid_results or {}, "floorboard": floorboard_results or {},
+        "wall": wall_results or {}, "cap": cap_results or {}, "decal": decal_results or {},
+        "app_version": app_version,
+    }
+    if timestamp is None and config.EXP_HEADER_TIMESTAMP:
+        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    yield HEADER_TITLE
+    if timestamp:
+        yield f"{TIMESTAMP_PREFIX}{timestamp}"
+    yield f"// AutoCrate Wizard Version: {app_version}"
+    yield ""
+    for number, section in enumerate(registered_sections(), start=1):
+        yield from _section_lines(number, section, context)
+    yield FOOTER
+
+
+def write_nx_exp_file(fh, product_params: dict, skid_results: dict, floorboard_results: dict, wall_results: dict,
+                      cap_results: dict, decal_results: dict, app_version: str = "N/A", timestamp: str = None) -> int:
+    """Streams the .exp content to the text file handle `fh`. Returns the number of lines written."""
+    count = 0
+    for count, line in enumerate(iter_exp_lines(product_params, skid_results, floorboard_results, wall_results,
+                                                cap_results, decal_results, app_version, timestamp), start=1):
+        if count > 1:
+            fh.write("\n")
+        fh.write(line)
+    return count
+
+
 def generate_nx_exp_file_content(product_params: dict, skid_results: dict, 
                                  floorboard_results: dict, wall_results: dict, 
                                  cap_results: dict, decal_results: dict, 
@@ -28,71 +200,54 @@ def generate_nx_exp_file_content(product_params: dict, skid_results: dict,
     Returns:
         str: The content of the .exp file.
     """
-    lines = []
-    now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    lines.append(f"// NX Expressions for AutoCrate Wizard - Skids, Floorboards & Cap Assembly")
-    lines.append(f"// Parameters from PyQt GUI at: {now}")
-    lines.append(f"// AutoCrate Wizard Version: {app_version}")
-    lines.append("")
-    # 1. USER CONTROLS
-    lines.append("// =============================")
-    lines.append("// 1. USER CONTROLS (Values from UI)")
-    lines.append("// =============================")
-    # Product params (example units)
-    lines.append(f"[lbm]product_weight = {product_params.get('product_weight', 0.0)}  // Product Weight")
-    lines.append(f"[Inch]product_width = {product_params.get('product_width', 0.0):.3f}     // Product Width - across skids")
-    lines.append(f"[Inch]product_length = {product_params.get('product_length', 0.0):.3f}    // Product Length - along skids")
-    lines.append(f"[Inch]product_actual_height = {product_params.get('product_actual_height', 0.0):.3f} // Product Actual Height")
-    lines.append(f"[Inch]clearance_side = {product_params.get('clearance_side', 0.0):.3f}     // Clearance per Side")
-    lines.append(f"[Inch]clearance_above_product = {product_params.get('clearance_above_product', 0.0):.3f} // Clearance above product")
-    lines.append(f"[Inch]panel_thickness = {product_params.get('panel_thickness', 0.0):.3f}   // Panel Sheathing Thickness")
-    lines.append(f"[Inch]cleat_thickness = {product_params.get('cleat_thickness', 0.0):.3f}   // General Cleat Actual Thickness")
-    lines.append(f"[Inch]wall_cleat_width = {product_params.get('wall_cleat_width', 0.0):.3f} // Wall Cleat Actual Width")
-    lines.append(f"[Inch]floor_lumbar_thickness = {product_params.get('floor_lumbar_thickness', 0.0):.3f} // Floorboard Actual Thickness")
-    lines.append(f"[Inch]cap_cleat_width = {product_params.get('cap_cleat_width', 0.0):.3f}     // Cap Cleat Actual Width")
-    lines.append(f"[Inch]max_cap_cleat_spacing_rule = {product_params.get('max_top_cleat_spacing', 0.0):.3f} // Max rule for cap cleats")
-    lines.append("")
-    # 2. CALCULATED DIMENSIONS
-    lines.append("// ===========================================")
-    lines.append("// 2. CALCULATED CRATE AND USABLE DIMENSIONS (NX Expressions)")
-    lines.append("// ===========================================")
-    # Example calculated values (add more as needed)
-    lines.append(f"[Inch]crate_width_OD = ... // TODO: Add calculation")
-    lines.append(f"[Inch]crate_length_OD = ... // TODO: Add calculation")
-    lines.append(f"[Inch]skid_usable_width_ID = ... // TODO: Add calculation")
-    lines.append("")
-    # 3. SKID LAYOUT
-    lines.append("// =============================")
-    lines.append("// 3. SKID LAYOUT (Values from Python skid_logic, for NX Pattern)")
-    lines.append("// =============================")
-    # Example skid values
-    lines.append(f"[Inch]INPUT_Skid_Nominal_Width = {skid_results.get('skid_actual_width', 0.0):.3f}")
-    lines.append(f"[Inch]INPUT_Skid_Nominal_Height = {skid_results.get('skid_actual_height', 0.0):.3f}")
-    lines.append(f"CALC_Skid_Count = {skid_results.get('skid_count', 0)}")
-    lines.append(f"[Inch]CALC_Skid_Pitch = {skid_results.get('actual_center_to_center_spacing', 0.0):.4f}")
-    lines.append(f"[Inch]CALC_First_Skid_Pos_X = {skid_results.get('first_skid_position_offset_x', 0.0):.4f}")
-    lines.append(f"[Inch]INPUT_Skid_Actual_Length = {skid_results.get('skid_actual_length', 0.0):.3f}")
-    lines.append("")
-    # 4. FLOORBOARD PARAMETERS
-    lines.append("// ===========================================")
-    lines.append("// 4. FLOORBOARD PARAMETERS (for N-Instance Suppression Strategy)")
-    lines.append("// ===========================================")
-    # Example floorboard values (add more as needed)
-    lines.append(f"[Inch]INPUT_Floorboard_Actual_Thickness = {product_params.get('floor_lumbar_thickness', 0.0):.3f}")
-    # ...
-    lines.append("")
-    # 5. CAP ASSEMBLY PARAMETERS
-    lines.append("// ===========================================")
-    lines.append("// 5. CAP ASSEMBLY PARAMETERS (for N-Instance Suppression Strategy)")
-    lines.append("// ===========================================")
-    # Example cap values (add more as needed)
-    lines.append(f"[Inch]CAP_Panel_Width = ... // TODO: Add calculation")
-    lines.append(f"[Inch]CAP_Panel_Length = ... // TODO: Add calculation")
-    lines.append(f"[Inch]CAP_Panel_Thickness = {product_params.get('panel_thickness', 0.0):.3f}")
-    # ...
-    lines.append("")
-    lines.append("// End of AutoCrate Wizard Expressions")
-    return '\n'.join(lines)
+    return '\n'.join(iter_exp_lines(product_params, skid_results, floorboard_results, wall_results,
+                                     cap_results, decal_results, app_version))
+
+
+# --- Sections owned by this module ---
+# (parameter key, expression name, unit, comment)
+USER_CONTROLS = (
+    ('product_weight', 'product_weight', 'lbm', "Product Weight"),
+    ('product_width', 'product_width', 'Inch', "Product Width - across skids"),
+    ('product_length', 'product_length', 'Inch', "Product Length - along skids"),
+    ('product_actual_height', 'product_actual_height', 'Inch', "Product Actual Height"),
+    ('clearance_side', 'clearance_side', 'Inch', "Clearance per Side"),
+    ('clearance_above_product', 'clearance_above_product', 'Inch', "Clearance above product"),
+    ('panel_thickness', 'panel_thickness', 'Inch', "Panel Sheathing Thickness"),
+    ('cleat_thickness', 'cleat_thickness', 'Inch', "General Cleat Actual Thickness"),
+    ('wall_cleat_width', 'wall_cleat_width', 'Inch', "Wall Cleat Actual Width"),
+    ('floor_lumbar_thickness', 'floor_lumbar_thickness', 'Inch', "Floorboard Actual Thickness"),
+    ('cap_cleat_width', 'cap_cleat_width', 'Inch', "Cap Cleat Actual Width"),
+    ('max_top_cleat_spacing', 'max_cap_cleat_spacing_rule', 'Inch', "Max rule for cap cleats"),
+)
+
+
+def _user_control_expressions(context: dict):
+    params = context["params"]
+    for param_key, name, _, _ in USER_CONTROLS:
+        yield name, params.get(param_key, 0.0)
+
+
+def _crate_dimension_expressions(context: dict):
+    skid = context["skid"]
+    yield "crate_width_OD", skid.get('crate_overall_width_calculated')
+    yield "crate_length_OD", skid.get('skid_actual_length')
+    yield "skid_usable_width_ID", (skid.get('exp_data') or {}).get('REF_Usable_Width_for_Skids')
+
+
+register_section(ExpSection(
+    key="user_controls", title="USER CONTROLS (Values from UI)", order=10,
+    units={name: unit for _, name, unit, _ in USER_CONTROLS},
+    comments={name: comment for _, name, _, comment in USER_CONTROLS},
+    expressions=_user_control_expressions,
+))
+register_section(ExpSection(
+    key="crate_dimensions", title="CALCULATED CRATE AND USABLE DIMENSIONS (NX Expressions)", order=20,
+    comments={"crate_width_OD": "Overall crate width (across skids)",
+              "crate_length_OD": "Overall crate length (along skids)",
+              "skid_usable_width_ID": "Inside width available for skids"},
+    expressions=_crate_dimension_expressions,
+))
 
 if __name__ == '__main__':
     # Mock data for testing
@@ -147,6 +302,11 @@ if __name__ == '__main__':
     
     mock_decal_results = {"exp_data": {"CALC_Fragile_Decal_Suppress": 0}}
 
+    with open("Test_AutoCrate_Expressions.exp", "w") as f:
+        line_count = write_nx_exp_file(
+            f, mock_product_params, mock_skid_results, mock_floor_results, mock_wall_results,
+            mock_cap_results, mock_decal_results, app_version="0.6.0")
+
     exp_content = generate_nx_exp_file_content(
         product_params=mock_product_params,
         skid_results=mock_skid_results,
@@ -157,8 +317,4 @@ if __name__ == '__main__':
         app_version="0.6.0"
     )
     print(exp_content)
-
-    # Save to a test file
-    with open("Test_AutoCrate_Expressions.exp", "w") as f:
-        f.write(exp_content)
-    print("\nTest .exp file generated as Test_AutoCrate_Expressions.exp") 
\ No newline at end of file
+    print(f"\nTest .exp file streamed as Test_AutoCrate_Expressions.exp ({line_count} lines)") 
\ No newline at end of file
@@ -7,8 +7,37 @@ import math
 
 try:
     from . import config
+    from . import rules
 except ImportError:
     import config # For direct testing
+    import rules
+
+# Section of the NX .exp file holding this module's exp_data (see exp_generator.ExpSection)
+EXP_SECTION = {
+    "key": "floorboard", "title": "FLOORBOARD PARAMETERS (for N-Instance Suppression Strategy)", "order": 40,
+}
+
+def _standard_board_count(target_span_to_fill_y: float, standard_board_actual_width_y: float,
+                          max_instances_per_side: int) -> int:
+    """Closed-form number of standard boards placed front and back.
+
+    Boards alternate front/back while the remaining gap is at least one full board,
+    i.e. the largest n with span - n * width >= 0, capped at max_instances_per_side per side.
+    """
+    if max_instances_per_side <= 0 or target_span_to_fill_y <= 0:
+        return 0
+    n = math.floor(target_span_to_fill_y / standard_board_actual_width_y)
+    # Nudge for floating point error in the division at exact multiples
+    if target_span_to_fill_y - n * standard_board_actual_width_y < 0:
+        n -= 1
+    elif target_span_to_fill_y - (n + 1) * standard_board_actual_width_y >= 0:
+        n += 1
+    return max(0, min(n, 2 * max_instances_per_side))
+
+def _custom_fill_applies(allow_custom_fill: bool, gap_y: float) -> bool:
+    """A single custom piece fills the center gap only if it is at least MIN_CUSTOM_NARROW_WIDTH."""
+    return (allow_custom_fill and gap_y > config.FLOAT_TOLERANCE and
+            gap_y >= config.MIN_CUSTOM_NARROW_WIDTH - config.FLOAT_TOLERANCE)
 
 def calculate_floorboard_layout_refined(
     target_span_to_fill_y: float, 
@@ -16,7 +45,8 @@ def calculate_floorboard_layout_refined(
     chosen_standard_floorboard_nominal_key: str, # e.g., "2x6"
     allow_custom_fill: bool, 
     floorboard_actual_thickness_z: float,
-    max_instances_per_side: int = 10 # From CAD guide floorboard section
+    max_instances_per_side: int = 10, # From CAD guide floorboard section
+    build_exp_data: bool = True
 ) -> dict:
     """Calculates floorboard layout for NX, including suppression flags.
     Assumes symmetrical placement from front and back, filling towards the center.
@@ -28,6 +58,8 @@ def calculate_floorboard_layout_refined(
         allow_custom_fill: Boolean, whether a custom width piece can be used for the final gap.
         floorboard_actual_thickness_z: Actual thickness of the floorboard lumber.
         max_instances_per_side: Max floorboard instances NX template supports from one side (e.g., FB_Std_Front_1 to N).
+        build_exp_data: Whether to add the per-instance FB_Std_* / FB_Custom_Center_* expressions to exp_data.
+            Sweeps that only need counts and gaps can skip them.
     """
 
     boards_placed_details = []
@@ -36,79 +68,51 @@ def calculate_floorboard_layout_refined(
         "CALC_Floor_Board_Length_Across_Skids": board_length_x 
     }
 
-    standard_board_actual_width_y = config.ALL_STANDARD_FLOORBOARDS.get(chosen_standard_floorboard_nominal_key, 0.0)
+    standard_board_actual_width_y = rules.get_rules().standard_floorboards.get(chosen_standard_floorboard_nominal_key, 0.0)
     if standard_board_actual_width_y <= config.FLOAT_TOLERANCE:
         # Handle error: invalid standard board choice
         return {"status": "ERROR", "message": f"Invalid standard floorboard key: {chosen_standard_floorboard_nominal_key}", "exp_data": exp_data_floor, "boards": []}
 
-    # Initialize all possible NX instance expressions to suppress
-    for i in range(1, max_instances_per_side + 1):
-        exp_data_floor[f"FB_Std_Front_{i}_Suppress_Flag"] = 1
-        exp_data_floor[f"FB_Std_Front_{i}_Actual_Width"] = 0
-        exp_data_floor[f"FB_Std_Front_{i}_Y_Pos_Abs"] = 0 # Absolute Y position of the board's starting edge
-        
-        exp_data_floor[f"FB_Std_Back_{i}_Suppress_Flag"] = 1
-        exp_data_floor[f"FB_Std_Back_{i}_Actual_Width"] = 0
-        exp_data_floor[f"FB_Std_Back_{i}_Y_Pos_Abs"] = 0
-
-    exp_data_floor["FB_Custom_Center_Suppress_Flag"] = 1
-    exp_data_floor["FB_Custom_Center_Actual_Width"] = 0
-    exp_data_floor["FB_Custom_Center_Y_Pos_Abs"] = 0
-    
-    current_y_front_edge = 0.0 # Start from Y=0 (min Y edge of target_span_to_fill_y)
-    current_y_back_edge = target_span_to_fill_y # Max Y edge of target_span_to_fill_y
-    
-    std_boards_front_count = 0
-    std_boards_back_count = 0
+    # Standard boards from front and back inwards (front gets the extra board on odd counts)
+    std_board_total = _standard_board_count(target_span_to_fill_y, standard_board_actual_width_y, max_instances_per_side)
+    std_boards_front_count = (std_board_total + 1) // 2
+    std_boards_back_count = std_board_total // 2
+    current_y_front_edge = std_boards_front_count * standard_board_actual_width_y
+    final_gap_y = target_span_to_fill_y - std_board_total * standard_board_actual_width_y
+
+    for i in range(1, std_boards_front_count + 1):
+        boards_placed_details.append({"type": "std_front", "id": i, "width": standard_board_actual_width_y, "y_pos": (i - 1) * standard_board_actual_width_y})
+    for i in range(std_boards_back_count, 0, -1):
+        # Y_Pos_Abs for back boards is the STARTING edge of the board, from Y=0 origin.
+        boards_placed_details.append({"type": "std_back", "id": i, "width": standard_board_actual_width_y, "y_pos": target_span_to_fill_y - i * standard_board_actual_width_y})
+
     custom_board_count = 0
     custom_board_actual_width = 0.0
-
-    # Place standard boards from front and back inwards
-    for i in range(1, max_instances_per_side + 1):
-        remaining_gap = current_y_back_edge - current_y_front_edge
-        if remaining_gap < standard_board_actual_width_y - config.FLOAT_TOLERANCE:
-            break # Gap too small for another standard board
-
-        # Place front board for this iteration i
-        if std_boards_front_count < max_instances_per_side and remaining_gap >= standard_board_actual_width_y:
-            exp_data_floor[f"FB_Std_Front_{i}_Suppress_Flag"] = 0
-            exp_data_floor[f"FB_Std_Front_{i}_Actual_Width"] = standard_board_actual_width_y
-            exp_data_floor[f"FB_Std_Front_{i}_Y_Pos_Abs"] = current_y_front_edge
-            boards_placed_details.append({"type": "std_front", "id": i, "width": standard_board_actual_width_y, "y_pos": current_y_front_edge})
-            current_y_front_edge += standard_board_actual_width_y
-            std_boards_front_count += 1
-            remaining_gap = current_y_back_edge - current_y_front_edge # Update remaining gap
-
-        # Place back board for this iteration i, if space allows
-        if std_boards_back_count < max_instances_per_side and remaining_gap >= standard_board_actual_width_y:
-            exp_data_floor[f"FB_Std_Back_{i}_Suppress_Flag"] = 0
-            exp_data_floor[f"FB_Std_Back_{i}_Actual_Width"] = standard_board_actual_width_y
-            # Y_Pos_Abs for back boards is the STARTING edge of the board, from Y=0 origin.
-            # So, it's current_y_back_edge - standard_board_actual_width_y
-            exp_data_floor[f"FB_Std_Back_{i}_Y_Pos_Abs"] = current_y_back_edge - standard_board_actual_width_y
-            boards_placed_details.append({"type": "std_back", "id": i, "width": standard_board_actual_width_y, "y_pos": current_y_back_edge - standard_board_actual_width_y})
-            current_y_back_edge -= standard_board_actual_width_y
-            std_boards_back_count += 1
-        elif remaining_gap < standard_board_actual_width_y - config.FLOAT_TOLERANCE and remaining_gap > config.FLOAT_TOLERANCE:
-            break # Gap smaller than a standard board, but still positive. Will be handled by custom fill or left as is. 
-
-    final_gap_y = current_y_back_edge - current_y_front_edge
-
-    if allow_custom_fill and final_gap_y > config.FLOAT_TOLERANCE: 
-        # Check if custom width is within configured min/max for a single custom piece
+    if _custom_fill_applies(allow_custom_fill, final_gap_y):
         # For simplicity, assuming one custom piece if allowed. More complex logic could split it.
-        if final_gap_y >= config.MIN_CUSTOM_NARROW_WIDTH - config.FLOAT_TOLERANCE: # only if gap is reasonably large
-            custom_board_actual_width = final_gap_y
-            exp_data_floor["FB_Custom_Center_Suppress_Flag"] = 0
-            exp_data_floor["FB_Custom_Center_Actual_Width"] = custom_board_actual_width
-            exp_data_floor["FB_Custom_Center_Y_Pos_Abs"] = current_y_front_edge # Place it after the last front board
-            boards_placed_details.append({"type": "custom_center", "id": 1, "width": custom_board_actual_width, "y_pos": current_y_front_edge})
-            custom_board_count = 1
-            final_gap_y = 0 # Gap filled by custom board
-        # Else: gap too small for preferred custom, or custom not allowed. Gap remains.
-
-    # Sorting boards by Y position for easier review if needed
-    boards_placed_details.sort(key=lambda b: b["y_pos"])
+        custom_board_actual_width = final_gap_y
+        # Place it after the last front board
+        boards_placed_details.insert(std_boards_front_count, {"type": "custom_center", "id": 1, "width": custom_board_actual_width, "y_pos": current_y_front_edge})
+        custom_board_count = 1
+        final_gap_y = 0 # Gap filled by custom board
+    # Else: gap too small for preferred custom, or custom not allowed. Gap remains.
+
+    if build_exp_data:
+        # All possible NX instance expressions, suppressed unless a board was placed
+        for i in range(1, max_instances_per_side + 1):
+            placed = i <= std_boards_front_count
+            exp_data_floor[f"FB_Std_Front_{i}_Suppress_Flag"] = 0 if placed else 1
+            exp_data_floor[f"FB_Std_Front_{i}_Actual_Width"] = standard_board_actual_width_y if placed else 0
+            exp_data_floor[f"FB_Std_Front_{i}_Y_Pos_Abs"] = (i - 1) * standard_board_actual_width_y if placed else 0 # Absolute Y position of the board's starting edge
+
+            placed = i <= std_boards_back_count
+            exp_data_floor[f"FB_Std_Back_{i}_Suppress_Flag"] = 0 if placed else 1
+            exp_data_floor[f"FB_Std_Back_{i}_Actual_Width"] = standard_board_actual_width_y if placed else 0
+            exp_data_floor[f"FB_Std_Back_{i}_Y_Pos_Abs"] = target_span_to_fill_y - i * standard_board_actual_width_y if placed else 0
+
+        exp_data_floor["FB_Custom_Center_Suppress_Flag"] = 0 if custom_board_count else 1
+        exp_data_floor["FB_Custom_Center_Actual_Width"] = custom_board_actual_width if custom_board_count else 0
+        exp_data_floor["FB_Custom_Center_Y_Pos_Abs"] = current_y_front_edge if custom_board_count else 0
 
     return {
         "status": "OK",
@@ -122,10 +126,94 @@ def calculate_floorboard_layout_refined(
         "final_gap_y_remaining": final_gap_y,
         "board_length_x": board_length_x,
         "floorboard_actual_thickness_z": floorboard_actual_thickness_z,
-        "boards_placed_details": boards_placed_details, # For detailed review/logging
+        "boards_placed_details": boards_placed_details, # For detailed review/logging, sorted by Y position
         "exp_data": exp_data_floor
     }
 
+def calculate_floorboard_layout_batch(
+    target_span_to_fill_y,
+    standard_board,
+    allow_custom_fill,
+    max_instances_per_side: int = 10,
+    build_exp_data: bool = False
+) -> dict:
+    """Vectorized calculate_floorboard_layout_refined for design-space sweeps.
+
+    Args:
+        target_span_to_fill_y: Span(s) to cover, scalar or array.
+        standard_board: Nominal key(s) from ALL_STANDARD_FLOORBOARDS (e.g. "2x8") or actual board width(s).
+        allow_custom_fill: Boolean(s), whether a custom center piece may fill the final gap.
+        max_instances_per_side: Max NX instances per side, as in the scalar function.
+        build_exp_data: Also return the FB_Std_* / FB_Custom_Center_* expressions as one array per key.
+
+    Returns:
+        dict: Arrays keyed like the scalar result ("std_boards_front_count", "final_gap_y_remaining", ...)
+        plus "valid" (False where the board choice is unknown; those entries are all zero).
+    """
+    import numpy as np # Imported here so the scalar logic stays importable without NumPy
+
+    board = np.asarray(standard_board)
+    if board.dtype.kind in "USO": # Nominal keys -> actual widths (unknown keys -> 0.0)
+        keys, inverse = np.unique(board, return_inverse=True)
+        standard_widths = rules.get_rules().standard_floorboards
+        widths = np.array([standard_widths.get(key, 0.0) for key in keys], dtype=float)
+        board = widths[inverse].reshape(board.shape)
+    span, width, allow_custom = np.broadcast_arrays(
+        np.asarray(target_span_to_fill_y, dtype=float), board.astype(float),
+        np.asarray(allow_custom_fill, dtype=bool))
+    tol = config.FLOAT_TOLERANCE
+
+    valid = width > tol
+    safe_width = np.where(valid, width, 1.0)
+    if max_instances_per_side > 0:
+        n = np.floor(span / safe_width)
+        n = np.where(span - n * safe_width < 0, n - 1, n)
+        n = np.where(span - (n + 1) * safe_width >= 0, n + 1, n)
+        n = np.clip(n, 0, 2 * max_instances_per_side).astype(np.int64)
+    else:
+        n = np.zeros(span.shape, dtype=np.int64)
+    n[~valid] = 0
+
+    front_count = (n + 1) // 2
+    back_count = n // 2
+    front_edge = front_count * width
+    gap = span - n * width
+
+    custom = valid & allow_custom & (gap > tol) & (gap >= config.MIN_CUSTOM_NARROW_WIDTH - tol)
+    custom_width = np.where(custom, gap, 0.0)
+    gap = np.where(custom, 0.0, np.where(valid, gap, 0.0))
+
+    results = {
+        "valid": valid,
+        "standard_board_actual_width": np.where(valid, width, 0.0),
+        "std_boards_front_count": front_count,
+        "std_boards_back_count": back_count,
+        "custom_board_count": custom.astype(np.int64),
+        "custom_board_actual_width": custom_width,
+        "custom_board_y_pos": np.where(custom, front_edge, 0.0),
+        "final_gap_y_remaining": gap,
+    }
+
+    if build_exp_data:
+        exp_data = {}
+        for i in range(1, max_instances_per_side + 1):
+            placed = i <= front_count
+            exp_data[f"FB_Std_Front_{i}_Suppress_Flag"] = np.where(placed, 0, 1)
+            exp_data[f"FB_Std_Front_{i}_Actual_Width"] = np.where(placed, width, 0.0)
+            exp_data[f"FB_Std_Front_{i}_Y_Pos_Abs"] = np.where(placed, (i - 1) * width, 0.0)
+
+            placed = i <= back_count
+            exp_data[f"FB_Std_Back_{i}_Suppress_Flag"] = np.where(placed, 0, 1)
+            exp_data[f"FB_Std_Back_{i}_Actual_Width"] = np.where(placed, width, 0.0)
+            exp_data[f"FB_Std_Back_{i}_Y_Pos_Abs"] = np.where(placed, span - i * width, 0.0)
+
+        exp_data["FB_Custom_Center_Suppress_Flag"] = np.where(custom, 0, 1)
+        exp_data["FB_Custom_Center_Actual_Width"] = custom_width
+        exp_data["FB_Custom_Center_Y_Pos_Abs"] = results["custom_board_y_pos"]
+        results["exp_data"] = exp_data
+
+    return results
+
 if __name__ == '__main__':
     try: from . import config
     except ImportError: import config
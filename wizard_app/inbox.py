@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Watch-folder daemon: order files dropped into an inbox become .exp files.
+
+    python autocrate.py watch orders/inbox --out orders/outbox
+
+A watchdog observer notices new and renamed *.json files in the inbox. A file
+is picked up once its size and modification time have not changed for the
+settle time, so files the ERP is still writing are left alone. Order files may
+use the flat parameters.json layout or the nested examples/*.json layout (see
+schema.to_canonical) and hold one order or a list of orders.
+
+Each file is read, designed and written by a ProcessPoolExecutor worker
+(batch.run_order), producing `<order_id>.exp` plus `<file>.result.json` in the
+outbox. The input then moves to the done/ folder, or to failed/ when it could
+not be read or an order failed. The observer thread only records paths, and
+at most `max_in_flight` files are handed to the pool at a time; the rest wait
+in a FIFO, so a burst of files never blocks the notice of new arrivals.
+"""
+
+import collections
+import functools
+import json
+import os
+import shutil
+import threading
+import time
+
+try:
+    from . import batch
+    from . import config
+    from . import rules
+except ImportError:
+    import batch # For direct testing
+    import config
+    import rules
+
+DEFAULT_SETTLE_SECONDS = 1.0 # A file must be unchanged this long before it is read
+ORDER_EXTENSIONS = (".json",)
+RESULT_SUFFIX = ".result.json"
+DONE_DIRNAME = "done"
+FAILED_DIRNAME = "failed"
+IGNORED_PREFIXES = (".", "~") # Hidden and editor/ERP temporary files
+
+
+def _write_json_atomic(path: str, data: dict) -> None:
+    temp_path = os.path.join(os.path.dirname(path), "." + os.path.basename(path) + ".tmp")
+    with open(temp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(temp_path, path)
+
+
+def process_order_file(path: str, outbox: str, use_cache: bool = True, delta: bool = False,
+                       use_catalog: bool = True) -> dict:
+    """Designs every order in one order file and writes the .exp files plus `<file>.result.json`.
+
+    Never raises for bad input; unreadable files and failed orders are reported in the result.
+    """
+    start = time.perf_counter()
+    name = os.path.basename(path)
+    stem = os.path.splitext(name)[0]
+    result = {"source": name, "status": "OK", "message": "", "app_version": config.VERSION,
+              "rules_version": rules.get_rules().version, "orders": []}
+    try:
+        with open(path, 'r') as f:
+            orders = batch._unique_order_ids(batch.orders_from_json(json.load(f), stem))
+    except Exception as e: # Unreadable or malformed (json.JSONDecodeError is a ValueError); the file is FAILED
+        result["status"] = "FAILED"
+        result["message"] = f"{type(e).__name__}: {e}"
+    else:
+        rejected = batch.invalid_order_results(orders)
+        result["orders"] = [rejected[index] if index in rejected else
+                            batch.run_order(order_id, params, outbox, use_cache=use_cache, delta=delta,
+                                            use_catalog=use_catalog)
+                            for index, (order_id, params) in enumerate(orders)]
+        statuses = {order["status"] for order in result["orders"]}
+        if not result["orders"]:
+            result["status"], result["message"] = "FAILED", "The file holds no orders"
+        elif "FAILED" in statuses:
+            result["status"] = "FAILED"
+        elif "WARNING" in statuses:
+            result["status"] = "WARNING"
+        if not result["message"]:
+            result["message"] = "; ".join(f"{order['order_id']}: {order['message']}"
+                                          for order in result["orders"] if order["message"])
+    result["seconds"] = time.perf_counter() - start
+    os.makedirs(outbox, exist_ok=True)
+    result["result_path"] = os.path.join(outbox, stem + RESULT_SUFFIX)
+    _write_json_atomic(result["result_path"], result)
+    return result
+
+
+def _unique_destination(directory: str, name: str) -> str:
+    """`directory/name`, or a timestamped variant when an earlier file of that name is already there."""
+    destination = os.path.join(directory, name)
+    stem, ext = os.path.splitext(name)
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    counter = 1
+    while os.path.exists(destination):
+        destination = os.path.join(directory, f"{stem}.{stamp}-{counter}{ext}")
+        counter += 1
+    return destination
+
+
+class InboxDaemon:
+    """Watches an inbox folder and processes settled order files on a bounded worker pool."""
+
+    def __init__(self, inbox: str, outbox: str, done_dir: str = None, failed_dir: str = None, workers: int = None,
+                 max_in_flight: int = None, settle: float = DEFAULT_SETTLE_SECONDS, use_cache: bool = True,
+                 delta: bool = False, use_catalog: bool = True, on_result=None):
+        """
+        Args:
+            inbox: Folder the order files are dropped into (not watched recursively).
+            outbox: Folder receiving the .exp and .result.json files.
+            done_dir / failed_dir: Where processed inputs move (default: done/ and failed/ inside the inbox).
+            workers: Worker processes (default: CPU count, 0 = one in-process thread).
+            max_in_flight: Files handed to the pool at once (default: twice the workers).
+            settle: Seconds a file's size and mtime must stay unchanged before it is read.
+            on_result: Called with each file's result dict (from a pool callback thread).
+        """
+        self.inbox = os.path.abspath(inbox)
+        self.outbox = os.path.abspath(outbox)
+        self.done_dir = os.path.abspath(done_dir or os.path.join(self.inbox, DONE_DIRNAME))
+        self.failed_dir = os.path.abspath(failed_dir or os.path.join(self.inbox, FAILED_DIRNAME))
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.max_in_flight = max_in_flight or max(1, self.workers) * 2
+        self.settle = settle
+        self.options = (use_cache, delta, use_catalog)
+        self.on_result = on_result
+        self.stats = {"processed": 0, "ok": 0, "warnings": 0, "failed": 0}
+
+        self._lock = threading.Lock()
+        self._seen = {} # path -> None (just noticed) or ((size, mtime_ns), monotonic time of the last change)
+        self._ready = collections.deque() # Settled files waiting for a pool slot
+        self._claimed = set() # Paths that are ready or in flight; further events for them are ignored
+        self._in_flight = 0
+        self._idle = threading.Condition(self._lock)
+        self._stopping = threading.Event()
+        self._executor = None
+        self._observer = None
+        self._scheduler = None
+
+    # --- Discovery ---
+    def _wanted(self, path: str) -> bool:
+        name = os.path.basename(path)
+        return (os.path.dirname(os.path.abspath(path)) == self.inbox and not name.startswith(IGNORED_PREFIXES)
+                and name.lower().endswith(ORDER_EXTENSIONS) and not name.endswith(RESULT_SUFFIX))
+
+    def notice(self, path: str) -> None:
+        """Records a created/modified/renamed file. Cheap: called from the observer thread."""
+        path = os.path.abspath(path)
+        if self._wanted(path):
+            with self._lock:
+                if path not in self._claimed and path not in self._seen:
+                    self._seen[path] = None
+
+    def scan(self) -> int:
+        """Notices every order file already in the inbox (startup, or files missed by the observer)."""
+        os.makedirs(self.inbox, exist_ok=True)
+        names = sorted(os.listdir(self.inbox))
+        for name in names:
+            self.notice(os.path.join(self.inbox, name))
+        return len(names)
+
+    def poll(self, now: float = None) -> int:
+        """One scheduler step: queues files that have settled and fills free pool slots.
+
+        Returns:
+            int: Files submitted to the pool.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            candidates = list(self._seen.items())
+        for path, state in candidates:
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                signature = None
+            else:
+                signature = (stat.st_size, stat.st_mtime_ns)
+            with self._lock:
+                if self._seen.get(path) != state:
+                    continue # Handled by a concurrent poll
+                if signature is None:
+                    del self._seen[path] # Renamed or deleted before it settled
+                elif state is None or state[0] != signature:
+                    self._seen[path] = (signature, now)
+                elif now - state[1] >= self.settle: # Even when empty: reported as FAILED, not left pending
+                    del self._seen[path]
+                    self._claimed.add(path)
+                    self._ready.append(path)
+        return self._submit_ready()
+
+    # --- Processing ---
+    def _ensure_executor(self):
+        if self._executor is None:
+            if self.workers:
+                from concurrent.futures import ProcessPoolExecutor # Imported here so workers=0 skips multiprocessing
+
+                active_rules = rules.get_rules()
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=batch._warm_worker,
+                                                     initargs=(active_rules.canonical, active_rules.fingerprint))
+            else:
+                from concurrent.futures import ThreadPoolExecutor
+
+                self._executor = ThreadPoolExecutor(max_workers=1)
+        return self._executor
+
+    def _submit_ready(self) -> int:
+        executor = self._ensure_executor()
+        submitted = 0
+        while True:
+            with self._lock:
+                if not self._ready or self._in_flight >= self.max_in_flight:
+                    return submitted
+                path = self._ready.popleft()
+                self._in_flight += 1
+            active_rules = rules.get_rules()
+            future = executor.submit(batch._call_with_rules, active_rules.canonical, active_rules.fingerprint,
+                                     process_order_file, path, self.outbox, *self.options)
+            future.add_done_callback(functools.partial(self._finished, path))
+            submitted += 1
+
+    def _finished(self, path: str, future) -> None:
+        try:
+            result = future.result()
+        except Exception as e: # The worker itself died; the file is left for inspection in failed/
+            result = {"source": os.path.basename(path), "status": "FAILED", "message": f"{type(e).__name__}: {e}",
+                      "orders": []}
+        target_dir = self.failed_dir if result["status"] == "FAILED" else self.done_dir
+        try:
+            os.makedirs(target_dir, exist_ok=True)
+            result["moved_to"] = shutil.move(path, _unique_destination(target_dir, os.path.basename(path)))
+        except OSError as e: # Deleted while it was processed, or no permission; never stop the daemon
+            result["moved_to"] = ""
+            result["message"] = "; ".join(filter(None, (result["message"], f"Could not move the file: {e}")))
+        with self._lock:
+            self._in_flight -= 1
+            self._claimed.discard(path)
+            self.stats["processed"] += 1
+            self.stats[{"OK": "ok", "WARNING": "warnings"}.get(result["status"], "failed")] += 1
+            self._idle.notify_all()
+        if self.on_result is not None:
+            self.on_result(result)
+        if not self._stopping.is_set():
+            self._submit_ready()
+
+    @property
+    def pending(self) -> int:
+        """Files noticed but not finished yet (settling, queued or in flight)."""
+        with self._lock:
+            return len(self._seen) + len(self._ready) + self._in_flight
+
+    def drain(self, timeout: float = None) -> bool:
+        """Polls until every noticed file has been processed. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        interval = min(0.05, max(self.settle / 4, 0.005))
+        while self.pending:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            self.poll()
+            with self._lock:
+                self._idle.wait(interval)
+        return True
+
+    # --- Lifecycle ---
+    def start(self) -> "InboxDaemon":
+        """Processes the files already in the inbox and starts watching for new ones."""
+        from watchdog.events import FileSystemEventHandler # Imported here so --once runs and tests skip watchdog
+        from watchdog.observers import Observer
+
+        daemon = self
+
+        class _Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                for path in (getattr(event, "dest_path", ""), event.src_path):
+                    if path and not event.is_directory:
+                        daemon.notice(path)
+
+        self.scan()
+        self._ensure_executor()
+        self._observer = Observer()
+        self._observer.schedule(_Handler(), self.inbox, recursive=False)
+        self._observer.daemon = True
+        self._observer.start()
+        self._scheduler = threading.Thread(target=self._run, name="autocrate-inbox", daemon=True)
+        self._scheduler.start()
+        return self
+
+    def _run(self) -> None:
+        interval = min(0.25, max(self.settle / 4, 0.01))
+        while not self._stopping.wait(interval):
+            self.poll()
+
+    def stop(self) -> None:
+        """Stops watching; files already handed to the pool are finished first."""
+        self._stopping.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+        if self._scheduler is not None:
+            self._scheduler.join()
+            self._scheduler = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def _print_result(result: dict) -> None:
+    exp_count = sum(1 for order in result["orders"] if order.get("exp_path"))
+    line = f"{result['status']:<7} {result['source']}: {exp_count} .exp file(s) in {result.get('seconds', 0.0):.2f}s"
+    print(line + (f" - {result['message']}" if result["message"] else ""), flush=True)
+
+
+def watch(inbox: str, outbox: str, once: bool = False, **options) -> dict:
+    """Runs the inbox daemon until interrupted (Ctrl+C), or only over the files already there with `once`.
+
+    Returns:
+        dict: The daemon's processed/ok/warnings/failed counts.
+    """
+    options.setdefault("on_result", _print_result)
+    daemon = InboxDaemon(inbox, outbox, **options)
+    if once:
+        daemon.settle = 0.0 # Files present at startup are complete
+        daemon.scan()
+        try:
+            daemon.drain()
+        finally:
+            daemon.stop()
+        return daemon.stats
+
+    watcher = rules.watch_default_rules(
+        on_reload=lambda new_rules: print(f"Loaded rules {new_rules.version} from {new_rules.source}"),
+        on_error=lambda message: print(f"Rule file rejected, keeping the current rules: {message}"))
+    daemon.start()
+    print(f"AutoCrate V{config.VERSION} watching {daemon.inbox} -> {daemon.outbox} "
+          f"({daemon.workers} workers, rules {rules.get_rules().version})", flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.stop()
+        if watcher is not None:
+            watcher.stop()
+    return daemon.stats
+
+
+if __name__ == '__main__':
+    import sys
+
+    if len(sys.argv) < 3:
+        print("Usage: python -m wizard_app.inbox INBOX OUTBOX", file=sys.stderr)
+        sys.exit(1)
+    watch(sys.argv[1], sys.argv[2])
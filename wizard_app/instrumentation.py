@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Lightweight timing instrumentation for the crate pipeline.
+
+    with instrumentation.timer("wall"):
+        ...
+
+    @instrumentation.timed("exp_write")
+    def write_exp_file(...): ...
+
+Timers record a call count and a latency histogram per name, plus the
+duration of the most recent call (see last_run()). Counters are incremented
+with count(). Everything is off by default; when off, timer() hands back a
+shared no-op context manager, so instrumented code pays one function call.
+Turn it on with enable() or the AUTOCRATE_METRICS=1 environment variable.
+
+Snapshots export as JSON (snapshot / write_json) or in the Prometheus text
+exposition format (to_prometheus / write_prometheus).
+"""
+
+from bisect import bisect_left
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+
+METRICS_ENV = "AUTOCRATE_METRICS"
+PROMETHEUS_PREFIX = "autocrate"
+
+# Histogram bucket upper bounds in seconds (10 us .. 10 s)
+LATENCY_BUCKETS = (1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 1e-2,
+                   2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_enabled = os.environ.get(METRICS_ENV, "").strip().lower() in ("1", "true", "yes", "on")
+_lock = threading.Lock()
+_histograms = {}
+_counters = {}
+_last_run = {}
+_NULL_TIMER = contextlib.nullcontext()
+
+
+class Histogram:
+    """Cumulative-free latency histogram: per-bucket counts plus count/sum/min/max."""
+    __slots__ = ("bucket_counts", "count", "total", "minimum", "maximum")
+
+    def __init__(self):
+        self.bucket_counts = [0] * (len(LATENCY_BUCKETS) + 1) # Last slot is +Inf
+        self.count = 0
+        self.total = 0.0
+        self.minimum = None
+        self.maximum = None
+
+    def observe(self, seconds: float) -> None:
+        self.bucket_counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.minimum = seconds if self.minimum is None else min(self.minimum, seconds)
+        self.maximum = seconds if self.maximum is None else max(self.maximum, seconds)
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "sum_seconds": self.total,
+            "mean_seconds": self.total / self.count if self.count else 0.0,
+            "min_seconds": self.minimum,
+            "max_seconds": self.maximum,
+            "buckets": {str(le): n for le, n in zip(LATENCY_BUCKETS + ("+Inf",), self.bucket_counts)},
+        }
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def enable(on: bool = True) -> None:
+    global _enabled
+    _enabled = bool(on)
+
+
+def disable() -> None:
+    enable(False)
+
+
+def reset() -> None:
+    """Clears every recorded metric."""
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+        _last_run.clear()
+
+
+def record(name: str, seconds: float) -> None:
+    """Adds one observation to the `name` histogram (no-op when disabled)."""
+    if not _enabled:
+        return
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = Histogram()
+        histogram.observe(seconds)
+        _last_run[name] = seconds
+
+
+def count(name: str, amount: int = 1) -> None:
+    """Increments the `name` counter (no-op when disabled)."""
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+class _Timer:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def timer(name: str):
+    """Context manager timing its block into the `name` histogram."""
+    return _Timer(name) if _enabled else _NULL_TIMER
+
+
+def timed(name: str = None):
+    """Decorator form of timer(); defaults to the function's qualified name."""
+    def decorator(func):
+        metric = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(metric, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def begin_run() -> None:
+    """Starts a new run for last_run(): forgets the previous run's timings."""
+    if _enabled:
+        with _lock:
+            _last_run.clear()
+
+
+def last_run() -> dict:
+    """Name -> seconds for each timer recorded since begin_run(), in recording order."""
+    with _lock:
+        return dict(_last_run)
+
+
+def _format_timings(timings: dict) -> str:
+    if not timings:
+        return ""
+    parts = [f"{name} {seconds * 1000:.2f} ms" for name, seconds in timings.items()]
+    parts.append(f"total {sum(timings.values()) * 1000:.2f} ms")
+    return " | ".join(parts)
+
+
+def format_last_run(names: tuple = None) -> str:
+    """One-line summary such as 'skid 0.02 ms | wall 0.05 ms | total 0.09 ms' for status bars."""
+    timings = last_run()
+    if names:
+        timings = {name: timings[name] for name in names if name in timings}
+    return _format_timings(timings)
+
+
+class PhaseTimer:
+    """Breakdown of consecutive phases, e.g. application startup.
+
+    mark(phase) records the time since the previous mark (or `start`). Phases are
+    always kept on the object; they also feed the `<prefix>.<phase>` histograms
+    when instrumentation is enabled.
+    """
+
+    def __init__(self, prefix: str, start: float = None):
+        self.prefix = prefix
+        self.start = start if start is not None else time.perf_counter()
+        self._last = self.start
+        self.phases = {}
+
+    def mark(self, phase: str) -> float:
+        now = time.perf_counter()
+        seconds = now - self._last
+        self.phases[phase] = seconds
+        self._last = now
+        record(f"{self.prefix}.{phase}", seconds)
+        return seconds
+
+    def total(self) -> float:
+        return self._last - self.start
+
+    def format(self) -> str:
+        return _format_timings(self.phases)
+
+
+def snapshot() -> dict:
+    """JSON-serializable copy of all metrics."""
+    with _lock:
+        return {
+            "enabled": _enabled,
+            "timers": {name: histogram.to_dict() for name, histogram in _histograms.items()},
+            "counters": dict(_counters),
+            "last_run": dict(_last_run),
+        }
+
+
+def write_json(path: str) -> str:
+    with open(path, 'w') as f:
+        json.dump(snapshot(), f, indent=2)
+    return path
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def to_prometheus() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    with _lock:
+        histograms = list(_histograms.items())
+        counters = list(_counters.items())
+
+    lines = []
+    if histograms:
+        metric = f"{PROMETHEUS_PREFIX}_duration_seconds"
+        lines.append(f"# HELP {metric} Duration of instrumented AutoCrate operations.")
+        lines.append(f"# TYPE {metric} histogram")
+        for name, histogram in histograms:
+            label = _escape_label(name)
+            cumulative = 0
+            for le, n in zip(LATENCY_BUCKETS + ("+Inf",), histogram.bucket_counts):
+                cumulative += n
+                lines.append(f'{metric}_bucket{{name="{label}",le="{le}"}} {cumulative}')
+            lines.append(f'{metric}_sum{{name="{label}"}} {histogram.total!r}')
+            lines.append(f'{metric}_count{{name="{label}"}} {histogram.count}')
+    if counters:
+        metric = f"{PROMETHEUS_PREFIX}_events_total"
+        lines.append(f"# HELP {metric} Count of instrumented AutoCrate events.")
+        lines.append(f"# TYPE {metric} counter")
+        for name, value in counters:
+            lines.append(f'{metric}{{name="{_escape_label(name)}"}} {value}')
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+def write_prometheus(path: str) -> str:
+    with open(path, 'w') as f:
+        f.write(to_prometheus())
+    return path
+
+
+if __name__ == '__main__':
+    try:
+        from . import pipeline
+    except ImportError:
+        import pipeline
+
+    metrics = pipeline.instrumentation # The module instance the pipeline records into
+    metrics.enable()
+    for weight in range(500, 5000, 500):
+        pipeline.design_crate({"product_weight": weight})
+    print(metrics.format_last_run())
+    print(metrics.to_prometheus())
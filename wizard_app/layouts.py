@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Typed, immutable views of the logic module results.
+
+SkidLayout, FloorLayout, WallLayout and CapLayout are frozen dataclasses with
+__slots__ (no per-object __dict__), so sweeps can hold large numbers of them
+and hot loops use plain attribute access instead of `.get()` chains.
+
+`from_dict()` accepts a result dict exactly as returned by the logic modules
+(including ERROR-shaped results) and `to_dict()` gives it back unchanged.
+Nested dicts and lists become FrozenRecord objects and tuples. The record keys
+are interned, so thousands of results share one key tuple and one key -> index
+dict per shape, and a lookup costs one dict probe.
+`to_exp_data()` returns the NX expression dict.
+"""
+
+from collections.abc import Mapping
+from dataclasses import dataclass, fields
+from typing import ClassVar, Optional, Tuple
+
+_interned_keys = {}
+_interned_shapes = {} # key tuple -> (interned key tuple, {key: index})
+
+
+def _intern_keys(keys: tuple) -> tuple:
+    return _interned_keys.setdefault(keys, keys)
+
+
+def _intern_shape(keys: tuple) -> tuple:
+    shape = _interned_shapes.get(keys)
+    if shape is None:
+        keys = _intern_keys(keys)
+        shape = _interned_shapes.setdefault(keys, (keys, {key: i for i, key in enumerate(keys)}))
+    return shape
+
+
+class FrozenRecord(Mapping):
+    """Read-only mapping stored as an interned key tuple and key -> index dict plus a value tuple."""
+    __slots__ = ("_keys", "_index", "_values")
+
+    def __init__(self, keys: tuple, values: tuple):
+        keys, index = _intern_shape(tuple(keys))
+        object.__setattr__(self, "_keys", keys)
+        object.__setattr__(self, "_index", index)
+        object.__setattr__(self, "_values", tuple(values))
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "FrozenRecord":
+        return cls(tuple(data), tuple(_freeze(value) for value in data.values()))
+
+    def to_dict(self) -> dict:
+        return {key: _thaw(value) for key, value in zip(self._keys, self._values)}
+
+    def __getitem__(self, key):
+        return self._values[self._index[key]]
+
+    def get(self, key, default=None):
+        index = self._index.get(key)
+        return default if index is None else self._values[index]
+
+    def __contains__(self, key) -> bool:
+        return key in self._index
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("FrozenRecord is immutable")
+
+    def __hash__(self) -> int:
+        return hash((self._keys, self._values))
+
+    def __reduce__(self):
+        return (FrozenRecord, (self._keys, self._values))
+
+    def __repr__(self) -> str:
+        return f"FrozenRecord({dict(zip(self._keys, self._values))!r})"
+
+
+_EMPTY_RECORD = FrozenRecord((), ())
+
+
+def _freeze(value):
+    """dict -> FrozenRecord, list -> tuple (recursively); other values unchanged."""
+    if isinstance(value, dict):
+        return FrozenRecord.from_dict(value)
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _thaw(value):
+    """Inverse of _freeze (also expands nested layouts)."""
+    if isinstance(value, (FrozenRecord, _Layout)):
+        return value.to_dict()
+    if isinstance(value, tuple):
+        return [_thaw(item) for item in value]
+    return value
+
+
+class _Layout:
+    """Shared from_dict/to_dict plumbing for the slotted layout dataclasses.
+
+    Every layout ends with two bookkeeping fields: `absent` names result keys the
+    source dict did not have (their fields are None), and `extra` keeps any keys
+    the layout does not model, so the round trip is lossless.
+    """
+    __slots__ = ()
+    _NESTED: ClassVar[dict] = {} # field name -> nested layout class
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        if data is None:
+            data = {}
+        values, absent = {}, []
+        names = [f.name for f in fields(cls) if f.name not in ("absent", "extra")]
+        for name in names:
+            if name in data:
+                nested = cls._NESTED.get(name)
+                value = data[name]
+                values[name] = nested.from_dict(value) if nested is not None and isinstance(value, dict) else _freeze(value)
+            else:
+                values[name] = None
+                absent.append(name)
+        extra = {key: value for key, value in data.items() if key not in values}
+        return cls(**values, absent=_intern_keys(tuple(absent)),
+                   extra=FrozenRecord.from_dict(extra) if extra else _EMPTY_RECORD)
+
+    def to_dict(self) -> dict:
+        """The original result dict (same keys, values and nesting)."""
+        result = {}
+        for f in fields(self):
+            if f.name in ("absent", "extra") or f.name in self.absent:
+                continue
+            result[f.name] = _thaw(getattr(self, f.name))
+        result.update(self.extra.to_dict())
+        return result
+
+    def to_exp_data(self) -> dict:
+        """NX expression values for this stage (empty if the stage has none)."""
+        exp_data = getattr(self, "exp_data", None)
+        return exp_data.to_dict() if isinstance(exp_data, FrozenRecord) else {}
+
+    def __getstate__(self):
+        return tuple(getattr(self, f.name) for f in fields(self))
+
+    def __setstate__(self, state):
+        for f, value in zip(fields(self), state):
+            object.__setattr__(self, f.name, value)
+
+
+@dataclass(frozen=True)
+class SkidLayout(_Layout):
+    __slots__ = ("skid_type_nominal", "skid_actual_width", "skid_actual_height", "skid_actual_length",
+                 "skid_count", "actual_center_to_center_spacing", "first_skid_position_offset_x",
+                 "crate_overall_width_calculated", "exp_data", "absent", "extra")
+    skid_type_nominal: Optional[str]
+    skid_actual_width: Optional[float]
+    skid_actual_height: Optional[float]
+    skid_actual_length: Optional[float]
+    skid_count: Optional[int]
+    actual_center_to_center_spacing: Optional[float]
+    first_skid_position_offset_x: Optional[float]
+    crate_overall_width_calculated: Optional[float]
+    exp_data: Optional[FrozenRecord]
+    absent: Tuple[str, ...]
+    extra: FrozenRecord
+
+
+@dataclass(frozen=True)
+class FloorLayout(_Layout):
+    __slots__ = ("status", "message", "standard_board_nominal_type", "standard_board_actual_width",
+                 "std_boards_front_count", "std_boards_back_count", "custom_board_count",
+                 "custom_board_actual_width", "final_gap_y_remaining", "board_length_x",
+                 "floorboard_actual_thickness_z", "boards_placed_details", "exp_data", "absent", "extra")
+    status: Optional[str]
+    message: Optional[str]
+    standard_board_nominal_type: Optional[str]
+    standard_board_actual_width: Optional[float]
+    std_boards_front_count: Optional[int]
+    std_boards_back_count: Optional[int]
+    custom_board_count: Optional[int]
+    custom_board_actual_width: Optional[float]
+    final_gap_y_remaining: Optional[float]
+    board_length_x: Optional[float]
+    floorboard_actual_thickness_z: Optional[float]
+    boards_placed_details: Optional[Tuple[FrozenRecord, ...]]
+    exp_data: Optional[FrozenRecord]
+    absent: Tuple[str, ...]
+    extra: FrozenRecord
+
+
+@dataclass(frozen=True)
+class WallCleats(_Layout):
+    __slots__ = ("vertical_edge_count", "vertical_edge_length", "horizontal_edge_count", "horizontal_edge_length",
+                 "intermediate_vertical_cleats", "intermediate_horizontal_cleats", "absent", "extra")
+    vertical_edge_count: Optional[int]
+    vertical_edge_length: Optional[float]
+    horizontal_edge_count: Optional[int]
+    horizontal_edge_length: Optional[float]
+    intermediate_vertical_cleats: Optional[Tuple[FrozenRecord, ...]]
+    intermediate_horizontal_cleats: Optional[Tuple[FrozenRecord, ...]]
+    absent: Tuple[str, ...]
+    extra: FrozenRecord
+
+
+@dataclass(frozen=True)
+class WallPanel(_Layout):
+    __slots__ = ("count", "panel_width_dim", "panel_height_dim", "thickness", "case_id", "cleats",
+                 "panel_1_removable", "panel_2_removable", "splices", "absent", "extra")
+    _NESTED: ClassVar[dict] = {"cleats": WallCleats}
+    count: Optional[int]
+    panel_width_dim: Optional[float]
+    panel_height_dim: Optional[float]
+    thickness: Optional[float]
+    case_id: Optional[str]
+    cleats: Optional[WallCleats]
+    panel_1_removable: Optional[bool]
+    panel_2_removable: Optional[bool]
+    splices: Optional[Tuple[FrozenRecord, ...]]
+    absent: Tuple[str, ...]
+    extra: FrozenRecord
+
+
+@dataclass(frozen=True)
+class WallLayout(_Layout):
+    __slots__ = ("status", "message", "side_panels", "end_panels", "removable_panels", "exp_data", "absent", "extra")
+    _NESTED: ClassVar[dict] = {"side_panels": WallPanel, "end_panels": WallPanel}
+    status: Optional[str]
+    message: Optional[str]
+    side_panels: Optional[WallPanel]
+    end_panels: Optional[WallPanel]
+    removable_panels: Optional[FrozenRecord]
+    exp_data: Optional[FrozenRecord]
+    absent: Tuple[str, ...]
+    extra: FrozenRecord
+
+
+@dataclass(frozen=True)
+class CapCleats(_Layout):
+    __slots__ = ("count", "actual_spacing_centers", "positions_from_center", "length", "thickness", "width",
+                 "absent", "extra")
+    count: Optional[int]
+    actual_spacing_centers: Optional[float]
+    positions_from_center: Optional[Tuple[float, ...]]
+    length: Optional[float]
+    thickness: Optional[float]
+    width: Optional[float]
+    absent: Tuple[str, ...]
+    extra: FrozenRecord
+
+
+@dataclass(frozen=True)
+class CapLayout(_Layout):
+    __slots__ = ("cap_panel", "longitudinal_cleats", "transverse_cleats", "fasteners", "exp_data", "absent", "extra")
+    _NESTED: ClassVar[dict] = {"longitudinal_cleats": CapCleats, "transverse_cleats": CapCleats}
+    cap_panel: Optional[FrozenRecord]
+    longitudinal_cleats: Optional[CapCleats]
+    transverse_cleats: Optional[CapCleats]
+    fasteners: Optional[FrozenRecord]
+    exp_data: Optional[FrozenRecord]
+    absent: Tuple[str, ...]
+    extra: FrozenRecord
+
+
+def layouts_from_design(design) -> dict:
+    """Typed layouts for a pipeline.CrateDesign: {"skid": SkidLayout, "floorboard": FloorLayout, ...}."""
+    return {
+        "skid": SkidLayout.from_dict(design.skid),
+        "floorboard": FloorLayout.from_dict(design.floorboard),
+        "wall": WallLayout.from_dict(design.wall),
+        "cap": CapLayout.from_dict(design.cap),
+    }
+
+
+if __name__ == '__main__':
+    try:
+        from . import pipeline
+    except ImportError:
+        import pipeline
+
+    design = pipeline.design_crate()
+    for stage, layout in layouts_from_design(design).items():
+        source = getattr(design, stage)
+        print(f"{stage}: {type(layout).__name__}, round trip {'OK' if layout.to_dict() == source else 'MISMATCH'}, "
+              f"{len(layout.to_exp_data())} expressions")
@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Closest existing crates for a product envelope: a KD-tree over the design catalog.
+
+Each catalogued design becomes a feature vector of product width, length,
+height, weight and skid class (the index of the weight rule, see rules.py, its
+weight falls under), divided by the per-feature standard deviation so inches,
+pounds and classes are comparable. NeighborIndex answers weighted k-nearest-
+neighbour queries with a best-first search over an array-based KD-tree, keeps
+newly catalogued designs in a small brute-force pending buffer until the tree
+is rebuilt, and saves itself as a directory of .npy files that load with
+mmap_mode='r', so a large catalog is usable at startup without reading it.
+"""
+
+import heapq
+import json
+import os
+import shutil
+import threading
+
+import numpy as np
+
+try:
+    from . import catalog
+    from . import rules
+except ImportError:
+    import catalog # For direct testing
+    import rules
+
+FEATURES = ("width", "length", "height", "weight", "skid_class")
+DEFAULT_K = 5
+DEFAULT_LEAF_SIZE = 64
+DEFAULT_REBUILD_THRESHOLD = 4096 # Pending inserts before the tree is rebuilt
+SNAPSHOT_SUFFIX = ".knn"
+SNAPSHOT_FORMAT = 1
+_ARRAYS = ("points", "ids", "bounds", "links")
+
+
+def skid_classes(weights) -> np.ndarray:
+    """Index of the WEIGHT_RULES rule (sorted by max weight) covering each weight; len(rules) above the last."""
+    limits = np.array(rules.get_rules().weight_limits, dtype=float)
+    return np.searchsorted(limits, np.asarray(weights, dtype=float), side="left").astype(float)
+
+
+def _rules_fingerprint() -> str:
+    return repr(rules.get_rules().weight_limits)
+
+
+def envelope_features(envelopes) -> tuple:
+    """(ids, raw feature matrix) from (id, width, length, height, weight) rows, e.g. catalog.product_envelopes()."""
+    rows = np.asarray(envelopes, dtype=float).reshape(-1, 5)
+    features = np.empty((len(rows), len(FEATURES)))
+    features[:, :4] = rows[:, 1:]
+    features[:, 4] = skid_classes(rows[:, 4])
+    return rows[:, 0].astype(np.int64), features
+
+
+def _feature_weights(weights) -> np.ndarray:
+    """Per-feature weights from None (all 1), a sequence in FEATURES order or a {feature: weight} dict."""
+    if weights is None:
+        return np.ones(len(FEATURES))
+    if isinstance(weights, dict):
+        unknown = set(weights) - set(FEATURES)
+        if unknown:
+            raise ValueError(f"Unknown feature(s) {sorted(unknown)}; expected {FEATURES}")
+        return np.array([float(weights.get(name, 1.0)) for name in FEATURES])
+    values = np.asarray(weights, dtype=float)
+    if values.shape != (len(FEATURES),):
+        raise ValueError(f"Expected {len(FEATURES)} feature weights ({', '.join(FEATURES)}), got {values.shape}")
+    return values
+
+
+def _build_tree(points: np.ndarray, leaf_size: int) -> tuple:
+    """Median-split KD-tree over `points`. Returns (permutation, node bounds (m, 2, d), node links (m, 4)).
+
+    A node's links are (start, end, left, right): it covers permuted points[start:end]
+    and is a leaf when left is -1. Bounds are the tight bounding box of those points.
+    """
+    n, dims = points.shape
+    perm = np.arange(n)
+    links = [[0, n, -1, -1]]
+    bounds = [None]
+    stack = [0]
+    while stack:
+        node = stack.pop()
+        start, end = links[node][0], links[node][1]
+        if end == start:
+            bounds[node] = np.zeros((2, dims))
+            continue
+        segment = points[perm[start:end]]
+        low, high = segment.min(axis=0), segment.max(axis=0)
+        bounds[node] = np.stack((low, high))
+        spread = high - low
+        axis = int(np.argmax(spread))
+        if end - start <= leaf_size or spread[axis] == 0:
+            continue
+        mid = (start + end) // 2
+        order = np.argpartition(segment[:, axis], mid - start)
+        perm[start:end] = perm[start:end][order]
+        left = len(links)
+        links.extend(([start, mid, -1, -1], [mid, end, -1, -1]))
+        bounds.extend((None, None))
+        links[node][2:] = [left, left + 1]
+        stack.extend((left, left + 1))
+    return perm, np.array(bounds), np.array(links, dtype=np.int64)
+
+
+class NeighborIndex:
+    """Weighted k-nearest-neighbour index over catalogued product envelopes."""
+
+    def __init__(self, points, ids, bounds, links, scale, max_id: int = 0,
+                 leaf_size: int = DEFAULT_LEAF_SIZE, rebuild_threshold: int = DEFAULT_REBUILD_THRESHOLD):
+        """Use build(), from_catalog() or load() rather than calling this directly."""
+        self.points = points # Scaled features in tree order (may be a read-only memmap)
+        self.ids = ids
+        self.scale = np.asarray(scale, dtype=float)
+        self.max_id = int(max_id) # Highest catalog id included; sync() adds newer rows
+        self.leaf_size = leaf_size
+        self.rebuild_threshold = rebuild_threshold
+        self._bounds = bounds.tolist() # Python lists: cheaper than NumPy for 5-element box tests
+        self._links = links.tolist()
+        self._bounds_array, self._links_array = bounds, links
+        self._pending_ids = []
+        self._pending_features = [] # Raw (unscaled) features
+        self._pending_cache = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, ids, features, leaf_size: int = DEFAULT_LEAF_SIZE,
+              rebuild_threshold: int = DEFAULT_REBUILD_THRESHOLD) -> "NeighborIndex":
+        """Builds the tree from raw feature rows (see envelope_features)."""
+        ids = np.asarray(ids, dtype=np.int64)
+        features = np.asarray(features, dtype=float).reshape(-1, len(FEATURES))
+        scale = features.std(axis=0) if len(features) > 1 else np.ones(len(FEATURES))
+        scale[~(scale > 0)] = 1.0
+        points = features / scale
+        perm, bounds, links = _build_tree(points, leaf_size)
+        return cls(np.ascontiguousarray(points[perm]), ids[perm], bounds, links, scale,
+                   max_id=int(ids.max()) if len(ids) else 0, leaf_size=leaf_size, rebuild_threshold=rebuild_threshold)
+
+    @classmethod
+    def from_catalog(cls, designs, **kwargs) -> "NeighborIndex":
+        """Builds the index from every non-error entry of a catalog.DesignCatalog."""
+        return cls.build(*envelope_features(designs.product_envelopes()), **kwargs)
+
+    def __len__(self) -> int:
+        return len(self.ids) + len(self._pending_ids)
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending_ids)
+
+    @property
+    def needs_rebuild(self) -> bool:
+        return len(self._pending_ids) >= self.rebuild_threshold
+
+    # --- Inserts ---
+    def insert(self, item_id: int, features) -> None:
+        """Adds one raw feature row (FEATURES order) to the pending buffer; queries see it immediately."""
+        self.insert_many([item_id], [features])
+
+    def insert_many(self, ids, features) -> None:
+        with self._lock:
+            for item_id, row in zip(ids, np.asarray(features, dtype=float).reshape(-1, len(FEATURES))):
+                self._pending_ids.append(int(item_id))
+                self._pending_features.append(row)
+                self.max_id = max(self.max_id, int(item_id))
+            self._pending_cache = None
+
+    def sync(self, designs) -> int:
+        """Adds catalog entries newer than max_id to the pending buffer. Returns how many were added."""
+        envelopes = designs.product_envelopes(after_id=self.max_id)
+        if envelopes:
+            self.insert_many(*envelope_features(envelopes))
+        return len(envelopes)
+
+    def rebuild(self) -> None:
+        """Folds the pending buffer into a new tree, recomputing the feature scale."""
+        with self._lock:
+            raw = np.asarray(self.points) * self.scale
+            if self._pending_features:
+                raw = np.vstack((raw, np.array(self._pending_features)))
+            ids = np.concatenate((np.asarray(self.ids), np.array(self._pending_ids, dtype=np.int64)))
+            rebuilt = NeighborIndex.build(ids, raw, leaf_size=self.leaf_size, rebuild_threshold=self.rebuild_threshold)
+            self.points, self.ids, self.scale = rebuilt.points, rebuilt.ids, rebuilt.scale
+            self._bounds, self._links = rebuilt._bounds, rebuilt._links
+            self._bounds_array, self._links_array = rebuilt._bounds_array, rebuilt._links_array
+            self._pending_ids, self._pending_features, self._pending_cache = [], [], None
+
+    # --- Queries ---
+    def query(self, width: float, length: float, height: float, weight: float, k: int = DEFAULT_K,
+              weights=None) -> list:
+        """The k catalogued envelopes closest to a product envelope.
+
+        Args:
+            width, length, height: Product dimensions (inches).
+            weight: Product weight (lb); its skid class is derived from the active weight rules.
+            k: Number of neighbours.
+            weights: Per-feature weights (see FEATURES), e.g. {"weight": 2, "skid_class": 0}.
+
+        Returns:
+            list: (id, distance) tuples, closest first. Distances are weighted Euclidean
+            in standard deviations.
+        """
+        target = np.array([width, length, height, weight, skid_classes(weight)], dtype=float)
+        return self.query_features(target, k=k, weights=weights)
+
+    def query_features(self, features, k: int = DEFAULT_K, weights=None) -> list:
+        """query() for a raw feature row in FEATURES order."""
+        w = _feature_weights(weights)
+        q = np.asarray(features, dtype=float) / self.scale
+        best = [] # Max-heap of (-squared distance, id) holding the k best so far
+        if k <= 0:
+            return []
+        self._search_pending(q, w, k, best)
+        if len(self.ids):
+            self._search_tree(q, w, k, best)
+        return [(item_id, float(np.sqrt(-neg))) for neg, item_id in sorted(best, reverse=True)]
+
+    def _search_pending(self, q, w, k, best) -> None:
+        with self._lock:
+            if self._pending_ids and self._pending_cache is None:
+                self._pending_cache = (np.array(self._pending_ids, dtype=np.int64),
+                                       np.array(self._pending_features) / self.scale)
+            cache = self._pending_cache if self._pending_ids else None
+        if cache is not None:
+            _offer(best, k, cache[0], ((cache[1] - q) ** 2) @ w)
+
+    def _search_tree(self, q, w, k, best) -> None:
+        qs, ws, dims = q.tolist(), w.tolist(), range(len(FEATURES))
+        bounds, links, points, ids = self._bounds, self._links, self.points, self.ids
+
+        def box_distance(node):
+            low, high = bounds[node]
+            total = 0.0
+            for j in dims:
+                x = qs[j]
+                if x < low[j]:
+                    total += ws[j] * (low[j] - x) ** 2
+                elif x > high[j]:
+                    total += ws[j] * (x - high[j]) ** 2
+            return total
+
+        frontier = [(box_distance(0), 0)]
+        while frontier:
+            distance, node = heapq.heappop(frontier)
+            if len(best) == k and distance >= -best[0][0]:
+                break
+            start, end, left, right = links[node]
+            if left < 0:
+                _offer(best, k, ids[start:end], ((points[start:end] - q) ** 2) @ w)
+                continue
+            for child in (left, right):
+                child_distance = box_distance(child)
+                if len(best) < k or child_distance < -best[0][0]:
+                    heapq.heappush(frontier, (child_distance, child))
+
+    # --- Snapshots ---
+    def save(self, path: str) -> str:
+        """Writes the index (pending inserts folded in) as .npy files in directory `path`, replacing it atomically."""
+        if self._pending_ids:
+            self.rebuild()
+        temp_path = f"{path}.tmp-{os.getpid()}"
+        shutil.rmtree(temp_path, ignore_errors=True)
+        os.makedirs(temp_path)
+        for name, array in zip(_ARRAYS, (self.points, self.ids, self._bounds_array, self._links_array)):
+            np.save(os.path.join(temp_path, f"{name}.npy"), np.asarray(array))
+        meta = {"format": SNAPSHOT_FORMAT, "features": list(FEATURES), "scale": self.scale.tolist(),
+                "max_id": self.max_id, "leaf_size": self.leaf_size, "rules": _rules_fingerprint(),
+                "count": len(self.ids)}
+        with open(os.path.join(temp_path, "meta.json"), 'w') as f:
+            json.dump(meta, f, indent=2)
+        if os.path.exists(path):
+            old_path = f"{path}.old-{os.getpid()}"
+            os.replace(path, old_path)
+            os.replace(temp_path, path)
+            shutil.rmtree(old_path, ignore_errors=True)
+        else:
+            os.replace(temp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path: str, rebuild_threshold: int = DEFAULT_REBUILD_THRESHOLD):
+        """Memory-maps a snapshot written by save(). Returns None if it is missing or was built
+        with a different feature set or WEIGHT_RULES."""
+        try:
+            with open(os.path.join(path, "meta.json"), 'r') as f:
+                meta = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        if (meta.get("format") != SNAPSHOT_FORMAT or tuple(meta.get("features", ())) != FEATURES
+                or meta.get("rules") != _rules_fingerprint()):
+            return None
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in _ARRAYS}
+        return cls(arrays["points"], arrays["ids"], np.asarray(arrays["bounds"]), np.asarray(arrays["links"]),
+                   meta["scale"], max_id=meta["max_id"], leaf_size=meta["leaf_size"],
+                   rebuild_threshold=rebuild_threshold)
+
+
+def _offer(best: list, k: int, ids, distances) -> None:
+    """Merges candidate (id, squared distance) arrays into the k-best max-heap."""
+    if len(best) == k:
+        keep = np.nonzero(distances < -best[0][0])[0]
+    else:
+        keep = np.arange(len(distances))
+    if len(keep) > k:
+        keep = keep[np.argpartition(distances[keep], k - 1)[:k]]
+    for i in keep.tolist():
+        entry = (-float(distances[i]), int(ids[i]))
+        if len(best) < k:
+            heapq.heappush(best, entry)
+        elif entry[0] > best[0][0]:
+            heapq.heapreplace(best, entry)
+
+
+def snapshot_path_for(catalog_path: str) -> str:
+    """design_catalog.sqlite3 -> design_catalog.sqlite3.knn"""
+    return catalog_path + SNAPSHOT_SUFFIX
+
+
+_indexes = {} # Catalog path -> NeighborIndex
+_indexes_lock = threading.Lock()
+
+
+def index_for(designs) -> NeighborIndex:
+    """The shared index for a catalog: its snapshot if current, otherwise built from the catalog
+    and saved. New catalog entries are synced in, and the snapshot is refreshed after a rebuild."""
+    persistent = designs.path != ":memory:"
+    snapshot = snapshot_path_for(designs.path)
+    with _indexes_lock:
+        index = _indexes.get(designs.path)
+        if index is None:
+            index = NeighborIndex.load(snapshot) if persistent else None
+            if index is None:
+                index = NeighborIndex.from_catalog(designs)
+                if persistent:
+                    index.save(snapshot)
+            _indexes[designs.path] = index
+        index.sync(designs)
+        if index.needs_rebuild:
+            index.rebuild()
+            if persistent:
+                index.save(snapshot)
+    return index
+
+
+def refresh_index(designs) -> NeighborIndex:
+    """Rebuilds the index for `designs` from scratch (e.g. after catalog entries were replaced)."""
+    with _indexes_lock:
+        _indexes.pop(designs.path, None)
+        if designs.path != ":memory:":
+            shutil.rmtree(snapshot_path_for(designs.path), ignore_errors=True)
+    return index_for(designs)
+
+
+def closest_crates(width: float, length: float, height: float, weight: float, k: int = DEFAULT_K,
+                   weights=None, designs=None) -> list:
+    """Catalog entries of the k existing crates closest to a product envelope.
+
+    Args:
+        width, length, height, weight: Product envelope (inches, lb).
+        k: Number of crates to return.
+        weights: Per-feature weights, see NeighborIndex.query().
+        designs: catalog.DesignCatalog (default: the shared catalog).
+
+    Returns:
+        list: Catalog entry dicts (see catalog.COLUMNS) with a `distance`, closest first.
+    """
+    designs = designs or catalog.get_default_catalog() or catalog.DesignCatalog()
+    index = index_for(designs)
+    hits = index.query(width, length, height, weight, k=k, weights=weights)
+    rows = designs.get(item_id for item_id, _ in hits)
+    if len(rows) < len(hits): # Entries were replaced in the catalog since the index was built
+        index = refresh_index(designs)
+        hits = index.query(width, length, height, weight, k=k, weights=weights)
+        rows = designs.get(item_id for item_id, _ in hits)
+    return [dict(rows[item_id], distance=distance) for item_id, distance in hits if item_id in rows]
+
+
+if __name__ == '__main__':
+    import sys
+    import time
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    rng = np.random.default_rng(0)
+    envelopes = np.column_stack((np.arange(1, count + 1), rng.uniform(10, 120, count), rng.uniform(10, 160, count),
+                                 rng.uniform(10, 100, count), rng.uniform(50, 20000, count)))
+    start = time.perf_counter()
+    demo = NeighborIndex.build(*envelope_features(envelopes))
+    print(f"Built {len(demo)} entries in {time.perf_counter() - start:.2f}s")
+    queries = envelopes[rng.integers(0, count, 1000), 1:] + rng.normal(0, 1, (1000, 4))
+    start = time.perf_counter()
+    for row in queries:
+        demo.query(*row, k=DEFAULT_K)
+    print(f"{(time.perf_counter() - start) * 1000 / len(queries):.3f} ms per {DEFAULT_K}-NN query")
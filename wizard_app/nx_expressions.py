@@ -0,0 +1,486 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Evaluator for NX expression (.exp) files, outside NX.
+
+Formula-mode files such as the one written by create_skid_exp_file.py hold
+expressions like
+
+    [Inch]CALC_Skid_Pitch = if(CALC_Skid_Count > 1) then (skid_centerline_span_calc / (CALC_Skid_Count - 1)) else (0.0[Inch])
+
+compile_expression() parses one right-hand side (numbers with [unit] suffixes,
+names, + - * / ^, comparisons, AND / OR / NOT, if/then/else and the functions
+in FUNCTIONS) into a Python closure. ExpressionFile compiles a whole file
+and evaluates it in dependency order. Inputs may be scalars or NumPy arrays.
+With arrays, every expression runs once over the whole array (if/then/else
+becomes numpy.where), so a million input combinations cost a handful of
+array operations.
+
+crosscheck_skids() evaluates a formula file over random products and compares
+it with skid_logic.calculate_skid_layout_batch(), the value-mode logic that
+exp_generator writes.
+
+Values are held internally in inches and pounds (see UNIT_FACTORS);
+ExpressionFile.evaluate() returns each expression in its declared unit.
+"""
+
+import contextlib
+from dataclasses import dataclass
+import functools
+import math
+import re
+
+try:
+    from . import exp_delta
+    from . import skid_logic
+except ImportError:
+    import exp_delta # For direct testing
+    import skid_logic
+
+# Conversion to the internal base units (inch, lbm)
+UNIT_FACTORS = {
+    "Inch": 1.0, "in": 1.0,
+    "Foot": 12.0, "ft": 12.0,
+    "MilliMeter": 1 / 25.4, "mm": 1 / 25.4,
+    "CentiMeter": 1 / 2.54, "cm": 1 / 2.54,
+    "Meter": 1 / 0.0254, "m": 1 / 0.0254,
+    "lbm": 1.0, "kg": 1 / 0.45359237,
+}
+
+_TOKEN_RE = re.compile(r"""
+    \s*(?:
+        (?P<number>(?:\d+\.\d*|\.\d+|\d+)(?:[eE][+-]?\d+)?)(?:\s*\[(?P<unit>[^\]]+)\])?
+      | (?P<string>"(?:[^"\\]|\\.)*")
+      | (?P<name>[A-Za-z_][A-Za-z0-9_]*)
+      | (?P<op>==|!=|<>|<=|>=|&&|\|\||[-+*/^<>(),!])
+    )""", re.VERBOSE)
+
+_KEYWORDS = ("if", "then", "else", "and", "or", "not")
+
+
+def _is_array(value) -> bool:
+    return getattr(value, "ndim", 0) > 0
+
+
+def _numpy():
+    import numpy as np # Imported here so scalar evaluation works without NumPy
+    return np
+
+
+def _ceil(x):
+    return _numpy().ceil(x) if _is_array(x) else math.ceil(x)
+
+
+def _floor(x):
+    return _numpy().floor(x) if _is_array(x) else math.floor(x)
+
+
+def _round(x):
+    return _numpy().round(x) if _is_array(x) else round(x)
+
+
+def _sqrt(x):
+    return _numpy().sqrt(x) if _is_array(x) else math.sqrt(x)
+
+
+def _extreme(pick_array, pick_scalar, *args):
+    if any(_is_array(a) for a in args):
+        return functools.reduce(pick_array, args)
+    return pick_scalar(args)
+
+
+FUNCTIONS = {
+    "ceil": _ceil,
+    "floor": _floor,
+    "round": _round,
+    "abs": abs,
+    "sqrt": _sqrt,
+    "max": lambda *args: _extreme(_numpy().maximum, max, *args),
+    "min": lambda *args: _extreme(_numpy().minimum, min, *args),
+}
+
+_COMPARISONS = {
+    "==": lambda a, b: a == b, "!=": lambda a, b: a != b, "<>": lambda a, b: a != b,
+    "<": lambda a, b: a < b, "<=": lambda a, b: a <= b, ">": lambda a, b: a > b, ">=": lambda a, b: a >= b,
+}
+_ARITHMETIC = {
+    "+": lambda a, b: a + b, "-": lambda a, b: a - b, "*": lambda a, b: a * b, "/": lambda a, b: a / b,
+}
+
+
+def _tokenize(text: str) -> list:
+    tokens, position = [], 0
+    text = text.rstrip()
+    while position < len(text):
+        match = _TOKEN_RE.match(text, position)
+        if not match or match.end() == position:
+            raise ValueError(f"Unexpected character {text[position:].strip()[:1]!r} in expression: {text}")
+        position = match.end()
+        if match.group("number") is not None:
+            unit = match.group("unit")
+            if unit is not None and unit not in UNIT_FACTORS:
+                raise ValueError(f"Unknown unit [{unit}] in expression: {text}")
+            value = float(match.group("number")) * (UNIT_FACTORS[unit] if unit else 1.0)
+            if unit is None and value.is_integer() and re.fullmatch(r"\d+", match.group("number")):
+                value = int(value)
+            tokens.append(("number", value))
+        elif match.group("string") is not None:
+            tokens.append(("string", match.group("string")[1:-1].replace('\\"', '"').replace('\\\\', '\\')))
+        elif match.group("name") is not None:
+            name = match.group("name")
+            tokens.append(("keyword", name.lower()) if name.lower() in _KEYWORDS else ("name", name))
+        elif match.group("op") is not None:
+            tokens.append(("op", match.group("op")))
+    return tokens
+
+
+class _Parser:
+    """Recursive-descent parser producing (closure, referenced names)."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens = _tokenize(text)
+        self.position = 0
+        self.names = set()
+
+    def _peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else (None, None)
+
+    def _take(self, kind=None, value=None):
+        token = self._peek()
+        if token[0] is None or (kind and token[0] != kind) or (value and token[1] != value):
+            expected = value or kind or "a token"
+            raise ValueError(f"Expected {expected} at token {self.position + 1} in expression: {self.text}")
+        self.position += 1
+        return token
+
+    def _accept(self, kind, *values):
+        token = self._peek()
+        if token[0] == kind and token[1] in values:
+            self.position += 1
+            return token[1]
+        return None
+
+    def parse(self):
+        node = self._expression()
+        if self.position != len(self.tokens):
+            raise ValueError(f"Unexpected {self._peek()[1]!r} in expression: {self.text}")
+        return node
+
+    def _expression(self):
+        if self._accept("keyword", "if"):
+            self._take("op", "(")
+            condition = self._expression()
+            self._take("op", ")")
+            self._accept("keyword", "then")
+            when_true = self._expression()
+            self._take("keyword", "else")
+            when_false = self._expression()
+
+            def if_then_else(env):
+                test = condition(env)
+                if _is_array(test):
+                    return _numpy().where(test, when_true(env), when_false(env))
+                return when_true(env) if test else when_false(env)
+            return if_then_else
+        return self._or()
+
+    def _or(self):
+        left = self._and()
+        while self._accept("keyword", "or") or self._accept("op", "||"):
+            right, first = self._and(), left
+
+            def either(env, first=first, right=right):
+                a = first(env)
+                if not _is_array(a) and a:
+                    return True
+                b = right(env)
+                return _numpy().logical_or(a, b) if _is_array(a) or _is_array(b) else bool(b)
+            left = either
+        return left
+
+    def _and(self):
+        left = self._not()
+        while self._accept("keyword", "and") or self._accept("op", "&&"):
+            right, first = self._not(), left
+
+            def both(env, first=first, right=right):
+                a = first(env)
+                if not _is_array(a) and not a:
+                    return False
+                b = right(env)
+                return _numpy().logical_and(a, b) if _is_array(a) or _is_array(b) else bool(b)
+            left = both
+        return left
+
+    def _not(self):
+        if self._accept("keyword", "not") or self._accept("op", "!"):
+            operand = self._not()
+
+            def negate(env):
+                a = operand(env)
+                return _numpy().logical_not(a) if _is_array(a) else not a
+            return negate
+        return self._comparison()
+
+    def _comparison(self):
+        left = self._additive()
+        op = self._accept("op", *_COMPARISONS)
+        if op:
+            right, compare, first = self._additive(), _COMPARISONS[op], left
+            return lambda env: compare(first(env), right(env))
+        return left
+
+    def _additive(self):
+        left = self._multiplicative()
+        while True:
+            op = self._accept("op", "+", "-")
+            if not op:
+                return left
+            right, apply, first = self._multiplicative(), _ARITHMETIC[op], left
+            left = lambda env, first=first, right=right, apply=apply: apply(first(env), right(env))
+
+    def _multiplicative(self):
+        left = self._unary()
+        while True:
+            op = self._accept("op", "*", "/")
+            if not op:
+                return left
+            right, apply, first = self._unary(), _ARITHMETIC[op], left
+            left = lambda env, first=first, right=right, apply=apply: apply(first(env), right(env))
+
+    def _unary(self):
+        if self._accept("op", "-"):
+            operand = self._unary()
+            return lambda env: -operand(env)
+        if self._accept("op", "+"):
+            return self._unary()
+        return self._power()
+
+    def _power(self):
+        base = self._primary()
+        if self._accept("op", "^"):
+            exponent = self._unary() # Right-associative
+            return lambda env: base(env) ** exponent(env)
+        return base
+
+    def _primary(self):
+        kind, value = self._peek()
+        if kind in ("number", "string"):
+            self.position += 1
+            return lambda env: value
+        if kind == "name":
+            self.position += 1
+            if self._accept("op", "("):
+                function = FUNCTIONS.get(value.lower())
+                if function is None:
+                    raise ValueError(f"Unknown function {value}() in expression: {self.text}")
+                args = []
+                if not self._accept("op", ")"):
+                    args.append(self._expression())
+                    while self._accept("op", ","):
+                        args.append(self._expression())
+                    self._take("op", ")")
+                return lambda env: function(*(arg(env) for arg in args))
+            self.names.add(value)
+            return lambda env: env[value]
+        if self._accept("op", "("):
+            inner = self._expression()
+            self._take("op", ")")
+            return inner
+        raise ValueError(f"Unexpected {value!r} in expression: {self.text}")
+
+
+@dataclass(frozen=True)
+class CompiledExpression:
+    """One compiled expression: evaluate(env) with env mapping names to base-unit values."""
+    name: str
+    unit: str # Declared unit ("" when unitless, "String" for strings)
+    source: str
+    evaluate: object
+    depends_on: frozenset
+
+    @property
+    def factor(self) -> float:
+        return UNIT_FACTORS.get(self.unit, 1.0)
+
+
+def compile_expression(text: str, name: str = "", unit: str = "") -> CompiledExpression:
+    """Compiles an NX expression right-hand side into a closure over an environment dict."""
+    if unit and unit != "String" and unit not in UNIT_FACTORS:
+        raise ValueError(f"Unknown unit [{unit}] for expression {name}")
+    parser = _Parser(text)
+    closure = parser.parse()
+    return CompiledExpression(name, unit, text, closure, frozenset(parser.names))
+
+
+class ExpressionFile:
+    """A compiled .exp file, evaluated in dependency (topological) order."""
+
+    def __init__(self, expressions: dict):
+        self.expressions = expressions # name -> CompiledExpression, in file order
+        self.order = self._topological_order()
+
+    @classmethod
+    def from_text(cls, text: str) -> "ExpressionFile":
+        return cls._from_parsed(exp_delta.parse_exp_text(text))
+
+    @classmethod
+    def from_path(cls, path: str) -> "ExpressionFile":
+        parsed = exp_delta.parse_exp_file(path)
+        if parsed is None:
+            raise FileNotFoundError(path)
+        return cls._from_parsed(parsed)
+
+    @classmethod
+    def _from_parsed(cls, parsed: dict) -> "ExpressionFile":
+        return cls({name: compile_expression(e.value, name, e.unit) for name, e in parsed.items()})
+
+    def _topological_order(self) -> list:
+        order, state = [], {} # state: 1 = visiting, 2 = done
+        for root in self.expressions:
+            if state.get(root) == 2:
+                continue
+            stack = [(root, iter(sorted(self.expressions[root].depends_on)))]
+            state[root] = 1
+            while stack:
+                name, pending = stack[-1]
+                for dependency in pending:
+                    if dependency not in self.expressions:
+                        continue # Must be supplied as an input
+                    if state.get(dependency) == 1:
+                        raise ValueError(f"Circular reference between {name} and {dependency}")
+                    if state.get(dependency) != 2:
+                        state[dependency] = 1
+                        stack.append((dependency, iter(sorted(self.expressions[dependency].depends_on))))
+                        break
+                else:
+                    stack.pop()
+                    state[name] = 2
+                    order.append(name)
+        return order
+
+    def missing_inputs(self) -> set:
+        """Names referenced by expressions but not defined in the file."""
+        defined = set(self.expressions)
+        return {dep for e in self.expressions.values() for dep in e.depends_on if dep not in defined}
+
+    def evaluate(self, inputs: dict = None, names=None) -> dict:
+        """Evaluates every expression; `inputs` override expressions by name (declared units).
+
+        Args:
+            inputs: Name -> value (scalar or NumPy array) replacing the file's expression.
+            names: Restrict the returned dict to these names (all are still computed as needed).
+
+        Returns:
+            dict: Name -> value in the expression's declared unit.
+        """
+        inputs = inputs or {}
+        missing = self.missing_inputs() - set(inputs)
+        if missing:
+            raise ValueError(f"Expressions reference undefined names: {', '.join(sorted(missing))}")
+        env = {}
+        for name, value in inputs.items():
+            expression = self.expressions.get(name)
+            env[name] = value * expression.factor if expression is not None and expression.factor != 1.0 else value
+        vectorized = any(_is_array(value) for value in inputs.values())
+        # numpy.where evaluates both if/else branches, so untaken ones may divide by zero
+        with _numpy().errstate(divide='ignore', invalid='ignore') if vectorized else contextlib.nullcontext():
+            for name in self.order:
+                if name not in inputs:
+                    env[name] = self.expressions[name].evaluate(env)
+        wanted = names if names is not None else self.expressions
+        return {name: env[name] / self.expressions[name].factor if self.expressions[name].factor != 1.0 else env[name]
+                for name in wanted}
+
+
+# --- Cross-check against the Python skid logic ---
+# Formula-file expression -> key of skid_logic.calculate_skid_layout_batch()
+CROSSCHECK_SKID_EXPRESSIONS = (
+    ("crate_width_OD", "crate_overall_width_calculated"),
+    ("skid_usable_width_ID", "usable_width_for_skids"),
+    ("INPUT_Skid_Nominal_Width", "skid_actual_width"),
+    ("RULE_Max_Skid_Spacing", "max_skid_spacing"),
+    ("CALC_Skid_Count", "skid_count"),
+    ("CALC_Skid_Pitch", "actual_center_to_center_spacing"),
+    ("CALC_First_Skid_Pos_X", "first_skid_position_offset_x"),
+    ("INPUT_Skid_Actual_Length", "skid_actual_length"),
+)
+
+# Sampled inputs: uniform (low, high) ranges and discrete lumber choices
+CROSSCHECK_INPUT_RANGES = {
+    "product_weight": (50.0, 25000.0),
+    "product_width": (6.0, 150.0),
+    "product_length": (6.0, 200.0),
+    "clearance_side": (0.5, 4.0),
+}
+CROSSCHECK_INPUT_CHOICES = {
+    "panel_thickness": (0.25, 0.5, 0.75),
+    "wall_cleat_thickness": (0.75, 1.5),
+}
+
+
+def _sample_inputs(np, rng, count: int) -> dict:
+    inputs = {name: rng.uniform(low, high, count) for name, (low, high) in CROSSCHECK_INPUT_RANGES.items()}
+    for name, choices in CROSSCHECK_INPUT_CHOICES.items():
+        inputs[name] = rng.choice(np.asarray(choices, dtype=float), count)
+    return inputs
+
+
+def crosscheck_skids(formula: ExpressionFile, samples: int = 100000, seed: int = 0,
+                     tolerance: float = 1e-6, chunk_size: int = 250000) -> dict:
+    """Compares a skid formula file with skid_logic over random products.
+
+    Args:
+        formula: Compiled formula-mode file (e.g. from create_skid_exp_file.py).
+        samples: Number of random products.
+        seed: Random seed, so a reported mismatch can be reproduced.
+        tolerance: Absolute tolerance per value.
+        chunk_size: Products evaluated per vectorized pass (bounds memory use).
+
+    Returns:
+        dict: {"samples", "seed", "expressions": {name: {"mismatches", "max_abs_error", "example"}}}.
+            "example" holds the inputs and both values of the first mismatch.
+    """
+    np = _numpy()
+    rng = np.random.default_rng(seed)
+    checked = [(nx, py) for nx, py in CROSSCHECK_SKID_EXPRESSIONS if nx in formula.expressions]
+    report = {nx: {"mismatches": 0, "max_abs_error": 0.0, "example": None} for nx, _ in checked}
+    done = 0
+    while done < samples:
+        count = min(chunk_size, samples - done)
+        inputs = _sample_inputs(np, rng, count)
+        nx_values = formula.evaluate({k: v for k, v in inputs.items() if k in formula.expressions},
+                                     names=[nx for nx, _ in checked])
+        py_values = skid_logic.calculate_skid_layout_batch(
+            inputs["product_weight"], inputs["product_width"], inputs["product_length"],
+            inputs["clearance_side"], inputs["panel_thickness"], inputs["wall_cleat_thickness"])
+        for nx, py in checked:
+            nx_array = np.broadcast_to(np.asarray(nx_values[nx], dtype=float), (count,))
+            error = np.abs(nx_array - np.asarray(py_values[py], dtype=float))
+            bad = ~(error <= tolerance) # NaN counts as a mismatch
+            entry = report[nx]
+            entry["mismatches"] += int(bad.sum())
+            if bad.any():
+                entry["max_abs_error"] = max(entry["max_abs_error"], float(np.nanmax(np.where(bad, error, 0.0))))
+                if entry["example"] is None:
+                    i = int(np.argmax(bad))
+                    entry["example"] = {**{k: float(v[i]) for k, v in inputs.items()},
+                                        "nx": float(nx_array[i]), "python": float(py_values[py][i])}
+        done += count
+    return {"samples": samples, "seed": seed, "expressions": report}
+
+
+if __name__ == '__main__':
+    import sys
+    import time
+
+    if len(sys.argv) < 2:
+        print("Usage: python nx_expressions.py <formula .exp file> [samples]")
+        sys.exit(1)
+    exp_file = ExpressionFile.from_path(sys.argv[1])
+    start = time.perf_counter()
+    result = crosscheck_skids(exp_file, samples=int(sys.argv[2]) if len(sys.argv) > 2 else 100000)
+    print(f"{result['samples']} samples in {time.perf_counter() - start:.2f}s")
+    for expression_name, entry in result["expressions"].items():
+        print(f"{expression_name}: {entry['mismatches']} mismatches, max error {entry['max_abs_error']:.6g}")
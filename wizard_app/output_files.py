@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Change-aware, atomic writes of generated files (.exp and delta files).
+
+write_text_if_changed() and write_stream_if_changed() leave the target alone
+when its content would not change: no new mtime, no rename, nothing for
+file watchers or rsync to pick up. Otherwise the new content is written to a
+temporary file in the same directory and renamed over the target in one
+step, so readers never see a half-written file. A `<file>.sha256` sidecar in
+`sha256sum` format holds the hash of the current content for downstream
+sync and import scripts (`sha256sum -c crate.exp.sha256`).
+"""
+
+import hashlib
+import os
+import tempfile
+
+HASH_SUFFIX = ".sha256"
+TEMP_PREFIX = "." # Hidden temporary files, so *.exp watchers ignore them
+
+_UMASK = os.umask(0o022) # Read once: os.umask() can only be read by setting it
+os.umask(_UMASK)
+
+
+def hash_path_for(path: str) -> str:
+    return path + HASH_SUFFIX
+
+
+def _encode(text: str) -> bytes:
+    # Same bytes text-mode open() would write (CRLF on Windows)
+    return (text.replace("\n", os.linesep) if os.linesep != "\n" else text).encode("utf-8")
+
+
+def file_hash(path: str):
+    """SHA-256 hex digest of the file at `path`, or None if it does not exist."""
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def read_stored_hash(path: str):
+    """Digest recorded in the sidecar of `path`, or None."""
+    try:
+        with open(hash_path_for(path), 'r') as f:
+            return f.read().split(None, 1)[0]
+    except (FileNotFoundError, IndexError):
+        return None
+
+
+def _replace(temp_path: str, path: str) -> None:
+    """Renames `temp_path` over `path` with the mode a plain open() would give it.
+
+    mkstemp() creates 0600 files, so keep the existing file's mode, or use the
+    umask default for a new file, so shared folders and rsync can still read it.
+    """
+    try:
+        mode = os.stat(path).st_mode & 0o7777
+    except FileNotFoundError:
+        mode = 0o666 & ~_UMASK
+    os.chmod(temp_path, mode)
+    os.replace(temp_path, path)
+
+
+def _atomic_replace(path: str, data: bytes) -> None:
+    directory = os.path.dirname(path) or "."
+    fd, temp_path = tempfile.mkstemp(prefix=TEMP_PREFIX + os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        _replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def _write_hash(path: str, digest: str) -> None:
+    if read_stored_hash(path) != digest:
+        _atomic_replace(hash_path_for(path), f"{digest}  {os.path.basename(path)}\n".encode("utf-8"))
+
+
+def _prepare_directory(path: str) -> None:
+    output_dir = os.path.dirname(path)
+    if output_dir and not os.path.exists(output_dir):
+        os.makedirs(output_dir, exist_ok=True)
+
+
+def write_text_if_changed(path: str, text: str, force: bool = False) -> bool:
+    """Atomically writes `text` to `path` unless the file already holds it.
+
+    Returns:
+        bool: True if the file was written, False if it was already up to date.
+    """
+    _prepare_directory(path)
+    data = _encode(text)
+    digest = hashlib.sha256(data).hexdigest()
+    if not force and file_hash(path) == digest:
+        _write_hash(path, digest) # Adopt files written before sidecars existed
+        return False
+    _atomic_replace(path, data)
+    _write_hash(path, digest)
+    return True
+
+
+class _HashingWriter:
+    """Text file-like object that encodes, hashes and writes to a binary handle."""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.sha256 = hashlib.sha256()
+
+    def write(self, text: str) -> int:
+        data = _encode(text)
+        self.sha256.update(data)
+        self.raw.write(data)
+        return len(text)
+
+
+def write_stream_if_changed(path: str, write, force: bool = False) -> bool:
+    """Like write_text_if_changed(), for content produced by `write(fh)` writing text to fh.
+
+    The content streams into a hidden temporary file next to `path`, which is renamed
+    over `path` only when its hash differs from the current file.
+    """
+    _prepare_directory(path)
+    directory = os.path.dirname(path) or "."
+    fd, temp_path = tempfile.mkstemp(prefix=TEMP_PREFIX + os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as raw:
+            writer = _HashingWriter(raw)
+            write(writer)
+            raw.flush()
+            os.fsync(raw.fileno())
+        digest = writer.sha256.hexdigest()
+        if not force and file_hash(path) == digest:
+            os.remove(temp_path)
+            _write_hash(path, digest)
+            return False
+        _replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    _write_hash(path, digest)
+    return True
+
+
+if __name__ == '__main__':
+    target = os.path.join(tempfile.gettempdir(), "AutoCrate_Output_Test.exp")
+    for content in ("a = 1\n", "a = 1\n", "a = 2\n"):
+        print(f"{content.strip()!r}: {'written' if write_text_if_changed(target, content) else 'unchanged'}")
+    print(open(hash_path_for(target)).read().strip())
@@ -6,6 +6,11 @@ Panel configuration logic for AutoCrate based on standardized rules.
 Implements the case-based logic for panel sizes and splice configurations.
 """
 
+from bisect import bisect_left
+from dataclasses import dataclass
+import json
+from typing import Optional, Tuple
+
 try:
     from . import config
 except ImportError:
@@ -30,6 +35,208 @@ CLEAT_SPACING_GAP = 0.75  # Required gap between cleats
 DETAIL_A_DIM_1 = 0.25  # Standard dimension 1 for DETAIL A in splice construction
 DETAIL_A_DIM_2 = 0.75  # Standard dimension 2 for DETAIL A in splice construction
 
+# --- Panel case decision table ---
+# Rows are height bands and columns are width bands, each band closed on its upper
+# breakpoint (x <= breakpoint). Anything past the last breakpoint is OVERSIZE.
+# Case dimensions are numbers or "width"/"height" optionally minus an offset
+# (e.g. "width - 48"), resolved against the looked-up dimensions.
+DEFAULT_PANEL_CASE_TABLE = {
+    "width_breakpoints": [STD_PANEL_WIDTH, 49.5, 50.0, 53.75, 54.25, 74.0, MAX_WIDTH],
+    "height_breakpoints": [STD_PANEL_HEIGHT, 97.5, 98.0, 101.75, 102.25, MAX_HEIGHT],
+    "grid": [
+        ["Case 1", "Case 2", "Case 3", "Case 4", "Case 5", "Case 6", "Case 7"],
+        ["Case 1-1"] + ["UNDEFINED"] * 6,
+        ["Case 1-2"] + ["UNDEFINED"] * 6,
+        ["Case 1-3"] + ["UNDEFINED"] * 6,
+        ["Case 1-4"] + ["UNDEFINED"] * 6,
+        ["Case 1-5"] + ["UNDEFINED"] * 6,
+    ],
+    "cases": {
+        "Case 1": {"front_face_strategy": "Single Panel", "main_panel_width": "width", "main_panel_height": "height",
+                   "splice_required": False},
+        "Case 2": {"front_face_strategy": "48\" Panel + Splice", "main_panel_width": STD_PANEL_WIDTH, "main_panel_height": "height",
+                   "splice_required": True, "splice_width": "width - 48", "min_splice_overlap": MIN_SPLICE_OVERLAP},
+        "Case 3": {"front_face_strategy": "48\" Panel + Splice", "main_panel_width": STD_PANEL_WIDTH, "main_panel_height": "height",
+                   "splice_required": True, "splice_width": 2.0, "min_splice_overlap": MIN_SPLICE_OVERLAP},
+        "Case 4": {"front_face_strategy": "48\" Panel + Splice", "main_panel_width": STD_PANEL_WIDTH, "main_panel_height": "height",
+                   "splice_required": True, "splice_width": 5.75, "min_splice_overlap": MIN_SPLICE_OVERLAP},
+        "Case 5": {"front_face_strategy": "48\" Panel + Splice", "main_panel_width": STD_PANEL_WIDTH, "main_panel_height": "height",
+                   "splice_required": True, "splice_width": 6.25, "min_splice_overlap": MIN_SPLICE_OVERLAP},
+        "Case 6": {"front_face_strategy": "Complex Splice Configuration", "main_panel_width": STD_PANEL_WIDTH, "main_panel_height": "height",
+                   "second_panel_width": 26.0, # From rear panel composition
+                   "splice_required": True, "min_splice_overlap": MIN_SPLICE_OVERLAP,
+                   "front_view_dimensions": {"dim_1": 24.0, "dim_2": 22.5, "dim_3": 1.5, "dim_4": 19.0, "dim_5": 1.5, "dim_6": 20.5}},
+        "Case 7": {"front_face_strategy": "Two 48\" Panels + Central Splice", "main_panel_width": STD_PANEL_WIDTH, "main_panel_height": "height",
+                   "second_panel_width": STD_PANEL_WIDTH,
+                   "splice_required": True, "min_splice_overlap": MIN_SPLICE_OVERLAP,
+                   "front_view_dimensions": {"dim_1": 24.0, "dim_2": 22.5, "dim_3": 22.0, "dim_4": 24.0}},
+        "Case 1-1": {"front_face_strategy": "96\" High Panel + Top Splice", "main_panel_width": "width", "main_panel_height": STD_PANEL_HEIGHT,
+                     "splice_required": True, "splice_type": "vertical", "splice_panel_height": "height - 96", "min_splice_overlap": MIN_SPLICE_OVERLAP},
+        "Case 1-2": {"front_face_strategy": "96\" High Panel + Top Splice", "main_panel_width": "width", "main_panel_height": STD_PANEL_HEIGHT,
+                     "splice_required": True, "splice_type": "vertical", "splice_panel_height": 2.0, "min_splice_overlap": MIN_SPLICE_OVERLAP},
+        "Case 1-3": {"front_face_strategy": "96\" High Panel + Top Splice", "main_panel_width": "width", "main_panel_height": STD_PANEL_HEIGHT,
+                     "splice_required": True, "splice_type": "vertical", "splice_panel_height": 5.75, "min_splice_overlap": MIN_SPLICE_OVERLAP},
+        "Case 1-4": {"front_face_strategy": "96\" High Panel + Top Splice", "main_panel_width": "width", "main_panel_height": STD_PANEL_HEIGHT,
+                     "splice_required": True, "splice_type": "vertical", "splice_panel_height": 6.25, "min_splice_overlap": MIN_SPLICE_OVERLAP},
+        "Case 1-5": {"front_face_strategy": "96\" High Panel + Top Splice", "main_panel_width": "width", "main_panel_height": STD_PANEL_HEIGHT,
+                     "splice_required": True, "splice_type": "vertical", "splice_panel_height": "height - 96", "min_splice_overlap": MIN_SPLICE_OVERLAP},
+        "UNDEFINED": {"status": "WARNING",
+                      "message": "No specific case defined for Width={width}, Height={height}, but dimensions are within limits"},
+        "OVERSIZE": {"status": "ERROR",
+                     "message": "Dimensions exceed maximum allowable: Width={width} (max {max_width}), Height={height} (max {max_height})"},
+    },
+}
+
+# Record fields that are not case dimensions
+_CASE_META_FIELDS = ("status", "message", "front_face_strategy", "splice_required", "splice_type",
+                     "min_splice_overlap", "front_view_dimensions")
+
+def _parse_case_dimension(value) -> tuple:
+    """Parses a case dimension into (source, offset): a number, "width", "height" or e.g. "width - 48"."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return ("", float(value))
+    source, _, offset = str(value).partition("-")
+    source = source.strip()
+    if source not in ("width", "height"):
+        raise ValueError(f"Invalid panel case dimension: {value!r}")
+    return (source, -float(offset) if offset.strip() else 0.0)
+
+@dataclass(frozen=True)
+class PanelCase:
+    """One row of the panel case table. Shared between lookups, so never mutated.
+
+    `dimensions` holds (key, source, offset) triples: source "" means the offset is the
+    fixed value, otherwise the value is the looked-up width/height plus the offset.
+    """
+    case_id: str
+    status: str = "OK"
+    front_face_strategy: Optional[str] = None
+    splice_required: Optional[bool] = None
+    splice_type: Optional[str] = None
+    min_splice_overlap: Optional[float] = None
+    message: Optional[str] = None
+    dimensions: Tuple[Tuple[str, str, float], ...] = ()
+    front_view_dimensions: Tuple[Tuple[str, float], ...] = ()
+
+    def dimension(self, key: str, width: float, height: float):
+        """Returns one case dimension (e.g. "splice_width") for the given face, or None if the case has none."""
+        for dim_key, source, offset in self.dimensions:
+            if dim_key == key:
+                return offset + (width if source == "width" else height if source == "height" else 0.0)
+        return None
+
+    def to_dict(self, width: float, height: float) -> dict:
+        """Legacy case details dict, as returned by determine_panel_case()."""
+        case = {"case_id": self.case_id, "status": self.status}
+        if self.message is not None:
+            case["message"] = self.message.format(width=width, height=height, max_width=MAX_WIDTH, max_height=MAX_HEIGHT)
+            return case
+        if self.front_face_strategy is not None:
+            case["front_face_strategy"] = self.front_face_strategy
+        for key, _, _ in self.dimensions:
+            case[key] = self.dimension(key, width, height)
+        if self.splice_required is not None:
+            case["splice_required"] = self.splice_required
+        if self.splice_type is not None:
+            case["splice_type"] = self.splice_type
+        if self.min_splice_overlap is not None:
+            case["min_splice_overlap"] = self.min_splice_overlap
+        if self.front_view_dimensions:
+            case["front_view_dimensions"] = dict(self.front_view_dimensions)
+        return case
+
+    @classmethod
+    def from_rule(cls, case_id: str, rule: dict) -> "PanelCase":
+        """Builds a record from one entry of a rules table's "cases" mapping."""
+        return cls(
+            case_id=case_id,
+            status=rule.get("status", "OK"),
+            front_face_strategy=rule.get("front_face_strategy"),
+            splice_required=rule.get("splice_required"),
+            splice_type=rule.get("splice_type"),
+            min_splice_overlap=rule.get("min_splice_overlap"),
+            message=rule.get("message"),
+            dimensions=tuple((key, *_parse_case_dimension(value)) for key, value in rule.items()
+                             if key not in _CASE_META_FIELDS),
+            front_view_dimensions=tuple((k, float(v)) for k, v in rule.get("front_view_dimensions", {}).items()),
+        )
+
+@dataclass(frozen=True)
+class PanelCaseTable:
+    """Compiled panel case table: sorted breakpoints plus a grid of shared PanelCase records."""
+    width_breakpoints: Tuple[float, ...]
+    height_breakpoints: Tuple[float, ...]
+    grid: Tuple[Tuple[PanelCase, ...], ...]
+    cases: Tuple[PanelCase, ...] # Unique records; batch lookups return indexes into this
+    oversize: PanelCase
+    undefined: PanelCase
+
+    @classmethod
+    def from_dict(cls, table: dict) -> "PanelCaseTable":
+        """Validates and compiles a rules table (see DEFAULT_PANEL_CASE_TABLE for the layout)."""
+        width_bps = tuple(float(w) for w in table["width_breakpoints"])
+        height_bps = tuple(float(h) for h in table["height_breakpoints"])
+        for name, bps in (("width_breakpoints", width_bps), ("height_breakpoints", height_bps)):
+            if not bps or any(a >= b for a, b in zip(bps, bps[1:])):
+                raise ValueError(f"Panel case table {name} must be non-empty and strictly increasing")
+
+        rules = dict(table["cases"])
+        rules.setdefault("UNDEFINED", DEFAULT_PANEL_CASE_TABLE["cases"]["UNDEFINED"])
+        rules.setdefault("OVERSIZE", DEFAULT_PANEL_CASE_TABLE["cases"]["OVERSIZE"])
+        records = {case_id: PanelCase.from_rule(case_id, rule) for case_id, rule in rules.items()}
+
+        rows = table["grid"]
+        if len(rows) != len(height_bps) or any(len(row) != len(width_bps) for row in rows):
+            raise ValueError("Panel case table grid must have one row per height band and one column per width band")
+        unknown = {case_id for row in rows for case_id in row if case_id not in records}
+        if unknown:
+            raise ValueError(f"Panel case table grid references undefined cases: {sorted(unknown)}")
+
+        return cls(
+            width_breakpoints=width_bps,
+            height_breakpoints=height_bps,
+            grid=tuple(tuple(records[case_id] for case_id in row) for row in rows),
+            cases=tuple(records.values()),
+            oversize=records["OVERSIZE"],
+            undefined=records["UNDEFINED"],
+        )
+
+    def lookup(self, width: float, height: float) -> PanelCase:
+        """Returns the shared case record for a front face, in O(log n)."""
+        if width != width or height != height: # NaN matches no band
+            return self.undefined
+        wi = bisect_left(self.width_breakpoints, width)
+        hi = bisect_left(self.height_breakpoints, height)
+        if wi == len(self.width_breakpoints) or hi == len(self.height_breakpoints):
+            return self.oversize
+        return self.grid[hi][wi]
+
+def load_panel_case_table(path: str) -> PanelCaseTable:
+    """Loads and compiles a panel case table from a JSON rules file."""
+    with open(path, 'r') as f:
+        return PanelCaseTable.from_dict(json.load(f))
+
+_active_case_table = PanelCaseTable.from_dict(DEFAULT_PANEL_CASE_TABLE)
+
+def get_panel_case_table() -> PanelCaseTable:
+    return _active_case_table
+
+def set_panel_case_table(table) -> PanelCaseTable:
+    """Activates a case table (a PanelCaseTable, a table dict or a rules file path); None restores the default."""
+    global _active_case_table
+    if table is None:
+        table = PanelCaseTable.from_dict(DEFAULT_PANEL_CASE_TABLE)
+    elif isinstance(table, str):
+        table = load_panel_case_table(table)
+    elif isinstance(table, dict):
+        table = PanelCaseTable.from_dict(table)
+    _active_case_table = table
+    return table
+
+def lookup_panel_case(width, height) -> PanelCase:
+    """Returns the shared, immutable PanelCase record for a front face (no per-call allocation)."""
+    return _active_case_table.lookup(width, height)
+
 def determine_panel_case(width, height):
     """
     Determines which case applies based on input width and height.
@@ -41,175 +248,68 @@ def determine_panel_case(width, height):
     Returns:
         dict: Case details including case_id and construction approach
     """
-    # Validate against maximum dimensions
-    if width > MAX_WIDTH or height > MAX_HEIGHT:
-        return {
-            "case_id": "OVERSIZE",
-            "status": "ERROR",
-            "message": f"Dimensions exceed maximum allowable: Width={width} (max {MAX_WIDTH}), Height={height} (max {MAX_HEIGHT})"
-        }
-    
-    # Handle cases where Height ≤ 96 inches (Cases 1-7)
-    if height <= STD_PANEL_HEIGHT:
-        if width <= STD_PANEL_WIDTH:
-            return {
-                "case_id": "Case 1",
-                "status": "OK",
-                "front_face_strategy": "Single Panel",
-                "main_panel_width": width,
-                "main_panel_height": height,
-                "splice_required": False
-            }
-        elif width <= 49.5:
-            return {
-                "case_id": "Case 2",
-                "status": "OK",
-                "front_face_strategy": "48\" Panel + Splice",
-                "main_panel_width": STD_PANEL_WIDTH,
-                "main_panel_height": height,
-                "splice_required": True,
-                "splice_width": width - STD_PANEL_WIDTH,
-                "min_splice_overlap": MIN_SPLICE_OVERLAP
-            }
-        elif width <= 50.0:
-            return {
-                "case_id": "Case 3",
-                "status": "OK",
-                "front_face_strategy": "48\" Panel + Splice",
-                "main_panel_width": STD_PANEL_WIDTH, 
-                "main_panel_height": height,
-                "splice_required": True,
-                "splice_width": 2.0,  # Fixed at 2 inches for this case
-                "min_splice_overlap": MIN_SPLICE_OVERLAP
-            }
-        elif width <= 53.75:
-            return {
-                "case_id": "Case 4",
-                "status": "OK", 
-                "front_face_strategy": "48\" Panel + Splice",
-                "main_panel_width": STD_PANEL_WIDTH,
-                "main_panel_height": height,
-                "splice_required": True,
-                "splice_width": 5.75,  # Fixed at 5.75 inches for this case
-                "min_splice_overlap": MIN_SPLICE_OVERLAP
-            }
-        elif width <= 54.25:
-            return {
-                "case_id": "Case 5",
-                "status": "OK",
-                "front_face_strategy": "48\" Panel + Splice",
-                "main_panel_width": STD_PANEL_WIDTH,
-                "main_panel_height": height,
-                "splice_required": True,
-                "splice_width": 6.25,  # Fixed at 6.25 inches for this case
-                "min_splice_overlap": MIN_SPLICE_OVERLAP
-            }
-        elif width <= 74.0:
-            return {
-                "case_id": "Case 6",
-                "status": "OK",
-                "front_face_strategy": "Complex Splice Configuration",
-                "main_panel_width": STD_PANEL_WIDTH,
-                "main_panel_height": height,
-                "second_panel_width": 26.0,  # From rear panel composition
-                "splice_required": True,
-                "min_splice_overlap": MIN_SPLICE_OVERLAP,
-                "front_view_dimensions": {
-                    "dim_1": 24.0,
-                    "dim_2": 22.5,
-                    "dim_3": 1.5,
-                    "dim_4": 19.0,
-                    "dim_5": 1.5,
-                    "dim_6": 20.5
-                }
-            }
-        elif width <= 96.0:
-            return {
-                "case_id": "Case 7",
-                "status": "OK", 
-                "front_face_strategy": "Two 48\" Panels + Central Splice",
-                "main_panel_width": STD_PANEL_WIDTH,
-                "main_panel_height": height,
-                "second_panel_width": STD_PANEL_WIDTH,
-                "splice_required": True,
-                "min_splice_overlap": MIN_SPLICE_OVERLAP,
-                "front_view_dimensions": {
-                    "dim_1": 24.0,
-                    "dim_2": 22.5, 
-                    "dim_3": 22.0,
-                    "dim_4": 24.0
-                }
-            }
-    
-    # Handle cases where Width ≤ 48 inches and Height > 96 inches (Cases 1-1 to 1-5)
-    elif width <= STD_PANEL_WIDTH and height > STD_PANEL_HEIGHT:
-        if height <= 97.5:
-            return {
-                "case_id": "Case 1-1",
-                "status": "OK",
-                "front_face_strategy": "96\" High Panel + Top Splice",
-                "main_panel_width": width,
-                "main_panel_height": STD_PANEL_HEIGHT,
-                "splice_required": True,
-                "splice_type": "vertical",
-                "splice_panel_height": height - STD_PANEL_HEIGHT,
-                "min_splice_overlap": MIN_SPLICE_OVERLAP
-            }
-        elif height <= 98.0:
-            return {
-                "case_id": "Case 1-2",
-                "status": "OK",
-                "front_face_strategy": "96\" High Panel + Top Splice",
-                "main_panel_width": width, 
-                "main_panel_height": STD_PANEL_HEIGHT,
-                "splice_required": True,
-                "splice_type": "vertical",
-                "splice_panel_height": 2.0,  # Fixed at 2 inches for this case
-                "min_splice_overlap": MIN_SPLICE_OVERLAP
-            }
-        elif height <= 101.75:
-            return {
-                "case_id": "Case 1-3",
-                "status": "OK",
-                "front_face_strategy": "96\" High Panel + Top Splice",
-                "main_panel_width": width,
-                "main_panel_height": STD_PANEL_HEIGHT,
-                "splice_required": True, 
-                "splice_type": "vertical",
-                "splice_panel_height": 5.75,  # Fixed at 5.75 inches for this case
-                "min_splice_overlap": MIN_SPLICE_OVERLAP
-            }
-        elif height <= 102.25:
-            return {
-                "case_id": "Case 1-4",
-                "status": "OK",
-                "front_face_strategy": "96\" High Panel + Top Splice",
-                "main_panel_width": width,
-                "main_panel_height": STD_PANEL_HEIGHT,
-                "splice_required": True,
-                "splice_type": "vertical",
-                "splice_panel_height": 6.25,  # Fixed at 6.25 inches for this case
-                "min_splice_overlap": MIN_SPLICE_OVERLAP
-            }
-        elif height <= 116.0:
-            return {
-                "case_id": "Case 1-5",
-                "status": "OK",
-                "front_face_strategy": "96\" High Panel + Top Splice",
-                "main_panel_width": width,
-                "main_panel_height": STD_PANEL_HEIGHT,
-                "splice_required": True,
-                "splice_type": "vertical",
-                "splice_panel_height": height - STD_PANEL_HEIGHT,
-                "min_splice_overlap": MIN_SPLICE_OVERLAP
-            }
-    
-    # If none of the defined cases match but dimensions are within limits
-    return {
-        "case_id": "UNDEFINED",
-        "status": "WARNING",
-        "message": f"No specific case defined for Width={width}, Height={height}, but dimensions are within limits"
-    }
+    return lookup_panel_case(width, height).to_dict(width, height)
+
+def determine_panel_case_batch(widths, heights, table: PanelCaseTable = None) -> dict:
+    """Vectorized case lookup for arrays of front faces.
+
+    Returns:
+        dict: "case_index" (int array into "cases") and "cases" (the table's PanelCase records).
+    """
+    import numpy as np # Imported here so panel logic stays importable without NumPy
+
+    table = table or _active_case_table
+    widths, heights = np.broadcast_arrays(np.asarray(widths, dtype=float), np.asarray(heights, dtype=float))
+    index_of = {id(case): i for i, case in enumerate(table.cases)}
+    # Grid of case indexes padded with an OVERSIZE row and column for out-of-range lookups
+    grid = np.full((len(table.height_breakpoints) + 1, len(table.width_breakpoints) + 1),
+                   index_of[id(table.oversize)], dtype=np.intp)
+    grid[:-1, :-1] = [[index_of[id(case)] for case in row] for row in table.grid]
+
+    wi = np.searchsorted(np.asarray(table.width_breakpoints), widths, side='left')
+    hi = np.searchsorted(np.asarray(table.height_breakpoints), heights, side='left')
+    case_index = grid[hi, wi]
+    case_index[np.isnan(widths) | np.isnan(heights)] = index_of[id(table.undefined)]
+    return {"case_index": case_index, "cases": table.cases}
+
+def panel_case_coverage(table: PanelCaseTable = None, case_id: str = "UNDEFINED") -> list:
+    """Lists the width/height regions (within the maximum dimensions) that resolve to `case_id`.
+
+    Regions are (min, max] intervals; a min of None means unbounded below.
+    Adjacent cells are merged across width first, then across height.
+    """
+    table = table or _active_case_table
+    width_lows = (None,) + table.width_breakpoints[:-1]
+    height_lows = (None,) + table.height_breakpoints[:-1]
+
+    # Merge matching cells along each height band
+    row_spans = []
+    for row in table.grid:
+        spans, start = [], None
+        for wi, case in enumerate(row + (None,)):
+            if case is not None and case.case_id == case_id:
+                start = wi if start is None else start
+            elif start is not None:
+                spans.append((width_lows[start], table.width_breakpoints[wi - 1]))
+                start = None
+        row_spans.append(spans)
+
+    # Merge identical width spans across consecutive height bands
+    regions = []
+    open_regions = {}
+    for hi, spans in enumerate(row_spans):
+        next_open = {}
+        for span in spans:
+            region = open_regions.get(span)
+            if region is None:
+                region = {"case_id": case_id, "width_min": span[0], "width_max": span[1],
+                          "height_min": height_lows[hi], "height_max": table.height_breakpoints[hi]}
+                regions.append(region)
+            else:
+                region["height_max"] = table.height_breakpoints[hi]
+            next_open[span] = region
+        open_regions = next_open
+    return regions
 
 def calculate_cleat_positions(dimension, max_spacing=MAX_CLEAT_SPACING, edge_cleats=True):
     """
@@ -267,10 +367,11 @@ def generate_panel_config(width, height, panel_thickness, cleat_thickness, cleat
         dict: Complete panel configuration with cleats and splices
     """
     # Determine which case applies
-    case_info = determine_panel_case(width, height)
+    case = lookup_panel_case(width, height)
+    case_info = case.to_dict(width, height)
     
     # If error case, return immediately
-    if case_info["status"] == "ERROR":
+    if case.status == "ERROR":
         return case_info
     
     # Initialize panel config with case info
@@ -302,9 +403,9 @@ def generate_panel_config(width, height, panel_thickness, cleat_thickness, cleat
     end_horizontal_cleats = calculate_cleat_positions(end_panel_width, MAX_CLEAT_SPACING)
     
     # Setup panel info based on case
-    if case_info["splice_required"]:
+    if case.splice_required:
         # Handle different splice cases
-        if "splice_type" in case_info and case_info["splice_type"] == "vertical":
+        if case.splice_type == "vertical":
             # Vertical splice (height extension)
             panel_config["splices"].append({
                 "type": "vertical",
@@ -325,7 +426,7 @@ def generate_panel_config(width, height, panel_thickness, cleat_thickness, cleat
             })
             
             # Add special handling for multi-panel cases (like Case 7)
-            if case_info["case_id"] == "Case 7":
+            if case.case_id == "Case 7":
                 # Central splice for two 48" panels
                 panel_config["splices"].append({
                     "type": "central", 
@@ -358,7 +459,7 @@ def generate_panel_config(width, height, panel_thickness, cleat_thickness, cleat
         "INPUT_Min_Splice_Overlap": MIN_SPLICE_OVERLAP,
         "INPUT_Cleat_Splice_Clearance": CLEAT_SPLICE_CLEARANCE,
         "CALC_Panel_Case_ID": case_info["case_id"],
-        "CALC_Splice_Required": 1 if case_info["splice_required"] else 0,
+        "CALC_Splice_Required": 1 if case.splice_required else 0,
         "CALC_Std_Panel_Width": STD_PANEL_WIDTH,
         "CALC_Std_Panel_Height": STD_PANEL_HEIGHT,
         "DETAIL_A_Dim_1": DETAIL_A_DIM_1,
@@ -390,3 +491,7 @@ if __name__ == '__main__':
         print(f"Width={width}, Height={height} => {case_info['case_id']}")
         # Uncomment to see full case details
         # print(json.dumps(case_info, indent=2))
+
+    print("\nRegions without a defined case:")
+    for region in panel_case_coverage():
+        print(f"  Width ({region['width_min']}, {region['width_max']}] x Height ({region['height_min']}, {region['height_max']}]")
@@ -2,73 +2,92 @@
 """
 Utility functions for generating PDF reports for the AutoCrate Wizard.
 Uses FPDF2 library for PDF creation and Kaleido for Plotly figure export.
+fpdf, pandas and plotly are only imported when a report is built, so importing
+this module stays cheap and works without them installed.
 """
 import io
 import logging
-from typing import Dict, List, Any
+from typing import Dict, List, Any, TYPE_CHECKING
 
-import pandas as pd
-import plotly.graph_objects as go
-from fpdf import FPDF
+if TYPE_CHECKING: # Annotations only; never imported at runtime
+    import pandas as pd
+    import plotly.graph_objects as go
 
 log = logging.getLogger(__name__)
 
-class PDF(FPDF):
-    def header(self):
-        self.set_font('Arial', 'B', 12)
-        self.cell(0, 10, 'AutoCrate Wizard - Crate Design Report', 0, 1, 'C')
-        self.ln(5)
-
-    def footer(self):
-        self.set_y(-15)
-        self.set_font('Arial', 'I', 8)
-        self.cell(0, 10, f'Page {self.page_no()}/{{nb}}', 0, 0, 'C')
-
-    def chapter_title(self, title):
-        self.set_font('Arial', 'B', 12)
-        self.cell(0, 10, title, 0, 1, 'L')
-        self.ln(4)
-
-    def add_bom_table(self, bom_data: pd.DataFrame):
-        if bom_data.empty:
-            self.set_font('Arial', '', 10)
-            self.cell(0, 10, "No Bill of Materials data available.", 0, 1)
-            return
-
-        self.set_font('Arial', 'B', 10)
-        col_widths = {'Item No.': 20, 'Qty': 15, 'Part No.': 50, 'Description': 105} # Adjust as needed
+_pdf_class = None
+
+def _get_pdf_class():
+    """Builds the FPDF subclass on first use (imports fpdf)."""
+    global _pdf_class
+    if _pdf_class is not None:
+        return _pdf_class
+    from fpdf import FPDF
+
+    class PDF(FPDF):
+        def header(self):
+            self.set_font('Arial', 'B', 12)
+            self.cell(0, 10, 'AutoCrate Wizard - Crate Design Report', 0, 1, 'C')
+            self.ln(5)
+
+        def footer(self):
+            self.set_y(-15)
+            self.set_font('Arial', 'I', 8)
+            self.cell(0, 10, f'Page {self.page_no()}/{{nb}}', 0, 0, 'C')
+
+        def chapter_title(self, title):
+            self.set_font('Arial', 'B', 12)
+            self.cell(0, 10, title, 0, 1, 'L')
+            self.ln(4)
+
+        def add_bom_table(self, bom_data: "pd.DataFrame"):
+            if bom_data.empty:
+                self.set_font('Arial', '', 10)
+                self.cell(0, 10, "No Bill of Materials data available.", 0, 1)
+                return
+
+            self.set_font('Arial', 'B', 10)
+            col_widths = {'Item No.': 20, 'Qty': 15, 'Part No.': 50, 'Description': 105} # Adjust as needed
         
-        # Headers
-        for col_name in bom_data.columns:
-            self.cell(col_widths.get(col_name, 40), 7, col_name, 1, 0, 'C')
-        self.ln()
-
-        # Data
-        self.set_font('Arial', '', 9)
-        for index, row in bom_data.iterrows():
+            # Headers
             for col_name in bom_data.columns:
-                self.cell(col_widths.get(col_name, 40), 6, str(row[col_name]), 1, 0, 'L')
+                self.cell(col_widths.get(col_name, 40), 7, col_name, 1, 0, 'C')
             self.ln()
-            # TODO make this code more robust. The pdf is not being generated
-    def add_plotly_figure_as_image(self, fig: go.Figure, title: str, fig_width_mm: int = 180):
-        try:
-            img_bytes = fig.to_image(format="png", engine="kaleido", width=800, height=600) # Adjust resolution as needed
+
+            # Data
+            self.set_font('Arial', '', 9)
+            for index, row in bom_data.iterrows():
+                for col_name in bom_data.columns:
+                    self.cell(col_widths.get(col_name, 40), 6, str(row[col_name]), 1, 0, 'L')
+                self.ln()
+                # TODO make this code more robust. The pdf is not being generated
+        def add_plotly_figure_as_image(self, fig: "go.Figure", title: str, fig_width_mm: int = 180):
+            try:
+                img_bytes = fig.to_image(format="png", engine="kaleido", width=800, height=600) # Adjust resolution as needed
             
-            # Check page space, add new page if needed
-            if self.get_y() + 70 > self.page_break_trigger: # Approximate height for image + title
-                self.add_page()
+                # Check page space, add new page if needed
+                if self.get_y() + 70 > self.page_break_trigger: # Approximate height for image + title
+                    self.add_page()
 
-            self.chapter_title(title)
-            self.image(io.BytesIO(img_bytes), w=fig_width_mm) # Adjust width as needed
-            self.ln(5)
-        except Exception as e:
-            log.error(f"Failed to add figure '{title}' to PDF: {e}", exc_info=True)
-            self.set_font('Arial', 'I', 10)
-            self.set_text_color(255, 0, 0) # Red color for error
-            self.cell(0, 10, f"Error rendering figure: {title} ({e})", 0, 1)
-            self.set_text_color(0, 0, 0) # Reset to black
-
-def create_crate_report(bom_data: pd.DataFrame, figures: Dict[str, go.Figure], ui_inputs: Dict[str, Any]) -> bytes:
+                self.chapter_title(title)
+                self.image(io.BytesIO(img_bytes), w=fig_width_mm) # Adjust width as needed
+                self.ln(5)
+            except Exception as e:
+                log.error(f"Failed to add figure '{title}' to PDF: {e}", exc_info=True)
+                self.set_font('Arial', 'I', 10)
+                self.set_text_color(255, 0, 0) # Red color for error
+                self.cell(0, 10, f"Error rendering figure: {title} ({e})", 0, 1)
+                self.set_text_color(0, 0, 0) # Reset to black
+
+    _pdf_class = PDF
+    return _pdf_class
+
+def __getattr__(name):
+    if name == "PDF": # Keeps `from wizard_app.pdf_generator import PDF` working
+        return _get_pdf_class()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def create_crate_report(bom_data: "pd.DataFrame", figures: Dict[str, "go.Figure"], ui_inputs: Dict[str, Any]) -> bytes:
     """
     Generates a PDF report containing the BOM and crate component schematics.
 
@@ -80,7 +99,7 @@ def create_crate_report(bom_data: pd.DataFrame, figures: Dict[str, go.Figure], u
     Returns:
         bytes: The generated PDF content.
     """
-    pdf = PDF()
+    pdf = _get_pdf_class()()
     pdf.alias_nb_pages() # Enable page numbering
     pdf.add_page()
     
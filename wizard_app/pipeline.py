@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Headless end-to-end crate design pipeline.
+
+Runs skid -> floorboard -> wall -> cap -> decal -> exp without any PyQt import,
+so batch jobs, services and benchmarks can all share one entry point.
+"""
+
+from dataclasses import dataclass, field
+from typing import Callable
+
+try:
+    from . import config
+    from . import skid_logic
+    from . import floorboard_logic
+    from . import wall_logic
+    from . import cap_logic
+    from . import decal_logic
+    from . import exp_generator
+    from . import instrumentation
+    from . import output_files
+    from . import rules
+    from . import schema
+except ImportError:
+    import config # For direct testing
+    import skid_logic
+    import floorboard_logic
+    import wall_logic
+    import cap_logic
+    import decal_logic
+    import exp_generator
+    import instrumentation
+    import output_files
+    import rules
+    import schema
+
+# Input model (see schema): canonical defaults, alternate key names and the bool strings accepted from CSV/forms
+DEFAULT_PARAMETERS: dict = schema.DEFAULT_PARAMETERS
+PARAMETER_ALIASES: dict = schema.PARAMETER_ALIASES
+TRUE_STRINGS = schema.TRUE_STRINGS
+normalize_parameters = schema.normalize_parameters
+
+
+@dataclass
+class CrateDesign:
+    """Result bundle for one crate: normalized inputs, every stage result and the .exp content."""
+    params: dict
+    skid: dict
+    floorboard: dict
+    wall: dict
+    cap: dict
+    decal: dict
+    crate_overall_width: float
+    crate_overall_length: float
+    crate_overall_height: float
+    crate_internal_height: float
+    exp_content: str = ""
+    errors: list = field(default_factory=list)
+
+    @property
+    def status(self) -> str:
+        return "ERROR" if self.errors else "OK"
+
+    def to_dict(self) -> dict:
+        return {
+            "status": self.status,
+            "errors": list(self.errors),
+            "params": self.params,
+            "skid": self.skid,
+            "floorboard": self.floorboard,
+            "wall": self.wall,
+            "cap": self.cap,
+            "decal": self.decal,
+            "crate_overall_width": self.crate_overall_width,
+            "crate_overall_length": self.crate_overall_length,
+            "crate_overall_height": self.crate_overall_height,
+            "crate_internal_height": self.crate_internal_height,
+            "exp_content": self.exp_content,
+        }
+
+
+# --- Pipeline stages ---
+# Each stage declares the parameters and upstream stages it reads, so an
+# IncrementalPipeline can rerun only the stages whose inputs changed.
+
+@dataclass(frozen=True)
+class Stage:
+    """One pipeline step: `run(params, outputs)` returns the stage result from the
+    normalized parameters and the results of the stages listed in `depends_on`."""
+    name: str
+    param_keys: tuple
+    depends_on: tuple
+    run: Callable
+
+
+def _floor_span_y(p: dict) -> float:
+    return p['product_width'] + 2 * p['clearance_side']
+
+
+def _internal_height(p: dict) -> float:
+    return p['product_actual_height'] + p['clearance_above_product']
+
+
+def _overall_height(p: dict, skid_results: dict, cap_results: dict) -> float:
+    return skid_results.get('skid_actual_height', 0) + \
+           p['floor_lumbar_thickness'] + \
+           _internal_height(p) + \
+           cap_results.get('cap_panel', {}).get('thickness', p['panel_thickness'])
+
+
+def _run_skid(p: dict, outputs: dict) -> dict:
+    # Shipping base
+    return skid_logic.calculate_skid_layout(
+        product_weight=p['product_weight'], product_width=p['product_width'],
+        product_length=p['product_length'], clearance_side=p['clearance_side'],
+        panel_thickness=p['panel_thickness'], cleat_thickness=p['cleat_thickness'],
+        allow_3x4_skids_for_light_loads=p['allow_3x4_skids']
+    )
+
+
+def _run_floorboard(p: dict, outputs: dict) -> dict:
+    return floorboard_logic.calculate_floorboard_layout_refined(
+        target_span_to_fill_y=_floor_span_y(p),
+        board_length_x=outputs['skid'].get('skid_actual_length', p['product_length']),
+        chosen_standard_floorboard_nominal_key=p['chosen_standard_floorboard_nominal'],
+        allow_custom_fill=p['allow_custom_floorboard_fill'],
+        floorboard_actual_thickness_z=p['floor_lumbar_thickness'],
+        build_exp_data=outputs.get('_generate_exp', True)
+    )
+
+
+def _run_wall(p: dict, outputs: dict) -> dict:
+    # Crate cap (walls + top)
+    return wall_logic.calculate_wall_layout(
+        crate_internal_width=_floor_span_y(p),
+        crate_internal_length=outputs['skid'].get('skid_actual_length', p['product_length']),
+        crate_internal_height=_internal_height(p),
+        panel_thickness=p['panel_thickness'],
+        cleat_thickness=p['cleat_thickness'],
+        cleat_width=p['wall_cleat_width'],
+        wall_construction_type="style_b",
+        end_panel_1_removable=p['end_panel_1_removable'],
+        end_panel_2_removable=p['end_panel_2_removable'],
+        side_panel_1_removable=p['side_panel_1_removable'],
+        side_panel_2_removable=p['side_panel_2_removable']
+    )
+
+
+def _run_cap(p: dict, outputs: dict) -> dict:
+    return cap_logic.calculate_cap_layout(
+        crate_overall_width_y=outputs['skid'].get('crate_overall_width_calculated', 0),
+        crate_overall_length_x=outputs['skid'].get('skid_actual_length', 0),
+        cap_panel_sheathing_thickness=p['panel_thickness'],
+        cap_cleat_actual_thickness=p['cleat_thickness'],
+        cap_cleat_actual_width=p['cap_cleat_width'],
+        max_top_cleat_spacing=p['max_top_cleat_spacing'],
+        top_panel_removable=p['top_panel_removable']
+    )
+
+
+def _run_decal(p: dict, outputs: dict) -> dict:
+    wall_results = outputs['wall']
+    return decal_logic.calculate_decal_placements(
+        product_is_fragile=p['product_is_fragile'],
+        product_requires_special_handling=p['product_requires_special_handling'],
+        panel_height_side=wall_results.get('side_panels', {}).get('panel_height_dim', 0),
+        panel_width_side=wall_results.get('side_panels', {}).get('panel_width_dim', 0),
+        panel_height_end=wall_results.get('end_panels', {}).get('panel_height_dim', 0),
+        panel_width_end=wall_results.get('end_panels', {}).get('panel_width_dim', 0),
+        overall_crate_height=_overall_height(p, outputs['skid'], outputs['cap'])
+    )
+
+
+def _run_exp(p: dict, outputs: dict) -> str:
+    if not outputs.get('_generate_exp', True):
+        return ""
+    return exp_generator.generate_nx_exp_file_content(
+        product_params=p, skid_results=outputs['skid'], floorboard_results=outputs['floorboard'],
+        wall_results=outputs['wall'], cap_results=outputs['cap'], decal_results=outputs['decal'],
+        app_version=outputs.get('_app_version', config.VERSION)
+    )
+
+
+# In dependency order
+STAGES: tuple = (
+    Stage("skid", ("product_weight", "product_width", "product_length", "clearance_side",
+                   "panel_thickness", "cleat_thickness", "allow_3x4_skids"), (), _run_skid),
+    Stage("floorboard", ("product_width", "product_length", "clearance_side", "chosen_standard_floorboard_nominal",
+                         "allow_custom_floorboard_fill", "floor_lumbar_thickness"), ("skid",), _run_floorboard),
+    Stage("wall", ("product_width", "product_length", "clearance_side", "product_actual_height",
+                   "clearance_above_product", "panel_thickness", "cleat_thickness", "wall_cleat_width",
+                   "end_panel_1_removable", "end_panel_2_removable", "side_panel_1_removable",
+                   "side_panel_2_removable"), ("skid",), _run_wall),
+    Stage("cap", ("panel_thickness", "cleat_thickness", "cap_cleat_width", "max_top_cleat_spacing",
+                  "top_panel_removable"), ("skid",), _run_cap),
+    Stage("decal", ("product_is_fragile", "product_requires_special_handling", "product_actual_height",
+                    "clearance_above_product", "floor_lumbar_thickness", "panel_thickness"),
+          ("skid", "wall", "cap"), _run_decal),
+    Stage("exp", tuple(DEFAULT_PARAMETERS), ("skid", "floorboard", "wall", "cap", "decal"), _run_exp),
+)
+
+
+def _assemble_design(p: dict, outputs: dict) -> "CrateDesign":
+    errors = [
+        f"{stage}: {res.get('message', 'error')}"
+        for stage, res in (("floorboard", outputs['floorboard']), ("wall", outputs['wall']))
+        if res.get("status") == "ERROR"
+    ]
+    skid_results = outputs['skid']
+    return CrateDesign(
+        params=p,
+        skid=skid_results,
+        floorboard=outputs['floorboard'],
+        wall=outputs['wall'],
+        cap=outputs['cap'],
+        decal=outputs['decal'],
+        crate_overall_width=skid_results.get('crate_overall_width_calculated', 0.0),
+        crate_overall_length=skid_results.get('skid_actual_length', 0.0),
+        crate_overall_height=_overall_height(p, skid_results, outputs['cap']),
+        crate_internal_height=_internal_height(p),
+        exp_content=outputs['exp'],
+        errors=errors,
+    )
+
+
+def design_crate(params=None, generate_exp: bool = True, app_version: str = config.VERSION,
+                 **overrides) -> CrateDesign:
+    """Runs the full crate design pipeline for one set of input parameters.
+
+    Args:
+        params: Parameter dict or object (see normalize_parameters). None uses the defaults.
+        generate_exp: Whether to build the NX .exp file content.
+        app_version: Version string written into the .exp header.
+        **overrides: Individual parameter values that take precedence over `params`.
+
+    Returns:
+        CrateDesign: All stage results plus the derived overall crate dimensions.
+    """
+    p = normalize_parameters(params, **overrides)
+    outputs = {'_generate_exp': generate_exp, '_app_version': app_version}
+    instrumentation.begin_run()
+    for stage in STAGES:
+        with instrumentation.timer(stage.name):
+            outputs[stage.name] = stage.run(p, outputs)
+    return _assemble_design(p, outputs)
+
+
+class IncrementalPipeline:
+    """Re-runs only the stages whose inputs changed since the previous update().
+
+    A stage is rerun when one of its parameters changed, or when an upstream stage
+    was rerun and produced a different result. Other stage results are reused, so
+    live edits and one-axis sweeps skip the unaffected stages. Activating a new rule
+    set (see rules.set_rules) reruns every stage.
+    """
+
+    def __init__(self, generate_exp: bool = True, app_version: str = config.VERSION, stages: tuple = STAGES):
+        self.generate_exp = generate_exp
+        self.app_version = app_version
+        self.stages = stages
+        self.last_params = None
+        self.outputs = {}
+        self.last_rerun = [] # Stage names recomputed by the most recent update()
+        self.rules = None # RuleSet the stored outputs were computed with
+
+    def update(self, params=None, **overrides) -> CrateDesign:
+        p = normalize_parameters(params, **overrides)
+        active_rules = rules.get_rules()
+        previous = self.last_params if active_rules is self.rules else None
+        outputs = {'_generate_exp': self.generate_exp, '_app_version': self.app_version}
+        changed_stages = set()
+        rerun = []
+        instrumentation.begin_run()
+        for stage in self.stages:
+            stale = (previous is None or stage.name not in self.outputs or
+                     any(p[key] != previous[key] for key in stage.param_keys) or
+                     any(dep in changed_stages for dep in stage.depends_on))
+            if stale:
+                with instrumentation.timer(stage.name):
+                    result = stage.run(p, outputs)
+                rerun.append(stage.name)
+                if stage.name not in self.outputs or result != self.outputs[stage.name]:
+                    changed_stages.add(stage.name)
+                outputs[stage.name] = result
+            else:
+                outputs[stage.name] = self.outputs[stage.name]
+
+        self.last_params = p
+        self.outputs = outputs
+        self.last_rerun = rerun
+        self.rules = active_rules
+        return _assemble_design(p, outputs)
+
+    def reset(self) -> None:
+        """Forgets the cached stage results so the next update() runs every stage."""
+        self.last_params = None
+        self.outputs = {}
+
+
+@instrumentation.timed("exp_write")
+def write_exp_file_if_changed(design: CrateDesign, path: str, app_version: str = config.VERSION,
+                              force: bool = False) -> bool:
+    """Writes the design's .exp file to `path` unless it already holds the same content.
+
+    The file is replaced atomically and gets a `.sha256` sidecar (see output_files), so
+    an unchanged design leaves the file, its mtime and any file watchers alone.
+    Uses design.exp_content when present; designs computed with generate_exp=False are
+    streamed section by section instead (their floorboard section then omits the
+    per-board FB_* expressions, which only a generate_exp run computes).
+
+    Returns:
+        bool: True if the file was written, False if it was already up to date.
+    """
+    if design.exp_content:
+        return output_files.write_text_if_changed(path, design.exp_content, force=force)
+    return output_files.write_stream_if_changed(
+        path, lambda f: exp_generator.write_nx_exp_file(f, design.params, design.skid, design.floorboard, design.wall,
+                                                        design.cap, design.decal, app_version=app_version),
+        force=force)
+
+
+def write_exp_file(design: CrateDesign, path: str, app_version: str = config.VERSION) -> str:
+    """Writes the design's .exp file to `path` (skipped when unchanged) and returns the path."""
+    write_exp_file_if_changed(design, path, app_version=app_version)
+    return path
+
+
+if __name__ == '__main__':
+    import json
+    import sys
+
+    source = {}
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], 'r') as f:
+            source = json.load(f)
+    result = design_crate(source)
+    print(json.dumps({k: v for k, v in result.to_dict().items() if k != "exp_content"}, indent=2, default=str))
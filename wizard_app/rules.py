@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Versioned business rules compiled into immutable lookup structures.
+
+The skid weight rules, skid and floorboard lumber sizes, decal rules and the
+panel case table are read from one RuleSet. By default it is compiled from the
+literals in config.py and panel_logic; set AUTOCRATE_RULES to a JSON rule file
+(see `python -m wizard_app.rules dump`) to load them from there instead.
+
+A rule file is validated and compiled once (sorted weight limits for bisect,
+read-only mappings, a compiled PanelCaseTable) and activated with a single
+reference swap, so readers never see a half-loaded rule set and the hot path
+costs one function call. RuleWatcher reloads the file through watchdog when it
+changes; a file that fails validation leaves the current rules active (at
+startup, the config.py rules, with a warning). Each
+rule set carries a fingerprint that design_cache folds into its keys, so a
+reload invalidates cached designs like a version bump.
+"""
+
+from bisect import bisect_left
+from dataclasses import dataclass, field
+import hashlib
+import json
+import logging
+import os
+import threading
+from types import MappingProxyType
+from typing import Mapping, Optional, Tuple
+
+try:
+    from . import config
+    from . import panel_logic
+except ImportError:
+    import config # For direct testing
+    import panel_logic
+
+RULES_FILE_ENV = "AUTOCRATE_RULES" # JSON rule file to load instead of the config.py literals
+RULES_FORMAT = 1
+DEFAULT_VERSION = f"config-{config.VERSION}" # Version of the rule set compiled from config.py
+SECTIONS = ("weight_rules", "skid_dimensions", "standard_floorboards", "decal_rules", "panel_cases")
+DEFAULT_DEBOUNCE_SECONDS = 0.25 # Editors write a file in several steps; reload once they are done
+
+log = logging.getLogger(__name__)
+
+
+def _freeze(value):
+    """Read-only copy of JSON-like data: dicts become mappingproxies, lists become tuples."""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _positive(value, what: str) -> float:
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not value > 0:
+        raise ValueError(f"{what} must be a positive number, got {value!r}")
+    return float(value)
+
+
+def config_rule_data() -> dict:
+    """The rule sections as currently defined by the config.py / panel_logic literals."""
+    return {
+        "version": DEFAULT_VERSION,
+        "weight_rules": [list(rule) for rule in config.WEIGHT_RULES],
+        "skid_dimensions": {key: list(dims) for key, dims in config.SKID_DIMENSIONS.items()},
+        "standard_floorboards": dict(config.ALL_STANDARD_FLOORBOARDS),
+        "decal_rules": config.DECAL_RULES,
+        "panel_cases": panel_logic.DEFAULT_PANEL_CASE_TABLE,
+    }
+
+
+def _normalize(data: dict) -> dict:
+    """Validates rule data and returns it in canonical form (missing sections come from config.py)."""
+    if not isinstance(data, dict):
+        raise ValueError("A rule file must hold a JSON object")
+    unknown = set(data) - set(SECTIONS) - {"version", "format"}
+    if unknown:
+        raise ValueError(f"Unknown rule section(s): {sorted(unknown)}")
+    if data.get("format", RULES_FORMAT) != RULES_FORMAT:
+        raise ValueError(f"Unsupported rule file format {data['format']!r} (expected {RULES_FORMAT})")
+    defaults = config_rule_data()
+    merged = {key: data.get(key, defaults[key]) for key in SECTIONS}
+    version = str(data.get("version") or "").strip()
+    if not version:
+        raise ValueError("Rule data needs a non-empty 'version'")
+
+    skid_dimensions = {}
+    for nominal, dims in dict(merged["skid_dimensions"]).items():
+        if not isinstance(dims, (list, tuple)) or len(dims) != 2:
+            raise ValueError(f"skid_dimensions[{nominal!r}] must be [actual width, actual height]")
+        skid_dimensions[str(nominal)] = [_positive(dims[0], f"{nominal} skid width"),
+                                         _positive(dims[1], f"{nominal} skid height")]
+
+    weight_rules = []
+    for rule in merged["weight_rules"]:
+        if not isinstance(rule, (list, tuple)) or len(rule) != 3:
+            raise ValueError(f"Weight rule {rule!r} must be [max product weight, skid nominal, max spacing]")
+        max_weight, nominal, spacing = rule
+        if nominal not in skid_dimensions:
+            raise ValueError(f"Weight rule {rule!r} uses skid {nominal!r}, which is not in skid_dimensions")
+        weight_rules.append([_positive(max_weight, "Weight rule max weight"), str(nominal),
+                             _positive(spacing, "Weight rule max spacing")])
+    weight_rules.sort(key=lambda rule: rule[0])
+    if not weight_rules:
+        raise ValueError("weight_rules must not be empty")
+    if any(a[0] == b[0] for a, b in zip(weight_rules, weight_rules[1:])):
+        raise ValueError("weight_rules must not repeat a max weight")
+
+    floorboards = {str(nominal): _positive(width, f"{nominal} floorboard width")
+                   for nominal, width in dict(merged["standard_floorboards"]).items()}
+    if not floorboards:
+        raise ValueError("standard_floorboards must not be empty")
+    decal_rules = json.loads(json.dumps(merged["decal_rules"])) # Plain JSON data, detached from the caller
+    if not isinstance(decal_rules, dict) or not all(isinstance(rule, dict) for rule in decal_rules.values()):
+        raise ValueError("decal_rules must map decal ids to rule objects")
+
+    return {"version": version, "weight_rules": weight_rules, "skid_dimensions": skid_dimensions,
+            "standard_floorboards": floorboards, "decal_rules": decal_rules,
+            "panel_cases": json.loads(json.dumps(merged["panel_cases"]))}
+
+
+@dataclass(frozen=True)
+class RuleSet:
+    """One compiled, immutable rule set. Build it with from_dict(), from_file() or from_config()."""
+    version: str
+    source: str # Rule file path, or "config.py"
+    fingerprint: str # SHA-256 of the canonical rule data
+    canonical: str = field(repr=False) # Canonical JSON of the rule data (pickles and saves the rule set)
+    weight_rules: Tuple[Tuple[float, str, float], ...] = field(repr=False) # Sorted by max weight
+    weight_limits: Tuple[float, ...] = field(repr=False) # Max weights, for bisect
+    skid_dimensions: Mapping[str, Tuple[float, float]] = field(repr=False)
+    standard_floorboards: Mapping[str, float] = field(repr=False)
+    decal_rules: Mapping = field(repr=False)
+    panel_cases: panel_logic.PanelCaseTable = field(repr=False)
+    _next_non_3x4: Tuple[int, ...] = field(repr=False) # First rule index >= i that is not a 3x4 (-1: none)
+
+    @classmethod
+    def from_dict(cls, data: dict, source: str = "") -> "RuleSet":
+        """Validates and compiles rule data; raises ValueError when it is invalid."""
+        normalized = _normalize(data)
+        canonical = json.dumps(normalized, sort_keys=True, separators=(",", ":"))
+        weight_rules = tuple((limit, nominal, spacing) for limit, nominal, spacing in normalized["weight_rules"])
+        next_non_3x4, following = [], -1
+        for index in range(len(weight_rules) - 1, -1, -1):
+            if weight_rules[index][1] != "3x4":
+                following = index
+            next_non_3x4.append(following)
+        return cls(
+            version=normalized["version"],
+            source=source,
+            fingerprint=hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16],
+            canonical=canonical,
+            weight_rules=weight_rules,
+            weight_limits=tuple(rule[0] for rule in weight_rules),
+            skid_dimensions=MappingProxyType({k: tuple(v) for k, v in normalized["skid_dimensions"].items()}),
+            standard_floorboards=MappingProxyType(dict(normalized["standard_floorboards"])),
+            decal_rules=_freeze(normalized["decal_rules"]),
+            panel_cases=panel_logic.PanelCaseTable.from_dict(normalized["panel_cases"]),
+            _next_non_3x4=tuple(reversed(next_non_3x4)),
+        )
+
+    @classmethod
+    def from_file(cls, path: str) -> "RuleSet":
+        with open(path, 'r', encoding='utf-8') as f:
+            try:
+                data = json.load(f)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path} is not valid JSON: {e}")
+        return cls.from_dict(data, source=os.path.abspath(path))
+
+    @classmethod
+    def from_config(cls) -> "RuleSet":
+        return cls.from_dict(config_rule_data(), source="config.py")
+
+    def __reduce__(self): # Mappingproxies do not pickle; rebuild from the canonical data (e.g. in worker processes)
+        return (_from_canonical, (self.canonical, self.source))
+
+    def to_dict(self) -> dict:
+        """The rule data in rule file layout."""
+        return {"format": RULES_FORMAT, **json.loads(self.canonical)}
+
+    def skid_rule(self, product_weight: float, allow_3x4: bool = True) -> tuple:
+        """(skid nominal, max spacing) of the first weight rule covering `product_weight`.
+
+        3x4 rules are skipped when not allowed. A weight above every rule, or with only
+        3x4 rules left, falls back to the lightest rule, as skid_logic always has.
+        """
+        index = bisect_left(self.weight_limits, product_weight - config.FLOAT_TOLERANCE)
+        if index < len(self.weight_rules):
+            if not allow_3x4:
+                index = self._next_non_3x4[index]
+            if index >= 0:
+                return self.weight_rules[index][1], self.weight_rules[index][2]
+        return self.weight_rules[0][1], self.weight_rules[0][2]
+
+
+def _from_canonical(canonical: str, source: str) -> RuleSet:
+    return RuleSet.from_dict(json.loads(canonical), source=source)
+
+
+# --- Active rule set ---
+_active: Optional[RuleSet] = None
+_swap_lock = threading.Lock()
+_load_error: Optional[str] = None # Why the AUTOCRATE_RULES file was not used at startup
+
+
+def get_rules() -> RuleSet:
+    """The active rule set; compiled on first use from AUTOCRATE_RULES or config.py."""
+    rules = _active
+    if rules is None:
+        with _swap_lock:
+            if _active is None:
+                _activate(_initial_rules(os.environ.get(RULES_FILE_ENV)))
+            rules = _active
+    return rules
+
+
+def _initial_rules(path: Optional[str]) -> RuleSet:
+    """Loads the startup rule file; a missing or invalid one falls back to config.py with a warning."""
+    global _load_error
+    if path:
+        try:
+            return RuleSet.from_file(path)
+        except (OSError, ValueError) as e:
+            _load_error = f"rule file {path} invalid, using the config.py rules: {e}"
+            log.warning("%s (%s)", _load_error, RULES_FILE_ENV)
+    return RuleSet.from_config()
+
+
+def load_error() -> Optional[str]:
+    """The startup rule-file error while the config.py fallback is active, else None."""
+    return _load_error
+
+
+def _activate(rules: RuleSet) -> None:
+    global _active
+    panel_logic.set_panel_case_table(rules.panel_cases)
+    _active = rules
+
+
+def set_rules(source=None) -> RuleSet:
+    """Compiles and activates a rule set: a RuleSet, rule data dict or rule file path.
+
+    None recompiles the config.py literals. The new rules are fully validated before
+    the swap; on error the active rules are left unchanged.
+    """
+    if isinstance(source, RuleSet):
+        rules = source
+    elif isinstance(source, dict):
+        rules = RuleSet.from_dict(source)
+    elif isinstance(source, str):
+        rules = RuleSet.from_file(source)
+    else:
+        rules = RuleSet.from_config()
+    global _load_error
+    with _swap_lock:
+        _activate(rules)
+        _load_error = None
+    return rules
+
+
+def use_rules(canonical: str, fingerprint: str) -> RuleSet:
+    """Activates the rule set with `fingerprint` unless it is already active (worker processes)."""
+    rules = get_rules()
+    if rules.fingerprint != fingerprint:
+        rules = set_rules(_from_canonical(canonical, "parent process"))
+    return rules
+
+
+def write_rules(path: str, rules: RuleSet = None) -> str:
+    """Writes a rule set (default: the active one) as a rule file."""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump((rules or get_rules()).to_dict(), f, indent=2, ensure_ascii=False)
+        f.write("\n")
+    return path
+
+
+# --- Hot reload ---
+class RuleWatcher:
+    """Reloads a rule file whenever it changes on disk (watchdog observer thread).
+
+    `on_reload(rules)` and `on_error(message)` are called from a background thread.
+    """
+
+    def __init__(self, path: str, on_reload=None, on_error=None, debounce: float = DEFAULT_DEBOUNCE_SECONDS):
+        self.path = os.path.abspath(path)
+        self.on_reload = on_reload
+        self.on_error = on_error
+        self.debounce = debounce
+        self.reloads = 0
+        self.last_error = None
+        self._observer = None
+        self._timer = None
+        self._timer_lock = threading.Lock()
+        self._loaded_hash = self._file_hash()
+
+    def _file_hash(self):
+        try:
+            with open(self.path, 'rb') as f:
+                return hashlib.sha256(f.read()).hexdigest()
+        except OSError:
+            return None
+
+    def start(self) -> "RuleWatcher":
+        from watchdog.events import FileSystemEventHandler # Imported here so rule lookups never load watchdog
+        from watchdog.observers import Observer
+
+        watcher = self
+
+        class _Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                paths = (getattr(event, "src_path", ""), getattr(event, "dest_path", ""))
+                if watcher.path in (os.path.abspath(p) for p in paths if p):
+                    watcher._schedule()
+
+        self._observer = Observer()
+        self._observer.schedule(_Handler(), os.path.dirname(self.path), recursive=False)
+        self._observer.daemon = True
+        self._observer.start()
+        return self
+
+    def _schedule(self) -> None:
+        with self._timer_lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.debounce, self.reload)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def reload(self, force: bool = False):
+        """Loads the file if its content changed. Returns the new RuleSet, or None."""
+        digest = self._file_hash()
+        if digest is None or (digest == self._loaded_hash and not force):
+            return None # Deleted mid-save, or touched without changes
+        try:
+            rules = set_rules(self.path)
+        except (OSError, ValueError) as e:
+            self.last_error = str(e)
+            if self.on_error is not None:
+                self.on_error(self.last_error)
+            return None
+        self._loaded_hash = digest
+        self.last_error = None
+        self.reloads += 1
+        if self.on_reload is not None:
+            self.on_reload(rules)
+        return rules
+
+    def stop(self) -> None:
+        with self._timer_lock:
+            if self._timer is not None:
+                self._timer.cancel()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def watch_default_rules(on_reload=None, on_error=None):
+    """Starts a RuleWatcher on the AUTOCRATE_RULES file; returns None when no rule file is configured."""
+    path = os.environ.get(RULES_FILE_ENV)
+    if not path:
+        return None
+    get_rules()
+    try:
+        return RuleWatcher(path, on_reload=on_reload, on_error=on_error).start()
+    except OSError as e: # The rule file's directory does not exist
+        log.warning("Not watching rule file %s: %s", path, e)
+        return None
+
+
+if __name__ == '__main__':
+    import sys
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "show"
+    if command == "dump": # Start a rule file from the config.py literals
+        print(json.dumps(RuleSet.from_config().to_dict(), indent=2, ensure_ascii=False))
+    elif command == "check" and len(sys.argv) > 2:
+        try:
+            checked = RuleSet.from_file(sys.argv[2])
+        except (OSError, ValueError) as e:
+            print(f"Invalid rule file: {e}", file=sys.stderr)
+            sys.exit(1)
+        print(f"{sys.argv[2]}: version {checked.version}, fingerprint {checked.fingerprint}")
+    else:
+        active = get_rules()
+        print(f"Active rules: version {active.version} from {active.source} (fingerprint {active.fingerprint})")
+        for limit, nominal, spacing in active.weight_rules:
+            print(f"  <= {limit:g} lb: {nominal} skids, max spacing {spacing:g} in")
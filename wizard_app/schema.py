@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Canonical crate input model, schema adapters and compiled batch validation.
+
+PARAMETERS describes every design_crate() input once (form label, key,
+default, type, decimals, minimum, maximum, tooltip). The PyQt form is built
+from it and pipeline.DEFAULT_PARAMETERS is derived from it.
+
+Order data arrives in three layouts. to_canonical() maps each of them onto the
+canonical keys:
+    - the canonical keys (GUI form, design_crate, batch CSV manifests)
+    - parameters.json / debug app keys (wall_cleat_thickness, product_height)
+    - the nested examples/*.json layout ({"product": {...}, "construction": {...}, ...})
+normalize_parameters() then adds the defaults and coerces the types.
+
+validate_orders() checks the PARAMETERS ranges, booleans and floorboard
+choices for a whole batch at once. It works column by column with NumPy
+instead of order by order, using a Validator compiled once per rule set, and
+reports each bad value with its 1-based row number instead of raising.
+"""
+
+import csv
+from dataclasses import dataclass
+from typing import Mapping, NamedTuple, Optional, Sequence
+
+try:
+    from . import config
+    from . import rules
+except ImportError:
+    import config # For direct testing
+    import rules
+
+MAX_PRODUCT_DIMENSION = 999.0 # inches, upper bound of the product dimension inputs
+
+TRUE_STRINGS = ("1", "true", "yes", "y", "on")
+FALSE_STRINGS = ("0", "false", "no", "n", "off")
+
+
+class ParameterSpec(NamedTuple):
+    """One input parameter. For "choice" parameters `minimum` holds the list of choices (PyQt form layout)."""
+    label: str
+    key: str
+    default: object
+    type: str # "float", "bool" or "choice"
+    decimals: int
+    minimum: object
+    maximum: Optional[float]
+    tooltip: str
+
+
+PARAMETERS = (
+    ParameterSpec("Product Weight (lbs):", 'product_weight', 600.0, "float", 1, 1.0, 20000.0, "Total weight of the product. (Example: 600 lbs)"),
+    ParameterSpec("Product Width (in):", 'product_width', 38.0, "float", 2, 1.0, MAX_PRODUCT_DIMENSION, "Inside dimension across skids - Y direction (Example: 38.00\")"),
+    ParameterSpec("Product Length (in):", 'product_length', 46.0, "float", 2, 1.0, MAX_PRODUCT_DIMENSION, "Inside dimension along skids - X direction (Example: 46.00\")"),
+    ParameterSpec("Product Height (in):", 'product_actual_height', 91.5, "float", 2, 1.0, MAX_PRODUCT_DIMENSION, "Inside height of the product (Example: 91.50\")"),
+
+    ParameterSpec("Side Clearance (in):", 'clearance_side', 1.0, "float", 2, 0.0, 20.0, "Clearance from product to inner wall surfaces (width and length)."),
+    ParameterSpec("Top Clearance (in):", 'clearance_above_product', config.DEFAULT_CLEARANCE_ABOVE_PRODUCT, "float", 2, 0.0, 20.0, "Clearance above product top to cap panel underside."),
+
+    ParameterSpec("Panel Thickness (in):", 'panel_thickness', 0.25, "float", 3, 0.25, 1.5, "Thickness for wall and cap plywood/sheathing (typically 0.25\")."),
+    ParameterSpec("Cleat Thickness (in):", 'cleat_thickness', 0.75, "float", 3, 0.5, 3.0, "Actual thickness for ALL cleats. Ensure size is appropriate for panel area."),
+
+    ParameterSpec("Wall Cleat Width (in):", 'wall_cleat_width', 3.5, "float", 2, 1.0, 11.25, "Actual width of wall cleats. (Example: Use 3.5\" for standard)"),
+    ParameterSpec("Floorboard Thickness (in):", 'floor_lumbar_thickness', 1.5, "float", 3, 0.5, 3.0, "Actual thickness of floorboards (typically 1.5\")."),
+
+    ParameterSpec("Cap Cleat Width (in):", 'cap_cleat_width', 3.5, "float", 2, 1.0, 11.25, "Actual width of cap cleats. (Example: Use 3.5\" for 2x4 nominal lumber)"),
+    ParameterSpec("Max Cleat Spacing (C-C, in):", 'max_top_cleat_spacing', 24.0, "float", 2, 6.0, 60.0, "Maximum center-to-center spacing for cap cleats (typically 24\")."),
+
+    ParameterSpec("Allow 3x4 Skids (Light Loads):", 'allow_3x4_skids', True, "bool", 0, None, None, "If checked, 3x4 skids can be used for lighter loads per rules."),
+    ParameterSpec("Std Floorboard Size:", 'chosen_standard_floorboard_nominal', "2x8", "choice", 0, config.ALL_LUMBER_OPTIONS_UI, None, "Standard floorboard nominal size to prioritize (typically 2x8)."),
+    ParameterSpec("Allow Custom Fill Floorboard:", 'allow_custom_floorboard_fill', True, "bool", 0, None, None, "Allow a custom-width floorboard to fill remaining small gaps."),
+    ParameterSpec("Product is Fragile:", 'product_is_fragile', False, "bool", 0, None, None, "Check if product is fragile (for decal selection)."),
+    ParameterSpec("Special Handling Required:", 'product_requires_special_handling', False, "bool", 0, None, None, "Check if special handling decals (e.g., This Way Up) are needed."),
+    ParameterSpec("Front Panel Removable:", 'end_panel_1_removable', False, "bool", 0, None, None, "Make Front Panel (End Panel 1) removable."),
+    ParameterSpec("Back Panel Removable:", 'end_panel_2_removable', False, "bool", 0, None, None, "Make Back Panel (End Panel 2) removable."),
+    ParameterSpec("Left Side Panel Removable:", 'side_panel_1_removable', True, "bool", 0, None, None, "Make Left Side Panel (Side Panel 1) removable (Style B default)."),
+    ParameterSpec("Right Side Panel Removable:", 'side_panel_2_removable', False, "bool", 0, None, None, "Make Right Side Panel (Side Panel 2) removable."),
+    ParameterSpec("Top Panel Removable:", 'top_panel_removable', False, "bool", 0, None, None, "Make the Top Panel removable."),
+)
+
+PARAMETERS_BY_KEY: dict = {spec.key: spec for spec in PARAMETERS}
+
+# Canonical parameters with their defaults, in form order
+DEFAULT_PARAMETERS: dict = {spec.key: spec.default for spec in PARAMETERS}
+
+# Alternate key names used by parameters.json and the debug app -> canonical key
+PARAMETER_ALIASES: dict = {
+    "product_height": "product_actual_height",
+    "wall_cleat_thickness": "cleat_thickness",
+}
+
+# Nested order layout (examples/*.json, ERP order files): canonical key -> (section, key)
+NESTED_PARAMETER_PATHS: dict = {
+    "product_weight": ("product", "weight"),
+    "product_width": ("product", "width"),
+    "product_length": ("product", "length"),
+    "product_actual_height": ("product", "height"),
+    "product_is_fragile": ("product", "is_fragile"),
+    "product_requires_special_handling": ("product", "requires_special_handling"),
+    "clearance_side": ("construction", "clearance_side"),
+    "clearance_above_product": ("construction", "clearance_above_product"),
+    "panel_thickness": ("construction", "panel_thickness"),
+    "cleat_thickness": ("construction", "cleat_thickness"),
+    "wall_cleat_width": ("construction", "wall_cleat_width"),
+    "cap_cleat_width": ("construction", "cap_cleat_width"),
+    "floor_lumbar_thickness": ("construction", "floor_lumber_thickness"),
+    "allow_3x4_skids": ("options", "allow_3x4_skids"),
+    "chosen_standard_floorboard_nominal": ("options", "standard_floorboard"),
+    "allow_custom_floorboard_fill": ("options", "allow_custom_fill"),
+    "max_top_cleat_spacing": ("options", "max_cleat_spacing"),
+    "side_panel_1_removable": ("removable_panels", "side_panel_1"),
+    "side_panel_2_removable": ("removable_panels", "side_panel_2"),
+    "end_panel_1_removable": ("removable_panels", "end_panel_1"),
+    "end_panel_2_removable": ("removable_panels", "end_panel_2"),
+    "top_panel_removable": ("removable_panels", "top_panel"),
+}
+NESTED_SECTIONS = frozenset(section for section, _ in NESTED_PARAMETER_PATHS.values())
+
+
+# --- Adapters ---
+def from_nested(data: dict) -> dict:
+    """Flattens the nested order layout. Top-level keys other than the sections (e.g. order_id) are kept."""
+    flat = {key: value for key, value in data.items() if key not in NESTED_SECTIONS}
+    for canonical, (section, key) in NESTED_PARAMETER_PATHS.items():
+        value = (data.get(section) or {}).get(key)
+        if value is not None:
+            flat[canonical] = value
+    return flat
+
+
+def from_aliases(data: dict) -> dict:
+    """Renames parameters.json / debug app keys; a canonical key given alongside its alias wins."""
+    if not any(alias in data for alias in PARAMETER_ALIASES):
+        return data
+    canonical = {key: value for key, value in data.items() if key not in PARAMETER_ALIASES}
+    for alias, key in PARAMETER_ALIASES.items():
+        if alias in data and canonical.get(key) is None:
+            canonical[key] = data[alias]
+    return canonical
+
+
+def to_canonical(data: dict) -> dict:
+    """Maps an order in any supported layout onto the canonical keys (values unchanged, extra keys kept)."""
+    if isinstance(data.get("product"), dict):
+        data = from_nested(data)
+    return from_aliases(data)
+
+
+def normalize_parameters(params=None, **overrides) -> dict:
+    """Returns a complete, canonical parameter dict for design_crate().
+
+    Accepts a dict in any supported layout or any object exposing the parameters
+    as attributes. Missing keys fall back to DEFAULT_PARAMETERS and unknown keys
+    are dropped.
+    """
+    if params is None:
+        source = {}
+    elif isinstance(params, dict):
+        source = params
+    elif hasattr(params, "to_dict"):
+        source = params.to_dict()
+    else:
+        source = vars(params)
+
+    source = to_canonical({**source, **overrides})
+    normalized = dict(DEFAULT_PARAMETERS)
+    for key in DEFAULT_PARAMETERS:
+        if key in source and source[key] is not None:
+            normalized[key] = source[key]
+
+    for key, default in DEFAULT_PARAMETERS.items():
+        if isinstance(default, bool):
+            value = normalized[key]
+            if isinstance(value, str): # CSV / form values such as "True", "no", "1"
+                value = value.strip().lower() in TRUE_STRINGS
+            normalized[key] = bool(value)
+        elif isinstance(default, float):
+            normalized[key] = float(normalized[key])
+        else:
+            normalized[key] = str(normalized[key])
+    return normalized
+
+
+# --- Batch validation ---
+@dataclass
+class ValidationReport:
+    """Result of validate_orders(): a per-row validity mask and (row, key, value, message) errors."""
+    rows: int
+    valid: "numpy.ndarray" # bool per row
+    errors: list # (1-based row, key, value, message), sorted by row
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    @property
+    def invalid_rows(self) -> int:
+        return int(self.rows - self.valid.sum())
+
+    def messages_by_row(self) -> dict:
+        """{row: "key: message; ..."} for every invalid row."""
+        messages = {}
+        for row, key, _, message in self.errors:
+            messages.setdefault(row, []).append(f"{key}: {message}")
+        return {row: "; ".join(parts) for row, parts in messages.items()}
+
+    def format(self, limit: int = 20) -> str:
+        lines = [f"row {row}: {key} = {value!r}: {message}" for row, key, value, message in self.errors[:limit]]
+        if len(self.errors) > limit:
+            lines.append(f"... and {len(self.errors) - limit} more")
+        return "\n".join(lines)
+
+
+def _is_missing(value) -> bool:
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def _bool_text(value) -> str:
+    """Lower-case text of a boolean cell; scalar non-text values are truthy/falsy like bool() and always valid,
+    containers (lists, dicts) never are."""
+    if isinstance(value, str):
+        return value.strip().lower()
+    if isinstance(value, (list, tuple, dict, set)):
+        return repr(value)
+    return "" if value is None else "true"
+
+
+def _choice_text(value) -> str:
+    return "" if value is None else str(value).strip()
+
+
+def _to_float(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+class Validator:
+    """Range, boolean and choice checks for every parameter, compiled for one rule set."""
+
+    def __init__(self, active_rules: "rules.RuleSet" = None):
+        self.rules = active_rules or rules.get_rules()
+        self.floats = [(spec.key, float(spec.minimum), float(spec.maximum)) for spec in PARAMETERS if spec.type == "float"]
+        self.bools = [spec.key for spec in PARAMETERS if spec.type == "bool"]
+        self.bool_strings = frozenset(TRUE_STRINGS + FALSE_STRINGS)
+        # The form offers the config.py floorboards; a rule file may define others
+        self.choices = {"chosen_standard_floorboard_nominal":
+                        tuple(sorted(self.rules.standard_floorboards)) + (config.CUSTOM_NARROW_OPTION_TEXT_UI,)}
+
+    def validate_columns(self, columns: Mapping[str, Sequence], rows: int) -> ValidationReport:
+        """Validates column data ({key: values}, one value per row); missing columns and empty cells use defaults."""
+        import numpy as np # Imported here so pipeline and batch imports skip NumPy
+
+        columns = to_canonical(dict(columns))
+        valid = np.ones(rows, dtype=bool)
+        errors = []
+
+        def report(key, values, mask, message):
+            for index in np.flatnonzero(mask):
+                errors.append((int(index) + 1, key, values[index], message(values[index])))
+            valid[mask] = False
+
+        for key, minimum, maximum in self.floats:
+            values = columns.get(key)
+            if values is None:
+                continue
+            try:
+                numbers = np.asarray(values, dtype=float)
+            except (TypeError, ValueError): # Empty cells or text somewhere in the column
+                numbers = None
+            if numbers is None or numbers.shape != (rows,): # ... or list cells, which NumPy reads as a second axis
+                numbers = np.fromiter((_to_float(v) for v in values), dtype=float, count=rows)
+            for index in np.flatnonzero(np.isnan(numbers)):
+                if _is_missing(values[index]):
+                    numbers[index] = PARAMETERS_BY_KEY[key].default
+            not_number = np.isnan(numbers)
+            report(key, values, not_number, lambda v: "not a number")
+            with np.errstate(invalid="ignore"):
+                out_of_range = ~not_number & ((numbers < minimum) | (numbers > maximum))
+            report(key, values, out_of_range, lambda v, lo=minimum, hi=maximum: f"outside {lo:g} to {hi:g}")
+
+        # Boolean and choice columns hold a handful of distinct values: check those, then find the rows of bad ones
+        categorical = [(key, self.bool_strings, _bool_text, lambda v: "expected true/false") for key in self.bools]
+        categorical += [(key, choices, _choice_text, lambda v, options=choices: f"expected one of {', '.join(options)}")
+                        for key, choices in self.choices.items()]
+        for key, allowed, as_text, message in categorical:
+            values = columns.get(key)
+            if values is None:
+                continue
+            try:
+                bad_values = {value for value in set(values) if as_text(value) not in allowed and as_text(value) != ""}
+                bad = np.fromiter((value in bad_values for value in values), dtype=bool, count=rows) if bad_values else None
+            except TypeError: # Unhashable cells (lists, dicts): check every value's text instead
+                texts = [as_text(value) for value in values]
+                bad = np.fromiter((text not in allowed and text != "" for text in texts), dtype=bool, count=rows)
+            if bad is not None and bad.any():
+                report(key, values, bad, message)
+
+        errors.sort(key=lambda error: error[0])
+        return ValidationReport(rows=rows, valid=valid, errors=errors)
+
+    def validate_orders(self, orders: Sequence) -> ValidationReport:
+        """Validates a list of parameter dicts or (order_id, params) tuples."""
+        params_list = [order[1] if isinstance(order, tuple) else order for order in orders]
+        present = set()
+        for params in params_list:
+            present.update(params)
+        if present & (NESTED_SECTIONS | set(PARAMETER_ALIASES)): # Adapt row by row only when some rows need it
+            params_list = [to_canonical(params) for params in params_list]
+            present = set().union(*params_list)
+        columns = {key: [params.get(key) for params in params_list] for key in DEFAULT_PARAMETERS if key in present}
+        return self.validate_columns(columns, len(params_list))
+
+
+_validator: Optional[Validator] = None
+
+
+def get_validator() -> Validator:
+    """The validator compiled for the active rule set (recompiled after a rule reload)."""
+    global _validator
+    validator = _validator
+    if validator is None or validator.rules is not rules.get_rules():
+        validator = _validator = Validator()
+    return validator
+
+
+def validate_orders(orders: Sequence) -> ValidationReport:
+    """Validates a batch of orders (parameter dicts or (order_id, params) tuples) in one pass per parameter."""
+    return get_validator().validate_orders(orders)
+
+
+def _read_csv_columns(path: str):
+    """{header: column values as strings} and the row count; pyarrow's reader when installed, else csv."""
+    try:
+        import pyarrow as pa # Imported here so plain validation never loads pyarrow
+        import pyarrow.csv as pa_csv
+    except ImportError:
+        pa = None
+    if pa is not None:
+        try:
+            with open(path, 'r', newline='') as f:
+                header = [name.strip() for name in next(csv.reader(f), [])]
+            table = pa_csv.read_csv(path, read_options=pa_csv.ReadOptions(column_names=header, skip_rows=1),
+                                    convert_options=pa_csv.ConvertOptions(
+                                        column_types={name: pa.string() for name in header}))
+            return {name: table.column(name).to_numpy(zero_copy_only=False) for name in header}, table.num_rows
+        except pa.ArrowInvalid: # Ragged rows: fall back to the csv module, which pads them
+            pass
+    with open(path, 'r', newline='') as f:
+        reader = csv.reader(f)
+        header = [name.strip() for name in next(reader, [])]
+        rows = [row for row in reader if row] # Blank lines are skipped, as csv.DictReader and pyarrow do
+    width = len(header)
+    rows = [row if len(row) == width else (row + [""] * width)[:width] for row in rows]
+    return (dict(zip(header, (list(column) for column in zip(*rows)))) if rows else {}), len(rows)
+
+
+def validate_csv(path: str) -> ValidationReport:
+    """Validates a CSV manifest column by column without building one dict per row."""
+    columns, rows = _read_csv_columns(path)
+    return get_validator().validate_columns(columns, rows)
+
+
+if __name__ == '__main__':
+    import sys
+
+    if len(sys.argv) > 1:
+        checked = validate_csv(sys.argv[1])
+        print(checked.format() or f"All {checked.rows} rows are valid.")
+    else:
+        for spec in PARAMETERS:
+            limits = f"{spec.minimum:g} to {spec.maximum:g}" if spec.type == "float" else spec.type
+            print(f"{spec.key:<36} default {spec.default!r:<8} {limits}")
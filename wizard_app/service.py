@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Local HTTP service for crate designs (stdlib asyncio, no web framework).
+
+    python autocrate.py serve --port 8765
+
+Endpoints (JSON in, JSON out):
+
+    POST /design    {"product_weight": 1800, ...}          -> one design
+    POST /designs   {"orders": [{...}, {...}]} or [...]    -> {"results": [...]}, same order
+    GET  /health                                           -> status and queue depth
+    GET  /metrics                                          -> Prometheus text (see instrumentation)
+
+Add `?exp=0` to leave the .exp content out of the response. A design response
+is CrateDesign.to_dict() plus "cache_hit"; failed orders in a batch come back
+as {"status": "FAILED", "message": ...} in their slot.
+
+Requests are queued on a bounded asyncio.Queue and computed by a
+ProcessPoolExecutor. When the queue cannot take a request (or a whole
+batch), the service answers 503 with a Retry-After header instead of
+buffering without limit. Repeat designs are served from the shared design
+cache, and identical requests that are in flight at the same time are
+computed once.
+"""
+
+import asyncio
+import json
+import os
+import threading
+from urllib.parse import parse_qs, urlsplit
+
+try:
+    from . import batch
+    from . import config
+    from . import design_cache
+    from . import instrumentation
+    from . import pipeline
+    from . import rules
+except ImportError:
+    import batch # For direct testing
+    import config
+    import design_cache
+    import instrumentation
+    import pipeline
+    import rules
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_QUEUE_SIZE = 256 # Designs waiting for a worker before requests are rejected with 503
+DEFAULT_MAX_BATCH = 256 # Orders accepted in one /designs request
+MAX_BODY_BYTES = 8 * 1024 * 1024
+MAX_HEADER_LINES = 100
+RETRY_AFTER_SECONDS = 1
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+            422: "Unprocessable Entity", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str, headers: dict = None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+def _compute_design(params: dict):
+    """Worker process entry point: one uncached pipeline run."""
+    return pipeline.design_crate(params, app_version=config.VERSION)
+
+
+class DesignService:
+    """The HTTP service: request parsing, the bounded job queue and the worker pool."""
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, workers: int = None,
+                 queue_size: int = DEFAULT_QUEUE_SIZE, max_batch: int = DEFAULT_MAX_BATCH, use_cache: bool = True):
+        """
+        Args:
+            host, port: Listening address (port 0 picks a free port; see .port after start()).
+            workers: Worker processes (default: CPU count). 0 computes on a thread in this process.
+            queue_size: Designs that may wait for a worker before new requests get 503.
+            max_batch: Largest accepted /designs batch (413 above it); also capped at queue_size.
+            use_cache: Serve repeat designs from the shared design cache.
+        """
+        self.host = host
+        self.port = port
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.queue_size = queue_size
+        self.max_batch = max_batch
+        self.cache = design_cache.get_default_cache() if use_cache else None
+        self.queue = None
+        self.stats = {"requests": 0, "designs": 0, "cache_hits": 0, "rejected": 0, "failed": 0}
+        self._server = None
+        self._executor = None
+        self._dispatchers = []
+        self._inflight = {} # design key -> Future shared by identical concurrent requests
+
+    # --- Lifecycle ---
+    async def start(self) -> None:
+        if self.workers > 0:
+            from concurrent.futures import ProcessPoolExecutor # Imported here so workers=0 skips multiprocessing
+
+            active_rules = rules.get_rules()
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=batch._warm_worker,
+                                                 initargs=(active_rules.canonical, active_rules.fingerprint))
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self._dispatchers = [asyncio.ensure_future(self._dispatch()) for _ in range(max(1, self.workers))]
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        for task in self._dispatchers:
+            task.cancel()
+        await asyncio.gather(*self._dispatchers, return_exceptions=True)
+        self._dispatchers = []
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    # --- Job queue ---
+    async def _dispatch(self) -> None:
+        """Feeds queued jobs to the executor; one dispatcher per worker keeps every worker busy."""
+        loop = asyncio.get_running_loop()
+        while True:
+            key, params, future = await self.queue.get()
+            try:
+                if self._executor is None: # The in-process thread already shares the active rules
+                    job = (_compute_design, params)
+                else:
+                    active_rules = rules.get_rules()
+                    job = (batch._call_with_rules, active_rules.canonical, active_rules.fingerprint, _compute_design,
+                           params)
+                with instrumentation.timer("service.design"):
+                    design = await loop.run_in_executor(self._executor, *job)
+                if self.cache is not None:
+                    await loop.run_in_executor(None, self.cache.put, key, design)
+                if not future.done():
+                    future.set_result(design)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                self._inflight.pop(key, None)
+                self.queue.task_done()
+
+    def _cached_designs(self, keys: list) -> dict:
+        """{key: design} for the keys in the design cache (blocking; run on an executor thread)."""
+        designs = {}
+        for key in keys:
+            design = self.cache.get(key)
+            if design is not None:
+                designs[key] = design
+        return designs
+
+    async def _reserve(self, orders: list) -> list:
+        """Resolves or queues every order, or none of them when the queue lacks room.
+
+        Returns one (future, cache_hit, error) entry per order. Cached designs and
+        orders identical to one already in flight need no queue slot. Cache lookups
+        (SQLite reads that can wait on a lock held by the GUI or a batch) run on an
+        executor thread; everything after them runs without awaiting, so the
+        in-flight and queue checks stay consistent.
+        """
+        loop = asyncio.get_running_loop()
+        keys = []
+        for params in orders:
+            try:
+                keys.append(design_cache.design_key(params, app_version=config.VERSION))
+            except (TypeError, ValueError) as e:
+                keys.append(e)
+        cached = {}
+        if self.cache is not None:
+            lookup = [key for key in dict.fromkeys(keys) if isinstance(key, str) and key not in self._inflight]
+            if lookup:
+                cached = await loop.run_in_executor(None, self._cached_designs, lookup)
+
+        entries, queued = [], {} # queued: design key -> (params, future)
+        for params, key in zip(orders, keys):
+            if not isinstance(key, str):
+                entries.append((None, False, key))
+                continue
+            future = self._inflight.get(key) or queued.get(key, (None, None))[1]
+            if future is None and key in cached:
+                future = loop.create_future()
+                future.set_result(cached[key])
+                entries.append((future, True, None))
+                continue
+            if future is None:
+                future = loop.create_future()
+                queued[key] = (params, future)
+            entries.append((future, False, None))
+
+        if self.queue.maxsize and self.queue.maxsize - self.queue.qsize() < len(queued):
+            self.stats["rejected"] += 1
+            raise HTTPError(503, f"Queue full ({self.queue.qsize()}/{self.queue.maxsize} designs waiting); retry later",
+                            {"Retry-After": str(RETRY_AFTER_SECONDS)})
+        for key, (params, future) in queued.items():
+            self.queue.put_nowait((key, params, future))
+            self._inflight[key] = future
+        return entries
+
+    async def _result(self, entry: tuple, include_exp: bool) -> dict:
+        future, cache_hit, error = entry
+        if error is None:
+            try:
+                design = await future
+            except Exception as e:
+                error = e
+        if error is not None:
+            self.stats["failed"] += 1
+            return {"status": "FAILED", "message": f"{type(error).__name__}: {error}"}
+        self.stats["designs"] += 1
+        self.stats["cache_hits"] += cache_hit
+        result = design.to_dict()
+        if not include_exp:
+            result.pop("exp_content", None)
+        result["cache_hit"] = cache_hit
+        return result
+
+    @property
+    def batch_limit(self) -> int:
+        """Largest accepted batch: a batch must fit into an empty queue."""
+        return min(self.max_batch, self.queue_size) if self.queue_size else self.max_batch
+
+    # --- HTTP ---
+    async def _handle_connection(self, reader, writer) -> None:
+        try:
+            status, payload, headers = await self._handle_request(reader)
+        except HTTPError as e:
+            status, payload, headers = e.status, {"error": str(e)}, e.headers
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+            return
+        except Exception as e:
+            status, payload, headers = 500, {"error": f"{type(e).__name__}: {e}"}, {}
+        if isinstance(payload, str):
+            body, content_type = payload.encode("utf-8"), "text/plain; version=0.0.4"
+        else:
+            body, content_type = json.dumps(payload, default=str).encode("utf-8"), "application/json"
+        head = [f"HTTP/1.1 {status} {_REASONS.get(status, '')}", f"Content-Type: {content_type}",
+                f"Content-Length: {len(body)}", "Connection: close"]
+        head += [f"{name}: {value}" for name, value in headers.items()]
+        try:
+            writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        request_line = (await reader.readline()).decode("latin-1").strip()
+        if not request_line:
+            raise asyncio.IncompleteReadError(b"", None)
+        try:
+            method, target, _ = request_line.split(" ", 2)
+        except ValueError:
+            raise HTTPError(400, f"Malformed request line: {request_line!r}") from None
+        headers = {}
+        for _ in range(MAX_HEADER_LINES):
+            line = (await reader.readline()).decode("latin-1")
+            if line in ("\r\n", "\n", ""):
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        else:
+            raise HTTPError(400, "Too many header lines")
+        try:
+            length = int(headers.get("content-length", "0"))
+        except ValueError:
+            raise HTTPError(400, "Invalid Content-Length") from None
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(413, f"Request body over {MAX_BODY_BYTES} bytes")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target, body
+
+    async def _handle_request(self, reader):
+        method, target, body = await self._read_request(reader)
+        self.stats["requests"] += 1
+        url = urlsplit(target)
+        query = parse_qs(url.query)
+        include_exp = query.get("exp", ["1"])[0].strip().lower() in pipeline.TRUE_STRINGS
+        routes = {"/design": ("POST", self._post_design), "/designs": ("POST", self._post_designs),
+                  "/health": ("GET", self._get_health), "/metrics": ("GET", self._get_metrics)}
+        if url.path not in routes:
+            raise HTTPError(404, f"Unknown path {url.path}")
+        expected_method, handler = routes[url.path]
+        if method != expected_method:
+            raise HTTPError(405, f"{url.path} expects {expected_method}", {"Allow": expected_method})
+        with instrumentation.timer(f"service.{url.path.strip('/')}"):
+            return await handler(body, include_exp)
+
+    @staticmethod
+    def _parse_json(body: bytes):
+        try:
+            return json.loads(body.decode("utf-8") or "{}")
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise HTTPError(400, f"Invalid JSON: {e}") from None
+
+    async def _post_design(self, body: bytes, include_exp: bool):
+        params = self._parse_json(body)
+        if not isinstance(params, dict):
+            raise HTTPError(400, "Expected a JSON object of crate parameters")
+        params = params.get("params", params)
+        result = await self._result((await self._reserve([params]))[0], include_exp)
+        return (422 if result["status"] == "FAILED" else 200), result, {}
+
+    async def _post_designs(self, body: bytes, include_exp: bool):
+        payload = self._parse_json(body)
+        orders = payload.get("orders") if isinstance(payload, dict) else payload
+        if not isinstance(orders, list) or not all(isinstance(order, dict) for order in orders):
+            raise HTTPError(400, "Expected {\"orders\": [...]} or a JSON list of parameter objects")
+        if len(orders) > self.batch_limit:
+            raise HTTPError(413, f"Batch of {len(orders)} orders exceeds the limit of {self.batch_limit}; split it up")
+        entries = await self._reserve(orders)
+        results = await asyncio.gather(*(self._result(entry, include_exp) for entry in entries))
+        return 200, {"results": results}, {}
+
+    async def _get_health(self, body: bytes, include_exp: bool):
+        return 200, {
+            "status": "ok",
+            "version": config.VERSION,
+            "workers": self.workers,
+            "queue_depth": self.queue.qsize(),
+            "queue_capacity": self.queue.maxsize,
+            "batch_limit": self.batch_limit,
+            "cache": self.cache is not None,
+            "rules_version": rules.get_rules().version,
+            **self.stats,
+        }, {}
+
+    async def _get_metrics(self, body: bytes, include_exp: bool):
+        return 200, instrumentation.to_prometheus(), {}
+
+
+def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, **options) -> None:
+    """Runs the service until interrupted (Ctrl+C)."""
+    service = DesignService(host, port, **options)
+
+    async def main():
+        await service.start()
+        print(f"AutoCrate design service V{config.VERSION} on http://{service.host}:{service.port} "
+              f"({service.workers} workers, queue {service.queue_size}, rules {rules.get_rules().version})")
+        await service.serve_forever()
+
+    watcher = rules.watch_default_rules(
+        on_reload=lambda new_rules: print(f"Loaded rules {new_rules.version} from {new_rules.source}"),
+        on_error=lambda message: print(f"Rule file rejected, keeping the current rules: {message}"))
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if watcher is not None:
+            watcher.stop()
+
+
+class BackgroundService:
+    """Runs a DesignService on its own event loop thread (tests, embedding in other tools)."""
+
+    def __init__(self, **options):
+        options.setdefault("port", 0)
+        self.service = DesignService(**options)
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="autocrate-service", daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.service.host}:{self.service.port}"
+
+    def __enter__(self):
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self.service.start(), self.loop).result()
+        return self
+
+    def __exit__(self, *exc_info):
+        asyncio.run_coroutine_threadsafe(self.service.close(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+        return False
+
+
+if __name__ == '__main__':
+    serve()
@@ -7,8 +7,15 @@ import math
 
 try:
     from . import config 
+    from . import rules
 except ImportError:
     import config # For direct testing, if config.py is in the same directory or PYTHONPATH
+    import rules
+
+# Section of the NX .exp file holding this module's exp_data (see exp_generator.ExpSection)
+EXP_SECTION = {
+    "key": "skid", "title": "SKID LAYOUT (Values from Python skid_logic, for NX Pattern)", "order": 30,
+}
 
 def calculate_skid_layout(product_weight: float, product_width: float, product_length: float, 
                             clearance_side: float, panel_thickness: float, cleat_thickness: float, 
@@ -18,39 +25,12 @@ def calculate_skid_layout(product_weight: float, product_width: float, product_l
     """
     
     # --- Determine Skid Type, Actual Dimensions, and Max Spacing from Rules ---
-    skid_type_nominal = None
-    skid_actual_width = 0.0
-    skid_actual_height = 0.0
-    max_skid_spacing_rule = 0.0
-
-    # Sort rules by weight to handle cases correctly
-    sorted_weight_rules = sorted(config.WEIGHT_RULES, key=lambda x: x[0])
-
-    for rule_max_weight, type_from_rule, rule_max_spacing in sorted_weight_rules:
-        if product_weight <= rule_max_weight + config.FLOAT_TOLERANCE:
-            if type_from_rule == "3x4" and not allow_3x4_skids_for_light_loads:
-                continue # Skip 3x4 if not allowed
-            skid_type_nominal = type_from_rule
-            max_skid_spacing_rule = rule_max_spacing
-            break
-    
-    if not skid_type_nominal: # Fallback if 3x4 was skipped and no other rule matched (e.g. product too light for next rule)
-        # Find first rule that isn't 3x4 or use the lightest rule if all are 3x4 and it was disallowed
-        for rule_max_weight, type_from_rule, rule_max_spacing in sorted_weight_rules:
-            if type_from_rule != "3x4":
-                 if product_weight <= rule_max_weight + config.FLOAT_TOLERANCE:
-                    skid_type_nominal = type_from_rule
-                    max_skid_spacing_rule = rule_max_spacing
-                    break
-        if not skid_type_nominal and sorted_weight_rules: # Still no type, product is very light and 3x4 disallowed.
-             # Default to the first rule in the list if any (could be 3x4 if that's the only one)
-             # Or handle as an error / specific light-load case
-            skid_type_nominal = sorted_weight_rules[0][1]
-            max_skid_spacing_rule = sorted_weight_rules[0][2]
-            # Potentially log a warning that 3x4 was disallowed and a specific rule was forced.
-
-    if skid_type_nominal and skid_type_nominal in config.SKID_DIMENSIONS:
-        skid_actual_width, skid_actual_height = config.SKID_DIMENSIONS[skid_type_nominal]
+    # Compiled rules: bisect on the sorted weight limits (see rules.RuleSet.skid_rule)
+    active_rules = rules.get_rules()
+    skid_type_nominal, max_skid_spacing_rule = active_rules.skid_rule(product_weight, allow_3x4_skids_for_light_loads)
+
+    if skid_type_nominal and skid_type_nominal in active_rules.skid_dimensions:
+        skid_actual_width, skid_actual_height = active_rules.skid_dimensions[skid_type_nominal]
     else:
         # Handle error: skid type not found or not defined in SKID_DIMENSIONS
         # For now, use placeholder values if not found, but ideally, this should be an error or a safe default
@@ -157,6 +137,99 @@ def calculate_skid_layout(product_weight: float, product_width: float, product_l
         "exp_data": exp_data
     }
 
+def calculate_skid_layout_batch(product_weight, product_width, product_length,
+                                clearance_side, panel_thickness, cleat_thickness,
+                                allow_3x4_skids_for_light_loads=True) -> dict:
+    """Vectorized calculate_skid_layout for arrays of products (design-space sweeps).
+
+    All arguments accept scalars or NumPy-compatible arrays and are broadcast together.
+    Gives exactly the same answers as calculate_skid_layout element by element,
+    including the fallback when 3x4 skids are disallowed.
+
+    Returns:
+        dict: Struct-of-arrays using the scalar result keys ("skid_count",
+        "actual_center_to_center_spacing", "first_skid_position_offset_x",
+        "crate_overall_width_calculated", ...), plus "skid_type_code" (int8 index
+        into the "skid_type_nominals" tuple).
+    """
+    import numpy as np # Imported here so the scalar logic stays importable without NumPy
+
+    weight, width, length, clearance, panel_t, cleat_t, allow_3x4 = np.broadcast_arrays(
+        np.asarray(product_weight, dtype=float), np.asarray(product_width, dtype=float),
+        np.asarray(product_length, dtype=float), np.asarray(clearance_side, dtype=float),
+        np.asarray(panel_thickness, dtype=float), np.asarray(cleat_thickness, dtype=float),
+        np.asarray(allow_3x4_skids_for_light_loads, dtype=bool))
+    tol = config.FLOAT_TOLERANCE
+
+    # --- Resolve each rule to (type, width, height, spacing), same defaults as the scalar path ---
+    active_rules = rules.get_rules()
+    sorted_weight_rules = active_rules.weight_rules
+    resolved = []
+    for _, type_from_rule, rule_max_spacing in sorted_weight_rules:
+        if type_from_rule in active_rules.skid_dimensions:
+            resolved.append((type_from_rule, *active_rules.skid_dimensions[type_from_rule], rule_max_spacing))
+        else:
+            resolved.append((type_from_rule, 3.5, 3.5, 30.0))
+    if not resolved: # No rules at all: scalar path falls back to a 4x4 at 30" spacing
+        resolved.append(("4x4", 3.5, 3.5, 30.0))
+    nominals = tuple(dict.fromkeys(r[0] for r in resolved))
+
+    # --- Rule selection: first matching rule, skipping 3x4 when disallowed ---
+    rule_index = np.zeros(weight.shape, dtype=np.intp) # Unmatched products fall back to the lightest rule
+    assigned = np.zeros(weight.shape, dtype=bool)
+    for i, (rule_max_weight, type_from_rule, _) in enumerate(sorted_weight_rules):
+        matches = ~assigned & (weight <= rule_max_weight + tol)
+        if type_from_rule == "3x4":
+            matches &= allow_3x4
+        rule_index[matches] = i
+        assigned |= matches
+
+    rule_type_code = np.array([nominals.index(r[0]) for r in resolved], dtype=np.int8)
+    skid_actual_width = np.array([r[1] for r in resolved], dtype=float)[rule_index]
+    skid_actual_height = np.array([r[2] for r in resolved], dtype=float)[rule_index]
+    max_skid_spacing = np.array([r[3] for r in resolved], dtype=float)[rule_index]
+
+    # --- Crate dimensions ---
+    crate_overall_width = width + (2 * clearance) + (2 * panel_t) + (2 * cleat_t)
+    usable_width_for_skids = width + (2 * clearance)
+
+    # --- Skid count and spacing ---
+    too_narrow = usable_width_for_skids < skid_actual_width - tol
+    single = ~too_narrow & ((usable_width_for_skids < (2 * skid_actual_width) - tol) | (max_skid_spacing == 0))
+    multi = ~too_narrow & ~single
+
+    centerline_span = usable_width_for_skids - skid_actual_width
+    with np.errstate(divide='ignore', invalid='ignore'):
+        num_gaps_ideal = centerline_span / np.where(multi, max_skid_spacing, 1.0)
+    skid_count = np.zeros(weight.shape, dtype=np.int64)
+    skid_count[single] = (usable_width_for_skids[single] >= skid_actual_width[single]).astype(np.int64)
+    skid_count[multi] = np.maximum(2, np.ceil(num_gaps_ideal[multi]).astype(np.int64) + 1)
+
+    pitch = np.zeros(weight.shape, dtype=float)
+    pitch[multi] = centerline_span[multi] / (skid_count[multi] - 1)
+    first_pos = np.where(skid_count > 0, -((skid_count - 1) * pitch) / 2.0, 0.0)
+
+    if config.SKID_LENGTH_ASSUMPTION == "crate_overall_length":
+        skid_actual_length = length + (2 * clearance) + (2 * panel_t) + (2 * cleat_t)
+    elif config.SKID_LENGTH_ASSUMPTION == "product_length":
+        skid_actual_length = length.copy()
+    else:
+        skid_actual_length = np.zeros(weight.shape, dtype=float)
+
+    return {
+        "skid_type_nominals": nominals,
+        "skid_type_code": rule_type_code[rule_index],
+        "skid_actual_width": skid_actual_width,
+        "skid_actual_height": skid_actual_height,
+        "skid_actual_length": skid_actual_length,
+        "max_skid_spacing": max_skid_spacing,
+        "skid_count": skid_count,
+        "actual_center_to_center_spacing": pitch,
+        "first_skid_position_offset_x": first_pos,
+        "crate_overall_width_calculated": crate_overall_width,
+        "usable_width_for_skids": usable_width_for_skids,
+    }
+
 if __name__ == '__main__':
     # Test cases from cad_implementation_guide.html (Skid configurations)
     # Assuming config.py is accessible
@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Design-space sweeps: evaluate a grid of inputs and stream the results to Arrow IPC or Parquet.
+
+    python autocrate.py sweep -p product_width=20:120:1 -p product_weight=classes -o sweep.arrow
+
+A SweepGrid is the cartesian product of value lists for any input parameters
+(the last axis varies fastest); every other input keeps its base value. Rows
+are evaluated in chunks of `chunk_rows`:
+
+    - KERNEL_COLUMNS come from the NumPy batch kernels (skid_logic,
+      floorboard_logic, panel_logic) for a whole chunk at once;
+    - "status", "errors" and "exp:<expression>" columns need the full pipeline
+      and are computed row by row on a ProcessPoolExecutor.
+
+Each chunk becomes one Arrow record batch (one Parquet row group). At most
+two chunks per worker are in flight, and results are written in grid order as
+they arrive, so memory stays bounded by the chunk size whatever the grid size.
+The output is uncompressed Arrow IPC by default (`.parquet` selects Parquet);
+open_sweep() memory-maps it for analysis.
+"""
+
+import itertools
+import json
+import os
+import time
+
+import numpy as np
+
+try:
+    from . import config
+    from . import floorboard_logic
+    from . import panel_logic
+    from . import pipeline
+    from . import rules
+    from . import schema
+    from . import skid_logic
+except ImportError:
+    import config # For direct testing
+    import floorboard_logic
+    import panel_logic
+    import pipeline
+    import rules
+    import schema
+    import skid_logic
+
+DEFAULT_CHUNK_ROWS = 65536
+PIPELINE_CHUNK_ROWS = 2048 # Row-by-row chunks are smaller, so work spreads over the workers
+EXP_COLUMN_PREFIX = "exp:"
+PIPELINE_COLUMNS = ("status", "errors")
+
+# Columns computed by the batch kernels: name -> Arrow type name
+KERNEL_COLUMNS = {
+    "skid_type": "string",
+    "skid_count": "int64",
+    "skid_spacing": "float64",
+    "crate_overall_width": "float64",
+    "crate_overall_length": "float64",
+    "crate_overall_height": "float64",
+    "floorboard_std_count": "int64",
+    "floorboard_custom_width": "float64",
+    "floorboard_gap": "float64",
+    "side_panel_case": "string",
+    "end_panel_case": "string",
+}
+DEFAULT_COLUMNS = tuple(KERNEL_COLUMNS)
+
+
+def frange(start: float, stop: float, step: float) -> list:
+    """Values from `start` to `stop` inclusive in steps of `step` (no floating-point drift)."""
+    if step <= 0:
+        raise ValueError("A range step must be positive")
+    count = int(np.floor((stop - start) / step + 1e-9)) + 1
+    if count < 1:
+        raise ValueError(f"Empty range {start:g}:{stop:g}:{step:g}")
+    return [round(start + i * step, 10) for i in range(count)]
+
+
+def weight_class_values() -> list:
+    """One product weight per skid weight class of the active rules: each class's upper limit."""
+    return list(rules.get_rules().weight_limits)
+
+
+def parse_values(key: str, text: str) -> list:
+    """Command line value spec: "start:stop:step", "a,b,c", or "classes" for product_weight."""
+    text = text.strip()
+    if key == "product_weight" and text == "classes":
+        return weight_class_values()
+    if ":" in text:
+        parts = text.split(":")
+        if len(parts) != 3:
+            raise ValueError(f"Expected start:stop:step for {key}, got '{text}'")
+        return frange(*(float(part) for part in parts))
+    return [item.strip() for item in text.split(",") if item.strip()]
+
+
+class SweepGrid:
+    """Cartesian grid over input parameters; row i is np.unravel_index(i, shape) (last axis fastest)."""
+
+    def __init__(self, axes: dict, base: dict = None):
+        if not axes:
+            raise ValueError("A sweep needs at least one parameter to vary")
+        axes = schema.to_canonical(dict(axes))
+        unknown = [key for key in axes if key not in schema.PARAMETERS_BY_KEY]
+        if unknown:
+            raise ValueError(f"Unknown sweep parameter(s): {', '.join(unknown)}")
+        lists = {key: list(values) if isinstance(values, (list, tuple, np.ndarray, range)) else [values]
+                 for key, values in axes.items()}
+        for key, values in lists.items():
+            if not values:
+                raise ValueError(f"No values given for {key}")
+            report = schema.get_validator().validate_columns({key: values}, len(values))
+            if not report.ok:
+                raise ValueError(f"Invalid {key} values:\n{report.format(limit=5)}")
+
+        report = schema.get_validator().validate_orders([{key: value for key, value in (base or {}).items()
+                                                          if key not in lists}])
+        if not report.ok:
+            raise ValueError(f"Invalid base parameters:\n{report.format(limit=5)}")
+        self.base = schema.normalize_parameters(base)
+        self.keys = tuple(lists)
+        self.axes = tuple(_typed_axis(key, values) for key, values in lists.items())
+        self.shape = tuple(len(axis) for axis in self.axes)
+        self.size = int(np.prod(self.shape, dtype=np.int64))
+
+    def to_dict(self) -> dict:
+        """JSON description of the grid (stored in the output file's metadata)."""
+        return {"axes": {key: axis.tolist() for key, axis in zip(self.keys, self.axes)},
+                "base": {key: value for key, value in self.base.items() if key not in self.keys}}
+
+    def inputs(self, start: int, stop: int) -> dict:
+        """Every input parameter for rows [start, stop): arrays for swept parameters, scalars otherwise."""
+        index = np.unravel_index(np.arange(start, stop, dtype=np.int64), self.shape)
+        values = dict(self.base)
+        for key, axis, axis_index in zip(self.keys, self.axes, index):
+            values[key] = axis[axis_index]
+        return values
+
+    def rows(self, start: int, stop: int):
+        """Complete parameter dicts for rows [start, stop), in grid order."""
+        combos = _product_from(self.shape, np.unravel_index(start, self.shape))
+        for combo in itertools.islice(combos, stop - start):
+            params = dict(self.base)
+            for key, axis, i in zip(self.keys, self.axes, combo):
+                params[key] = axis[i].item()
+            yield params
+
+
+def _product_from(sizes: tuple, first: tuple):
+    """Index tuples of itertools.product(*map(range, sizes)) from `first` on, without walking the rows before it."""
+    position = [int(i) for i in first]
+    while True:
+        yield tuple(position)
+        for axis in range(len(sizes) - 1, -1, -1):
+            position[axis] += 1
+            if position[axis] < sizes[axis]:
+                break
+            position[axis] = 0
+        else:
+            return
+
+
+def _typed_axis(key: str, values: list) -> np.ndarray:
+    spec = schema.PARAMETERS_BY_KEY[key]
+    if spec.type == "float":
+        return np.array([float(value) for value in values], dtype=float)
+    if spec.type == "bool":
+        return np.array([value.strip().lower() in schema.TRUE_STRINGS if isinstance(value, str) else bool(value)
+                         for value in values], dtype=bool)
+    return np.array([str(value).strip() for value in values], dtype=str)
+
+
+# --- Evaluation ---
+def evaluate_kernels(inputs: dict, columns) -> dict:
+    """KERNEL_COLUMNS for a chunk of inputs (see SweepGrid.inputs), as NumPy arrays."""
+    skid = skid_logic.calculate_skid_layout_batch(
+        inputs["product_weight"], inputs["product_width"], inputs["product_length"], inputs["clearance_side"],
+        inputs["panel_thickness"], inputs["cleat_thickness"], inputs["allow_3x4_skids"])
+    # Inputs that are not swept are scalars, so broadcast every column to the chunk length
+    rows = (max(np.size(value) for value in inputs.values() if isinstance(value, np.ndarray)),)
+    floor_span = np.broadcast_to(np.asarray(inputs["product_width"] + 2 * np.asarray(inputs["clearance_side"]),
+                                            dtype=float), rows)
+    internal_height = np.broadcast_to(np.asarray(inputs["product_actual_height"], dtype=float)
+                                      + inputs["clearance_above_product"], rows)
+    results = {
+        "skid_type": np.asarray(skid["skid_type_nominals"], dtype=object)[skid["skid_type_code"]],
+        "skid_count": skid["skid_count"],
+        "skid_spacing": skid["actual_center_to_center_spacing"],
+        "crate_overall_width": skid["crate_overall_width_calculated"],
+        "crate_overall_length": skid["skid_actual_length"],
+    }
+    if "crate_overall_height" in columns:
+        results["crate_overall_height"] = (skid["skid_actual_height"] + inputs["floor_lumbar_thickness"]
+                                           + internal_height + inputs["panel_thickness"])
+    if any(column.startswith("floorboard_") for column in columns):
+        floor = floorboard_logic.calculate_floorboard_layout_batch(
+            floor_span, inputs["chosen_standard_floorboard_nominal"], inputs["allow_custom_floorboard_fill"])
+        results["floorboard_std_count"] = floor["std_boards_front_count"] + floor["std_boards_back_count"]
+        results["floorboard_custom_width"] = floor["custom_board_actual_width"]
+        results["floorboard_gap"] = floor["final_gap_y_remaining"]
+    for column, width in (("side_panel_case", skid["skid_actual_length"]), ("end_panel_case", floor_span)):
+        if column in columns:
+            case = panel_logic.determine_panel_case_batch(width, internal_height)
+            results[column] = np.array([c.case_id for c in case["cases"]], dtype=object)[case["case_index"]]
+    return {column: np.broadcast_to(results[column], rows) for column in columns if column in KERNEL_COLUMNS}
+
+
+def _pipeline_value(design, column: str):
+    if column == "status":
+        return design.status
+    if column == "errors":
+        return "; ".join(design.errors)
+    name = column[len(EXP_COLUMN_PREFIX):]
+    for stage in (design.skid, design.floorboard, design.wall, design.cap, design.decal):
+        exp_data = stage.get("exp_data") or {}
+        if name in exp_data:
+            return exp_data[name]
+    return None
+
+
+def evaluate_chunk(grid: SweepGrid, start: int, stop: int, columns: tuple) -> dict:
+    """All requested columns for rows [start, stop): swept inputs, kernel columns and pipeline columns."""
+    inputs = grid.inputs(start, stop)
+    results = {key: inputs[key] for key in grid.keys}
+    results.update(evaluate_kernels(inputs, columns))
+    row_columns = [column for column in columns if column not in KERNEL_COLUMNS]
+    if row_columns:
+        designer = pipeline.IncrementalPipeline(generate_exp=False) # Consecutive rows share most stage inputs
+        values = {column: [] for column in row_columns}
+        for params in grid.rows(start, stop):
+            design = designer.update(params)
+            for column in row_columns:
+                values[column].append(_pipeline_value(design, column))
+        results.update(values)
+    return results
+
+
+def _evaluate_chunk_with_rules(rule_fingerprint: str, rule_data: str, *args) -> dict:
+    """Worker process entry point: uses the parent's rule set, then evaluates the chunk."""
+    rules.use_rules(rule_data, rule_fingerprint)
+    return evaluate_chunk(*args)
+
+
+def _check_columns(columns) -> tuple:
+    columns = tuple(dict.fromkeys(columns or DEFAULT_COLUMNS))
+    unknown = [column for column in columns if column not in KERNEL_COLUMNS and column not in PIPELINE_COLUMNS
+               and not (column.startswith(EXP_COLUMN_PREFIX) and len(column) > len(EXP_COLUMN_PREFIX))]
+    if unknown:
+        raise ValueError(f"Unknown sweep column(s): {', '.join(unknown)} (kernel columns: "
+                         f"{', '.join(KERNEL_COLUMNS)}; pipeline columns: status, errors, exp:<expression name>)")
+    return columns
+
+
+# --- Output ---
+def _arrow_type(pa, values):
+    """Arrow type for a pipeline column, decided from its first chunk."""
+    for value in values:
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            return pa.bool_()
+        if isinstance(value, (int, float)):
+            return pa.float64()
+        return pa.string()
+    return pa.float64()
+
+
+def _to_arrow(pa, values, arrow_type):
+    if isinstance(values, np.ndarray) and values.dtype != object:
+        return pa.array(values, type=arrow_type)
+    if pa.types.is_string(arrow_type):
+        return pa.array([None if value is None else str(value) for value in values], type=arrow_type)
+    if pa.types.is_floating(arrow_type):
+        return pa.array([float(value) if isinstance(value, (int, float)) else None for value in values],
+                        type=arrow_type)
+    return pa.array(list(values), type=arrow_type)
+
+
+class _SweepWriter:
+    """Writes record batches to an Arrow IPC file or a Parquet file, replacing `path` when closed."""
+
+    def __init__(self, path: str, grid: SweepGrid, columns: tuple):
+        import pyarrow as pa # Imported here so the kernels and grid work without pyarrow
+
+        self.pa = pa
+        self.path = path
+        self.parquet = path.lower().endswith(".parquet")
+        self.temp_path = os.path.join(os.path.dirname(path) or ".", "." + os.path.basename(path) + ".tmp")
+        self.grid = grid
+        self.columns = columns
+        self.schema = None
+        self._writer = None
+
+    def _open(self, chunk: dict):
+        pa = self.pa
+        fields = []
+        for key, axis in zip(self.grid.keys, self.grid.axes):
+            kind = axis.dtype.kind
+            fields.append(pa.field(key, pa.float64() if kind == "f" else pa.bool_() if kind == "b" else pa.string()))
+        for column in self.columns:
+            if column in KERNEL_COLUMNS:
+                fields.append(pa.field(column, pa.type_for_alias(KERNEL_COLUMNS[column])))
+            else:
+                fields.append(pa.field(column, _arrow_type(pa, chunk[column])))
+        metadata = {"autocrate.version": config.VERSION, "autocrate.rules_version": rules.get_rules().version,
+                    "autocrate.rules_fingerprint": rules.get_rules().fingerprint,
+                    "autocrate.grid": json.dumps(self.grid.to_dict())}
+        self.schema = pa.schema(fields, metadata=metadata)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        if self.parquet:
+            import pyarrow.parquet as pq
+
+            self._writer = pq.ParquetWriter(self.temp_path, self.schema)
+        else:
+            self._writer = pa.ipc.new_file(self.temp_path, self.schema)
+
+    def write(self, chunk: dict) -> None:
+        if self._writer is None:
+            self._open(chunk)
+        arrays = [_to_arrow(self.pa, chunk[field.name], field.type) for field in self.schema]
+        self._writer.write_batch(self.pa.RecordBatch.from_arrays(arrays, schema=self.schema))
+
+    def close(self, commit: bool = True) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        if commit and self._writer is not None:
+            os.replace(self.temp_path, self.path)
+        elif os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+
+def run_sweep(grid: SweepGrid, path: str, columns=None, workers: int = None, chunk_rows: int = None,
+              progress=None) -> dict:
+    """Evaluates every grid row and writes the results to `path` (.parquet, else Arrow IPC file).
+
+    Args:
+        grid: The inputs to evaluate.
+        path: Output file; written to a temporary file and renamed when complete.
+        columns: Result columns (default: DEFAULT_COLUMNS). Swept inputs are always written first.
+        workers: Worker processes for pipeline columns (default: CPU count, 0/1 = in-process).
+            Kernel-only sweeps always run in-process.
+        chunk_rows: Rows per record batch / row group.
+        progress: Called with (rows done, total rows) after each chunk.
+
+    Returns:
+        dict: Summary with the row and chunk counts, columns and elapsed time.
+    """
+    columns = _check_columns(columns)
+    needs_pipeline = any(column not in KERNEL_COLUMNS for column in columns)
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    chunk_rows = chunk_rows or (PIPELINE_CHUNK_ROWS if needs_pipeline else DEFAULT_CHUNK_ROWS)
+    bounds = [(start, min(start + chunk_rows, grid.size)) for start in range(0, grid.size, chunk_rows)]
+
+    start_time = time.perf_counter()
+    writer = _SweepWriter(path, grid, columns)
+    done = 0
+    try:
+        if not needs_pipeline or workers <= 1 or len(bounds) <= 1:
+            chunks = (evaluate_chunk(grid, start, stop, columns) for start, stop in bounds)
+        else:
+            chunks = _parallel_chunks(grid, bounds, columns, workers)
+        for (start, stop), chunk in zip(bounds, chunks):
+            writer.write(chunk)
+            done += stop - start
+            if progress is not None:
+                progress(done, grid.size)
+    except BaseException:
+        writer.close(commit=False)
+        raise
+    writer.close()
+    return {"path": os.path.abspath(path), "rows": grid.size, "chunks": len(bounds),
+            "columns": list(grid.keys) + list(columns), "format": "parquet" if writer.parquet else "arrow",
+            "workers": workers if needs_pipeline else 0, "elapsed_seconds": time.perf_counter() - start_time}
+
+
+def _parallel_chunks(grid: SweepGrid, bounds: list, columns: tuple, workers: int):
+    """Chunk results in grid order, with at most two chunks per worker submitted at a time."""
+    from collections import deque
+    from concurrent.futures import ProcessPoolExecutor # Imported here so kernel-only sweeps skip multiprocessing
+
+    active_rules = rules.get_rules()
+    pending = deque()
+    remaining = iter(bounds)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        def submit_next():
+            for start, stop in itertools.islice(remaining, 1):
+                pending.append(executor.submit(_evaluate_chunk_with_rules, active_rules.fingerprint,
+                                               active_rules.canonical, grid, start, stop, columns))
+
+        for _ in range(2 * workers):
+            submit_next()
+        while pending:
+            chunk = pending.popleft().result()
+            submit_next()
+            yield chunk
+
+
+def open_sweep(path: str):
+    """Memory-maps a sweep file as a pyarrow Table (the grid definition is in table.schema.metadata)."""
+    import pyarrow as pa # Imported here so the kernels and grid work without pyarrow
+
+    if path.lower().endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        return pq.read_table(path, memory_map=True)
+    return pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+
+
+if __name__ == '__main__':
+    demo = SweepGrid({"product_width": frange(20, 120, 10), "product_weight": weight_class_values()})
+    chunk = evaluate_chunk(demo, 0, demo.size, ("skid_type", "skid_count", "side_panel_case"))
+    for row in range(0, demo.size, len(demo.axes[1])):
+        print(f"width {chunk['product_width'][row]:>5g}: " + ", ".join(
+            f"{chunk['skid_count'][row + i]} x {chunk['skid_type'][row + i]}" for i in range(len(demo.axes[1]))))
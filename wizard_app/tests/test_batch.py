@@ -0,0 +1,125 @@
+# tests/test_batch.py
+"""
+Unit tests for the batch module.
+Uses pytest.
+"""
+import json
+import os
+
+import pytest
+# Use absolute import based on expected structure
+from wizard_app import batch
+from wizard_app import catalog
+
+
+def _write_orders(tmp_path):
+    (tmp_path / "orders.jsonl").write_text(
+        "\n".join(json.dumps({"order_id": f"SO-{i}", "product_weight": 400 + 500 * i, "product_width": 30 + i})
+                  for i in range(6)) + "\n")
+    (tmp_path / "orders.csv").write_text(
+        "order_id,product_weight,product_width,allow_3x4_skids\nA1,300,40,false\nA2,not-a-number,40,\n")
+
+
+def test_load_orders_formats(tmp_path):
+    """JSON-Lines and CSV manifests load with ids and string values."""
+    _write_orders(tmp_path)
+    jsonl_orders = batch.load_orders(str(tmp_path / "orders.jsonl"))
+    assert [order_id for order_id, _ in jsonl_orders][:2] == ["SO-0", "SO-1"]
+    csv_orders = batch.load_orders(str(tmp_path / "orders.csv"))
+    assert csv_orders[0] == ("A1", {"product_weight": "300", "product_width": "40", "allow_3x4_skids": "false"})
+    assert "allow_3x4_skids" not in csv_orders[1][1] # Empty cells fall back to defaults
+
+
+def test_load_orders_directory(tmp_path):
+    """A directory loads every .json file, named after the file."""
+    (tmp_path / "crate_a.json").write_text(json.dumps({"product_weight": 900}))
+    (tmp_path / "crate_b.json").write_text(json.dumps({"product_weight": 1900}))
+    orders = batch.load_orders(str(tmp_path))
+    assert [order_id for order_id, _ in orders] == ["crate_a", "crate_b"]
+
+
+def test_unreadable_inputs_are_failed_rows(tmp_path, monkeypatch):
+    """Malformed files, lines and non-object list items fail on their own row; the other orders still run."""
+    monkeypatch.setenv("AUTOCRATE_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setenv("AUTOCRATE_NO_CATALOG", "1")
+    orders_dir = tmp_path / "orders"
+    orders_dir.mkdir()
+    (orders_dir / "a_good.json").write_text(json.dumps([{"product_weight": 900}, 7]))
+    (orders_dir / "b_broken.json").write_text('{"product_weight": 18')
+    (tmp_path / "orders.jsonl").write_text('{"product_weight": 1200}\n{"product_weight": \n[1, 2]\n')
+
+    orders = batch.load_orders(str(orders_dir)) + batch.load_orders(str(tmp_path / "orders.jsonl"))
+    assert [order_id for order_id, _ in orders] == ["a_good_1", "a_good_2", "b_broken", "line_1", "line_2", "line_3"]
+    assert batch.validate_orders(orders).valid.tolist() == [True, False, False, True, False, False]
+    summary = batch.run_batch(orders, str(tmp_path / "out"), workers=1)
+    assert [r["status"] for r in summary["orders"]] == ["OK", "FAILED", "FAILED", "OK", "FAILED", "FAILED"]
+    assert "not an order object (int)" in summary["orders"][1]["message"]
+    assert "JSONDecodeError" in summary["orders"][2]["message"]
+    assert summary["orders"][4]["row"] == 5
+
+
+def test_duplicate_order_ids_get_a_suffix(tmp_path, monkeypatch):
+    """Repeated order ids (also differing only in case) write separate .exp files instead of overwriting."""
+    monkeypatch.setenv("AUTOCRATE_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setenv("AUTOCRATE_NO_CATALOG", "1")
+    orders = [("A", {"product_weight": 900}), ("a", {"product_weight": 1500}), ("A_2", {"product_weight": 2500}),
+              ("B", {"product_weight": 700})]
+    summary = batch.run_batch(orders, str(tmp_path / "out"), workers=1)
+    assert [r["order_id"] for r in summary["orders"]] == ["A", "a_3", "A_2", "B"]
+    assert len({r["exp_path"] for r in summary["orders"]}) == 4
+    assert len(list((tmp_path / "out").glob("*.exp"))) == 4
+
+
+def test_catalog_failure_is_a_warning(tmp_path, monkeypatch):
+    """An order whose .exp was written is a WARNING, not FAILED, when the catalog cannot record it."""
+    monkeypatch.setenv("AUTOCRATE_CACHE_DIR", str(tmp_path / "cache"))
+
+    def locked_catalog(*args, **kwargs):
+        raise catalog.sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(catalog, "record_design", locked_catalog)
+    result = batch.run_order("SO-9", {"product_weight": 1100}, str(tmp_path))
+    assert result["status"] == "WARNING"
+    assert result["message"] == "catalog: OperationalError: database is locked"
+    assert os.path.exists(result["exp_path"]) and result["skid_count"]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_run_batch_writes_exp_and_report(tmp_path, monkeypatch, workers):
+    """Every order gets an .exp file; bad rows are reported instead of aborting the batch."""
+    monkeypatch.setenv("AUTOCRATE_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setenv("AUTOCRATE_CATALOG", str(tmp_path / "catalog.sqlite3"))
+    _write_orders(tmp_path)
+    orders = batch.load_orders(str(tmp_path / "orders.jsonl")) + batch.load_orders(str(tmp_path / "orders.csv"))
+    out_dir = tmp_path / "out"
+    summary = batch.run_batch(orders, str(out_dir), workers=workers, chunksize=2)
+
+    assert summary["total"] == 8
+    assert summary["failed"] == 1
+    assert os.path.exists(out_dir / "SO-3.exp")
+    assert os.path.exists(out_dir / "A1.exp")
+    failed = [r for r in summary["orders"] if r["status"] == "FAILED"]
+    assert failed[0]["order_id"] == "A2"
+
+    with open(out_dir / batch.SUMMARY_FILENAME) as f:
+        report = json.load(f)
+    assert report["total"] == 8
+    assert all("seconds" in row for row in report["orders"])
+
+    recorded = catalog.DesignCatalog(str(tmp_path / "catalog.sqlite3"))
+    assert recorded.count() == 7 # Every order except the failed one
+    recorded.close()
+
+
+def test_run_batch_delta(tmp_path, monkeypatch):
+    """A repeated delta batch reports every order unchanged; a changed order gets a delta file."""
+    monkeypatch.setenv("AUTOCRATE_NO_CACHE", "1")
+    monkeypatch.setenv("AUTOCRATE_NO_CATALOG", "1")
+    orders = [("A", {"product_weight": 900}), ("B", {"product_weight": 1900})]
+    out_dir = str(tmp_path / "out")
+    first = batch.run_batch(orders, out_dir, workers=1, delta=True)
+    assert [r["exp_status"] for r in first["orders"]] == ["NEW", "NEW"]
+    second = batch.run_batch([orders[0], ("B", {"product_weight": 2100})], out_dir, workers=1, delta=True)
+    assert second["unchanged"] == 1
+    assert second["orders"][1]["exp_status"] == "CHANGED"
+    assert os.path.exists(second["orders"][1]["delta_path"])
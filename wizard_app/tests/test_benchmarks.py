@@ -0,0 +1,39 @@
+# tests/test_benchmarks.py
+"""
+Unit tests for the benchmarks package (corpus, runner and baseline comparison).
+Uses pytest.
+"""
+import pytest
+# Use absolute import based on expected structure
+from benchmarks import corpus
+from benchmarks import runner
+
+
+def test_corpus_includes_examples_and_synthetic_cases():
+    """The nested example crate is flattened onto pipeline parameter names."""
+    cases = dict(corpus.load_corpus())
+    example = cases["example_example-0205-13057"]
+    assert example["product_actual_height"] == 91.5
+    assert example["chosen_standard_floorboard_nominal"] == "2x8"
+    assert example["side_panel_1_removable"] is True
+    assert "synthetic_oversize_heavy" in cases
+
+
+def test_run_benchmarks_selected(monkeypatch):
+    """A filtered run times only the selected benchmarks."""
+    monkeypatch.setattr(runner, "MIN_REPEAT_SECONDS", 0.001)
+    results = runner.run_benchmarks(corpus.load_corpus(), repeat=2, only=["skid_logic", "pipeline"])
+    assert set(results["results"]) == {"skid_logic.calculate_skid_layout", "pipeline.design_crate"}
+    assert all(timing["min_us"] > 0 for timing in results["results"].values())
+
+
+def test_compare_flags_regressions():
+    """Changes beyond the threshold are flagged as regressions or improvements."""
+    baseline = {"results": {"a": {"min_us": 10.0}, "b": {"min_us": 10.0}, "c": {"min_us": 10.0}}}
+    current = {"results": {"a": {"min_us": 12.0}, "b": {"min_us": 10.5}, "c": {"min_us": 5.0}, "new": {"min_us": 1.0}}}
+    rows = {row["benchmark"]: row for row in runner.compare_results(baseline, current, threshold_pct=10)}
+    assert rows["a"]["status"] == "REGRESSION"
+    assert rows["b"]["status"] == "OK"
+    assert rows["c"]["status"] == "IMPROVED"
+    assert "new" not in rows
+    assert rows["a"]["change_pct"] == pytest.approx(20.0)
@@ -0,0 +1,113 @@
+# tests/test_calculation_worker.py
+"""
+Unit tests for the ui_modules.calculation_worker module.
+Uses pytest.
+"""
+import os
+import time
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+QtWidgets = pytest.importorskip("PyQt6.QtWidgets")
+# Use absolute import based on expected structure
+from wizard_app.ui_modules import calculation_worker
+
+_app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([]) # Must outlive every test
+
+@pytest.fixture
+def qt_app():
+    return _app
+
+@pytest.fixture(autouse=True)
+def no_shared_cache(monkeypatch):
+    monkeypatch.setenv("AUTOCRATE_NO_CACHE", "1")
+    monkeypatch.setenv("AUTOCRATE_NO_CATALOG", "1")
+
+def _wait_for(app, condition, timeout=10.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        app.processEvents()
+    return condition()
+
+def test_preview_does_not_write(qt_app):
+    """A preview computes the design on the pool and reports it through `finished`."""
+    runner = calculation_worker.CalculationRunner()
+    designs, written = [], []
+    runner.finished.connect(designs.append)
+    runner.exp_written.connect(written.append)
+    runner.submit({"product_weight": 2500.0})
+    assert _wait_for(qt_app, lambda: designs and not runner.is_busy())
+    assert designs[0].params["product_weight"] == 2500.0
+    assert written == []
+
+def test_only_newest_result_is_shown(qt_app, tmp_path):
+    """Superseded requests are dropped, but an .exp write they made is still reported."""
+    runner = calculation_worker.CalculationRunner()
+    designs, written = [], []
+    runner.finished.connect(designs.append)
+    runner.exp_written.connect(written.append)
+    path = str(tmp_path / "crate.exp")
+    runner.submit({"product_weight": 1000.0}, exp_output_path=path)
+    for weight in (1500.0, 2000.0, 3000.0):
+        runner.submit({"product_weight": weight})
+    assert _wait_for(qt_app, lambda: not runner.is_busy())
+    assert [d.params["product_weight"] for d in designs] == [3000.0]
+    assert written == [path]
+    with open(path) as f:
+        assert f.read()
+
+def test_failure_reported(qt_app):
+    """Exceptions in the worker arrive through the `failed` signal."""
+    class BrokenDesigner:
+        def update(self, params, **overrides):
+            raise ValueError("boom")
+
+    runner = calculation_worker.CalculationRunner(designer=BrokenDesigner())
+    errors = []
+    runner.failed.connect(lambda message, details: errors.append(message))
+    runner.submit({})
+    assert _wait_for(qt_app, lambda: errors)
+    assert errors == ["boom"]
+
+def test_delta_write_reports_status(qt_app, tmp_path):
+    """A delta submit writes the .delta.exp and reports UNCHANGED when nothing changed."""
+    runner = calculation_worker.CalculationRunner()
+    deltas = []
+    runner.delta_written.connect(deltas.append)
+    path = str(tmp_path / "crate.exp")
+    runner.submit({"product_weight": 1200.0}, exp_output_path=path, delta=True)
+    runner.submit({"product_weight": 1200.0}, exp_output_path=path, delta=True)
+    assert _wait_for(qt_app, lambda: len(deltas) == 2 and not runner.is_busy())
+    assert [d.status for d in deltas] == ["NEW", "UNCHANGED"]
+    assert os.path.exists(deltas[1].delta_path)
+
+def test_unchanged_exp_not_rewritten(qt_app, tmp_path):
+    """Writing the same design twice reports the second write through `exp_unchanged`."""
+    runner = calculation_worker.CalculationRunner()
+    written, unchanged = [], []
+    runner.exp_written.connect(written.append)
+    runner.exp_unchanged.connect(unchanged.append)
+    path = str(tmp_path / "crate.exp")
+    runner.submit({"product_weight": 1700.0}, exp_output_path=path)
+    runner.submit({"product_weight": 1700.0}, exp_output_path=path)
+    assert _wait_for(qt_app, lambda: len(written) + len(unchanged) == 2 and not runner.is_busy())
+    assert written == [path] and unchanged == [path]
+
+def test_catalog_failure_is_a_warning(qt_app, tmp_path, monkeypatch):
+    """A catalog that cannot be written still delivers the design and the .exp, plus a catalog warning."""
+    def locked_catalog(*args, **kwargs):
+        raise calculation_worker.catalog.sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(calculation_worker.catalog, "record_design", locked_catalog)
+    runner = calculation_worker.CalculationRunner()
+    designs, written, warnings, errors = [], [], [], []
+    runner.finished.connect(designs.append)
+    runner.exp_written.connect(written.append)
+    runner.catalog_failed.connect(lambda path, message: warnings.append(message))
+    runner.failed.connect(lambda message, details: errors.append(message))
+    path = str(tmp_path / "crate.exp")
+    runner.submit({"product_weight": 1300.0}, exp_output_path=path)
+    assert _wait_for(qt_app, lambda: designs and not runner.is_busy())
+    assert written == [path] and errors == []
+    assert warnings == ["OperationalError: database is locked"]
+
@@ -0,0 +1,72 @@
+# tests/test_catalog.py
+"""
+Unit tests for the catalog module.
+Uses pytest.
+"""
+import os
+
+import pytest
+# Use absolute import based on expected structure
+from wizard_app import catalog
+from wizard_app import pipeline
+
+
+@pytest.fixture
+def designs(tmp_path):
+    """A catalog holding three crates that differ in product width."""
+    store = catalog.DesignCatalog(str(tmp_path / "catalog.sqlite3"))
+    for width in (38.0, 38.3, 44.0):
+        design = pipeline.design_crate(product_width=width, generate_exp=False)
+        store.record(design, str(tmp_path / f"crate_{width:g}.exp"), order_id=f"W{width:g}")
+    yield store
+    store.close()
+
+
+def test_find_within_tolerance(designs):
+    """Only crates within the tolerance on every dimension are returned, closest first."""
+    target = pipeline.design_crate(product_width=38.0, generate_exp=False)
+    matches = designs.find_similar(target, tolerance=0.5)
+    assert [m["order_id"] for m in matches] == ["W38", "W38.3"]
+    assert matches[0]["deviation"] == 0.0
+    assert matches[1]["deviation"] == pytest.approx(0.3)
+    assert matches[0]["skid_type"] == target.skid["skid_type_nominal"]
+    assert matches[0]["side_panel_case"] == target.wall["exp_data"]["CALC_Side_Panel_Case_ID"]
+    assert matches[0]["params"]["product_width"] == 38.0
+    assert not matches[0]["exp_exists"]
+    assert [m["order_id"] for m in designs.find_similar(target, tolerance=0.1)] == ["W38"]
+    assert designs.find_within(target.crate_overall_width, target.crate_overall_length,
+                               target.crate_overall_height, weight=target.params["product_weight"] + 100) == []
+
+
+def test_record_is_idempotent_per_exp_path(designs, tmp_path):
+    """Re-recording refreshes the entry; a different design written to the same path replaces it."""
+    path = str(tmp_path / "crate_38.exp")
+    designs.record(pipeline.design_crate(product_width=38.0, generate_exp=False), path, order_id="again")
+    assert designs.count() == 3
+    designs.record(pipeline.design_crate(product_width=60.0, generate_exp=False), path)
+    assert designs.count() == 3
+    target = pipeline.design_crate(product_width=38.0, generate_exp=False)
+    assert [m["order_id"] for m in designs.find_similar(target)] == ["W38.3"]
+
+
+def test_fallback_index_without_rtree(tmp_path, monkeypatch):
+    """SQLite builds without R*Tree fall back to the composite index with the same results."""
+    monkeypatch.setattr(catalog, "_RTREE_SCHEMA", "CREATE VIRTUAL TABLE design_dims USING no_such_module(id)")
+    store = catalog.DesignCatalog(str(tmp_path / "plain.sqlite3"))
+    design = pipeline.design_crate(generate_exp=False)
+    store.record(design, str(tmp_path / "crate.exp"))
+    assert not store.has_rtree
+    assert len(store.find_similar(design)) == 1
+    store.close()
+
+
+def test_default_catalog_follows_environment(tmp_path, monkeypatch):
+    """AUTOCRATE_CATALOG moves the shared catalog and AUTOCRATE_NO_CATALOG disables recording."""
+    path = str(tmp_path / "shared.sqlite3")
+    monkeypatch.setenv("AUTOCRATE_CATALOG", path)
+    assert catalog.get_default_catalog().path == path
+    assert catalog.record_design(pipeline.design_crate(generate_exp=False), "crate.exp") is not None
+    assert os.path.exists(path)
+    catalog.get_default_catalog().close()
+    monkeypatch.setenv("AUTOCRATE_NO_CATALOG", "1")
+    assert catalog.record_design(pipeline.design_crate(generate_exp=False), "crate.exp") is None
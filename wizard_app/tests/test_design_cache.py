@@ -0,0 +1,82 @@
+# tests/test_design_cache.py
+"""
+Unit tests for the design_cache module.
+Uses pytest.
+"""
+import os
+
+import pytest
+# Use absolute import based on expected structure
+from wizard_app import config
+from wizard_app import design_cache
+
+
+def test_design_key_is_canonical():
+    """Equivalent parameter spellings hash to the same key; real changes do not."""
+    key = design_cache.design_key({"product_weight": 600, "product_height": 91.5})
+    assert key == design_cache.design_key({"product_actual_height": "91.5", "unknown_field": 1})
+    assert key != design_cache.design_key({"product_weight": 601})
+    assert key != design_cache.design_key({}, generate_exp=False)
+
+
+def test_memory_and_disk_tiers(tmp_path):
+    """A repeat design is served from memory; a fresh cache on the same file reads it from disk."""
+    path = str(tmp_path / "cache.sqlite3")
+    cache = design_cache.DesignCache(path=path)
+    design, hit = cache.design_crate({"product_weight": 1500})
+    assert not hit
+    again, hit = cache.design_crate({"product_weight": 1500.0})
+    assert hit and again is design
+    assert cache.stats["memory_hits"] == 1
+
+    other = design_cache.DesignCache(path=path)
+    from_disk, hit = other.design_crate({"product_weight": 1500})
+    assert hit
+    assert other.stats["disk_hits"] == 1
+    assert from_disk.exp_content == design.exp_content
+    cache.close()
+    other.close()
+
+
+def test_corrupt_disk_tier_is_a_miss(tmp_path, caplog):
+    """A cache file that is not a database makes lookups miss and writes skip; designs still work."""
+    path = tmp_path / "cache.sqlite3"
+    path.write_bytes(os.urandom(4096))
+    cache = design_cache.DesignCache(path=str(path))
+    design, hit = cache.design_crate({"product_weight": 1500})
+    assert not hit and design.status == "OK"
+    assert cache.design_crate({"product_weight": 1500})[1] # Still served from the memory tier
+    assert cache.stats["disk_errors"] == 2 # The first read and the write
+    assert "Design cache read failed" in caplog.text
+    cache.close()
+
+
+def test_memory_lru_and_disk_eviction(tmp_path):
+    """The memory tier keeps the newest entries and the disk tier stays under its size limit."""
+    cache = design_cache.DesignCache(path=str(tmp_path / "cache.sqlite3"), memory_items=2, max_disk_bytes=30000)
+    for weight in range(500, 1500, 100):
+        cache.design_crate({"product_weight": weight})
+    assert len(cache._memory) == 2
+    assert cache.disk_usage()["bytes"] <= 30000
+    assert cache.stats["evictions"] > 0
+    cache.close()
+
+
+def test_config_change_invalidates(tmp_path, monkeypatch):
+    """Changing a config constant changes the fingerprint and therefore the key."""
+    key = design_cache.design_key({})
+    monkeypatch.setattr(config, "MIN_CUSTOM_NARROW_WIDTH", 3.0)
+    try:
+        design_cache.config_fingerprint(refresh=True)
+        assert design_cache.design_key({}) != key
+    finally:
+        monkeypatch.undo()
+        design_cache.config_fingerprint(refresh=True)
+    assert design_cache.design_key({}) == key
+
+
+def test_cached_design_crate_disabled(monkeypatch):
+    """AUTOCRATE_NO_CACHE bypasses the shared cache."""
+    monkeypatch.setenv(design_cache.CACHE_DISABLE_ENV, "1")
+    assert design_cache.get_default_cache() is None
+    assert design_cache.cached_design_crate({"product_weight": 900}).skid["skid_type_nominal"] == "4x4"
@@ -0,0 +1,59 @@
+# tests/test_exp_delta.py
+"""
+Unit tests for the exp_delta module.
+Uses pytest.
+"""
+import os
+# Use absolute import based on expected structure
+from wizard_app import exp_delta
+from wizard_app import pipeline
+
+def test_parse_exp_lines():
+    """Unit, string and unitless expressions parse; comments and blank lines are skipped."""
+    parsed = exp_delta.parse_exp_text(
+        '// header\n\n[Inch]CALC_Skid_Pitch = 18.2500 // pitch\nCALC_Skid_Count = 3\n'
+        '(String) CALC_Side_Panel_Case_ID = "Case // 3"\n[Inch]Half = Width/2\n')
+    assert parsed["CALC_Skid_Pitch"].unit == "Inch" and parsed["CALC_Skid_Pitch"].value == "18.2500"
+    assert parsed["CALC_Skid_Count"].unit == "" and parsed["CALC_Skid_Count"].value == "3"
+    assert parsed["CALC_Side_Panel_Case_ID"].value == '"Case // 3"'
+    assert parsed["Half"].value == "Width/2"
+    assert parsed["CALC_Skid_Pitch"].line == "[Inch]CALC_Skid_Pitch = 18.2500 // pitch"
+
+def test_diff_expressions():
+    """Numbers compare by value; changed, added and removed names are reported."""
+    previous = exp_delta.parse_exp_text("[Inch]A = 1.5\n[Inch]B = 2\nC = 1\n")
+    assert exp_delta.diff_expressions(previous, exp_delta.parse_exp_text("[Inch]A = 1.5000\n[Inch]B = 2.0\nC = 1\n")).status == "UNCHANGED"
+    delta = exp_delta.diff_expressions(previous, exp_delta.parse_exp_text("[Inch]A = 1.5\n[mm]B = 2\nD = 4\n"))
+    assert delta.status == "CHANGED"
+    assert [e.name for e in delta.changed] == ["B"]
+    assert [e.name for e in delta.added] == ["D"]
+    assert delta.removed == ["C"]
+    assert exp_delta.diff_expressions(None, previous).status == "NEW"
+
+def test_write_exp_delta(tmp_path):
+    """Only changed expressions reach the delta file; an unchanged design leaves the .exp untouched."""
+    path = str(tmp_path / "crate.exp")
+    first = exp_delta.write_exp_delta(pipeline.design_crate(product_weight=1800.0), path)
+    assert first.status == "NEW" and os.path.exists(path)
+
+    mtime = os.stat(path).st_mtime_ns
+    same = exp_delta.write_exp_delta(pipeline.design_crate(product_weight=1800.0), path)
+    assert same.skip_import
+    assert os.stat(path).st_mtime_ns == mtime
+    with open(same.delta_path) as f:
+        assert "Delta Status: UNCHANGED" in f.read()
+
+    heavier = exp_delta.write_exp_delta(pipeline.design_crate(product_weight=2600.0), path)
+    assert heavier.status == "CHANGED"
+    with open(heavier.delta_path) as f:
+        delta_expressions = exp_delta.parse_exp_lines(f)
+    assert set(delta_expressions) == {e.name for e in heavier.changed}
+    assert "REF_Product_Weight" in delta_expressions
+
+def test_cached_previous_content(tmp_path):
+    """The previous expressions can come from a cached design instead of the file on disk."""
+    cached = pipeline.design_crate(product_weight=900.0)
+    delta = exp_delta.write_exp_delta(pipeline.design_crate(product_weight=900.0), str(tmp_path / "c.exp"),
+                                      previous=exp_delta.parse_exp_text(cached.exp_content))
+    assert delta.status == "UNCHANGED"
+    assert os.path.exists(tmp_path / "c.exp") # Written anyway because the file did not exist
@@ -0,0 +1,80 @@
+# tests/test_exp_generator.py
+"""
+Unit tests for the exp_generator module.
+Uses pytest.
+"""
+import io
+# Use absolute import based on expected structure
+from wizard_app import exp_generator
+from wizard_app import pipeline
+
+STAGE_KEYS = ("skid", "floorboard", "wall", "cap", "decal")
+
+def _stage_results(design):
+    return [getattr(design, key) for key in STAGE_KEYS]
+
+def _expression_names(exp_content):
+    names = set()
+    for line in exp_content.splitlines():
+        if line.startswith("//") or "=" not in line:
+            continue
+        lhs = line.split("=", 1)[0].strip()
+        names.add(lhs.split("]", 1)[-1].split(")", 1)[-1].strip())
+    return names
+
+def test_every_exp_data_key_emitted():
+    """Every stage's exp_data key appears as an expression, with no placeholder lines."""
+    design = pipeline.design_crate(product_is_fragile=True)
+    names = _expression_names(design.exp_content)
+    for key in STAGE_KEYS:
+        assert set(getattr(design, key)["exp_data"]) <= names, key
+    assert "TODO" not in design.exp_content and "= ..." not in design.exp_content
+    assert {"crate_width_OD", "crate_length_OD", "skid_usable_width_ID", "CAP_Panel_Width"} <= names
+
+def test_units_and_formatting():
+    """Lengths are [Inch], weights [lbm], counts and flags unitless, strings quoted."""
+    assert exp_generator.format_expression("CALC_Skid_Pitch", 18.25) == "[Inch]CALC_Skid_Pitch = 18.2500"
+    section = exp_generator.ExpSection("x", "x", 0)
+    assert section.unit_for("REF_Product_Weight") == "lbm"
+    for name in ("CALC_Skid_Count", "FB_Std_Front_1_Suppress_Flag", "CALC_Cap_Use_Klimps",
+                 "CALC_Side_Panel_1_Removable", "CALC_Cap_Long_Cleat_Count_Y", "CALC_Cap_Panel_Area_SqFt"):
+        assert section.unit_for(name) is None, name
+    assert exp_generator.format_expression("CALC_Skid_Count", 3, None) == "CALC_Skid_Count = 3"
+    assert exp_generator.format_expression("Flag", True, None) == "Flag = 1"
+    assert exp_generator.format_expression("ID", 'Case "3"', None) == '(String) ID = "Case \\"3\\""'
+    assert exp_generator.format_expression("X", None).startswith("// X not available")
+
+def test_streaming_matches_string_wrapper():
+    """write_nx_exp_file streams exactly what generate_nx_exp_file_content returns."""
+    design = pipeline.design_crate()
+    args = [design.params] + _stage_results(design)
+    buffer = io.StringIO()
+    line_count = exp_generator.write_nx_exp_file(buffer, *args, app_version="9.9", timestamp="T")
+    streamed = buffer.getvalue()
+    assert line_count == len(streamed.split("\n"))
+    assert streamed == "\n".join(exp_generator.iter_exp_lines(*args, app_version="9.9", timestamp="T"))
+    wrapped = exp_generator.generate_nx_exp_file_content(*args, app_version="9.9")
+    strip = lambda text: [l for l in text.splitlines() if not l.startswith(exp_generator.TIMESTAMP_PREFIX)]
+    assert strip(wrapped) == strip(streamed)
+
+def test_registered_section_order_and_override():
+    """Sections are numbered in order; registering a key again replaces that section."""
+    sections = exp_generator.registered_sections()
+    assert [s.key for s in sections][:2] == ["user_controls", "crate_dimensions"]
+    original = next(s for s in sections if s.key == "decal")
+    try:
+        exp_generator.register_section(exp_generator.ExpSection(
+            key="decal", title="DECALS", order=original.order, expressions=lambda ctx: [("Decal_Count", 2)]))
+        content = exp_generator.generate_nx_exp_file_content({}, {}, {}, {}, {}, {})
+        assert f"// {len(sections)}. DECALS" in content and "\nDecal_Count = 2\n" in content
+    finally:
+        exp_generator.register_section(original)
+
+def test_write_exp_file_streams_without_content(tmp_path):
+    """write_exp_file streams designs computed with generate_exp=False."""
+    design = pipeline.design_crate(generate_exp=False)
+    path = pipeline.write_exp_file(design, str(tmp_path / "out" / "crate.exp"))
+    with open(path) as f:
+        content = f.read()
+    assert content.startswith(exp_generator.HEADER_TITLE)
+    assert "CALC_Skid_Count" in _expression_names(content)
@@ -125,3 +125,49 @@ def test_floorboard_error_no_boards_allowed():
 
 # Add tests for single skid base, different combinations of available lumber.
 
+
+def test_floorboard_refined_front_back_custom():
+    """Standard boards fill from front and back; the center gap gets one custom piece."""
+    # 50 / 7.25 -> 6 boards (3 front, 3 back), gap = 50 - 43.5 = 6.5
+    results = floorboard_logic.calculate_floorboard_layout_refined(50.0, 100.0, "2x8", True, 1.5)
+    assert results["std_boards_front_count"] == 3
+    assert results["std_boards_back_count"] == 3
+    assert results["custom_board_count"] == 1
+    assert math.isclose(results["exp_data"]["FB_Custom_Center_Actual_Width"], 6.5)
+    assert math.isclose(results["exp_data"]["FB_Std_Back_1_Y_Pos_Abs"], 50.0 - 7.25)
+    assert results["exp_data"]["FB_Std_Front_4_Suppress_Flag"] == 1
+    assert [b["y_pos"] for b in results["boards_placed_details"]] == sorted(b["y_pos"] for b in results["boards_placed_details"])
+
+def test_floorboard_refined_gap_just_under_board_width():
+    """A gap within tolerance of a full board does not place a standard board."""
+    span = 3 * 7.25 - config.FLOAT_TOLERANCE / 2
+    results = floorboard_logic.calculate_floorboard_layout_refined(span, 100.0, "2x8", False, 1.5)
+    assert results["std_boards_front_count"] + results["std_boards_back_count"] == 2
+    assert math.isclose(results["final_gap_y_remaining"], 7.25, abs_tol=config.FLOAT_TOLERANCE)
+
+def test_floorboard_refined_without_exp_data():
+    """build_exp_data=False skips the per-instance expressions but keeps the layout."""
+    results = floorboard_logic.calculate_floorboard_layout_refined(50.0, 100.0, "2x8", True, 1.5, build_exp_data=False)
+    assert results["std_boards_front_count"] == 3
+    assert not any(key.startswith("FB_") for key in results["exp_data"])
+
+def test_floorboard_batch_matches_refined():
+    """The vectorized layout matches the scalar function for mixed spans, boards and fill settings."""
+    np = pytest.importorskip("numpy")
+    rng = np.random.default_rng(3)
+    spans = np.concatenate([rng.uniform(-5, 200, 300), np.arange(0, 30) * 7.25])
+    boards = rng.choice(list(config.ALL_STANDARD_FLOORBOARDS) + ["2x4"], spans.size)
+    allow = rng.random(spans.size) < 0.5
+    batch = floorboard_logic.calculate_floorboard_layout_batch(spans, boards, allow, build_exp_data=True)
+    for i in range(spans.size):
+        scalar = floorboard_logic.calculate_floorboard_layout_refined(spans[i], 100.0, boards[i], allow[i], 1.5)
+        if scalar["status"] == "ERROR":
+            assert not batch["valid"][i]
+            continue
+        for key in ("std_boards_front_count", "std_boards_back_count", "custom_board_count"):
+            assert batch[key][i] == scalar[key]
+        for key in ("custom_board_actual_width", "final_gap_y_remaining"):
+            assert math.isclose(batch[key][i], scalar[key], abs_tol=1e-9)
+        for key, value in scalar["exp_data"].items():
+            if key.startswith("FB_"):
+                assert math.isclose(batch["exp_data"][key][i], value, abs_tol=1e-9)
@@ -0,0 +1,42 @@
+# tests/test_import_time.py
+"""
+Import-cost tests for the headless entry points, measured with `python -X importtime`.
+Uses pytest.
+"""
+import os
+import subprocess
+import sys
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+IMPORT_BUDGET_MS = 300 # Generous for slow CI machines; typical is well under 100 ms
+HEAVY_MODULES = ("PyQt6", "numpy", "pandas", "plotly", "fpdf", "multiprocessing")
+
+def _import_profile(statement: str) -> dict:
+    """Runs `statement` in a fresh interpreter; returns {top-level module: cumulative microseconds}."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement], cwd=REPO_ROOT,
+                            capture_output=True, text=True, check=True)
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            profile[name.strip()] = profile.get(name.strip(), 0) + int(cumulative)
+    return profile
+
+@pytest.mark.parametrize("module", [
+    "wizard_app.pipeline", "wizard_app.batch", "wizard_app.cli", "wizard_app.design_cache",
+    "wizard_app.layouts", "wizard_app.ui_modules", "wizard_app.pdf_generator",
+])
+def test_headless_imports_skip_heavy_dependencies(module):
+    """Logic, batch and CLI modules import without GUI, plotting or NumPy packages."""
+    profile = _import_profile(f"import {module}")
+    loaded = {name.split(".")[0] for name in profile}
+    assert not loaded & set(HEAVY_MODULES)
+
+def test_headless_import_budget():
+    """The batch worker import path stays inside the import-time budget."""
+    profile = _import_profile("import wizard_app.batch, wizard_app.cli")
+    total_ms = (profile["wizard_app.batch"] + profile["wizard_app.cli"]) / 1000.0
+    assert total_ms < IMPORT_BUDGET_MS
@@ -0,0 +1,142 @@
+# tests/test_inbox.py
+"""
+Unit tests for the inbox module.
+Uses pytest.
+"""
+import json
+import os
+import shutil
+import time
+
+import pytest
+# Use absolute import based on expected structure
+from wizard_app import inbox
+
+EXAMPLE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                            "examples", "example-0205-13057.json")
+
+
+@pytest.fixture
+def folders(tmp_path, monkeypatch):
+    monkeypatch.setenv("AUTOCRATE_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setenv("AUTOCRATE_NO_CATALOG", "1")
+    (tmp_path / "inbox").mkdir()
+    return tmp_path / "inbox", tmp_path / "outbox"
+
+
+def test_process_existing_files(folders):
+    """Flat, nested and broken files are processed into the outbox and moved to done/ or failed/."""
+    inbox_dir, outbox_dir = folders
+    (inbox_dir / "flat.json").write_text(json.dumps({"order_id": "SO-7", "product_weight": 1800}))
+    shutil.copy(EXAMPLE_PATH, inbox_dir / "nested.json")
+    (inbox_dir / "broken.json").write_text('{"product_weight": 18')
+    (inbox_dir / ".partial.json").write_text('{"product_weight": 1800}') # Temporary names are ignored
+
+    results = []
+    daemon = inbox.InboxDaemon(str(inbox_dir), str(outbox_dir), workers=0, settle=0.0, on_result=results.append)
+    daemon.scan()
+    assert daemon.drain(timeout=60)
+    daemon.stop()
+
+    assert daemon.stats == {"processed": 3, "ok": 2, "warnings": 0, "failed": 1}
+    assert os.path.exists(outbox_dir / "SO-7.exp") and os.path.exists(outbox_dir / "nested.exp")
+    assert sorted(os.listdir(inbox_dir / "done")) == ["flat.json", "nested.json"]
+    assert os.listdir(inbox_dir / "failed") == ["broken.json"]
+    assert (inbox_dir / ".partial.json").exists()
+    with open(outbox_dir / "broken.result.json") as f:
+        assert json.load(f)["status"] == "FAILED"
+    with open(outbox_dir / "flat.result.json") as f:
+        flat_result = json.load(f)
+    assert flat_result["orders"][0]["order_id"] == "SO-7"
+    assert {result["source"] for result in results} == {"flat.json", "nested.json", "broken.json"}
+
+
+def test_repeated_ids_in_a_file(folders):
+    """Orders of one file that share an order_id write separate .exp files."""
+    inbox_dir, outbox_dir = folders
+    order_path = inbox_dir / "pair.json"
+    order_path.write_text(json.dumps([{"order_id": "SO-8", "product_weight": 900},
+                                      {"order_id": "SO-8", "product_weight": 2600}]))
+    result = inbox.process_order_file(str(order_path), str(outbox_dir))
+    assert [order["order_id"] for order in result["orders"]] == ["SO-8", "SO-8_2"]
+    assert os.path.exists(outbox_dir / "SO-8.exp") and os.path.exists(outbox_dir / "SO-8_2.exp")
+
+
+def test_non_object_item_is_reported(folders):
+    """A list item that is not an order object fails in result.json; the file's other orders are designed."""
+    inbox_dir, outbox_dir = folders
+    order_path = inbox_dir / "mixed.json"
+    order_path.write_text(json.dumps([{"order_id": "SO-9", "product_weight": 900}, "SO-10"]))
+    result = inbox.process_order_file(str(order_path), str(outbox_dir))
+    assert result["status"] == "FAILED"
+    assert [order["status"] for order in result["orders"]] == ["OK", "FAILED"]
+    with open(outbox_dir / "mixed.result.json") as f:
+        assert "not an order object (str)" in json.load(f)["orders"][1]["message"]
+
+
+def test_waits_for_files_to_settle(folders):
+    """A file is only read once its size and mtime have not changed for the settle time."""
+    inbox_dir, outbox_dir = folders
+    order_path = inbox_dir / "slow.json"
+    order_path.write_text('{"product_weight": ')
+    daemon = inbox.InboxDaemon(str(inbox_dir), str(outbox_dir), workers=0, settle=30.0)
+    daemon.scan()
+    now = time.monotonic()
+    assert daemon.poll(now) == 0 # First sighting
+    assert daemon.poll(now + 10) == 0 # Unchanged, but not for long enough
+    order_path.write_text('{"product_weight": 2400}')
+    os.utime(order_path, ns=(time.time_ns(), time.time_ns() + 10**9))
+    assert daemon.poll(now + 31) == 0 # Changed since: the settle time starts over
+    assert daemon.poll(now + 62) == 1
+    daemon.stop()
+    assert daemon.stats["ok"] == 1
+    assert os.listdir(inbox_dir / "done") == ["slow.json"]
+
+
+def test_empty_file_fails(folders):
+    """A zero-byte file is claimed once it has settled and moved to failed/, so draining finishes."""
+    inbox_dir, outbox_dir = folders
+    (inbox_dir / "empty.json").write_bytes(b"")
+    daemon = inbox.InboxDaemon(str(inbox_dir), str(outbox_dir), workers=0, settle=5.0)
+    daemon.scan()
+    now = time.monotonic()
+    assert daemon.poll(now) == 0
+    assert daemon.poll(now + 6) == 1
+    assert daemon.drain(timeout=60)
+    daemon.stop()
+    assert daemon.pending == 0
+    assert daemon.stats["failed"] == 1
+    assert os.listdir(inbox_dir / "failed") == ["empty.json"]
+    with open(outbox_dir / "empty.result.json") as f:
+        assert json.load(f)["status"] == "FAILED"
+
+
+def test_bounded_in_flight(folders):
+    """Settled files beyond max_in_flight wait in the queue instead of being handed to the pool."""
+    inbox_dir, outbox_dir = folders
+    for i in range(6):
+        (inbox_dir / f"order_{i}.json").write_text(json.dumps({"product_weight": 500 + 100 * i}))
+    daemon = inbox.InboxDaemon(str(inbox_dir), str(outbox_dir), workers=0, max_in_flight=2, settle=0.0)
+    daemon.scan()
+    now = time.monotonic()
+    daemon.poll(now)
+    assert daemon.poll(now) <= 2
+    assert daemon.drain(timeout=60)
+    daemon.stop()
+    assert daemon.stats["ok"] == 6
+    assert len(os.listdir(inbox_dir / "done")) == 6
+
+
+def test_watch_new_files(folders):
+    """The running daemon picks up files dropped (or renamed) into the inbox on a worker process."""
+    inbox_dir, outbox_dir = folders
+    (inbox_dir / "before.json").write_text(json.dumps({"product_weight": 900}))
+    with inbox.InboxDaemon(str(inbox_dir), str(outbox_dir), workers=2, settle=0.1) as daemon:
+        (inbox_dir / ".upload.tmp").write_text(json.dumps({"order_id": "SO-9", "product_weight": 2400}))
+        os.replace(inbox_dir / ".upload.tmp", inbox_dir / "renamed.json")
+        deadline = time.monotonic() + 60
+        while daemon.stats["processed"] < 2 and time.monotonic() < deadline:
+            time.sleep(0.05)
+    assert daemon.stats["ok"] == 2
+    assert os.path.exists(outbox_dir / "SO-9.exp") and os.path.exists(outbox_dir / "before.exp")
+    assert sorted(os.listdir(inbox_dir / "done")) == ["before.json", "renamed.json"]
@@ -0,0 +1,86 @@
+# tests/test_instrumentation.py
+"""
+Unit tests for the instrumentation module.
+Uses pytest.
+"""
+import json
+import pytest
+# Use absolute import based on expected structure
+from wizard_app import instrumentation
+from wizard_app import pipeline
+
+@pytest.fixture
+def metrics():
+    """Enables instrumentation with a clean slate and restores the previous state afterwards."""
+    was_enabled = instrumentation.is_enabled()
+    instrumentation.reset()
+    instrumentation.enable()
+    yield instrumentation
+    instrumentation.enable(was_enabled)
+    instrumentation.reset()
+
+def test_disabled_records_nothing():
+    """With instrumentation off, timers and counters are no-ops."""
+    was_enabled = instrumentation.is_enabled()
+    instrumentation.reset()
+    instrumentation.disable()
+    try:
+        with instrumentation.timer("noop"):
+            pass
+        instrumentation.count("noop")
+        assert instrumentation.timer("a") is instrumentation.timer("b")
+        snap = instrumentation.snapshot()
+        assert snap["timers"] == {} and snap["counters"] == {}
+    finally:
+        instrumentation.enable(was_enabled)
+
+def test_histogram_buckets_and_counts(metrics):
+    """Observations land in the first bucket whose bound is >= the value."""
+    metrics.record("op", 0.003)
+    metrics.record("op", 0.003)
+    metrics.record("op", 20.0)
+    timer = metrics.snapshot()["timers"]["op"]
+    assert timer["count"] == 3
+    assert timer["buckets"]["0.005"] == 2
+    assert timer["buckets"]["+Inf"] == 1
+    assert timer["max_seconds"] == 20.0
+
+def test_pipeline_stages_recorded(metrics):
+    """design_crate times every stage and write_exp_file times the write."""
+    design = pipeline.design_crate()
+    assert list(metrics.last_run()) == [stage.name for stage in pipeline.STAGES]
+    pipeline.write_exp_file(design, "/dev/null")
+    assert "exp_write" in metrics.last_run()
+    summary = metrics.format_last_run()
+    assert summary.startswith("skid ") and "total" in summary
+
+def test_incremental_pipeline_times_only_reruns(metrics):
+    """IncrementalPipeline.update only times the stages it recomputes."""
+    designer = pipeline.IncrementalPipeline()
+    designer.update()
+    designer.update(product_weight=2500.0)
+    assert list(metrics.last_run()) == designer.last_rerun
+
+def test_exports(metrics, tmp_path):
+    """JSON and Prometheus exports contain the recorded metrics."""
+    with metrics.timer("stage \"x\""):
+        pass
+    metrics.count("runs", 2)
+    json_path = metrics.write_json(str(tmp_path / "metrics.json"))
+    with open(json_path) as f:
+        assert json.load(f)["counters"] == {"runs": 2}
+    prom = open(metrics.write_prometheus(str(tmp_path / "metrics.prom"))).read()
+    assert '# TYPE autocrate_duration_seconds histogram' in prom
+    assert 'autocrate_duration_seconds_bucket{name="stage \\"x\\"",le="+Inf"} 1' in prom
+    assert 'autocrate_duration_seconds_count{name="stage \\"x\\""} 1' in prom
+    assert 'autocrate_events_total{name="runs"} 2' in prom
+
+def test_phase_timer_breakdown(metrics):
+    """PhaseTimer keeps consecutive phase durations and feeds the prefixed histograms."""
+    phases = metrics.PhaseTimer("startup")
+    phases.mark("imports")
+    phases.mark("window")
+    assert list(phases.phases) == ["imports", "window"]
+    assert abs(phases.total() - sum(phases.phases.values())) < 1e-9
+    assert "startup.window" in metrics.snapshot()["timers"]
+    assert phases.format().startswith("imports ")
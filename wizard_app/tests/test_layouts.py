@@ -0,0 +1,66 @@
+# tests/test_layouts.py
+"""
+Unit tests for the layouts module.
+Uses pytest.
+"""
+import dataclasses
+import pickle
+import pytest
+# Use absolute import based on expected structure
+from wizard_app import layouts
+from wizard_app import pipeline
+
+
+@pytest.mark.parametrize("params", [
+    {},
+    {"product_weight": 9000, "product_width": 90, "product_length": 120, "top_panel_removable": True},
+    {"product_actual_height": 130}, # Oversize walls -> ERROR-shaped wall result
+    {"chosen_standard_floorboard_nominal": "2x3"}, # Invalid board -> ERROR-shaped floorboard result
+])
+def test_round_trip_is_lossless(params):
+    """to_dict() reproduces the logic module result exactly, including error shapes."""
+    design = pipeline.design_crate(params)
+    for stage, layout in layouts.layouts_from_design(design).items():
+        assert layout.to_dict() == getattr(design, stage)
+        assert layout.to_exp_data() == getattr(design, stage).get("exp_data", {})
+
+
+def test_typed_attribute_access():
+    """Layouts expose results as attributes, including nested panels and cleats."""
+    design = pipeline.design_crate()
+    skid = layouts.SkidLayout.from_dict(design.skid)
+    wall = layouts.WallLayout.from_dict(design.wall)
+    cap = layouts.CapLayout.from_dict(design.cap)
+    assert skid.skid_count == design.skid["skid_count"]
+    assert wall.side_panels.cleats.vertical_edge_length == design.wall["side_panels"]["cleats"]["vertical_edge_length"]
+    assert cap.longitudinal_cleats.positions_from_center == tuple(design.cap["longitudinal_cleats"]["positions_from_center"])
+    assert wall.status is None and "status" in wall.absent
+
+
+def test_layouts_are_frozen_slotted_and_picklable():
+    """Layouts have no __dict__, reject assignment and survive pickling."""
+    floor = layouts.FloorLayout.from_dict(pipeline.design_crate().floorboard)
+    assert not hasattr(floor, "__dict__")
+    with pytest.raises(Exception):
+        floor.custom_board_count = 2
+    assert pickle.loads(pickle.dumps(floor)) == floor
+
+
+def test_record_keys_are_shared():
+    """Results with the same shape share one interned key tuple."""
+    a = layouts.FloorLayout.from_dict(pipeline.design_crate({"product_width": 40}).floorboard)
+    b = layouts.FloorLayout.from_dict(pipeline.design_crate({"product_width": 60}).floorboard)
+    assert a.exp_data._keys is b.exp_data._keys
+    assert a.exp_data._index is b.exp_data._index
+    assert a.exp_data.get("no_such_key", 1) == 1 and "no_such_key" not in a.exp_data
+    with pytest.raises(KeyError):
+        a.exp_data["no_such_key"]
+
+
+def test_designs_hold_only_the_stage_dicts():
+    """Layouts are built by the consumer on demand; a design keeps no copy, so cached designs stay small."""
+    design = pipeline.design_crate({"product_width": 50})
+    wall = layouts.WallLayout.from_dict(design.wall)
+    assert wall.to_dict() == design.wall
+    assert set(design.__dict__) == {f.name for f in dataclasses.fields(design)}
+    assert pickle.loads(pickle.dumps(design)) == design
@@ -0,0 +1,92 @@
+# tests/test_neighbors.py
+"""
+Unit tests for the neighbors module.
+Uses pytest.
+"""
+import numpy as np
+import pytest
+# Use absolute import based on expected structure
+from wizard_app import catalog
+from wizard_app import neighbors
+from wizard_app import pipeline
+from wizard_app import rules
+
+
+def _random_envelopes(count, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.column_stack((np.arange(1, count + 1), rng.uniform(10, 120, count), rng.uniform(10, 160, count),
+                            rng.uniform(10, 100, count), rng.uniform(50, 20000, count)))
+
+
+def _brute_force(index, ids, features, target, k, weights):
+    q = np.asarray(target) / index.scale
+    distances = ((features / index.scale - q) ** 2) @ neighbors._feature_weights(weights)
+    return list(ids[np.argsort(distances, kind="stable")[:k]])
+
+
+@pytest.mark.parametrize("weights", [None, {"weight": 3.0, "skid_class": 0.0}, [0.5, 1, 2, 1, 1]])
+def test_query_matches_brute_force(weights):
+    """Weighted k-NN over the tree returns the same neighbours as an exhaustive scan."""
+    ids, features = neighbors.envelope_features(_random_envelopes(5000))
+    index = neighbors.NeighborIndex.build(ids, features, leaf_size=16)
+    rng = np.random.default_rng(1)
+    for target in features[rng.integers(0, len(features), 25)] + rng.normal(0, 2, (25, len(neighbors.FEATURES))):
+        found = [item_id for item_id, _ in index.query_features(target, k=7, weights=weights)]
+        assert found == _brute_force(index, ids, features, target, 7, weights)
+
+
+def test_skid_classes_follow_weight_rules():
+    """Weights map to the WEIGHT_RULES bracket they fall under, inclusive of the upper limit."""
+    assert list(neighbors.skid_classes([100, 500, 501, 4500, 19000, 25000])) == [0, 0, 1, 1, 4, 5]
+
+
+def test_inserts_and_rebuild():
+    """Pending inserts are found immediately and survive folding into the tree."""
+    ids, features = neighbors.envelope_features(_random_envelopes(500))
+    index = neighbors.NeighborIndex.build(ids, features, rebuild_threshold=2)
+    index.insert(9001, [40.0, 50.0, 60.0, 1800.0, float(neighbors.skid_classes(1800.0))])
+    assert index.query(40.0, 50.0, 60.0, 1800.0, k=1)[0][0] == 9001
+    assert index.max_id == 9001 and not index.needs_rebuild
+    index.insert(9002, [41.0, 50.0, 60.0, 1800.0, float(neighbors.skid_classes(1800.0))])
+    assert index.needs_rebuild
+    index.rebuild()
+    assert index.pending == 0 and len(index) == 502
+    assert [item_id for item_id, _ in index.query(40.2, 50.0, 60.0, 1800.0, k=2)] == [9001, 9002]
+
+
+def test_snapshot_round_trip(tmp_path):
+    """A saved snapshot loads memory-mapped and answers the same queries; changed rules invalidate it."""
+    ids, features = neighbors.envelope_features(_random_envelopes(2000))
+    index = neighbors.NeighborIndex.build(ids, features)
+    path = index.save(str(tmp_path / "catalog.knn"))
+    loaded = neighbors.NeighborIndex.load(path)
+    assert isinstance(loaded.points, np.memmap)
+    assert loaded.max_id == 2000
+    target = features[17]
+    assert loaded.query_features(target, k=5) == index.query_features(target, k=5)
+    index.save(path) # Replacing an existing snapshot
+    assert neighbors.NeighborIndex.load(path) is not None
+    rules.set_rules({"version": "test", "weight_rules": [[1000, "4x4", 30.0]]})
+    try:
+        assert neighbors.NeighborIndex.load(path) is None
+    finally:
+        rules.set_rules(None)
+
+
+def test_closest_crates_from_catalog(tmp_path):
+    """The shared index is built from the catalog, picks up new entries and drops replaced ones."""
+    designs = catalog.DesignCatalog(str(tmp_path / "catalog.sqlite3"))
+    for width in (30.0, 40.0, 50.0):
+        designs.record(pipeline.design_crate(product_width=width, generate_exp=False),
+                       str(tmp_path / f"crate_{width:g}.exp"), order_id=f"W{width:g}")
+    matches = neighbors.closest_crates(41.0, 46.0, 91.5, 600.0, k=2, designs=designs)
+    assert [m["order_id"] for m in matches] == ["W40", "W50"]
+    assert matches[0]["distance"] < matches[1]["distance"]
+
+    designs.record(pipeline.design_crate(product_width=41.0, generate_exp=False), str(tmp_path / "new.exp"),
+                   order_id="W41")
+    assert neighbors.closest_crates(41.0, 46.0, 91.5, 600.0, k=1, designs=designs)[0]["order_id"] == "W41"
+    designs.record(pipeline.design_crate(product_width=90.0, generate_exp=False), str(tmp_path / "new.exp"))
+    assert [m["order_id"] for m in neighbors.closest_crates(41.0, 46.0, 91.5, 600.0, k=2, designs=designs)] == \
+        ["W40", "W50"]
+    designs.close()
@@ -0,0 +1,69 @@
+# tests/test_nx_expressions.py
+"""
+Unit tests for the nx_expressions module.
+Uses pytest.
+"""
+import numpy as np
+import pytest
+# Use absolute import based on expected structure
+from wizard_app import nx_expressions
+import create_skid_exp_file
+
+def _evaluate(text, **env):
+    return nx_expressions.compile_expression(text).evaluate(env)
+
+def test_operators_and_precedence():
+    """Arithmetic, power, comparison and boolean operators follow the usual precedence."""
+    assert _evaluate("1 + 2 * 3 ^ 2") == 19
+    assert _evaluate("-(a - 4) / 2", a=10) == -3
+    assert _evaluate("a > 1 AND NOT a > 5 OR a == 0", a=3) is True
+    assert _evaluate("max(2, ceil(x / 4) + 1)", x=9.0) == 4
+    assert _evaluate("min(3, 1, 2)") == 1
+
+def test_units_and_if_then_else():
+    """Unit suffixes convert to inches/pounds; nested if/then/else picks the first true branch."""
+    text = "if(w <= 500[lbm]) then (2.5[Inch]) else if(w <= 4500[lbm]) then (25.4[mm]) else (0.5[Foot])"
+    assert _evaluate(text, w=400) == 2.5
+    assert _evaluate(text, w=1000) == pytest.approx(1.0)
+    assert _evaluate(text, w=5000) == 6.0
+    assert _evaluate("if (a > 0) (1) else (2)", a=1) == 1 # NX form without 'then'
+    with pytest.raises(ValueError):
+        nx_expressions.compile_expression("3[furlong]")
+    with pytest.raises(ValueError):
+        nx_expressions.compile_expression("nope(1)")
+
+def test_file_topological_order_and_units():
+    """Expressions may reference later ones; results come back in each declared unit."""
+    formula = nx_expressions.ExpressionFile.from_text(
+        "[mm]doubled_mm = twice\n[Inch]twice = 2 * base // comment\n[Inch]base = 1.5\n")
+    assert formula.order == ["base", "twice", "doubled_mm"]
+    result = formula.evaluate()
+    assert result["twice"] == 3.0 and result["doubled_mm"] == pytest.approx(76.2)
+    assert formula.evaluate({"base": 2.0})["twice"] == 4.0
+    with pytest.raises(ValueError):
+        nx_expressions.ExpressionFile.from_text("a = b + 1\nb = a\n")
+    with pytest.raises(ValueError):
+        nx_expressions.ExpressionFile.from_text("a = missing + 1\n").evaluate()
+
+def test_vectorized_matches_scalar():
+    """Array inputs give the same answers as evaluating each element on its own."""
+    formula = nx_expressions.ExpressionFile.from_text(create_skid_exp_file.generate_nx_exp_file_content_for_skids({}))
+    weights = np.array([300.0, 2500.0, 5000.0, 8000.0, 15000.0, 21000.0])
+    widths = np.array([4.0, 40.0, 90.0, 60.0, 130.0, 80.0])
+    vectorized = formula.evaluate({"product_weight": weights, "product_width": widths})
+    for i, (weight, width) in enumerate(zip(weights, widths)):
+        scalar = formula.evaluate({"product_weight": float(weight), "product_width": float(width)})
+        for name in ("CALC_Skid_Count", "CALC_Skid_Pitch", "POS_Skid_2_X", "CALC_Overall_Skid_Span"):
+            assert np.asarray(vectorized[name])[i] == pytest.approx(scalar[name]), (name, weight, width)
+
+def test_crosscheck_skids(monkeypatch):
+    """Within the shared weight rules the formula file agrees with skid_logic; above them it does not."""
+    formula = nx_expressions.ExpressionFile.from_text(create_skid_exp_file.generate_nx_exp_file_content_for_skids({}))
+    monkeypatch.setitem(nx_expressions.CROSSCHECK_INPUT_RANGES, "product_weight", (50.0, 4400.0))
+    report = nx_expressions.crosscheck_skids(formula, samples=20000, chunk_size=7000)
+    assert report["expressions"]["crate_width_OD"]["mismatches"] == 0
+    assert report["expressions"]["INPUT_Skid_Nominal_Width"]["mismatches"] == 0
+    monkeypatch.setitem(nx_expressions.CROSSCHECK_INPUT_RANGES, "product_weight", (20500.0, 25000.0))
+    report = nx_expressions.crosscheck_skids(formula, samples=1000)
+    overweight = report["expressions"]["CALC_Skid_Count"]
+    assert overweight["mismatches"] > 0 and overweight["example"]["nx"] == 0.0
@@ -0,0 +1,60 @@
+# tests/test_output_files.py
+"""
+Unit tests for the output_files module.
+Uses pytest.
+"""
+import hashlib
+import os
+# Use absolute import based on expected structure
+from wizard_app import output_files
+from wizard_app import pipeline
+
+def test_write_text_if_changed(tmp_path):
+    """Identical content is not rewritten; the sidecar holds the content hash in sha256sum format."""
+    path = str(tmp_path / "sub" / "crate.exp")
+    assert output_files.write_text_if_changed(path, "a = 1\n")
+    mtime = os.stat(path).st_mtime_ns
+    assert not output_files.write_text_if_changed(path, "a = 1\n")
+    assert os.stat(path).st_mtime_ns == mtime
+    with open(path, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    with open(output_files.hash_path_for(path)) as f:
+        assert f.read() == f"{digest}  crate.exp\n"
+    assert output_files.write_text_if_changed(path, "a = 2\n")
+    assert output_files.read_stored_hash(path) == output_files.file_hash(path) != digest
+    assert sorted(os.listdir(tmp_path / "sub")) == ["crate.exp", "crate.exp.sha256"] # No temporary files left
+
+def test_write_stream_if_changed(tmp_path):
+    """Streamed content is compared by hash before the temporary file replaces the target."""
+    path = str(tmp_path / "crate.exp")
+    write = lambda f: (f.write("a = 1\n"), f.write("b = 2\n"))
+    assert output_files.write_stream_if_changed(path, write)
+    assert not output_files.write_stream_if_changed(path, write)
+    assert output_files.write_stream_if_changed(path, write, force=True)
+    assert not output_files.write_text_if_changed(path, "a = 1\nb = 2\n")
+    assert sorted(os.listdir(tmp_path)) == ["crate.exp", "crate.exp.sha256"]
+
+def test_exp_output_is_deterministic(tmp_path):
+    """Recomputing the same design leaves its .exp file untouched."""
+    path = str(tmp_path / "crate.exp")
+    assert pipeline.write_exp_file_if_changed(pipeline.design_crate(product_weight=1500.0), path)
+    assert not pipeline.write_exp_file_if_changed(pipeline.design_crate(product_weight=1500.0), path)
+    streamed = pipeline.design_crate(product_weight=1500.0, generate_exp=False)
+    assert pipeline.write_exp_file_if_changed(streamed, str(tmp_path / "streamed.exp"))
+    assert not pipeline.write_exp_file_if_changed(streamed, str(tmp_path / "streamed.exp"))
+    with open(path) as f:
+        assert "Parameters from PyQt GUI at" not in f.read()
+
+
+def test_written_files_keep_default_permissions(tmp_path):
+    """New files get the umask default mode (not mkstemp's 0600); rewrites keep the existing mode."""
+    path = str(tmp_path / "crate.exp")
+    assert output_files.write_text_if_changed(path, "a = 1\n")
+    streamed = str(tmp_path / "streamed.exp")
+    assert output_files.write_stream_if_changed(streamed, lambda fh: fh.write("b = 2\n"))
+    expected = 0o666 & ~output_files._UMASK
+    for written in (path, output_files.hash_path_for(path), streamed):
+        assert os.stat(written).st_mode & 0o777 == expected
+    os.chmod(path, 0o640)
+    assert output_files.write_text_if_changed(path, "a = 2\n")
+    assert os.stat(path).st_mode & 0o777 == 0o640
@@ -0,0 +1,83 @@
+# tests/test_panel_logic.py
+"""
+Unit tests for the panel_logic module.
+Uses pytest.
+"""
+import json
+import pytest
+import math
+# Use absolute import based on expected structure
+from wizard_app import panel_logic
+
+@pytest.mark.parametrize("width, height, case_id", [
+    (45, 90, "Case 1"), (48, 96, "Case 1"), (49, 90, "Case 2"), (50, 90, "Case 3"),
+    (53, 90, "Case 4"), (54, 90, "Case 5"), (70, 90, "Case 6"), (96, 90, "Case 7"),
+    (45, 97, "Case 1-1"), (45, 98, "Case 1-2"), (45, 101, "Case 1-3"), (45, 102, "Case 1-4"),
+    (45, 116, "Case 1-5"), (60, 100, "UNDEFINED"), (97, 90, "OVERSIZE"), (45, 117, "OVERSIZE"),
+])
+def test_panel_case_breakpoints(width, height, case_id):
+    """Breakpoints are inclusive upper bounds, matching the documented case rules."""
+    assert panel_logic.determine_panel_case(width, height)["case_id"] == case_id
+
+def test_panel_case_legacy_dict():
+    """The legacy dict resolves width/height dependent dimensions."""
+    case = panel_logic.determine_panel_case(49.0, 90.0)
+    assert case["status"] == "OK"
+    assert case["main_panel_width"] == panel_logic.STD_PANEL_WIDTH
+    assert case["main_panel_height"] == 90.0
+    assert math.isclose(case["splice_width"], 1.0)
+    assert panel_logic.determine_panel_case(45.0, 97.0)["splice_panel_height"] == 1.0
+    assert "max 96.0" in panel_logic.determine_panel_case(100.0, 90.0)["message"]
+
+def test_lookup_returns_shared_record():
+    """Lookups in the same cell return the same immutable record."""
+    case = panel_logic.lookup_panel_case(40.0, 90.0)
+    assert case is panel_logic.lookup_panel_case(20.0, 10.0)
+    with pytest.raises(Exception):
+        case.case_id = "Case 2"
+
+def test_batch_lookup_matches_scalar():
+    """The vectorized lookup agrees with the scalar lookup."""
+    np = pytest.importorskip("numpy")
+    widths = np.array([45, 49.5, 49.6, 74, 96, 96.1, 48, 60, float("nan")])
+    heights = np.array([90, 90, 90, 90, 96, 90, 102.25, 100, 90])
+    result = panel_logic.determine_panel_case_batch(widths, heights)
+    for i in range(widths.size):
+        assert result["cases"][result["case_index"][i]] is panel_logic.lookup_panel_case(widths[i], heights[i])
+
+def test_coverage_reports_undefined_region():
+    """The coverage report lists the one region without a defined case."""
+    regions = panel_logic.panel_case_coverage()
+    assert len(regions) == 1
+    assert (regions[0]["width_min"], regions[0]["width_max"]) == (48.0, 96.0)
+    assert (regions[0]["height_min"], regions[0]["height_max"]) == (96.0, 116.0)
+
+def test_load_case_table_from_rules_file(tmp_path):
+    """A rules file can replace the built-in table."""
+    rules = {
+        "width_breakpoints": [48, 96],
+        "height_breakpoints": [96],
+        "grid": [["Narrow", "Wide"]],
+        "cases": {
+            "Narrow": {"front_face_strategy": "Single Panel", "main_panel_width": "width", "splice_required": False},
+            "Wide": {"front_face_strategy": "Spliced", "splice_required": True, "splice_width": "width - 48"},
+        },
+    }
+    path = tmp_path / "panel_cases.json"
+    path.write_text(json.dumps(rules))
+    try:
+        panel_logic.set_panel_case_table(str(path))
+        assert panel_logic.determine_panel_case(60, 50)["splice_width"] == 12.0
+        assert panel_logic.determine_panel_case(60, 100)["case_id"] == "OVERSIZE"
+    finally:
+        panel_logic.set_panel_case_table(None)
+    assert panel_logic.determine_panel_case(60, 50)["case_id"] == "Case 6"
+
+def test_invalid_case_table_rejected():
+    """Tables with unsorted breakpoints or unknown cases are rejected."""
+    with pytest.raises(ValueError):
+        panel_logic.PanelCaseTable.from_dict({"width_breakpoints": [50, 48], "height_breakpoints": [96],
+                                              "grid": [["A", "A"]], "cases": {"A": {}}})
+    with pytest.raises(ValueError):
+        panel_logic.PanelCaseTable.from_dict({"width_breakpoints": [48], "height_breakpoints": [96],
+                                              "grid": [["Missing"]], "cases": {}})
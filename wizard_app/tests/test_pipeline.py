@@ -0,0 +1,102 @@
+# tests/test_pipeline.py
+"""
+Unit tests for the headless pipeline module.
+Uses pytest.
+"""
+import math
+import subprocess
+import sys
+
+import pytest
+# Use absolute import based on expected structure
+from wizard_app import pipeline
+from wizard_app import skid_logic
+
+
+def test_design_crate_defaults():
+    """The default parameters produce a complete design with .exp content."""
+    design = pipeline.design_crate()
+    assert design.status == "OK"
+    assert design.skid["skid_count"] >= 1
+    assert design.floorboard["status"] == "OK"
+    assert "side_panels" in design.wall
+    assert "cap_panel" in design.cap
+    assert "INPUT_Skid_Nominal_Width" in design.exp_content
+
+
+def test_design_crate_matches_skid_logic():
+    """Stage results are the same as calling the logic modules directly."""
+    params = {"product_weight": 7000.0, "product_width": 70.0, "product_length": 100.0,
+              "clearance_side": 2.0, "panel_thickness": 0.75, "cleat_thickness": 0.75}
+    design = pipeline.design_crate(params, generate_exp=False)
+    direct = skid_logic.calculate_skid_layout(7000.0, 70.0, 100.0, 2.0, 0.75, 0.75, True)
+    assert design.skid == direct
+    assert design.exp_content == ""
+    assert math.isclose(design.crate_overall_width, direct["crate_overall_width_calculated"])
+
+
+def test_normalize_parameters_aliases_and_objects():
+    """Aliased keys map to canonical names and objects are accepted."""
+    class Order:
+        def __init__(self):
+            self.product_height = 50
+            self.wall_cleat_thickness = 1.0
+            self.description = "ignored"
+
+    params = pipeline.normalize_parameters(Order())
+    assert params["product_actual_height"] == 50.0
+    assert params["cleat_thickness"] == 1.0
+    assert "description" not in params
+    assert params["allow_3x4_skids"] is True
+
+
+def test_fragile_product_decals():
+    """Fragile products get a decal placement without raising."""
+    design = pipeline.design_crate(product_is_fragile=True, generate_exp=False)
+    assert design.decal["decals_to_apply"][0]["id"] == "fragile"
+
+
+def test_invalid_floorboard_choice_reported():
+    """Stage errors are collected on the design instead of raising."""
+    design = pipeline.design_crate(chosen_standard_floorboard_nominal="2x99", generate_exp=False)
+    assert design.status == "ERROR"
+    assert design.errors[0].startswith("floorboard:")
+
+
+def test_pipeline_does_not_import_qt():
+    """Importing the pipeline must not pull in PyQt."""
+    code = "import sys; from wizard_app import pipeline; print(any(m.startswith('PyQt') for m in sys.modules))"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "False"
+
+
+def _without_timestamp(exp_content):
+    return [line for line in exp_content.splitlines() if "Parameters from PyQt GUI at" not in line]
+
+
+def test_incremental_reruns_only_affected_stages():
+    """Changing the clearance above the product skips the skid, floorboard and cap stages."""
+    designer = pipeline.IncrementalPipeline()
+    designer.update({"product_weight": 1500})
+    assert designer.last_rerun == [stage.name for stage in pipeline.STAGES]
+
+    first_skid = designer.outputs["skid"]
+    design = designer.update({"product_weight": 1500, "clearance_above_product": 4.0})
+    assert designer.last_rerun == ["wall", "decal", "exp"]
+    assert design.skid is first_skid
+
+    designer.update({"product_weight": 1500, "clearance_above_product": 4.0})
+    assert designer.last_rerun == []
+
+
+def test_incremental_matches_full_pipeline():
+    """A series of incremental updates gives the same results as full runs."""
+    designer = pipeline.IncrementalPipeline()
+    edits = [{}, {"product_width": 50}, {"product_width": 50, "product_weight": 5000},
+             {"product_width": 50, "product_weight": 5000, "chosen_standard_floorboard_nominal": "2x10"},
+             {"product_width": 40, "product_is_fragile": True}]
+    for params in edits:
+        incremental = designer.update(params).to_dict()
+        full = pipeline.design_crate(params).to_dict()
+        assert _without_timestamp(incremental.pop("exp_content")) == _without_timestamp(full.pop("exp_content"))
+        assert incremental == full
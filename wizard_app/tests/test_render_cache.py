@@ -0,0 +1,45 @@
+# tests/test_render_cache.py
+"""
+Unit tests for the ui_modules.render_cache module.
+Uses pytest.
+"""
+import os
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+QtWidgets = pytest.importorskip("PyQt6.QtWidgets")
+# Use absolute import based on expected structure
+from wizard_app import pipeline
+from wizard_app.ui_modules import base_assembly_views
+from wizard_app.ui_modules import visualizations
+
+_app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([]) # Must outlive every widget
+
+@pytest.fixture(scope="module")
+def design():
+    return pipeline.design_crate()
+
+@pytest.mark.parametrize("widget_cls, setter, stage", [
+    (visualizations.SkidVisualizationWidget, "update_data", "skid"),
+    (visualizations.WallVisualizationWidget, "update_data", "wall"),
+    (base_assembly_views.SkidFrontView, "set_data", "skid"),
+])
+def test_repaint_reuses_cached_scene(design, widget_cls, setter, stage):
+    """Repaints without a data or size change replay the cached pixmap."""
+    widget = widget_cls()
+    widget.resize(400, 300)
+    getattr(widget, setter)(getattr(design, stage))
+    first = widget.grab().toImage()
+    assert widget.grab().toImage() == first
+    assert widget.render_count == 1
+
+def test_data_and_size_changes_rerender(design):
+    """New data or a new size draws the scene again."""
+    widget = base_assembly_views.FloorboardTopView()
+    widget.resize(400, 300)
+    widget.grab()
+    widget.set_data(design.floorboard, skid_data=design.skid)
+    widget.grab()
+    widget.resize(500, 300)
+    widget.grab()
+    assert widget.render_count == 3
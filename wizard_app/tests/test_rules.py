@@ -0,0 +1,135 @@
+# tests/test_rules.py
+"""
+Unit tests for the rules module.
+Uses pytest.
+"""
+import json
+import pickle
+import time
+
+import pytest
+# Use absolute import based on expected structure
+from wizard_app import config
+from wizard_app import design_cache
+from wizard_app import pipeline
+from wizard_app import rules
+from wizard_app import skid_logic
+
+
+@pytest.fixture(autouse=True)
+def restore_rules():
+    yield
+    rules.set_rules(None)
+
+
+def _rule_file(path, version, heavy_skid="4x6"):
+    data = rules.config_rule_data()
+    data["version"] = version
+    data["weight_rules"] = [[500, "3x4", 30.0], [4500, "4x4", 30.0], [20000, heavy_skid, 24.0]]
+    path.write_text(json.dumps(data))
+    return str(path)
+
+
+def _legacy_skid_rule(weight, allow_3x4):
+    """The linear scan skid_logic used before rules were compiled."""
+    ordered = sorted(config.WEIGHT_RULES, key=lambda rule: rule[0])
+    for limit, nominal, spacing in ordered:
+        if weight <= limit + config.FLOAT_TOLERANCE and (allow_3x4 or nominal != "3x4"):
+            return nominal, spacing
+    return ordered[0][1], ordered[0][2]
+
+
+def test_skid_rule_matches_linear_scan():
+    """Bisect lookup picks the same rule as the old scan, including limits, 3x4 skipping and overweight."""
+    compiled = rules.get_rules()
+    for weight in (0, 100, 500, 500.0000001, 501, 4500, 6000, 6000.5, 12000, 20000, 20001, 1e6):
+        for allow_3x4 in (True, False):
+            assert compiled.skid_rule(weight, allow_3x4) == _legacy_skid_rule(weight, allow_3x4)
+
+
+@pytest.mark.parametrize("change, message", [
+    ({"version": ""}, "version"),
+    ({"weight_rules": [[500, "2x2", 30.0]]}, "not in skid_dimensions"),
+    ({"weight_rules": [[500, "3x4", 30.0], [500, "4x4", 30.0]]}, "repeat"),
+    ({"weight_rules": [[500, "3x4", -1]]}, "positive"),
+    ({"standard_floorboards": {"2x8": "wide"}}, "positive"),
+    ({"panel_cases": {"width_breakpoints": [], "height_breakpoints": [1], "grid": [], "cases": {}}}, "breakpoints"),
+    ({"skid_rules": []}, "Unknown"),
+])
+def test_invalid_rules_are_rejected(change, message):
+    """Invalid rule data raises ValueError and leaves the active rules alone."""
+    active = rules.get_rules()
+    with pytest.raises(ValueError, match=message):
+        rules.set_rules({**rules.config_rule_data(), **change})
+    assert rules.get_rules() is active
+
+
+def test_swap_invalidates_cached_designs(tmp_path):
+    """Loading a rule file changes skid results, the design cache key and forces incremental reruns."""
+    params = {"product_weight": 5000.0}
+    designer = pipeline.IncrementalPipeline(generate_exp=False)
+    before = designer.update(params)
+    key = design_cache.design_key(params)
+
+    loaded = rules.set_rules(_rule_file(tmp_path / "rules.json", "2026.1", heavy_skid="4x4"))
+    assert loaded.version == "2026.1" and rules.get_rules() is loaded
+    assert design_cache.design_key(params) != key
+    after = designer.update(params)
+    assert designer.last_rerun[0] == "skid"
+    assert before.skid["skid_type_nominal"] == "4x6" and after.skid["skid_type_nominal"] == "4x4"
+    assert skid_logic.calculate_skid_layout_batch(5000.0, 40.0, 40.0, 1.0, 0.25, 0.75)["skid_type_nominals"] == ("3x4", "4x4")
+
+    rules.set_rules(None)
+    assert design_cache.design_key(params) == key
+
+
+def test_rule_set_pickles_and_round_trips(tmp_path):
+    """Rule sets travel to worker processes and back to a rule file unchanged."""
+    compiled = rules.get_rules()
+    assert pickle.loads(pickle.dumps(compiled)).fingerprint == compiled.fingerprint
+    path = rules.write_rules(str(tmp_path / "dump.json"))
+    assert rules.RuleSet.from_file(path).fingerprint == compiled.fingerprint
+    assert compiled.decal_rules["fragile"]["dimensions_small"]["width"] == 8.0
+    with pytest.raises(TypeError):
+        compiled.decal_rules["fragile"]["angle"] = 0
+
+
+def _wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return condition()
+
+
+def test_watcher_reloads_changed_file(tmp_path):
+    """Saving the rule file activates it; a broken save is reported and ignored."""
+    path = _rule_file(tmp_path / "rules.json", "v1")
+    rules.set_rules(path)
+    reloaded, errors = [], []
+    with rules.RuleWatcher(path, on_reload=reloaded.append, on_error=errors.append, debounce=0.05):
+        _rule_file(tmp_path / "rules.json", "v2", heavy_skid="4x4")
+        assert _wait_for(lambda: reloaded)
+        assert rules.get_rules().version == "v2"
+        (tmp_path / "rules.json").write_text("{not json")
+        assert _wait_for(lambda: errors)
+        assert rules.get_rules().version == "v2"
+
+
+def test_invalid_rule_file_at_startup_falls_back(tmp_path, monkeypatch, caplog):
+    """A broken or missing AUTOCRATE_RULES file activates the config.py rules with a warning."""
+    for path in (tmp_path / "broken.json", tmp_path / "missing" / "rules.json"):
+        if path.parent.exists():
+            path.write_text("{not json")
+        monkeypatch.setenv(rules.RULES_FILE_ENV, str(path))
+        monkeypatch.setattr(rules, "_active", None)
+        with caplog.at_level("WARNING", logger=rules.__name__):
+            assert rules.get_rules().version == rules.DEFAULT_VERSION
+            watcher = rules.watch_default_rules() # Still watches the broken file, so a fix is picked up
+        assert (watcher is not None) == path.parent.exists()
+        if watcher is not None:
+            watcher.stop()
+        assert str(path) in rules.load_error()
+        assert str(path) in caplog.text
+        caplog.clear()
+    rules.set_rules(None)
+    assert rules.load_error() is None
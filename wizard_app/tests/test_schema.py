@@ -0,0 +1,112 @@
+# tests/test_schema.py
+"""
+Unit tests for the schema module.
+Uses pytest.
+"""
+import json
+import os
+import time
+
+# Use absolute import based on expected structure
+from wizard_app import batch
+from wizard_app import rules
+from wizard_app import schema
+
+EXAMPLE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                            "examples", "example-0205-13057.json")
+
+
+def test_adapters_agree():
+    """The nested, parameters.json and canonical layouts of one order normalize to the same parameters."""
+    with open(EXAMPLE_PATH) as f:
+        nested = json.load(f)
+    canonical = schema.to_canonical({**nested, "order_id": "SO-1"})
+    assert canonical["order_id"] == "SO-1"
+    assert canonical["floor_lumbar_thickness"] == 1.5
+    assert "product" not in canonical
+    flat = {"product_weight": 600.0, "product_width": 38.0, "product_length": 46.0, "product_height": 91.5,
+            "wall_cleat_thickness": 0.75, "chosen_standard_floorboard_nominal": "2x8", "product_is_fragile": True,
+            "product_requires_special_handling": True}
+    assert schema.normalize_parameters(nested) == schema.normalize_parameters(flat)
+    assert schema.to_canonical({"product_weight": 900}) == {"product_weight": 900}
+
+
+def test_parameters_match_defaults():
+    """Every parameter has a default of its declared type; floats have a range containing it."""
+    assert list(schema.DEFAULT_PARAMETERS) == [spec.key for spec in schema.PARAMETERS]
+    for spec in schema.PARAMETERS:
+        if spec.type == "float":
+            assert spec.minimum <= spec.default <= spec.maximum
+        elif spec.type == "bool":
+            assert isinstance(spec.default, bool)
+        else:
+            assert spec.default in spec.minimum
+
+
+def test_validate_orders_reports_rows():
+    """Bad values are reported with their row number; empty cells and aliases are accepted."""
+    orders = [
+        {"product_weight": "1800", "product_width": "40"},
+        {"product_weight": "not-a-number"},
+        {"product_weight": 30000, "product_height": 0.5},
+        {"product_weight": "", "allow_3x4_skids": "maybe", "chosen_standard_floorboard_nominal": "2x9"},
+        ("SO-5", {"wall_cleat_thickness": 0.75, "allow_3x4_skids": "No"}),
+    ]
+    report = schema.validate_orders(orders)
+    assert report.valid.tolist() == [True, False, False, False, True]
+    assert report.invalid_rows == 3
+    assert [(row, key) for row, key, _, _ in report.errors] == [
+        (2, "product_weight"), (3, "product_weight"), (3, "product_actual_height"),
+        (4, "allow_3x4_skids"), (4, "chosen_standard_floorboard_nominal")]
+    assert "outside 1 to 20000" in report.messages_by_row()[3]
+
+
+def test_validator_follows_rules(tmp_path):
+    """Floorboard choices come from the active rule set."""
+    data = rules.config_rule_data()
+    data.update(version="wide-boards", standard_floorboards={**data["standard_floorboards"], "2x14": 13.25})
+    try:
+        rules.set_rules(data)
+        assert schema.validate_orders([{"chosen_standard_floorboard_nominal": "2x14"}]).ok
+    finally:
+        rules.set_rules()
+    assert not schema.validate_orders([{"chosen_standard_floorboard_nominal": "2x14"}]).ok
+
+
+def test_validate_csv_large(tmp_path):
+    """A 100k row CSV manifest validates well under a second with every bad row found."""
+    path = tmp_path / "orders.csv"
+    lines = ["order_id,product_weight,product_width,product_length,allow_3x4_skids"]
+    for i in range(100000):
+        weight = "heavy" if i % 25000 == 7 else str(200 + i % 15000)
+        lines.append(f"SO-{i},{weight},{20 + i % 90},{30 + i % 80},{'true' if i % 2 else ''}")
+    path.write_text("\n".join(lines) + "\n")
+
+    start = time.perf_counter()
+    report = schema.validate_csv(str(path))
+    assert time.perf_counter() - start < 1.0
+    assert report.rows == 100000
+    assert [row for row, _, _, _ in report.errors] == [8, 25008, 50008, 75008]
+
+
+def test_unhashable_cells_are_reported():
+    """List and dict cells are invalid values, not a reason to abort the validation."""
+    orders = [{"allow_3x4_skids": [1]}, {"chosen_standard_floorboard_nominal": {"size": "2x6"}},
+              {"product_weight": [900]}, {"product_weight": [1800]}, {"allow_3x4_skids": True}]
+    report = schema.validate_orders(orders)
+    assert report.valid.tolist() == [False, False, False, False, True]
+    assert [(row, key) for row, key, _, _ in report.errors] == [
+        (1, "allow_3x4_skids"), (2, "chosen_standard_floorboard_nominal"), (3, "product_weight"), (4, "product_weight")]
+
+
+def test_batch_skips_invalid_orders(tmp_path, monkeypatch):
+    """Invalid orders are reported in the batch summary by row; the rest are designed."""
+    monkeypatch.setenv("AUTOCRATE_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setenv("AUTOCRATE_NO_CATALOG", "1")
+    orders = [("A1", {"product_weight": 900}), ("A2", {"product_weight": -5}), ("A3", {"product_weight": 1900})]
+    summary = batch.run_batch(orders, str(tmp_path / "out"), workers=1)
+    assert [r["order_id"] for r in summary["orders"]] == ["A1", "A2", "A3"]
+    assert summary["invalid"] == 1 and summary["failed"] == 1
+    assert summary["orders"][1]["row"] == 2
+    assert summary["orders"][1]["message"].startswith("Invalid input: product_weight")
+    assert not os.path.exists(tmp_path / "out" / "A2.exp")
@@ -0,0 +1,117 @@
+# tests/test_service.py
+"""
+Unit tests for the service module.
+Uses pytest.
+"""
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+# Use absolute import based on expected structure
+from wizard_app import service
+
+
+def _request(url, payload=None):
+    data = json.dumps(payload).encode("utf-8") if payload is not None else None
+    request = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            return response.status, json.loads(response.read()), dict(response.headers)
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read()), dict(e.headers)
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("AUTOCRATE_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(service.design_cache, "_default_cache", None) # Fresh shared cache in tmp_path
+    yield tmp_path
+    if service.design_cache._default_cache is not None:
+        service.design_cache._default_cache.close()
+
+
+def test_design_and_cache_hit(cache_dir):
+    """A design comes back with its .exp content; the repeat is served from the cache."""
+    with service.BackgroundService(workers=1) as background:
+        status, first, _ = _request(background.url + "/design", {"product_weight": 1800})
+        assert status == 200 and first["status"] == "OK" and not first["cache_hit"]
+        assert "CALC_Skid_Count" in first["exp_content"]
+        status, second, _ = _request(background.url + "/design?exp=0", {"params": {"product_weight": 1800}})
+        assert second["cache_hit"] and "exp_content" not in second
+        assert second["skid"] == first["skid"]
+
+
+def test_batch_and_errors(cache_dir):
+    """Batches keep order and report bad orders in their slot; bad requests get 4xx codes."""
+    with service.BackgroundService(workers=0, queue_size=8, use_cache=False) as background:
+        orders = [{"product_weight": 700}, {"product_weight": "heavy"}, {"product_weight": 700}]
+        status, body, _ = _request(background.url + "/designs", {"orders": orders})
+        assert status == 200
+        assert [r["status"] for r in body["results"]] == ["OK", "FAILED", "OK"]
+        assert body["results"][0]["params"]["product_weight"] == 700.0
+        assert _request(background.url + "/designs", [{}] * 9)[0] == 413
+        assert _request(background.url + "/design", ["not", "an", "object"])[0] == 400
+        assert _request(background.url + "/design", {"product_weight": "heavy"})[0] == 422
+        assert _request(background.url + "/missing")[0] == 404
+        assert _request(background.url + "/design")[0] == 405
+        status, health, _ = _request(background.url + "/health")
+        assert status == 200 and health["queue_capacity"] == 8 and health["failed"] == 2
+
+
+def test_cache_lookup_does_not_block_the_loop(cache_dir, monkeypatch):
+    """A design cache lookup stuck on a locked SQLite file leaves other requests answered."""
+    release = threading.Event()
+    started = threading.Event()
+    cache = service.design_cache.get_default_cache()
+    cached_get = cache.get
+
+    def locked_get(key):
+        started.set()
+        release.wait(30)
+        return cached_get(key)
+
+    monkeypatch.setattr(cache, "get", locked_get)
+    with service.BackgroundService(workers=0) as background:
+        results = []
+        stuck = threading.Thread(target=lambda: results.append(_request(background.url + "/design", {"product_weight": 900})))
+        stuck.start()
+        assert started.wait(30)
+        start = time.perf_counter()
+        status, health, _ = _request(background.url + "/health")
+        assert status == 200 and time.perf_counter() - start < 5
+        release.set()
+        stuck.join(30)
+        assert results[0][0] == 200
+
+
+def test_queue_full_returns_503(monkeypatch):
+    """With the worker busy and the queue full, new requests are rejected with Retry-After."""
+    release = threading.Event()
+    started = threading.Event()
+
+    def slow_design(params):
+        started.set()
+        release.wait(30)
+        return service.pipeline.design_crate(params)
+
+    monkeypatch.setattr(service, "_compute_design", slow_design)
+    with service.BackgroundService(workers=0, queue_size=1, use_cache=False) as background:
+        results = []
+        running = threading.Thread(target=lambda: results.append(_request(background.url + "/design", {"product_weight": 1000})))
+        running.start()
+        assert started.wait(30) # The only dispatcher is now busy
+        waiting = threading.Thread(target=lambda: results.append(_request(background.url + "/design", {"product_weight": 2000})))
+        waiting.start()
+        for _ in range(200): # Until the second request occupies the queue slot
+            if _request(background.url + "/health")[1]["queue_depth"] == 1:
+                break
+            time.sleep(0.01)
+        status, body, headers = _request(background.url + "/design", {"product_weight": 3000})
+        assert status == 503 and headers["Retry-After"] == "1"
+        release.set()
+        running.join(30)
+        waiting.join(30)
+        assert sorted(r[0] for r in results) == [200, 200]
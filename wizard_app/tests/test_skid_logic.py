@@ -89,3 +89,31 @@ def test_skid_fits_two_tight():
 
 # Add more tests for different weight/width combinations, zero clearances etc.
 
+
+def test_skid_layout_batch_matches_scalar():
+    """The vectorized kernel reproduces calculate_skid_layout element by element."""
+    np = pytest.importorskip("numpy")
+    rng = np.random.default_rng(7)
+    weights = np.concatenate([rng.uniform(0, 25000, 400), [500, 500.0001, 4500, 20000, 20000.5]])
+    widths = np.concatenate([rng.uniform(0, 120, 400), [2, 5, 6, 38, 96]])
+    lengths = rng.uniform(10, 120, weights.size)
+    for allow_3x4 in (True, False):
+        batch = skid_logic.calculate_skid_layout_batch(weights, widths, lengths, DEFAULT_CLEARANCE,
+                                                       DEFAULT_PANEL_THK, DEFAULT_CLEAT_THK, allow_3x4)
+        for i in range(weights.size):
+            scalar = skid_logic.calculate_skid_layout(weights[i], widths[i], lengths[i], DEFAULT_CLEARANCE,
+                                                      DEFAULT_PANEL_THK, DEFAULT_CLEAT_THK, allow_3x4)
+            assert batch["skid_type_nominals"][batch["skid_type_code"][i]] == scalar["skid_type_nominal"]
+            assert batch["skid_count"][i] == scalar["skid_count"]
+            assert batch["actual_center_to_center_spacing"][i] == scalar["actual_center_to_center_spacing"]
+            assert batch["first_skid_position_offset_x"][i] == scalar["first_skid_position_offset_x"]
+            assert batch["crate_overall_width_calculated"][i] == scalar["crate_overall_width_calculated"]
+            assert batch["skid_actual_length"][i] == scalar["skid_actual_length"]
+
+def test_skid_layout_batch_broadcasts_scalars():
+    """Scalar inputs broadcast against array inputs."""
+    np = pytest.importorskip("numpy")
+    batch = skid_logic.calculate_skid_layout_batch(np.array([300.0, 1500.0, 8000.0]), 38.0, 46.0,
+                                                   DEFAULT_CLEARANCE, DEFAULT_PANEL_THK, DEFAULT_CLEAT_THK)
+    assert batch["skid_count"].shape == (3,)
+    assert [batch["skid_type_nominals"][c] for c in batch["skid_type_code"]] == ["3x4", "4x4", "4x6"]
@@ -0,0 +1,106 @@
+# tests/test_sweep.py
+"""
+Unit tests for the sweep module.
+Uses pytest.
+"""
+import json
+
+import pytest
+
+# Use absolute import based on expected structure
+from wizard_app import pipeline
+from wizard_app import sweep
+
+
+def test_grid_order_and_ranges():
+    """frange is inclusive without drift, and grid rows vary the last axis fastest from any start row."""
+    assert sweep.frange(20, 21, 0.1)[-1] == 21.0
+    assert len(sweep.frange(20, 21, 0.1)) == 11
+    assert sweep.parse_values("product_weight", "classes") == sweep.weight_class_values()
+    assert sweep.parse_values("chosen_standard_floorboard_nominal", "2x6, 2x8") == ["2x6", "2x8"]
+
+    grid = sweep.SweepGrid({"product_width": [20, 30, 40], "product_weight": [500, 1500]},
+                           base={"product_length": 72.0})
+    assert grid.shape == (3, 2)
+    assert grid.size == 6
+    rows = list(grid.rows(3, 6))
+    assert [(row["product_width"], row["product_weight"]) for row in rows] == [(30.0, 1500.0), (40.0, 500.0),
+                                                                              (40.0, 1500.0)]
+    assert all(row["product_length"] == 72.0 for row in rows)
+    inputs = grid.inputs(3, 6)
+    assert inputs["product_width"].tolist() == [30.0, 40.0, 40.0]
+    assert inputs["product_length"] == 72.0
+
+
+def test_invalid_sweeps_raise():
+    """Unknown or out-of-range parameters and unknown columns are reported before anything runs."""
+    with pytest.raises(ValueError):
+        sweep.SweepGrid({"product_colour": [1, 2]})
+    with pytest.raises(ValueError):
+        sweep.SweepGrid({"product_width": [20, -5]})
+    with pytest.raises(ValueError):
+        sweep.SweepGrid({"product_width": [20]}, base={"product_weight": 10 ** 9})
+    with pytest.raises(ValueError):
+        sweep.run_sweep(sweep.SweepGrid({"product_width": [20]}), "unused.arrow", columns=["skid_colour"])
+
+
+def test_kernel_columns_match_pipeline():
+    """The vectorized columns equal design_crate() for every row of a mixed grid."""
+    grid = sweep.SweepGrid({"product_width": [12, 38.5, 75, 126], "product_length": [24, 97.5],
+                            "product_weight": [250, 1800, 9000], "product_actual_height": [20, 120],
+                            "allow_3x4_skids": [True, False], "chosen_standard_floorboard_nominal": ["2x6", "2x12"]})
+    chunk = sweep.evaluate_chunk(grid, 0, grid.size, sweep.DEFAULT_COLUMNS)
+    for i, params in enumerate(grid.rows(0, grid.size)):
+        design = pipeline.design_crate(params, generate_exp=False)
+        assert chunk["skid_type"][i] == design.skid["skid_type_nominal"]
+        assert chunk["skid_count"][i] == design.skid["skid_count"]
+        assert chunk["crate_overall_width"][i] == pytest.approx(design.crate_overall_width)
+        assert chunk["crate_overall_length"][i] == pytest.approx(design.crate_overall_length)
+        assert chunk["crate_overall_height"][i] == pytest.approx(design.crate_overall_height)
+        assert chunk["floorboard_std_count"][i] == (design.floorboard["std_boards_front_count"]
+                                                    + design.floorboard["std_boards_back_count"])
+        wall_cases = design.wall["exp_data"]
+        if "CALC_Side_Panel_Case_ID" in wall_cases:
+            assert chunk["side_panel_case"][i] == wall_cases["CALC_Side_Panel_Case_ID"]
+            assert chunk["end_panel_case"][i] == wall_cases["CALC_End_Panel_Case_ID"]
+        else: # The wall stage fails when a panel is oversize
+            assert "OVERSIZE" in (chunk["side_panel_case"][i], chunk["end_panel_case"][i])
+
+
+def test_arrow_output_is_chunked_and_mappable(tmp_path):
+    """Each chunk is one record batch; open_sweep memory-maps the file and the grid is in the metadata."""
+    grid = sweep.SweepGrid({"product_width": sweep.frange(20, 60, 0.5), "product_weight": sweep.weight_class_values()})
+    path = str(tmp_path / "sweep.arrow")
+    progress = []
+    summary = sweep.run_sweep(grid, path, columns=["skid_count", "end_panel_case"], chunk_rows=100,
+                              progress=lambda done, total: progress.append(done))
+    assert summary["rows"] == grid.size
+    assert summary["chunks"] == -(-grid.size // 100)
+    assert progress[-1] == grid.size
+    assert not list(tmp_path.glob(".*.tmp"))
+
+    import pyarrow as pa
+    reader = pa.ipc.open_file(pa.memory_map(path, 'r'))
+    assert reader.num_record_batches == summary["chunks"]
+    table = sweep.open_sweep(path)
+    assert table.column_names == ["product_width", "product_weight", "skid_count", "end_panel_case"]
+    assert table.num_rows == grid.size
+    assert json.loads(table.schema.metadata[b"autocrate.grid"])["axes"]["product_width"][-1] == 60.0
+    assert table.column("product_width")[len(grid.axes[1])].as_py() == 20.5
+
+
+def test_parquet_pipeline_columns(tmp_path):
+    """status and exp:<name> columns come from the full pipeline on worker processes, in grid order."""
+    grid = sweep.SweepGrid({"product_width": [20, 40, 60, 80], "product_weight": [500, 4000]})
+    path = str(tmp_path / "sweep.parquet")
+    summary = sweep.run_sweep(grid, path, columns=["skid_count", "status", "exp:CALC_Side_Panel_Case_ID"],
+                              workers=2, chunk_rows=3)
+    assert summary["format"] == "parquet"
+
+    import pyarrow.parquet as pq
+    assert pq.ParquetFile(path).num_row_groups == 3
+    table = sweep.open_sweep(path)
+    for row, params in zip(table.to_pylist(), grid.rows(0, grid.size)):
+        design = pipeline.design_crate(params, generate_exp=False)
+        assert row["status"] == design.status
+        assert row["exp:CALC_Side_Panel_Case_ID"] == design.wall["exp_data"]["CALC_Side_Panel_Case_ID"]
@@ -1,12 +1,16 @@
 # wizard_app/ui_modules/__init__.py
-# This file marks the ui_modules directory as a Python package
-from .visualizations import (
-    SkidVisualizationWidget,
-    FloorboardVisualizationWidget,
-    WallVisualizationWidget,
-    CapVisualizationWidget,
-    CrateVisualizationManager
-)
+# This file marks the ui_modules directory as a Python package.
+# The widgets are imported on first attribute access (PEP 562), so importing
+# wizard_app.ui_modules, or the package alone, does not load PyQt6.
+import importlib
+
+_LAZY_ATTRIBUTES = {
+    'SkidVisualizationWidget': '.visualizations',
+    'FloorboardVisualizationWidget': '.visualizations',
+    'WallVisualizationWidget': '.visualizations',
+    'CapVisualizationWidget': '.visualizations',
+    'CrateVisualizationManager': '.visualizations',
+}
 
 __all__ = [
     'SkidVisualizationWidget',
@@ -15,3 +19,16 @@ __all__ = [
     'CapVisualizationWidget',
     'CrateVisualizationManager'
 ]
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value # Later lookups skip __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
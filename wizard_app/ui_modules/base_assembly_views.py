@@ -10,7 +10,12 @@ from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QSizePolicy
 from PyQt6.QtGui import QPainter, QPen, QBrush, QColor, QPainterPath, QFont
 from PyQt6.QtCore import Qt, QRectF, QPointF
 
-class BaseVisualizationWidget(QWidget):
+try:
+    from .render_cache import CachedRenderWidget
+except ImportError:
+    from render_cache import CachedRenderWidget # For direct testing
+
+class BaseVisualizationWidget(CachedRenderWidget):
     """Base class for all specialized visualization widgets."""
     
     def __init__(self, parent=None):
@@ -32,9 +37,9 @@ class BaseVisualizationWidget(QWidget):
             'nail_head': QColor('#888888')    # Grey for nail heads
         }
         
-    def paintEvent(self, event):
-        """Base paint event."""
-        painter = QPainter(self)
+    def render_scene(self, painter):
+        """Draws the background and title; subclasses draw on top."""
+        painter.save()
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
         
         # Fill background
@@ -47,6 +52,7 @@ class BaseVisualizationWidget(QWidget):
         font.setBold(True)
         painter.setFont(font)
         painter.drawText(10, 25, self.title)
+        painter.restore()
 
 
 class FloorboardTopView(BaseVisualizationWidget):
@@ -61,35 +67,18 @@ class FloorboardTopView(BaseVisualizationWidget):
         
     def set_data(self, floorboard_data, skid_data=None):
         """Update with floorboard and optional skid calculation data."""
-        import traceback
-        stack = traceback.extract_stack()
-        caller = stack[-2]  # The caller of this method
-        print(f"FloorboardTopView.set_data called from {caller.filename}:{caller.lineno}")
-        print(f"  with skid_data={skid_data is not None}")
-        
-        if skid_data is not None:
-            print(f"  skid_data type: {type(skid_data)}")
-            print(f"  skid_data has 'exp_data': {'exp_data' in skid_data if isinstance(skid_data, dict) else 'Not a dict'}")
-        else:
-            # Print more of the call stack when skid_data is None to help diagnose
-            print("CALL STACK FOR NONE skid_data:")
-            for frame in stack[-5:-1]:  # Print last 4 frames
-                print(f"  {frame.filename}:{frame.lineno} in {frame.name}")
-        
         self.floorboard_data = floorboard_data
         # Store skid_data only if it's not None - preserve previous data if it exists
         if skid_data is not None:
             self.skid_data = skid_data
-        print(f"After assignment, self.skid_data is {self.skid_data is not None}")
-        self.update()
+        self.invalidate()
         
-    def paintEvent(self, event):
+    def render_scene(self, painter):
         """Render the floorboards top-down view."""
-        super().paintEvent(event)
+        super().render_scene(painter)
         
         if not self.floorboard_data:
             # Draw instructions if no data
-            painter = QPainter(self)
             painter.setPen(QPen(self.colors['text'], 1))
             font = painter.font()
             font.setPointSize(10)
@@ -97,7 +86,6 @@ class FloorboardTopView(BaseVisualizationWidget):
             painter.drawText(20, 50, "Run calculations to view floorboards")
             return
             
-        painter = QPainter(self)
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
         
         # Get drawing area
@@ -335,15 +323,14 @@ class SkidFrontView(BaseVisualizationWidget):
     def set_data(self, skid_data):
         """Update with skid calculation data."""
         self.skid_data = skid_data
-        self.update()
+        self.invalidate()
         
-    def paintEvent(self, event):
+    def render_scene(self, painter):
         """Render the skids front view."""
-        super().paintEvent(event)
+        super().render_scene(painter)
         
         if not self.skid_data:
             # Draw instructions if no data
-            painter = QPainter(self)
             painter.setPen(QPen(self.colors['text'], 1))
             font = painter.font()
             font.setPointSize(10)
@@ -353,7 +340,6 @@ class SkidFrontView(BaseVisualizationWidget):
             
 
             
-        painter = QPainter(self)
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
         
         # Get drawing area
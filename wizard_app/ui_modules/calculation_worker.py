@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Background crate calculations for the PyQt GUI.
+CalculationRunner runs the design pipeline on a QThreadPool and reports results
+back to the GUI thread through Qt signals, so the window stays responsive.
+"""
+
+import os
+import traceback
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+try:
+    from .. import catalog
+    from .. import config
+    from .. import design_cache
+    from .. import exp_delta
+    from .. import pipeline
+except ImportError:
+    import catalog # For direct testing
+    import config
+    import design_cache
+    import exp_delta
+    import pipeline
+
+
+class CalculationSignals(QObject):
+    """Signals emitted by a CalculationWorker (delivered on the receiver's thread)."""
+    finished = pyqtSignal(int, object, str) # request id, CrateDesign, written .exp path ("" for previews)
+    failed = pyqtSignal(int, str, str) # request id, error message, traceback
+
+
+class CalculationWorker(QRunnable):
+    """Computes one design and, unless it is a preview, writes its .exp file and records it in the catalog."""
+
+    def __init__(self, request_id: int, params: dict, designer, exp_output_path: str = "", delta: bool = False):
+        super().__init__()
+        self.request_id = request_id
+        self.params = params
+        self.designer = designer
+        self.exp_output_path = exp_output_path
+        self.delta = delta
+        self.exp_delta = None # exp_delta.ExpDelta once a delta file is written
+        self.exp_changed = False # False when the .exp file already held this design
+        self.catalog_error = "" # Set when the written design could not be recorded in the catalog
+        self.signals = CalculationSignals()
+
+    def run(self):
+        try:
+            design = design_cache.cached_design_crate(self.params, app_version=config.VERSION,
+                                                      compute=self.designer.update)
+            written = self.exp_output_path
+            if written and self.delta:
+                self.exp_delta = exp_delta.write_exp_delta(design, written, app_version=config.VERSION)
+                self.exp_changed = self.exp_delta.exp_written
+            elif written:
+                self.exp_changed = pipeline.write_exp_file_if_changed(design, written, app_version=config.VERSION)
+        except Exception as e:
+            self.signals.failed.emit(self.request_id, str(e), traceback.format_exc())
+            return
+        if written:
+            try:
+                catalog.record_design(design, written, app_version=config.VERSION)
+            except Exception as e: # The .exp file is written; a locked or corrupt catalog only loses the record
+                self.catalog_error = f"{type(e).__name__}: {e}"
+        self.signals.finished.emit(self.request_id, design, written)
+
+
+class CalculationRunner(QObject):
+    """Queues calculations on a single background thread and drops superseded results.
+
+    One thread keeps requests in order and lets them share an IncrementalPipeline.
+    Only the newest request's design is emitted through `finished`; an older request
+    that wrote an .exp file still reports it through `exp_written` / `exp_unchanged` (or `failed`).
+    """
+    finished = pyqtSignal(object) # CrateDesign of the newest request
+    exp_written = pyqtSignal(str) # Path of a written .exp file
+    exp_unchanged = pyqtSignal(str) # Path of an .exp file that already held the design (not rewritten)
+    delta_written = pyqtSignal(object) # exp_delta.ExpDelta of a delta write (emitted after exp_written)
+    catalog_failed = pyqtSignal(str, str) # .exp path, error: written but not recorded in the design catalog
+    failed = pyqtSignal(str, str) # error message, traceback
+
+    def __init__(self, parent=None, designer=None):
+        super().__init__(parent)
+        self.designer = designer or pipeline.IncrementalPipeline(app_version=config.VERSION)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self._latest_request = 0
+        self._pending = {} # request id -> worker; keeps the signal objects alive until delivery
+
+    def submit(self, params: dict, exp_output_path: str = "", delta: bool = False) -> int:
+        """Starts a calculation; pass exp_output_path to also write the .exp file. Returns the request id.
+
+        With `delta`, the file is diffed against its previous contents and a .delta.exp is written too.
+        """
+        self._latest_request += 1
+        worker = CalculationWorker(self._latest_request, params, self.designer,
+                                   os.path.normpath(exp_output_path) if exp_output_path else "", delta)
+        worker.setAutoDelete(False)
+        worker.signals.finished.connect(self._on_finished)
+        worker.signals.failed.connect(self._on_failed)
+        self._pending[worker.request_id] = worker
+        self.pool.start(worker)
+        return worker.request_id
+
+    def is_busy(self) -> bool:
+        return bool(self._pending)
+
+    def wait(self, msecs: int = -1) -> bool:
+        """Blocks until queued calculations finish (for shutdown and tests)."""
+        return self.pool.waitForDone(msecs)
+
+    def _on_finished(self, request_id: int, design, written: str):
+        worker = self._pending.pop(request_id, None)
+        if request_id == self._latest_request:
+            self.finished.emit(design)
+        if written and (worker is None or worker.exp_changed):
+            self.exp_written.emit(written)
+        elif written:
+            self.exp_unchanged.emit(written)
+        if worker is not None and worker.exp_delta is not None:
+            self.delta_written.emit(worker.exp_delta)
+        if worker is not None and worker.catalog_error:
+            self.catalog_failed.emit(written, worker.catalog_error)
+
+    def _on_failed(self, request_id: int, message: str, details: str):
+        worker = self._pending.pop(request_id, None)
+        if request_id == self._latest_request or (worker is not None and worker.exp_output_path):
+            self.failed.emit(message, details)
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Cached rendering for the QPainter visualization widgets.
+A CachedRenderWidget draws its scene (render_scene) into a QPixmap once per data
+change and widget size; ordinary repaints (expose, overlapping windows, tab
+switches) just blit that pixmap.
+"""
+
+from PyQt6.QtWidgets import QWidget
+from PyQt6.QtGui import QPainter, QPixmap, QPalette
+from PyQt6.QtCore import QEvent
+
+
+class CachedRenderWidget(QWidget):
+    """QWidget whose paintEvent replays a cached rendering of render_scene().
+
+    Subclasses draw in render_scene(painter) and call invalidate() whenever the
+    data it draws changes.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._data_version = 0
+        self._render_cache = None
+        self._render_cache_key = None
+        self.render_count = 0 # Number of times the scene was actually drawn
+
+    def invalidate(self):
+        """Marks the cached rendering stale and schedules a repaint."""
+        self._data_version += 1
+        self.update()
+
+    def render_scene(self, painter):
+        """Draws the widget contents with `painter` (override in subclasses)."""
+
+    def _cache_key(self):
+        return (self._data_version, self.width(), self.height(), self.devicePixelRatioF())
+
+    def _rendered_pixmap(self):
+        key = self._cache_key()
+        if self._render_cache is None or self._render_cache_key != key:
+            ratio = key[3]
+            pixmap = QPixmap(max(1, round(self.width() * ratio)), max(1, round(self.height() * ratio)))
+            pixmap.setDevicePixelRatio(ratio)
+            pixmap.fill(self.palette().color(QPalette.ColorRole.Window))
+            painter = QPainter(pixmap)
+            painter.setFont(self.font()) # A widget painter would start from these
+            painter.setPen(self.palette().color(QPalette.ColorRole.WindowText))
+            try:
+                self.render_scene(painter)
+            finally:
+                painter.end()
+            self._render_cache, self._render_cache_key = pixmap, key
+            self.render_count += 1
+        return self._render_cache
+
+    def paintEvent(self, event):
+        painter = QPainter(self) # Clipped to the exposed region, so partial repaints stay cheap
+        painter.drawPixmap(0, 0, self._rendered_pixmap())
+        painter.end()
+
+    def changeEvent(self, event):
+        if event.type() in (QEvent.Type.FontChange, QEvent.Type.PaletteChange, QEvent.Type.StyleChange):
+            self._render_cache = None
+        super().changeEvent(event)
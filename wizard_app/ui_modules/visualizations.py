@@ -10,7 +10,20 @@ from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QLabel, QSizePolicy, QGridLay
 from PyQt6.QtGui import QPainter, QPen, QBrush, QColor, QPainterPath, QFont
 from PyQt6.QtCore import Qt, QRectF, QPointF
 
-class BaseVisualizationWidget(QWidget):
+try:
+    from .render_cache import CachedRenderWidget
+    from ..layouts import WallLayout
+except ImportError:
+    from render_cache import CachedRenderWidget # For direct testing
+    from layouts import WallLayout
+
+
+def _value(record, name: str, default):
+    """Attribute of a layout (None-safe), or `default` when the record or value is missing."""
+    value = getattr(record, name, None)
+    return default if value is None else value
+
+class BaseVisualizationWidget(CachedRenderWidget):
     """Base class for all visualization widgets."""
     
     def __init__(self, parent=None):
@@ -36,9 +49,9 @@ class BaseVisualizationWidget(QWidget):
             'fastener': QColor('#b0b0b0')    # gray for fasteners
         }
         
-    def paintEvent(self, event):
-        """Base paint event."""
-        painter = QPainter(self)
+    def render_scene(self, painter):
+        """Draws the background and title; subclasses draw on top."""
+        painter.save()
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
         
         # Fill background
@@ -51,6 +64,7 @@ class BaseVisualizationWidget(QWidget):
         font.setBold(True)
         painter.setFont(font)
         painter.drawText(10, 18, self.title)
+        painter.restore()
 
 
 class SkidVisualizationWidget(BaseVisualizationWidget):
@@ -64,15 +78,14 @@ class SkidVisualizationWidget(BaseVisualizationWidget):
     def update_data(self, skid_results):
         """Update with skid calculation results."""
         self.data = skid_results
-        self.update()
+        self.invalidate()
         
-    def paintEvent(self, event):
-        super().paintEvent(event)
+    def render_scene(self, painter):
+        super().render_scene(painter)
         
         if not self.data:
             return
             
-        painter = QPainter(self)
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
         
         width = self.width()
@@ -146,15 +159,14 @@ class FloorboardVisualizationWidget(BaseVisualizationWidget):
     def update_data(self, floorboard_results):
         """Update with floorboard calculation results."""
         self.data = floorboard_results
-        self.update()
+        self.invalidate()
         
-    def paintEvent(self, event):
-        super().paintEvent(event)
+    def render_scene(self, painter):
+        super().render_scene(painter)
         
         if not self.data:
             return
             
-        painter = QPainter(self)
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
         
         width = self.width()
@@ -251,17 +263,16 @@ class WallVisualizationWidget(BaseVisualizationWidget):
         self.data = None
         
     def update_data(self, wall_results):
-        """Update with wall calculation results."""
-        self.data = wall_results
-        self.update()
+        """Update with wall calculation results (a WallLayout, or a wall result dict)."""
+        self.data = WallLayout.from_dict(wall_results) if isinstance(wall_results, dict) else wall_results
+        self.invalidate()
         
-    def paintEvent(self, event):
-        super().paintEvent(event)
+    def render_scene(self, painter):
+        super().render_scene(painter)
         
         if not self.data:
             return
             
-        painter = QPainter(self)
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
         
         width = self.width()
@@ -269,13 +280,13 @@ class WallVisualizationWidget(BaseVisualizationWidget):
         margin = 40
         
         # Extract data
-        side_panel_data = self.data.get('side_panels', {})
-        end_panel_data = self.data.get('end_panels', {})
+        side_panel_data = self.data.side_panels
+        end_panel_data = self.data.end_panels
         
-        side_width = side_panel_data.get('panel_width_dim', 100)
-        side_height = side_panel_data.get('panel_height_dim', 50)
-        end_width = end_panel_data.get('panel_width_dim', 50)
-        end_height = end_panel_data.get('panel_height_dim', 50)
+        side_width = _value(side_panel_data, 'panel_width_dim', 100)
+        side_height = _value(side_panel_data, 'panel_height_dim', 50)
+        end_width = _value(end_panel_data, 'panel_width_dim', 50)
+        end_height = _value(end_panel_data, 'panel_height_dim', 50)
         
         # Calculate scale
         max_dim = max(side_width, side_height, end_width, end_height)
@@ -283,7 +294,7 @@ class WallVisualizationWidget(BaseVisualizationWidget):
                    (height - 2 * margin) / (max(side_height, end_height) + 20))
         
         # Get removable panel info
-        removable_info = self.data.get('removable_panels', {})
+        removable_info = self.data.removable_panels or {}
         removable_positions = removable_info.get('positions', [])
         
         # Draw side panel 1
@@ -303,7 +314,7 @@ class WallVisualizationWidget(BaseVisualizationWidget):
         
         # Draw cleats
         painter.setBrush(QBrush(cleat_color))
-        cleat_width = side_panel_data.get('cleats', {}).get('horizontal_edge_length', side_width - 2) * scale
+        cleat_width = _value(_value(side_panel_data, 'cleats', None), 'horizontal_edge_length', side_width - 2) * scale
         cleat_height = 5  # Simplified cleat height visual
         
         # Horizontal cleats (top & bottom)
@@ -337,7 +348,7 @@ class WallVisualizationWidget(BaseVisualizationWidget):
         
         # Draw cleats (vertical)
         cleat_width = 5  # Simplified cleat width visual
-        cleat_height = end_panel_data.get('cleats', {}).get('vertical_edge_length', end_height) * scale
+        cleat_height = _value(_value(end_panel_data, 'cleats', None), 'vertical_edge_length', end_height) * scale
         
         painter.setBrush(QBrush(cleat_color))
         painter.drawRect(int(x_pos), int(y_pos), int(cleat_width), int(cleat_height))
@@ -372,15 +383,14 @@ class CapVisualizationWidget(BaseVisualizationWidget):
     def update_data(self, cap_results):
         """Update with cap calculation results."""
         self.data = cap_results
-        self.update()
+        self.invalidate()
         
-    def paintEvent(self, event):
-        super().paintEvent(event)
+    def render_scene(self, painter):
+        super().render_scene(painter)
         
         if not self.data:
             return
             
-        painter = QPainter(self)
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
         
         width = self.width()
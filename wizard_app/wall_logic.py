@@ -10,6 +10,11 @@ except ImportError:
     import config # For direct testing
     import panel_logic # For direct testing
 
+# Section of the NX .exp file holding this module's exp_data (see exp_generator.ExpSection)
+EXP_SECTION = {
+    "key": "wall", "title": "WALL PANEL PARAMETERS (Side and End Panels)", "order": 50,
+}
+
 def calculate_wall_layout(crate_internal_width: float, crate_internal_length: float, crate_internal_height: float,
                             panel_thickness: float, cleat_thickness: float, cleat_width: float,
                             wall_construction_type: str = "style_b",